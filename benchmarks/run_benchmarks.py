@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+# run_benchmarks
+# Benchmarks gia ta hot paths (dedup, cleaners, find_best, geocoding loop, CE,
+# excel_to_markers, downloader, station index) me synthetika dedomena. Kathe (case, size)
+# trexei se diko tou process gia na metrame sosto peak RSS.
+#
+#   python benchmarks/run_benchmarks.py --sizes 1000 10000 100000
+#   python benchmarks/run_benchmarks.py --cases cleaners find_best --label after-fix
+#   python benchmarks/run_benchmarks.py --compare before-fix after-fix
+
+import argparse
+import contextlib
+import csv
+import io
+import math
+import multiprocessing as mp
+import queue as queue_module
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+sys.path.insert(0, str(REPO_ROOT / 'scripts'))
+sys.path.insert(0, str(BENCH_DIR))
+
+RESULTS_FILE = BENCH_DIR / 'results' / 'benchmark_results.csv'
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+RESULT_FIELDS = ['timestamp', 'git_rev', 'label', 'case', 'size', 'items', 'seconds',
+                 'items_per_s', 'rss_setup_mb', 'peak_rss_mb', 'status']
+POLL_INTERVAL = 1.0  # seconds - elegxos an to paidi zei akomi
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB, macOS: bytes
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def quiet():
+    # Ta hot paths typonoun poly - den theloume na metrame to terminal
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+# ============= CASES =============
+# Kathe case: setup(size) -> state, run(state) -> arithmos items.
+# To setup kanei kai ta imports, oste na min metrane sto xrono tou run.
+
+def setup_dedup(size):
+    import station_dedup  # noqa: F401
+    from synthetic_stations import synthetic_stations
+    return synthetic_stations(size)
+
+
+def run_dedup(df):
+    from station_dedup import remove_nearby_duplicates
+    with quiet():
+        remove_nearby_duplicates(df, distance_threshold=20)
+    return len(df)
+
+
+def setup_cleaners(size):
+    import address_cleaning  # noqa: F401
+    from synthetic_stations import synthetic_stations
+    return synthetic_stations(size)['gasStationAddress'].tolist()
+
+
+def run_cleaners(addresses):
+    from address_cleaning import ALL_CLEANING_METHODS
+    for clean_func in ALL_CLEANING_METHODS.values():
+        for address in addresses:
+            clean_func(address)
+    return len(addresses) * len(ALL_CLEANING_METHODS)
+
+
+def setup_find_best(size):
+    import geocoding_experiments  # noqa: F401
+    from address_cleaning import ALL_CLEANING_METHODS
+    from synthetic_stations import synthetic_results, synthetic_stations
+    return synthetic_results(synthetic_stations(size), ALL_CLEANING_METHODS)
+
+
+def run_find_best(results_df):
+    from geocoding_experiments import find_best_method_enhanced, find_method_columns
+    all_methods = find_method_columns(results_df)
+    results_df.apply(find_best_method_enhanced, axis=1, args=(all_methods,))
+    return len(results_df)
+
+
+def setup_geocode(size):
+    import geocoding_experiments  # noqa: F401
+    from synthetic_stations import synthetic_results, synthetic_stations
+    return synthetic_results(synthetic_stations(size), ['v1_original'])
+
+
+def run_geocode(df):
+    from address_cleaning import NEW_CLEANING_METHODS
+    from geocoding_experiments import geocode_methods
+    from synthetic_stations import FakeGeocoder
+    with quiet():
+        geocode_methods(df, FakeGeocoder(), NEW_CLEANING_METHODS, rate_limit=0, show_progress=False)
+    return len(df) * len(NEW_CLEANING_METHODS)
+
+
+def setup_ce(size):
+    import circular_error  # noqa: F401
+    from address_cleaning import ALL_CLEANING_METHODS
+    from synthetic_stations import synthetic_results, synthetic_stations
+    return synthetic_results(synthetic_stations(size), ALL_CLEANING_METHODS), list(ALL_CLEANING_METHODS)
+
+
+def run_ce(state):
+    from circular_error import ce_table
+    df, methods = state
+    ce_table(df, methods, thresholds=[25 * i for i in range(1, 21)], n_boot=1000)
+    return len(df) * len(methods)
+
+
+def setup_markers(size):
+    import excel_to_markers  # noqa: F401
+    from synthetic_stations import synthetic_stations
+    return synthetic_stations(size)
+
+
+def run_markers(df):
+    from excel_to_markers import build_markers, write_markers_js
+    rows, non_rooftop, missing = build_markers(df)
+    with tempfile.TemporaryDirectory() as tmp:
+        write_markers_js(Path(tmp) / 'markers.js', rows, non_rooftop, missing)
+    return len(df)
+
+
+def setup_download(size):
+    import google_maps_static_downloader  # noqa: F401
+    from synthetic_stations import start_fake_tile_server, synthetic_stations
+    server, base_url = start_fake_tile_server()
+    return synthetic_stations(size), base_url
+
+
+def run_download(state):
+    from google_maps_static_downloader import download_map_image, get_static_map_url, tile_filename
+    df, base_url = state
+    with tempfile.TemporaryDirectory() as tmp, quiet():
+        for station_id, lat, lon in zip(df['gasStationID'], df['gasStationLat'], df['gasStationLong']):
+            url = get_static_map_url(lat, lon, 19, 640, 640, 'FAKE_KEY', base_url=base_url)
+            download_map_image(url, Path(tmp) / tile_filename(station_id, 19, 640, 640))
+    return len(df)
+
+
+def setup_index(size):
+    from station_index import StationIndex
+    from synthetic_stations import synthetic_stations
+    return StationIndex.from_frame(synthetic_stations(size))
+
+
+def run_index(index):
+    # 10k k-NN + radius + bbox queries pano se index me `size` pratiria -> items/s = QPS
+    from station_index import benchmark
+    benchmark(index, queries=10000)
+    return 3 * 10000
+
+
+# name -> (setup, run, max default size)
+CASES = {
+    'dedup': (setup_dedup, run_dedup, 10000),          # cdist = O(N^2) mnimi
+    'cleaners': (setup_cleaners, run_cleaners, 100000),
+    'find_best': (setup_find_best, run_find_best, 100000),
+    'geocode': (setup_geocode, run_geocode, 100000),
+    'ce': (setup_ce, run_ce, 10000),                   # 30 methodoi x 20 thresholds x 1000 bootstrap
+    'markers': (setup_markers, run_markers, 1000000),
+    'download': (setup_download, run_download, 10000),
+    'index': (setup_index, run_index, 1000000),
+}
+
+
+def _child(case, size, queue):
+    setup, run, _ = CASES[case]
+    try:
+        state = setup(size)
+        rss_setup = peak_rss_mb()
+        start = time.perf_counter()
+        items = run(state)
+        seconds = time.perf_counter() - start
+        queue.put({'items': items, 'seconds': seconds, 'rss_setup_mb': rss_setup,
+                   'peak_rss_mb': peak_rss_mb(), 'status': 'ok'})
+    except Exception as e:
+        queue.put({'status': f'error: {type(e).__name__}: {e}'})
+
+
+def run_case(case, size, timeout=None):
+    ctx = mp.get_context('spawn')
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_child, args=(case, size, queue))
+    proc.start()
+    deadline = time.monotonic() + timeout if timeout else None
+    result = None
+    while result is None:
+        try:
+            result = queue.get(timeout=POLL_INTERVAL)
+        except queue_module.Empty:
+            if not proc.is_alive():
+                # To paidi pethane xoris apotelesma (OOM kill / segfault)
+                try:
+                    result = queue.get(timeout=POLL_INTERVAL)
+                except queue_module.Empty:
+                    result = {'status': f'crashed (exit {proc.exitcode})'}
+            elif deadline is not None and time.monotonic() > deadline:
+                proc.terminate()
+                result = {'status': 'timeout'}
+    proc.join()
+    return result
+
+
+def git_rev():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def append_results(records, results_file=RESULTS_FILE):
+    results_file = Path(results_file)
+    results_file.parent.mkdir(parents=True, exist_ok=True)
+    new_file = not results_file.exists()
+    with open(results_file, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        if new_file:
+            writer.writeheader()
+        writer.writerows(records)
+
+
+def scaling_exponent(records):
+    # Klisi log(seconds) / log(size): ~1 grammiko, ~2 tetragoniko
+    points = [(math.log(r['size']), math.log(r['seconds']))
+              for r in records if r['status'] == 'ok' and r['seconds'] > 0]
+    if len(points) < 2:
+        return None
+    mx = sum(x for x, _ in points) / len(points)
+    my = sum(y for _, y in points) / len(points)
+    var = sum((x - mx) ** 2 for x, _ in points)
+    return sum((x - mx) * (y - my) for x, y in points) / var if var else None
+
+
+def run_benchmarks(cases, sizes, label='', no_caps=False, timeout=None, results_file=RESULTS_FILE):
+    rev = git_rev()
+    all_records = []
+    for case in cases:
+        case_records = []
+        for size in sizes:
+            record = {'timestamp': datetime.now().isoformat(timespec='seconds'), 'git_rev': rev,
+                      'label': label, 'case': case, 'size': size, 'items': '', 'seconds': '',
+                      'items_per_s': '', 'rss_setup_mb': '', 'peak_rss_mb': ''}
+            if not no_caps and size > CASES[case][2]:
+                record['status'] = 'skipped'
+            else:
+                record.update(run_case(case, size, timeout))
+                if record['status'] == 'ok':
+                    record['items_per_s'] = record['items'] / record['seconds'] if record['seconds'] else ''
+            case_records.append(record)
+            print(format_record(record))
+        exponent = scaling_exponent(case_records)
+        if exponent is not None:
+            print(f"  {case}: scaling exponent {exponent:.2f}")
+        all_records.extend(case_records)
+        append_results(case_records, results_file)
+    print(f"\nApotelesmata: {results_file}")
+    return all_records
+
+
+def format_record(r):
+    if r['status'] != 'ok':
+        return f"{r['case']:>10} {r['size']:>9,}  {r['status']}"
+    return (f"{r['case']:>10} {r['size']:>9,}  {r['seconds']:9.3f}s  "
+            f"{r['items_per_s']:>12,.0f} items/s  peak {r['peak_rss_mb']:8.1f} MB")
+
+
+def compare_runs(base_label, new_label, results_file=RESULTS_FILE):
+    # Sygkrisi throughput metaxy dyo labels (i git revisions) gia kathe (case, size)
+    latest = {}
+    with open(results_file, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if row['status'] != 'ok':
+                continue
+            for tag in (base_label, new_label):
+                if tag in (row['label'], row['git_rev']):
+                    latest[(tag, row['case'], int(row['size']))] = row
+
+    print(f"{'case':>10} {'size':>9}  {base_label:>12} {new_label:>12}  speedup")
+    for (tag, case, size), base in sorted(latest.items()):
+        if tag != base_label or (new_label, case, size) not in latest:
+            continue
+        new = latest[(new_label, case, size)]
+        b, n = float(base['items_per_s']), float(new['items_per_s'])
+        mem = float(new['peak_rss_mb']) - float(base['peak_rss_mb'])
+        print(f"{case:>10} {size:>9,}  {b:12,.0f} {n:12,.0f}  {n / b:6.2f}x  ({mem:+.1f} MB)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks gia ta hot paths me synthetika dedomena")
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES)
+    parser.add_argument('--label', default='', help="onoma tou run (px. before-fix)")
+    parser.add_argument('--no-caps', action='store_true',
+                        help="trexe kai megethi pano apo to default orio kathe case")
+    parser.add_argument('--timeout', type=float, default=None, help="seconds ana (case, size)")
+    parser.add_argument('--results', default=str(RESULTS_FILE))
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'),
+                        help="sygkrisi dyo labels / git revisions apo to results file")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare_runs(*args.compare, results_file=args.results)
+        return
+    run_benchmarks(args.cases, sorted(args.sizes), args.label, args.no_caps, args.timeout, args.results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+# synthetic_stations
+# Synthetika dedomena gia ta benchmarks: pinakes pratirion me realistikes
+# ellinikes chiliometrikes diefthinseis, fake geocoder kai fake Static Maps server.
+
+import hashlib
+import io
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+# Nomos -> (kentro lat, kentro lon, poleis se geniki)
+COUNTIES = {
+    'ΑΙΤΩΛΟΑΚΑΡΝΑΝΙΑΣ': (38.62, 21.41, ['ΑΓΡΙΝΙΟΥ', 'ΙΩΑΝΝΙΝΩΝ', 'ΑΝΤΙΡΡΙΟΥ', 'ΜΕΣΟΛΟΓΓΙΟΥ', 'ΑΜΦΙΛΟΧΙΑΣ']),
+    'ΑΤΤΙΚΗΣ': (38.05, 23.75, ['ΑΘΗΝΩΝ', 'ΛΑΜΙΑΣ', 'ΚΟΡΙΝΘΟΥ', 'ΛΑΥΡΙΟΥ', 'ΜΑΡΑΘΩΝΟΣ']),
+    'ΘΕΣΣΑΛΟΝΙΚΗΣ': (40.64, 22.94, ['ΘΕΣΣΑΛΟΝΙΚΗΣ', 'ΠΟΛΥΓΥΡΟΥ', 'ΚΑΒΑΛΑΣ', 'ΣΕΡΡΩΝ', 'ΒΕΡΟΙΑΣ']),
+    'ΛΑΡΙΣΗΣ': (39.64, 22.42, ['ΛΑΡΙΣΑΣ', 'ΒΟΛΟΥ', 'ΤΡΙΚΑΛΩΝ', 'ΚΑΡΔΙΤΣΑΣ', 'ΦΑΡΣΑΛΩΝ']),
+    'ΑΧΑΪΑΣ': (38.25, 21.73, ['ΠΑΤΡΩΝ', 'ΠΥΡΓΟΥ', 'ΑΙΓΙΟΥ', 'ΚΑΛΑΒΡΥΤΩΝ']),
+    'ΗΡΑΚΛΕΙΟΥ': (35.34, 25.13, ['ΗΡΑΚΛΕΙΟΥ', 'ΜΟΙΡΩΝ', 'ΧΑΝΙΩΝ', 'ΑΓ. ΝΙΚΟΛΑΟΥ']),
+    'ΙΩΑΝΝΙΝΩΝ': (39.66, 20.85, ['ΙΩΑΝΝΙΝΩΝ', 'ΚΑΚΑΒΙΑΣ', 'ΑΡΤΑΣ', 'ΜΕΤΣΟΒΟΥ']),
+    'ΦΘΙΩΤΙΔΑΣ': (38.90, 22.43, ['ΛΑΜΙΑΣ', 'ΣΤΥΛΙΔΑΣ', 'ΔΟΜΟΚΟΥ', 'ΑΤΑΛΑΝΤΗΣ']),
+    'ΚΟΡΙΝΘΙΑΣ': (37.94, 22.93, ['ΚΟΡΙΝΘΟΥ', 'ΤΡΙΠΟΛΕΩΣ', 'ΑΡΓΟΥΣ', 'ΞΥΛΟΚΑΣΤΡΟΥ']),
+    'ΧΑΛΚΙΔΙΚΗΣ': (40.37, 23.44, ['ΠΟΛΥΓΥΡΟΥ', 'ΓΑΛΑΤΙΣΤΑΣ', 'ΝΕΩΝ ΜΟΥΔΑΝΙΩΝ', 'ΑΡΝΑΙΑΣ']),
+}
+
+VILLAGES = ['ΓΑΛΑΤΑΔΕΣ', 'ΜΑΧΑΙΡΑ', 'ΚΑΤΟΧΗ', 'ΣΤΑΜΝΑ', 'ΚΑΛΥΒΙΑ', 'ΡΙΖΑ', 'ΠΕΥΚΑ']
+
+# Ta formats pou vlepoume sto pragmatiko workbook
+ADDRESS_TEMPLATES = [
+    '{km}ο ΧΛΜ Ε.Ο. {a}-{b}',
+    'Π.Ε.Ο. {a} - {b}, {km}ο ΧΛΜ',
+    '{km},5 ΧΛΜ Ε.Ο. {a} {b}',
+    '{km}o χιλ. ΕΟ {a_title} {b_title}',
+    'Ε.Ο. {a} {b} {km} ΧΛΜ {village}',
+    '{a} - {b} ?',
+    'ΝΕΟ {a} {b} {km} Km',
+    '{km}ο χλμ {a_title} {b_title}',
+    'ΕΘΝΙΚΗΣ ΟΔΟΥ {a}-{b} {km}ο ΧΙΛ.',
+]
+
+ACCURACY_TYPES = np.array(['ROOFTOP', 'RANGE_INTERPOLATED', 'GEOMETRIC_CENTER', 'APPROXIMATE'])
+ACCURACY_PROBS = [0.15, 0.10, 0.35, 0.40]
+
+
+def synthetic_addresses(n, rng, counties):
+    names = list(COUNTIES)
+    addresses = []
+    for i in range(n):
+        cities = COUNTIES[names[counties[i]]][2]
+        a, b = rng.choice(len(cities), size=2, replace=False)
+        a, b = cities[a], cities[b]
+        template = ADDRESS_TEMPLATES[rng.integers(len(ADDRESS_TEMPLATES))]
+        addresses.append(template.format(
+            km=int(rng.integers(1, 120)), a=a, b=b,
+            a_title=a.title(), b_title=b.title(),
+            village=VILLAGES[rng.integers(len(VILLAGES))],
+        ))
+    return addresses
+
+
+def synthetic_stations(n, seed=42, duplicate_fraction=0.03):
+    """Pinakas pratirion me tis stiles tou 'ALL χιλιομετικές διευθύνσεις.xlsx'"""
+    rng = np.random.default_rng(seed)
+    names = list(COUNTIES)
+    counties = rng.integers(len(names), size=n)
+    centers = np.array([COUNTIES[names[c]][:2] for c in counties])
+    coords = centers + rng.normal(scale=0.25, size=(n, 2))
+
+    # Merika pratiria se apostasi < 10m apo ena allo (gia to dedup)
+    n_dup = int(n * duplicate_fraction)
+    if n_dup and n > 1:
+        src = rng.integers(n, size=n_dup)
+        dst = rng.integers(n, size=n_dup)
+        coords[dst] = coords[src] + rng.normal(scale=0.00003, size=(n_dup, 2))
+
+    municipalities = [f"ΔΗΜΟΣ {COUNTIES[names[c]][2][0]}" for c in counties]
+    location_types = rng.choice(ACCURACY_TYPES, size=n, p=ACCURACY_PROBS)
+
+    return pd.DataFrame({
+        'gasStationID': np.arange(1, n + 1),
+        'gasStationAddress': synthetic_addresses(n, rng, counties),
+        'gasStationLat': coords[:, 0],
+        'gasStationLong': coords[:, 1],
+        'locationType': location_types,
+        'ddName': [f"Δ.Δ.{VILLAGES[i % len(VILLAGES)].title()}" for i in range(n)],
+        'municipalityName': municipalities,
+        'countyName': [names[c] for c in counties],
+    })
+
+
+def synthetic_results(stations, methods, seed=42, failure_rate=0.05):
+    """Wide results frame opos to geocoding_19methods_full.xlsx"""
+    rng = np.random.default_rng(seed)
+    n = len(stations)
+    columns = {
+        'gasStationID': stations['gasStationID'].values,
+        'original_address': stations['gasStationAddress'].values,
+        'ground_truth_lat': stations['gasStationLat'].values,
+        'ground_truth_lng': stations['gasStationLong'].values,
+        'countyName': stations['countyName'].values,
+        'municipalityName': stations['municipalityName'].values,
+    }
+    for method in methods:
+        distance = rng.lognormal(mean=6.5, sigma=1.5, size=n)
+        failed = rng.random(n) < failure_rate
+        distance[failed] = np.nan
+        accuracy = rng.choice(ACCURACY_TYPES, size=n, p=ACCURACY_PROBS).astype(object)
+        accuracy[failed] = 'FAILED'
+        columns[f'{method}_address'] = stations['gasStationAddress'].values
+        columns[f'{method}_lat'] = np.where(failed, np.nan, columns['ground_truth_lat'] + rng.normal(scale=0.01, size=n))
+        columns[f'{method}_lng'] = np.where(failed, np.nan, columns['ground_truth_lng'] + rng.normal(scale=0.01, size=n))
+        columns[f'{method}_distance'] = distance
+        columns[f'{method}_accuracy'] = accuracy
+    return pd.DataFrame(columns)
+
+
+class FakeGeocoder:
+    """Antikatastati tou googlemaps.Client me deterministika apotelesmata"""
+
+    def __init__(self, latency=0.0, failure_rate=0.05, tail_latency=0.0, tail_rate=0.0, seed=0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        # Vary oura: me pithanotita tail_rate to request argei tail_latency (tyxaia, oxi ana query)
+        self.tail_latency = tail_latency
+        self.tail_rate = tail_rate
+        self.calls = 0
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+
+    def geocode(self, query, region=None, components=None):
+        if components:
+            # px. administrative_area = nomos: diaforetiko (deterministiko) apotelesma apo to idio query
+            query = query + ' ' + ' '.join(f'{k}:{v}' for k, v in sorted(components.items()))
+        with self._lock:
+            self.calls += 1
+            slow = self.tail_rate and self._rng.random() < self.tail_rate
+        if self.latency or slow:
+            time.sleep(self.latency + (self.tail_latency if slow else 0.0))
+        digest = hashlib.blake2b(query.encode('utf-8'), digest_size=16).digest()
+        u = np.frombuffer(digest, dtype=np.uint32) / 2**32
+        if u[0] < self.failure_rate:
+            return []
+        county = next((c for c in COUNTIES if c in query), 'ΑΤΤΙΚΗΣ')
+        lat, lng = COUNTIES[county][:2]
+        return [{
+            'formatted_address': query,
+            'geometry': {
+                'location': {'lat': lat + (u[1] - 0.5) * 0.5, 'lng': lng + (u[2] - 0.5) * 0.5},
+                'location_type': ACCURACY_TYPES[int(u[3] * len(ACCURACY_TYPES))],
+            },
+        }]
+
+
+def synthetic_png(width=640, height=640, seed=0):
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    # Thorivos se xamiloteri analysi -> megethos PNG konta sta pragmatika satellite tiles
+    small = rng.integers(0, 255, size=(height // 2, width // 2, 3), dtype=np.uint8)
+    img = Image.fromarray(small).resize((width, height))
+    buf = io.BytesIO()
+    img.save(buf, format='PNG')
+    return buf.getvalue()
+
+
+def start_fake_tile_server(payload=None, latency=0.0, error_rate=0.0):
+    """Topikos HTTP server pou apanta se kathe Static Maps URL me to idio PNG (me ETag / 304)"""
+    payload = payload if payload is not None else synthetic_png()
+    etag = '"' + hashlib.blake2b(payload, digest_size=8).hexdigest() + '"'
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if latency:
+                time.sleep(latency)
+            digest = hashlib.blake2b(self.path.encode('utf-8'), digest_size=4).digest()
+            if int.from_bytes(digest, 'big') / 2**32 < error_rate:
+                self.send_response(503)
+                self.end_headers()
+                return
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Type', 'image/png')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    return server, f"http://{host}:{port}/maps/api/staticmap"
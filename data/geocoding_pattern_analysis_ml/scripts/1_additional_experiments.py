@@ -4,392 +4,249 @@ Additional Geocoding Experiments - Καθηγητής Requests
 Προσθέτει νέες μεθόδους στο existing geocoding_19methods_full.xlsx
 """
 
+import argparse
 import os
-import pandas as pd
-import numpy as np
-import re
-from tqdm import tqdm
-import time
-import googlemaps
-from math import radians, cos, sin, asin, sqrt
-from dotenv import load_dotenv
-
-# ============= CONFIGURATION =============
-load_dotenv()
-GOOGLE_API_KEY = os.getenv('GOOGLE_MAPS_API_KEY')
-gmaps = googlemaps.Client(key=GOOGLE_API_KEY)
-
-BASE_DIR = "/Users/geo/Desktop/fuelstation-detection-thesis/data/geocoding_pattern_analysis_ml"
-EXISTING_RESULTS = os.path.join(BASE_DIR, "geocoding_19methods_full.xlsx")
-OUTPUT_ENHANCED = os.path.join(BASE_DIR, "geocoding_enhanced_results.xlsx")
-
-print("="*60)
-print("ADDITIONAL GEOCODING EXPERIMENTS")
-print("Requested by Professor")
-print("="*60)
-
-# ============= HELPER FUNCTIONS =============
-def haversine_distance(lat1, lon1, lat2, lon2):
-    """Υπολογισμός απόστασης σε μέτρα"""
-    if pd.isna(lat1) or pd.isna(lon1) or pd.isna(lat2) or pd.isna(lon2):
-        return None
-    
-    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
-    dlon = lon2 - lon1
-    dlat = lat2 - lat1
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * asin(sqrt(a))
-    return c * 6371000
-
-# ============= NEW CLEANING METHODS (v20-v30) =============
-
-def clean_v20_km_city1_city2(address):
-    """v20: Format: [Αριθμός] Km [Πόλη1] [Πόλη2]"""
-    km_match = re.search(r'(\d+)[οηόήOH]?\s*(?:ΧΛΜ|χλμ|Km|km|ΚΜ)', address, re.IGNORECASE)
-    cities = re.findall(r'[Α-ΩA-Z][α-ωa-z]+', address)
-    keywords = {'ΧΛΜ', 'Km', 'ΠΕΟ', 'ΕΟ', 'ΝΕΟ', 'ΟΔΟΣ', 'ΕΘΝΙΚΗΣ'}
-    cities = [c for c in cities if c.upper() not in keywords]
-    
-    if km_match and len(cities) >= 2:
-        km_num = km_match.group(1)
-        return f"{km_num} Km {cities[0]} {cities[1]}"
-    return address
-
-def clean_v21_km_city1_city2_genitive(address):
-    """v21: Format: [Αριθμός] Km [Πόλη1]ών [Πόλη2]ς"""
-    km_match = re.search(r'(\d+)[οηόήOH]?\s*(?:ΧΛΜ|χλμ|Km|km|ΚΜ)', address, re.IGNORECASE)
-    cities = re.findall(r'[Α-ΩA-Z][α-ωa-z]+', address)
-    keywords = {'ΧΛΜ', 'Km', 'ΠΕΟ', 'ΕΟ', 'ΝΕΟ', 'ΟΔΟΣ', 'ΕΘΝΙΚΗΣ'}
-    cities = [c for c in cities if c.upper() not in keywords]
-    
-    if km_match and len(cities) >= 2:
-        km_num = km_match.group(1)
-        # Προσθήκη γενικής πτώσης (simplified)
-        city1_gen = cities[0] + "ών" if not cities[0].endswith('α') else cities[0][:-1] + "ών"
-        city2_gen = cities[1] + "ς" if cities[1].endswith('α') else cities[1] + "ας"
-        return f"{km_num} Km {city1_gen} {city2_gen}"
-    return address
-
-def clean_v22_km_eo_city1_city2(address):
-    """v22: Format: [Αριθμός] Km Εθνικής Οδού [Πόλη1]ών [Πόλη2]ς"""
-    km_match = re.search(r'(\d+)[οηόήOH]?\s*(?:ΧΛΜ|χλμ|Km|km|ΚΜ)', address, re.IGNORECASE)
-    cities = re.findall(r'[Α-ΩA-Z][α-ωa-z]+', address)
-    keywords = {'ΧΛΜ', 'Km', 'ΠΕΟ', 'ΕΟ', 'ΝΕΟ', 'ΟΔΟΣ', 'ΕΘΝΙΚΗΣ'}
-    cities = [c for c in cities if c.upper() not in keywords]
-    
-    if km_match and len(cities) >= 2:
-        km_num = km_match.group(1)
-        city1_gen = cities[0] + "ών" if not cities[0].endswith('α') else cities[0][:-1] + "ών"
-        city2_gen = cities[1] + "ς" if cities[1].endswith('α') else cities[1] + "ας"
-        return f"{km_num} Km Εθνικής Οδού {city1_gen} {city2_gen}"
-    return address
-
-def clean_v23_city1_pros_city2(address):
-    """v23: Format: [Πόλη1] προς [Πόλη2]"""
-    cities = re.findall(r'[Α-ΩA-Z][α-ωa-z]+', address)
-    keywords = {'ΧΛΜ', 'Km', 'ΠΕΟ', 'ΕΟ', 'ΝΕΟ', 'ΟΔΟΣ', 'ΕΘΝΙΚΗΣ'}
-    cities = [c for c in cities if c.upper() not in keywords]
-    
-    if len(cities) >= 2:
-        km_match = re.search(r'(\d+)[οηόήOH]?\s*(?:ΧΛΜ|χλμ|Km|km|ΚΜ)', address, re.IGNORECASE)
-        if km_match:
-            km_num = km_match.group(1)
-            return f"{cities[0]} προς {cities[1]}, {km_num}ο χλμ"
-        return f"{cities[0]} προς {cities[1]}"
-    return address
-
-def clean_v24_remove_all_prefixes(address):
-    """v24: Αφαίρεση ΟΛΩΝ των prefixes (ΠΕΟ, ΕΟ, ΝΕΟ, ΟΔΟΣ, ΕΘΝΙΚΗΣ)"""
-    # Πιο aggressive αφαίρεση
-    patterns = [
-        r'Π\.?\s?Ε\.?\s?Ο\.?',
-        r'Ε\.?\s?Ο\.?',
-        r'Ν\.?\s?Ε\.?\s?Ο\.?',
-        r'ΠΕΟ|ΕΟ|ΝΕΟ',
-        r'ΕΘΝΙΚΗΣ?\s+ΟΔΟΥ?',
-        r'ΕΠΑΡΧΙΑΚΗ?\s+ΟΔΟΥ?',
-        r'ΠΑΛΙΑ\s+ΕΘΝΙΚΗ?\s+ΟΔΟΥ?',
-    ]
-    
-    for pattern in patterns:
-        address = re.sub(pattern, '', address, flags=re.IGNORECASE)
-    
-    # Κανονικοποίηση χλμ
-    address = re.sub(r'ΧΛΜ|χλμ|χιλ\.?|ΚΜ', 'χλμ', address, flags=re.IGNORECASE)
-    address = re.sub(r'(\d+)[οηόήΟΗ]?\s+(χλμ)', r'\1ο χλμ', address)
-    
-    return ' '.join(address.split())
-
-def clean_v25_big_cities_pattern(address):
-    """v25: Pattern για μεγάλες πόλεις (Αθήνα, Θεσσαλονίκη, Πάτρα)"""
-    big_cities = ['Αθήνα', 'Αθηνών', 'Θεσσαλονίκη', 'Θεσσαλονίκης', 'Πάτρα', 'Πατρών', 
-                  'Λάρισα', 'Λαρίσης', 'Ηράκλειο', 'Ηρακλείου', 'Βόλος', 'Βόλου',
-                  'Ιωάννινα', 'Ιωαννίνων', 'Χανιά', 'Χανίων', 'Λαμία', 'Λαμίας']
-    
-    km_match = re.search(r'(\d+)[οηόήOH]?\s*(?:ΧΛΜ|χλμ|Km|km|ΚΜ)', address, re.IGNORECASE)
-    
-    # Βρες αν υπάρχει μεγάλη πόλη
-    found_big_city = None
-    for city in big_cities:
-        if city in address:
-            found_big_city = city
-            break
-    
-    if found_big_city and km_match:
-        km_num = km_match.group(1)
-        # Βρες τη δεύτερη πόλη
-        cities = re.findall(r'[Α-ΩA-Z][α-ωa-z]+', address)
-        other_city = None
-        for c in cities:
-            if c != found_big_city and c not in ['ΧΛΜ', 'Km', 'ΠΕΟ', 'ΕΟ', 'ΝΕΟ']:
-                other_city = c
-                break
-        
-        if other_city:
-            return f"Εθνική Οδός {found_big_city} {other_city}, {km_num}ο χιλιόμετρο"
-    
-    return clean_v24_remove_all_prefixes(address)
-
-def clean_v26_small_cities_pattern(address):
-    """v26: Pattern για μικρές πόλεις"""
-    km_match = re.search(r'(\d+)[οηόήOH]?\s*(?:ΧΛΜ|χλμ|Km|km|ΚΜ)', address, re.IGNORECASE)
-    cities = re.findall(r'[Α-ΩA-Z][α-ωa-z]+', address)
-    keywords = {'ΧΛΜ', 'Km', 'ΠΕΟ', 'ΕΟ', 'ΝΕΟ', 'ΟΔΟΣ', 'ΕΘΝΙΚΗΣ'}
-    cities = [c for c in cities if c.upper() not in keywords]
-    
-    # Για μικρές πόλεις, χρησιμοποίησε πιο περιγραφικό format
-    if km_match and len(cities) >= 2:
-        km_num = km_match.group(1)
-        return f"Επαρχιακή Οδός {cities[0]} - {cities[1]}, στο {km_num}ο χιλιόμετρο"
-    
-    return clean_v24_remove_all_prefixes(address)
-
-def clean_v27_english_km_pattern(address):
-    """v27: English pattern: Highway [City1]-[City2] km [number]"""
-    km_match = re.search(r'(\d+)[οηόήOH]?\s*(?:ΧΛΜ|χλμ|Km|km|ΚΜ)', address, re.IGNORECASE)
-    cities = re.findall(r'[Α-ΩA-Z][α-ωa-z]+', address)
-    keywords = {'ΧΛΜ', 'Km', 'ΠΕΟ', 'ΕΟ', 'ΝΕΟ', 'ΟΔΟΣ', 'ΕΘΝΙΚΗΣ'}
-    cities = [c for c in cities if c.upper() not in keywords]
-    
-    if km_match and len(cities) >= 2:
-        km_num = km_match.group(1)
-        return f"Highway {cities[0]}-{cities[1]} km {km_num}"
-    
-    return address
-
-def clean_v28_nomoi_pattern(address):
-    """v28: Προσθήκη νομού context"""
-    cleaned = clean_v24_remove_all_prefixes(address)
-    # Θα χρειαστεί το countyName από το DataFrame
-    return cleaned  # Will be enhanced in the loop with county
-
-def clean_v29_only_km_number(address):
-    """v29: Μόνο χλμ και αριθμός για testing"""
-    km_match = re.search(r'(\d+)[οηόήOH]?\s*(?:ΧΛΜ|χλμ|Km|km|ΚΜ)', address, re.IGNORECASE)
-    cities = re.findall(r'[Α-ΩA-Z][α-ωa-z]+', address)
-    keywords = {'ΧΛΜ', 'Km', 'ΠΕΟ', 'ΕΟ', 'ΝΕΟ', 'ΟΔΟΣ', 'ΕΘΝΙΚΗΣ'}
-    cities = [c for c in cities if c.upper() not in keywords]
-    
-    if km_match and len(cities) >= 1:
-        km_num = km_match.group(1)
-        return f"{km_num}ο χλμ {cities[0]}"
-    
-    return address
-
-def clean_v30_inferred_highway(address):
-    """v30: Προσπάθεια να συμπεράνει την εθνική οδό"""
-    cities = re.findall(r'[Α-ΩA-Z][α-ωa-z]+', address)
-    keywords = {'ΧΛΜ', 'Km', 'ΠΕΟ', 'ΕΟ', 'ΝΕΟ', 'ΟΔΟΣ', 'ΕΘΝΙΚΗΣ'}
-    cities = [c for c in cities if c.upper() not in keywords]
-    
-    # Known highway patterns
-    highway_map = {
-        ('Αθήνα', 'Λαμία'): 'Α1',
-        ('Αθήνα', 'Θεσσαλονίκη'): 'Α1', 
-        ('Αθήνα', 'Κόρινθος'): 'Α8',
-        ('Αθήνα', 'Πάτρα'): 'Α8',
-        ('Λάρισα', 'Βόλος'): 'ΕΟ3',
-        ('Θεσσαλονίκη', 'Καβάλα'): 'Α2',
-    }
-    
-    if len(cities) >= 2:
-        for (c1, c2), highway in highway_map.items():
-            if (c1 in cities and c2 in cities) or (c2 in cities and c1 in cities):
-                km_match = re.search(r'(\d+)', address)
-                if km_match:
-                    return f"{highway} {km_match.group(1)} km"
-                return f"{highway} {cities[0]} {cities[1]}"
-    
-    return clean_v24_remove_all_prefixes(address)
-
-# Dictionary με τις νέες μεθόδους
-NEW_CLEANING_METHODS = {
-    'v20_km_city1_city2': clean_v20_km_city1_city2,
-    'v21_km_city1_city2_genitive': clean_v21_km_city1_city2_genitive,
-    'v22_km_eo_city1_city2': clean_v22_km_eo_city1_city2,
-    'v23_city1_pros_city2': clean_v23_city1_pros_city2,
-    'v24_remove_all_prefixes': clean_v24_remove_all_prefixes,
-    'v25_big_cities_pattern': clean_v25_big_cities_pattern,
-    'v26_small_cities_pattern': clean_v26_small_cities_pattern,
-    'v27_english_km_pattern': clean_v27_english_km_pattern,
-    'v28_nomoi_pattern': clean_v28_nomoi_pattern,
-    'v29_only_km_number': clean_v29_only_km_number,
-    'v30_inferred_highway': clean_v30_inferred_highway,
-}
-
-print(f"\n✅ Ορίστηκαν {len(NEW_CLEANING_METHODS)} νέες μέθοδοι (v20-v30)")
-
-# ============= MAIN EXECUTION =============
-
-# Φόρτωση existing results
-print(f"\n📂 Φόρτωση existing results από: {EXISTING_RESULTS}")
-df_existing = pd.read_excel(EXISTING_RESULTS)
-print(f"   Φορτώθηκαν {len(df_existing)} σταθμοί")
-print(f"   Existing columns: {len(df_existing.columns)}")
-
-# Προσθήκη νέων στηλών
-print("\n🔄 Εκτέλεση νέων geocoding experiments...")
-print(f"   API calls: {len(df_existing) * len(NEW_CLEANING_METHODS)}")
-print(f"   Εκτιμώμενος χρόνος: ~{len(df_existing) * len(NEW_CLEANING_METHODS) * 0.1 / 60:.1f} λεπτά")
-
-# Progress bar
-for idx, row in tqdm(df_existing.iterrows(), total=len(df_existing), desc="New Geocoding"):
-    
-    for method_name, clean_func in NEW_CLEANING_METHODS.items():
-        try:
-            # Special handling για v28
-            if method_name == 'v28_nomoi_pattern':
-                cleaned_address = clean_v24_remove_all_prefixes(row['original_address'])
-                cleaned_address = f"{cleaned_address}, Νομός {row['countyName']}"
-            else:
-                cleaned_address = clean_func(row['original_address'])
-            
-            # Geocoding query με county
-            query = f"{cleaned_address}, {row['countyName']}, Greece"
-            
-            # API call
-            result = gmaps.geocode(query, region='gr')
-            
-            if result:
-                loc = result[0]['geometry']['location']
-                distance = haversine_distance(
-                    row['ground_truth_lat'], row['ground_truth_lng'],
-                    loc['lat'], loc['lng']
-                )
-                accuracy = result[0]['geometry']['location_type']
-                
-                # Αποθήκευση αποτελεσμάτων
-                df_existing.at[idx, f'{method_name}_address'] = cleaned_address
-                df_existing.at[idx, f'{method_name}_lat'] = loc['lat']
-                df_existing.at[idx, f'{method_name}_lng'] = loc['lng']
-                df_existing.at[idx, f'{method_name}_distance'] = distance
-                df_existing.at[idx, f'{method_name}_accuracy'] = accuracy
-            else:
-                # Αποτυχία geocoding
-                df_existing.at[idx, f'{method_name}_address'] = cleaned_address
-                df_existing.at[idx, f'{method_name}_distance'] = None
-                df_existing.at[idx, f'{method_name}_accuracy'] = 'FAILED'
-                
-        except Exception as e:
-            print(f"\n❌ Error για station {row['gasStationID']}, method {method_name}: {e}")
-            df_existing.at[idx, f'{method_name}_address'] = cleaned_address
-            df_existing.at[idx, f'{method_name}_distance'] = None
-            df_existing.at[idx, f'{method_name}_accuracy'] = 'ERROR'
-        
-        # Rate limiting
-        time.sleep(0.1)
-
-# ============= FIND BEST METHOD OVERALL =============
-print("\n📊 Υπολογισμός καλύτερης μεθόδου overall...")
-
-# Συλλογή όλων των μεθόδων (παλιές + νέες)
-all_methods = []
-
-# Βρες όλες τις μεθόδους από τις στήλες
-for col in df_existing.columns:
-    if col.endswith('_distance') and not col.startswith('best_') and not col.startswith('original_'):
-        method_name = col.replace('_distance', '')
-        all_methods.append(method_name)
-
-print(f"   Συνολικές μέθοδοι: {len(all_methods)}")
-
-# Υπολογισμός best method για κάθε σταθμό
-def find_best_method_enhanced(row):
-    """Βρίσκει την καλύτερη μέθοδο για κάθε σταθμό"""
-    best_method = None
-    best_distance = float('inf')
-    
-    for method in all_methods:
-        dist_col = f'{method}_distance'
-        if dist_col in row and pd.notna(row[dist_col]) and row[dist_col] < best_distance:
-            best_distance = row[dist_col]
-            best_method = method
-    
-    return pd.Series({
-        'best_method_enhanced': best_method,
-        'best_distance_enhanced': best_distance,
-        'improvement_over_v1': row['v1_original_distance'] - best_distance if best_method else 0
+import sys
+from pathlib import Path
+
+# Κοινά modules στο <repo>/scripts
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / 'scripts'))
+from paths import ML_DIR, RESULTS_19_METHODS, RESULTS_ENHANCED, STATIONS_FILE
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Nees methodoi geocoding (v20-v30) pano sta existing results")
+    parser.add_argument('--existing', default=str(RESULTS_19_METHODS))
+    parser.add_argument('--output', default=str(RESULTS_ENHANCED))
+    parser.add_argument('--out-dir', default=str(ML_DIR), help="statistics kai metrics")
+    parser.add_argument('--rate-limit', type=float, default=0.1)
+    parser.add_argument('--dry-run', action='store_true',
+                        help="mono fortosi kai ektimisi API calls, xoris Google API")
+    parser.add_argument('--fuzzy-groups', action='store_true',
+                        help="geocoding mia fora ana omada sxedon idion diefthinseon (MinHash/LSH)")
+    parser.add_argument('--hedge', action='store_true',
+                        help="hedged requests (backup meta to p95) + geocoding_cache.json os proto backend")
+    parser.add_argument('--only-ids', default=None,
+                        help="work list (ena gasStationID ana grammi, px. data/station_diff/geocode_ids.txt): "
+                             "geocoding mono gia aftous, oi ypoloipoi apo to proigoumeno --output")
+    parser.add_argument('--stations', default=str(STATIONS_FILE),
+                        help="(--only-ids) trexon katalogos: diefthinseis kai syntetagmenes ton stathmon tis work list")
+    parser.add_argument('--adaptive', action='store_true',
+                        help="successive halving ana omada diefthinseon anti gia oles tis klisis")
+    parser.add_argument('--budget', type=float, default=None,
+                        help="(--adaptive) klasma ton N x M klisewn, px. 0.2")
+    return parser.parse_args(argv)
+
+
+def make_client(hedge=False):
+    import googlemaps
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    client = googlemaps.Client(key=os.getenv('GOOGLE_MAPS_API_KEY'))
+    if not hedge:
+        return client
+    from geocoding_client import load_cache
+    from hedged_geocoder import CacheBackend, GoogleBackend, HedgedGeocoder
+    return HedgedGeocoder(GoogleBackend(client), cache=CacheBackend(load_cache()))
+
+
+def load_work_list(ids_path, stations_path):
+    """Οι σταθμοί της work list από τον τρέχοντα κατάλογο (added/moved δεν είναι στα παλιά results)"""
+    import pandas as pd
+    from station_diff import load_id_list
+
+    only_ids = load_id_list(ids_path)
+    stations = pd.read_excel(stations_path)
+    stations = stations[stations['gasStationID'].isin(only_ids)].drop_duplicates('gasStationID', keep='last')
+    missing = sorted(only_ids - set(stations['gasStationID']))
+    if missing:
+        print(f"   ⚠️  {len(missing)} IDs tis work list den yparxoun sto {stations_path}: "
+              f"{', '.join(map(str, missing[:10]))}{' ...' if len(missing) > 10 else ''}")
+    if not len(stations):
+        raise SystemExit(f"Kanenas stathmos tis work list {ids_path} sto {stations_path}")
+    # Idies stiles me ta results (geocode_methods: original_address, countyName, ground_truth_*)
+    return pd.DataFrame({
+        'gasStationID': stations['gasStationID'].to_numpy(),
+        'original_address': stations['gasStationAddress'].to_numpy(),
+        'ground_truth_lat': stations['gasStationLat'].to_numpy(dtype=float),
+        'ground_truth_lng': stations['gasStationLong'].to_numpy(dtype=float),
+        'countyName': stations['countyName'].to_numpy(),
+        'municipalityName': stations['municipalityName'].to_numpy(),
     })
 
-# Εφαρμογή
-best_results_enhanced = df_existing.apply(find_best_method_enhanced, axis=1)
-df_final = pd.concat([df_existing, best_results_enhanced], axis=1)
-
-# ============= STATISTICS & RANKING =============
-print("\n📈 Στατιστικά ανά μέθοδο:")
-
-stats_data = []
-for method in all_methods:
-    dist_col = f'{method}_distance'
-    if dist_col in df_final.columns:
-        distances = df_final[dist_col].dropna()
-        
-        if len(distances) > 0:
-            stats_data.append({
-                'Method': method,
-                'Mean_Distance_m': distances.mean(),
-                'Median_Distance_m': distances.median(),
-                'Success_Rate_%': (len(distances) / len(df_final)) * 100,
-                'Within_100m_%': (distances <= 100).mean() * 100,
-                'Within_500m_%': (distances <= 500).mean() * 100,
-                'Times_Best': (df_final['best_method_enhanced'] == method).sum()
-            })
-
-stats_df = pd.DataFrame(stats_data).sort_values('Mean_Distance_m')
-
-print("\n🏆 TOP 10 Μέθοδοι (by mean distance):")
-print(stats_df[['Method', 'Mean_Distance_m', 'Within_100m_%', 'Times_Best']].head(10).to_string(index=False))
-
-# ============= SAVE RESULTS =============
-print(f"\n💾 Αποθήκευση enhanced results στο: {OUTPUT_ENHANCED}")
-df_final.to_excel(OUTPUT_ENHANCED, index=False)
-
-# Αποθήκευση και των statistics
-STATS_OUTPUT = os.path.join(BASE_DIR, "geocoding_methods_statistics.xlsx")
-stats_df.to_excel(STATS_OUTPUT, index=False)
-print(f"   Statistics αποθηκεύτηκαν στο: {STATS_OUTPUT}")
-
-# ============= FINAL SUMMARY =============
-print("\n" + "="*60)
-print("ΣΥΝΟΨΗ ΑΠΟΤΕΛΕΣΜΑΤΩΝ")
-print("="*60)
-
-# Overall improvements
-original_mean = df_final['v1_original_distance'].mean()
-best_mean = df_final['best_distance_enhanced'].mean()
-improvement_pct = ((original_mean - best_mean) / original_mean) * 100
-
-print(f"\n📍 Μέση απόσταση:")
-print(f"   Original (v1): {original_mean:.1f} m")
-print(f"   Best method:   {best_mean:.1f} m")
-print(f"   Βελτίωση:      {improvement_pct:.1f}%")
-
-# Best performing new methods
-new_methods_performance = stats_df[stats_df['Method'].str.startswith('v2')].head(5)
-if not new_methods_performance.empty:
-    print(f"\n🌟 Καλύτερες νέες μέθοδοι (v20-v30):")
-    print(new_methods_performance[['Method', 'Mean_Distance_m', 'Times_Best']].to_string(index=False))
-
-print("\n✅ Script ολοκληρώθηκε επιτυχώς!")
-print(f"   Enhanced dataset: {OUTPUT_ENHANCED}")
-print(f"   Statistics: {STATS_OUTPUT}")
+
+def merge_previous(df_updated, all_ids, previous_path):
+    # Incremental run: oi stathmoi ektos work list kratane ta apotelesmata tou proigoumenou output
+    import pandas as pd
+    from station_diff import update_rows
+
+    if not os.path.exists(previous_path):
+        print(f"   ⚠️  Den yparxei proigoumeno {previous_path} - to output tha exei mono ti work list")
+        return df_updated
+    previous = pd.read_excel(previous_path)
+    merged = update_rows(previous, df_updated, all_ids)
+    added = len(set(df_updated['gasStationID']) - set(previous['gasStationID']))
+    print(f"   Incremental: {len(df_updated)} νέοι + {len(merged) - len(df_updated)} από {previous_path}"
+          + (f" ({added} χωρίς προηγούμενο αποτέλεσμα)" if added else ""))
+    return merged
+
+
+def report_geocoder(gmaps):
+    # Latency ana backend kai apothikefsi tou cache (mono gia --hedge)
+    from hedged_geocoder import HedgedGeocoder, format_latency_stats
+    if isinstance(gmaps, HedgedGeocoder):
+        from geocoding_client import save_cache
+        print(format_latency_stats(gmaps.stats()))
+        save_cache(gmaps.cache.cache)
+        gmaps.close()
+
+
+def run_adaptive_mode(df_existing, methods, args):
+    """Adaptive experiments: ligotera API calls, idios pinakas statistikon + confidence"""
+    import pandas as pd
+    from adaptive_experiments import LiveOracle, run_adaptive
+    from pipeline_metrics import METRICS
+
+    gmaps = make_client(args.hedge)
+    result = run_adaptive(df_existing, LiveOracle(df_existing, gmaps, args.rate_limit),
+                          methods, budget_fraction=args.budget)
+    report_geocoder(gmaps)
+    print(f"\n   API calls: {result['calls']:,} apo {result['exhaustive_calls']:,} "
+          f"({result['calls'] / result['exhaustive_calls'] * 100:.1f}%)")
+    print("\n🏆 Καλύτερη μέθοδος ανά ομάδα:")
+    print(result['groups'].to_string(index=False))
+    print("\n📈 Στατιστικά ανά μέθοδο (δείγμα):")
+    print(result['stats'][['Method', 'Mean_Distance_m', 'CI_Low_m', 'CI_High_m', 'Samples']]
+          .head(10).to_string(index=False))
+
+    METRICS.export_jsonl(os.path.join(args.out_dir, "geocoding_metrics.jsonl"))
+    output = os.path.join(args.out_dir, "geocoding_adaptive_results.xlsx")
+    with pd.ExcelWriter(output) as writer:
+        result['stats'].to_excel(writer, sheet_name='stats', index=False)
+        result['groups'].to_excel(writer, sheet_name='groups', index=False)
+        result['observations'].to_excel(writer, sheet_name='observations', index=False)
+    print(f"\n💾 Adaptive results: {output}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    import pandas as pd
+    from address_cleaning import NEW_CLEANING_METHODS
+    from geocoding_experiments import (geocode_methods, find_method_columns,
+                                       find_best_method_enhanced, method_statistics)
+    from pipeline_metrics import METRICS
+
+    print("="*60)
+    print("ADDITIONAL GEOCODING EXPERIMENTS")
+    print("Requested by Professor")
+    print("="*60)
+
+    print(f"\n✅ Ορίστηκαν {len(NEW_CLEANING_METHODS)} νέες μέθοδοι (v20-v30)")
+
+    # ============= MAIN EXECUTION =============
+
+    # Φόρτωση existing results
+    print(f"\n📂 Φόρτωση existing results από: {args.existing}")
+    df_existing = pd.read_excel(args.existing)
+    print(f"   Φορτώθηκαν {len(df_existing)} σταθμοί")
+    print(f"   Existing columns: {len(df_existing.columns)}")
+    all_ids = df_existing['gasStationID'].to_numpy()
+    if args.only_ids:
+        # Oi stathmoi tis work list (kai oi nees / metakinimenes) apo ton trexonta katalogo
+        df_existing = load_work_list(args.only_ids, args.stations)
+        all_ids = list(dict.fromkeys([*all_ids, *df_existing['gasStationID']]))
+        print(f"   Work list: {len(df_existing)} σταθμοί από {args.only_ids} ({args.stations})")
+
+    # Προσθήκη νέων στηλών
+    print("\n🔄 Εκτέλεση νέων geocoding experiments...")
+    print(f"   API calls: {len(df_existing) * len(NEW_CLEANING_METHODS)}")
+    print(f"   Εκτιμώμενος χρόνος: ~{len(df_existing) * len(NEW_CLEANING_METHODS) * args.rate_limit / 60:.1f} λεπτά")
+    representatives = None
+    if args.fuzzy_groups:
+        from address_lsh import address_groups, calls_saved
+        groups = address_groups(df_existing['original_address'], df_existing['countyName'])
+        saved = calls_saved(groups, len(NEW_CLEANING_METHODS))
+        representatives = groups['representative'].to_numpy()
+        print(f"   Fuzzy groups: {saved['groups']} omades -> API calls {saved['calls_with']:,} "
+              f"(-{saved['calls_saved']:,}, {saved['saved_%']:.1f}%)")
+    if args.dry_run:
+        print("\n(dry run - χωρίς API calls)")
+        return
+
+    if args.adaptive:
+        run_adaptive_mode(df_existing, NEW_CLEANING_METHODS, args)
+        return
+
+    # Checkpoint ana 200 stathmous - ena run pou kopike synexizei apo ekei
+    gmaps = make_client(args.hedge)
+    df_existing = geocode_methods(df_existing, gmaps, NEW_CLEANING_METHODS, rate_limit=args.rate_limit,
+                                  checkpoint=os.path.join(args.out_dir, "geocoding_partial.pkl"),
+                                  representatives=representatives)
+
+    print("\n⏱️  Metrics geocoding:")
+    print(METRICS.summary())
+    report_geocoder(gmaps)
+    if args.only_ids:
+        df_existing = merge_previous(df_existing, all_ids, args.output)
+    METRICS.export_jsonl(os.path.join(args.out_dir, "geocoding_metrics.jsonl"))
+    METRICS.export_prometheus(os.path.join(args.out_dir, "geocoding_metrics.prom"))
+
+    # ============= FIND BEST METHOD OVERALL =============
+    print("\n📊 Υπολογισμός καλύτερης μεθόδου overall...")
+
+    # Συλλογή όλων των μεθόδων (παλιές + νέες) από τις στήλες
+    all_methods = find_method_columns(df_existing)
+
+    print(f"   Συνολικές μέθοδοι: {len(all_methods)}")
+
+    # Εφαρμογή
+    best_results_enhanced = df_existing.apply(find_best_method_enhanced, axis=1, args=(all_methods,))
+    df_final = pd.concat([df_existing, best_results_enhanced], axis=1)
+
+    # ============= STATISTICS & RANKING =============
+    print("\n📈 Στατιστικά ανά μέθοδο:")
+
+    stats_df = method_statistics(df_final, all_methods)
+
+    print("\n🏆 TOP 10 Μέθοδοι (by mean distance):")
+    print(stats_df[['Method', 'Mean_Distance_m', 'Within_100m_%', 'Times_Best']].head(10).to_string(index=False))
+
+    # ============= SAVE RESULTS =============
+    print(f"\n💾 Αποθήκευση enhanced results στο: {args.output}")
+    df_final.to_excel(args.output, index=False)
+
+    # Αποθήκευση και των statistics
+    stats_output = os.path.join(args.out_dir, "geocoding_methods_statistics.xlsx")
+    stats_df.to_excel(stats_output, index=False)
+    print(f"   Statistics αποθηκεύτηκαν στο: {stats_output}")
+
+    # ============= FINAL SUMMARY =============
+    print("\n" + "="*60)
+    print("ΣΥΝΟΨΗ ΑΠΟΤΕΛΕΣΜΑΤΩΝ")
+    print("="*60)
+
+    # Overall improvements
+    original_mean = df_final['v1_original_distance'].mean()
+    best_mean = df_final['best_distance_enhanced'].mean()
+    improvement_pct = ((original_mean - best_mean) / original_mean) * 100
+
+    print(f"\n📍 Μέση απόσταση:")
+    print(f"   Original (v1): {original_mean:.1f} m")
+    print(f"   Best method:   {best_mean:.1f} m")
+    print(f"   Βελτίωση:      {improvement_pct:.1f}%")
+
+    # Best performing new methods
+    new_methods_performance = stats_df[stats_df['Method'].str.startswith('v2')].head(5)
+    if not new_methods_performance.empty:
+        print(f"\n🌟 Καλύτερες νέες μέθοδοι (v20-v30):")
+        print(new_methods_performance[['Method', 'Mean_Distance_m', 'Times_Best']].to_string(index=False))
+
+    print("\n✅ Script ολοκληρώθηκε επιτυχώς!")
+    print(f"   Enhanced dataset: {args.output}")
+    print(f"   Statistics: {stats_output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,33 +4,18 @@ Final Summary Report Generator
 Δημιουργεί comprehensive report για τον καθηγητή
 """
 
-import pandas as pd
-import numpy as np
+import argparse
 import os
 import re
+import sys
 from datetime import datetime
+from pathlib import Path
 
-BASE_DIR = "/Users/geo/Desktop/fuelstation-detection-thesis/data/geocoding_pattern_analysis_ml"
+# Κοινά modules στο <repo>/scripts
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / 'scripts'))
+from paths import ML_DIR, RESULTS_19_METHODS
 
-print("="*80)
-print(" GEOCODING ANALYSIS - FINAL REPORT FOR PROFESSOR")
-print("="*80)
-print(f"\nDate: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
-print(f"Student: Γεώργιος")
-print(f"Project: Fuel Station Detection - Address Geocoding Optimization")
-
-# Load results (choose the file you have)
-results_file = os.path.join(BASE_DIR, "geocoding_19methods_full.xlsx")  # or geocoding_enhanced_results.xlsx
-df = pd.read_excel(results_file)
-
-print(f"\n📊 Dataset: {len(df)} fuel stations analyzed")
-
-# ============= EXECUTIVE SUMMARY =============
-print("\n" + "="*60)
-print("EXECUTIVE SUMMARY")
-print("="*60)
-
-summary_text = """
+SUMMARY_TEXT = """
 Πραγματοποίησα comprehensive analysis με 19+ διαφορετικές μεθόδους καθαρισμού 
 διευθύνσεων για να βελτιστοποιήσω το geocoding accuracy των βενζινάδικων.
 
@@ -39,14 +24,8 @@ summary_text = """
 2. Το format "[Αριθμός] Km [Πόλη1] [Πόλη2]" δίνει τα καλύτερα αποτελέσματα
 3. Ανέπτυξα rule-based system που πετυχαίνει ~75% της βέλτιστης απόδοσης χωρίς ML
 """
-print(summary_text)
-
-# ============= ΑΠΑΝΤΗΣΗ ΣΤΑ REQUESTS ΤΟΥ ΚΑΘΗΓΗΤΗ =============
-print("\n" + "="*60)
-print("ΑΠΑΝΤΗΣΗ ΣΤΑ ΣΥΓΚΕΚΡΙΜΕΝΑ REQUESTS")
-print("="*60)
 
-print("""
+REQUESTS_TEXT = """
 📌 Request 1: "Αφαίρεση ΠΕΟ, Π.Ε.Ο., ΕΟ"
 ✅ ΥΛΟΠΟΙΗΘΗΚΕ στις μεθόδους v2, v8, v9, v24
 📊 ΑΠΟΤΕΛΕΣΜΑ: Μείωση μέσης απόστασης κατά ~35% σε διευθύνσεις με αυτά τα prefixes
@@ -66,46 +45,9 @@ print("""
    • Μεγάλες πόλεις (Αθήνα, Θεσ/νίκη): Προτιμούν format με "Εθνική Οδός"
    • Μικρές πόλεις: Απλούστερο format "[Km] [Πόλη1] [Πόλη2]" δουλεύει καλύτερα
    • Η σειρά των πόλεων ΔΕΝ επηρεάζει σημαντικά (tested με v17)
-""")
-
-# ============= ΑΝΑΛΥΣΗ PATTERNS =============
-print("\n" + "="*60)
-print("PATTERN ANALYSIS - ΤΙ ΒΡΗΚΑ")
-print("="*60)
-
-# Υπολογισμός statistics για patterns
-patterns_found = {
-    'Διευθύνσεις με ΠΕΟ/ΕΟ': len(df[df['original_address'].str.contains(r'Π\.?Ε\.?Ο|Ε\.?Ο', regex=True, na=False)]),
-    'Διευθύνσεις με ΧΛΜ': len(df[df['original_address'].str.contains(r'ΧΛΜ|χλμ', regex=True, na=False)]),
-    'Διευθύνσεις με 2+ πόλεις': len(df[df['original_address'].apply(lambda x: len(re.findall(r'[Α-ΩA-Z][α-ωa-z]+', str(x))) >= 2)]),
-    'Προβληματικές (με ?)': len(df[df['original_address'].str.contains(r'\?', regex=True, na=False)]),
-}
-
-print("📊 Κατανομή Patterns στο Dataset:")
-for pattern, count in patterns_found.items():
-    percentage = (count / len(df)) * 100
-    print(f"   • {pattern}: {count} ({percentage:.1f}%)")
-
-# Best methods per pattern
-print("\n🏆 Καλύτερη Μέθοδος ανά Pattern:")
-pattern_recommendations = {
-    'Με ΠΕΟ/ΕΟ + ΧΛΜ': 'v8_combined_basic',
-    'Με ερωτηματικό (?)': 'v9_combined_aggressive',
-    'Μόνο πόλεις (χωρίς χλμ)': 'v12_simplify_cities_only',
-    'Ξεκινάει με αριθμό': 'v11_km_first',
-    'Πολλές πόλεις (3+)': 'v13_simplify_km_cities',
-    'Default': 'v3_normalize_km'
-}
-
-for pattern, method in pattern_recommendations.items():
-    print(f"   • {pattern}: → {method}")
-
-# ============= RULE-BASED APPROACH =============
-print("\n" + "="*60)
-print("RULE-BASED APPROACH - ΕΞΗΓΗΣΗ")
-print("="*60)
+"""
 
-print("""
+RULE_BASED_TEXT = """
 📚 ΤΙ ΕΙΝΑΙ RULE-BASED APPROACH:
 Είναι ένα σύστημα που χρησιμοποιεί προκαθορισμένους κανόνες (if-then) 
 αντί για Machine Learning για να επιλέξει την καλύτερη μέθοδο καθαρισμού.
@@ -118,79 +60,19 @@ print("""
 5. **Deterministic**: Ίδιο input → ίδιο output ΠΑΝΤΑ
 
 📋 ΠΡΟΤΕΙΝΟΜΕΝΟ RULE-BASED SYSTEM:
-""")
-
-# Print the actual rules
-rules_code = '''
-def select_cleaning_method(address):
-    """
-    Rule-based επιλογή μεθόδου καθαρισμού
-    """
-    # Rule 1: Διευθύνσεις με ΠΕΟ/ΕΟ και ΧΛΜ
-    if ('ΠΕΟ' in address or 'Π.Ε.Ο' in address or 'ΕΟ' in address) and 'ΧΛΜ' in address:
-        return 'v8_combined_basic'
-    
-    # Rule 2: Προβληματικές διευθύνσεις με ?
-    if '?' in address:
-        return 'v9_combined_aggressive'
-    
-    # Rule 3: Πολύ μεγάλες διευθύνσεις
-    if len(address) > 60:
-        return 'v12_simplify_cities_only'
-    
-    # Rule 4: Διευθύνσεις που ξεκινούν με αριθμό
-    if address.strip() and address.strip()[0].isdigit():
-        return 'v11_km_first'
-    
-    # Rule 5: Διευθύνσεις με 3+ πόλεις
-    cities = re.findall(r'[Α-ΩA-Z][α-ωa-z]+', address)
-    if len(cities) >= 3:
-        return 'v13_simplify_km_cities'
-    
-    # Default: Τουλάχιστον normalize τα χλμ
-    return 'v3_normalize_km'
-'''
-print(rules_code)
-
-# ============= PERFORMANCE METRICS =============
-print("\n" + "="*60)
-print("PERFORMANCE METRICS")
-print("="*60)
+"""
 
-# Calculate key metrics
-if 'v1_original_distance' in df.columns:
-    original_mean = df['v1_original_distance'].mean()
-    
-    # Find best achievable
-    best_distances = []
-    for idx, row in df.iterrows():
-        min_dist = float('inf')
-        for col in df.columns:
-            if col.endswith('_distance') and not col.startswith('best_') and not col.startswith('original_'):
-                if pd.notna(row[col]) and row[col] < min_dist:
-                    min_dist = row[col]
-        if min_dist < float('inf'):
-            best_distances.append(min_dist)
-    
-    best_mean = np.mean(best_distances) if best_distances else original_mean
-    improvement = ((original_mean - best_mean) / original_mean) * 100
-    
-    print(f"""
+PERFORMANCE_TEMPLATE = """
 📊 ΣΥΝΟΛΙΚΑ ΑΠΟΤΕΛΕΣΜΑΤΑ:
    • Original (v1) Mean Distance: {original_mean:.1f} meters
    • Best Achievable Mean Distance: {best_mean:.1f} meters
    • Maximum Improvement Potential: {improvement:.1f}%
    
-   • Διευθύνσεις εντός 100μ: {(df['v1_original_distance'] <= 100).mean() * 100:.1f}% → μπορεί να φτάσει ~85%
-   • Διευθύνσεις εντός 500μ: {(df['v1_original_distance'] <= 500).mean() * 100:.1f}% → μπορεί να φτάσει ~95%
-""")
-
-# ============= RECOMMENDATIONS =============
-print("\n" + "="*60)
-print("ΣΥΣΤΑΣΕΙΣ & NEXT STEPS")
-print("="*60)
+   • Διευθύνσεις εντός 100μ: {within_100:.1f}% → μπορεί να φτάσει ~85%
+   • Διευθύνσεις εντός 500μ: {within_500:.1f}% → μπορεί να φτάσει ~95%
+"""
 
-print("""
+RECOMMENDATIONS_TEXT = """
 🎯 ΑΜΕΣΕΣ ΕΝΕΡΓΕΙΕΣ:
 
 1. **Implement Rule-Based System**
@@ -230,14 +112,9 @@ print("""
    • Βελτίωση user experience
    • Μείωση manual corrections
    • Cost savings από λιγότερες API calls (λόγω caching)
-""")
-
-# ============= TECHNICAL DETAILS FOR IMPLEMENTATION =============
-print("\n" + "="*60)
-print("TECHNICAL IMPLEMENTATION GUIDE")
-print("="*60)
+"""
 
-implementation_code = '''
+IMPLEMENTATION_CODE = '''
 # Complete implementation example
 import re
 import googlemaps
@@ -291,24 +168,15 @@ class GeocodingOptimizer:
         }
 '''
 
-print("Sample Implementation Code:")
-print(implementation_code)
-
-# ============= SAVE FINAL REPORT =============
-print("\n" + "="*60)
-print("ΑΠΟΘΗΚΕΥΣΗ REPORT")
-print("="*60)
-
-# Create text report
-report_content = f"""
+REPORT_TEMPLATE = """
 GEOCODING OPTIMIZATION REPORT
 ============================
-Date: {datetime.now().strftime('%Y-%m-%d %H:%M')}
+Date: {date}
 Student: Γεώργιος
 
 DATASET
 -------
-Total Stations: {len(df)}
+Total Stations: {n_stations}
 Methods Tested: 19+
 
 KEY FINDINGS
@@ -346,44 +214,185 @@ NEXT STEPS
 4. Add caching layer
 """
 
-# Save text report
-report_path = os.path.join(BASE_DIR, "FINAL_REPORT_FOR_PROFESSOR.txt")
-with open(report_path, 'w', encoding='utf-8') as f:
-    f.write(report_content)
-
-print(f"✅ Text report saved to: {report_path}")
-
-# Create summary Excel
-summary_data = {
-    'Metric': [
-        'Total Stations Analyzed',
-        'Methods Tested', 
-        'Best Mean Distance Achieved',
-        'Improvement Over Original',
-        'Success Rate',
-        'Rule-Based Performance'
-    ],
-    'Value': [
-        len(df),
-        '19+',
-        f'{best_mean:.1f}m',
-        f'{improvement:.1f}%',
-        '95%+',
-        '~70% of optimal'
-    ]
+PATTERN_RECOMMENDATIONS = {
+    'Με ΠΕΟ/ΕΟ + ΧΛΜ': 'v8_combined_basic',
+    'Με ερωτηματικό (?)': 'v9_combined_aggressive',
+    'Μόνο πόλεις (χωρίς χλμ)': 'v12_simplify_cities_only',
+    'Ξεκινάει με αριθμό': 'v11_km_first',
+    'Πολλές πόλεις (3+)': 'v13_simplify_km_cities',
+    'Default': 'v3_normalize_km'
 }
 
-summary_df = pd.DataFrame(summary_data)
-summary_path = os.path.join(BASE_DIR, "FINAL_SUMMARY_FOR_PROFESSOR.xlsx")
-summary_df.to_excel(summary_path, index=False)
-
-print(f"✅ Excel summary saved to: {summary_path}")
 
-print("\n" + "="*80)
-print(" REPORT GENERATION COMPLETE!")
-print("="*80)
-print("\n📧 Ready to send to professor!")
-print("   Attachments:")
-print(f"   1. {report_path}")
-print(f"   2. {summary_path}")
-print("   3. geocoding_analysis_plots.png (if generated)")
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Final summary report (txt + xlsx)")
+    parser.add_argument('--results', default=str(RESULTS_19_METHODS),
+                        help="geocoding_19methods_full.xlsx i geocoding_enhanced_results.xlsx")
+    parser.add_argument('--out-dir', default=str(ML_DIR))
+    return parser.parse_args(argv)
+
+
+def best_achievable_distances(df):
+    """Η μικρότερη απόσταση κάθε σταθμού από όλες τις μεθόδους"""
+    from geocoding_experiments import find_method_columns
+
+    dist_cols = [f'{m}_distance' for m in find_method_columns(df)]
+    return df[dist_cols].min(axis=1).dropna()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    import pandas as pd
+
+    print("="*80)
+    print(" GEOCODING ANALYSIS - FINAL REPORT FOR PROFESSOR")
+    print("="*80)
+    print(f"\nDate: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+    print(f"Student: Γεώργιος")
+    print(f"Project: Fuel Station Detection - Address Geocoding Optimization")
+
+    df = pd.read_excel(args.results)
+
+    print(f"\n📊 Dataset: {len(df)} fuel stations analyzed")
+
+    # ============= EXECUTIVE SUMMARY =============
+    print("\n" + "="*60)
+    print("EXECUTIVE SUMMARY")
+    print("="*60)
+    print(SUMMARY_TEXT)
+
+    # ============= ΑΠΑΝΤΗΣΗ ΣΤΑ REQUESTS ΤΟΥ ΚΑΘΗΓΗΤΗ =============
+    print("\n" + "="*60)
+    print("ΑΠΑΝΤΗΣΗ ΣΤΑ ΣΥΓΚΕΚΡΙΜΕΝΑ REQUESTS")
+    print("="*60)
+    print(REQUESTS_TEXT)
+
+    # ============= ΑΝΑΛΥΣΗ PATTERNS =============
+    print("\n" + "="*60)
+    print("PATTERN ANALYSIS - ΤΙ ΒΡΗΚΑ")
+    print("="*60)
+
+    # Υπολογισμός statistics για patterns
+    addresses = df['original_address']
+    patterns_found = {
+        'Διευθύνσεις με ΠΕΟ/ΕΟ': int(addresses.str.contains(r'Π\.?Ε\.?Ο|Ε\.?Ο', regex=True, na=False).sum()),
+        'Διευθύνσεις με ΧΛΜ': int(addresses.str.contains(r'ΧΛΜ|χλμ', regex=True, na=False).sum()),
+        'Διευθύνσεις με 2+ πόλεις': int(addresses.apply(lambda x: len(re.findall(r'[Α-ΩA-Z][α-ωa-z]+', str(x))) >= 2).sum()),
+        'Προβληματικές (με ?)': int(addresses.str.contains(r'\?', regex=True, na=False).sum()),
+    }
+
+    print("📊 Κατανομή Patterns στο Dataset:")
+    for pattern, count in patterns_found.items():
+        percentage = (count / len(df)) * 100
+        print(f"   • {pattern}: {count} ({percentage:.1f}%)")
+
+    # Best methods per pattern
+    print("\n🏆 Καλύτερη Μέθοδος ανά Pattern:")
+    for pattern, method in PATTERN_RECOMMENDATIONS.items():
+        print(f"   • {pattern}: → {method}")
+
+    # ============= RULE-BASED APPROACH =============
+    print("\n" + "="*60)
+    print("RULE-BASED APPROACH - ΕΞΗΓΗΣΗ")
+    print("="*60)
+    print(RULE_BASED_TEXT)
+
+    # Print the actual rules (η decision list που εφαρμόζει το rule_engine)
+    from rule_engine import HAND_RULES, format_rules, load_rules
+    print(format_rules(HAND_RULES))
+    learned_path = os.path.join(args.out_dir, "learned_rules.json")
+    if os.path.exists(learned_path):
+        print("\n🌳 Learned Rules (από το 2_analyze_results_rules.py):")
+        print(format_rules(load_rules(learned_path)))
+
+    # ============= PERFORMANCE METRICS =============
+    print("\n" + "="*60)
+    print("PERFORMANCE METRICS")
+    print("="*60)
+
+    # Calculate key metrics
+    best_distances = best_achievable_distances(df)
+    if 'v1_original_distance' in df.columns:
+        original_mean = df['v1_original_distance'].mean()
+        best_mean = best_distances.mean() if len(best_distances) else original_mean
+        improvement = ((original_mean - best_mean) / original_mean) * 100
+
+        print(PERFORMANCE_TEMPLATE.format(
+            original_mean=original_mean, best_mean=best_mean, improvement=improvement,
+            within_100=(df['v1_original_distance'] <= 100).mean() * 100,
+            within_500=(df['v1_original_distance'] <= 500).mean() * 100))
+    else:
+        # Xoris v1 den yparxei baseline: to improvement menei NaN sta reports
+        best_mean = best_distances.mean() if len(best_distances) else float('nan')
+        improvement = float('nan')
+        print("⚠️ Den yparxei v1_original_distance - paraleipetai i sygkrisi me to original")
+
+    # ============= RECOMMENDATIONS =============
+    print("\n" + "="*60)
+    print("ΣΥΣΤΑΣΕΙΣ & NEXT STEPS")
+    print("="*60)
+    print(RECOMMENDATIONS_TEXT)
+
+    # ============= TECHNICAL DETAILS FOR IMPLEMENTATION =============
+    print("\n" + "="*60)
+    print("TECHNICAL IMPLEMENTATION GUIDE")
+    print("="*60)
+
+    print("Sample Implementation Code:")
+    print(IMPLEMENTATION_CODE)
+
+    # ============= SAVE FINAL REPORT =============
+    print("\n" + "="*60)
+    print("ΑΠΟΘΗΚΕΥΣΗ REPORT")
+    print("="*60)
+
+    # Create text report
+    report_content = REPORT_TEMPLATE.format(
+        date=datetime.now().strftime('%Y-%m-%d %H:%M'), n_stations=len(df), improvement=improvement)
+
+    # Save text report
+    report_path = os.path.join(args.out_dir, "FINAL_REPORT_FOR_PROFESSOR.txt")
+    with open(report_path, 'w', encoding='utf-8') as f:
+        f.write(report_content)
+
+    print(f"✅ Text report saved to: {report_path}")
+
+    # Create summary Excel
+    summary_data = {
+        'Metric': [
+            'Total Stations Analyzed',
+            'Methods Tested',
+            'Best Mean Distance Achieved',
+            'Improvement Over Original',
+            'Success Rate',
+            'Rule-Based Performance'
+        ],
+        'Value': [
+            len(df),
+            '19+',
+            f'{best_mean:.1f}m',
+            f'{improvement:.1f}%',
+            '95%+',
+            '~70% of optimal'
+        ]
+    }
+
+    summary_df = pd.DataFrame(summary_data)
+    summary_path = os.path.join(args.out_dir, "FINAL_SUMMARY_FOR_PROFESSOR.xlsx")
+    summary_df.to_excel(summary_path, index=False)
+
+    print(f"✅ Excel summary saved to: {summary_path}")
+
+    print("\n" + "="*80)
+    print(" REPORT GENERATION COMPLETE!")
+    print("="*80)
+    print("\n📧 Ready to send to professor!")
+    print("   Attachments:")
+    print(f"   1. {report_path}")
+    print(f"   2. {summary_path}")
+    print("   3. geocoding_analysis_plots.png (if generated)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+# adaptive_experiments
+# Adaptive geocoding experiments: anti gia N x 30 klisis, kathe omada
+# diefthinseon (syndyasmos patterns) trexei successive halving pano stis
+# methodous (arms). Kathe gyro oi epizosantes methodoi geokodikopoioun ena neo
+# batch stathmon (paired sygkrisi), oi xeiroteres me statistiki simasia
+# vgainoun amesos kai, mono me --budget, apo tis ypoloipes menei to kalytero
+# miso (xoris budget synexizoun oles oses den einai xeiroteres). To apotelesma
+# einai o idios pinakas statistikon ana methodo (opos method_statistics) me
+# CI kai confidence gia ton nikiti kathe omadas.
+#
+# Offline: ReplayOracle pairnei tis apostaseis apo ena katagegrammeno wide
+# results frame (geocoding_19methods_full.xlsx), opote o algorithmos elegxetai
+# xoris Google API kai sygkrinetai me to exhaustive apotelesma.
+
+import argparse
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+from address_cleaning import build_query, haversine_distance
+from address_patterns import ADDRESS_PATTERNS, pattern_matrix
+from pipeline_metrics import METRICS
+
+# Parametroi
+GROUP_PATTERNS = ('has_peo', 'has_km', 'has_question')   # omades = syndyasmoi autwn
+BATCH_SIZE = 16             # stathmoi ston proto gyro kathe omadas (diplasiazetai ana gyro)
+FAILURE_PENALTY_M = 10000   # kostos apotyxias gia tin katataxi (opos sto rule_engine)
+CONFIDENCE_Z = 1.96
+CONFIDENCE_RESAMPLES = 2000
+
+
+class ReplayOracle:
+    """Apantaei apo katagegrammena apotelesmata ({method}_distance / _accuracy)"""
+
+    def __init__(self, results_df):
+        self.results = results_df
+        self.calls = 0
+        self._position = pd.Series(np.arange(len(results_df)), index=results_df.index)
+        self._columns = {}
+
+    def _column(self, name):
+        if name not in self._columns:
+            self._columns[name] = self.results[name].to_numpy() if name in self.results.columns else None
+        return self._columns[name]
+
+    def query(self, idx, method):
+        self.calls += 1
+        i = self._position[idx]
+        distances, accuracies = self._column(f'{method}_distance'), self._column(f'{method}_accuracy')
+        distance = np.nan if distances is None else distances[i]
+        accuracy = None if accuracies is None else accuracies[i]
+        return {'distance': None if pd.isna(distance) else float(distance),
+                'accuracy': None if pd.isna(accuracy) else accuracy}
+
+
+class LiveOracle:
+    """Geocoding me to Google API (i opoiodipote client me .geocode) kai cache ana (stathmo, methodo)"""
+
+    def __init__(self, df, gmaps, rate_limit=0.1):
+        self.df = df
+        self.gmaps = gmaps
+        self.rate_limit = rate_limit
+        self.calls = 0
+        self._cache = {}
+
+    def query(self, idx, method):
+        key = (idx, method)
+        if key in self._cache:
+            return self._cache[key]
+        row = self.df.loc[idx]
+        cleaned_address, query = build_query(method, row['original_address'], row['countyName'])
+        result = {'distance': None, 'accuracy': 'FAILED', 'address': cleaned_address}
+        self.calls += 1
+        try:
+            with METRICS.timer('geocode_request_seconds', method=method):
+                response = self.gmaps.geocode(query, region='gr')
+            if response:
+                loc = response[0]['geometry']['location']
+                result.update(lat=loc['lat'], lng=loc['lng'],
+                              accuracy=response[0]['geometry']['location_type'],
+                              distance=haversine_distance(row['ground_truth_lat'], row['ground_truth_lng'],
+                                                          loc['lat'], loc['lng']))
+        except Exception as e:
+            METRICS.counter('geocode_errors_total', method=method, kind=type(e).__name__).inc()
+            print(f"\n❌ Error για station {row.get('gasStationID')}, method {method}: {e}")
+            result['accuracy'] = 'ERROR'
+        METRICS.counter('geocode_results_total', method=method, accuracy=result['accuracy']).inc()
+        if self.rate_limit:
+            time.sleep(self.rate_limit)
+        self._cache[key] = result
+        return result
+
+
+def pattern_groups(addresses, group_patterns=GROUP_PATTERNS, patterns=ADDRESS_PATTERNS):
+    """Ετικέτα ομάδας ανά διεύθυνση, π.χ. 'has_peo+has_km' ή 'other'"""
+    masks = pattern_matrix(addresses, {name: patterns[name] for name in group_patterns})
+    labels = np.full(len(masks), '', dtype=object)
+    for name in group_patterns:
+        hit = masks[name].to_numpy()
+        labels[hit] = np.where(labels[hit] == '', name, labels[hit] + '+' + name)
+    labels[labels == ''] = 'other'
+    return pd.Series(labels, index=masks.index, name='group')
+
+
+def _costs(distances, failure_penalty):
+    # log1p: oi apostaseis exoun vary oura (lognormal) - o mesos log-kostos
+    # xorizei tis methodous me poly ligotera deigmata apo ton meso se metra
+    d = np.asarray(distances, dtype=float)
+    return np.log1p(np.minimum(np.where(np.isnan(d), failure_penalty, d), failure_penalty))
+
+
+def paired_confidence(winner_costs, other_costs, resamples=CONFIDENCE_RESAMPLES, seed=0):
+    """P(ο νικητής έχει μικρότερο μέσο κόστος) με bootstrap στις κοινές παρατηρήσεις"""
+    diff = np.asarray(other_costs, dtype=float) - np.asarray(winner_costs, dtype=float)
+    if not len(diff):
+        return float('nan')
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(diff), size=(resamples, len(diff)))
+    means = diff[picks].mean(axis=1)
+    return float((means > 0).mean() + 0.5 * (means == 0).mean())     # isopalia = 0.5
+
+
+def run_group(indices, oracle, methods, budget=None, batch_size=BATCH_SIZE, z=CONFIDENCE_Z,
+              failure_penalty=FAILURE_PENALTY_M, rng=None):
+    """Successive halving (με budget) ή απόρριψη μόνο των σαφώς χειρότερων για μία ομάδα -> (παρατηρήσεις, νικητής, confidence, calls)"""
+    rng = rng or np.random.default_rng(0)
+    order = rng.permutation(np.asarray(indices))
+    alive = list(methods)
+    costs = {m: [] for m in methods}          # kostos ana stathmo, sti seira tou order
+    observations = []
+    calls = 0
+    seen = 0
+    round_no = 0
+    eliminated = []                           # (method, round) me ti seira pou vgikan
+
+    while seen < len(order) and len(alive) > 1:
+        batch = order[seen:seen + batch_size * 2 ** round_no]
+        if budget is not None:
+            affordable = (budget - calls) // len(alive)
+            batch = batch[:max(affordable, 0)]
+        if not len(batch):
+            break
+        for idx in batch:
+            for method in alive:
+                result = oracle.query(idx, method)
+                calls += 1
+                costs[method].append(_costs([result['distance'] if result['distance'] is not None
+                                             else np.nan], failure_penalty)[0])
+                observations.append({'station': idx, 'method': method, 'round': round_no,
+                                     'distance': result['distance'], 'accuracy': result['accuracy']})
+        seen += len(batch)
+
+        # Oles oi epizosantes methodoi exoun ta idia 'seen' apotelesmata (paired)
+        matrix = np.array([costs[m][-seen:] for m in alive])               # (A, seen)
+        means = matrix.mean(axis=1)
+        half = z * matrix.std(axis=1, ddof=1) / math.sqrt(seen) if seen > 1 else np.full(len(alive), np.inf)
+        best = int(np.argmin(means))
+        # 1) Xeiroteres me simasia: LCB > UCB tou kalyterou
+        keep = means - half <= means[best] + half[best]
+        ranked = [i for i in np.argsort(means) if keep[i]]
+        # 2) Successive halving (mono me budget): to kalytero miso ton ypoloipon
+        if budget is not None:
+            ranked = ranked[:max(1, math.ceil(len(ranked) / 2))]
+        survivors = [alive[i] for i in sorted(ranked)]
+        eliminated += [(m, round_no) for m in alive if m not in survivors]
+        alive = survivors
+        round_no += 1
+
+    observed = {m: np.array(c) for m, c in costs.items() if c}
+    winner = min(alive, key=lambda m: observed[m].mean() if m in observed else np.inf)
+    # Confidence enantia sto kalytero apo osa vgikan teleutaia
+    confidence = float('nan')
+    if len(alive) > 1:
+        runner_up = sorted((m for m in alive if m != winner), key=lambda m: observed[m].mean())[0]
+        confidence = paired_confidence(observed[winner], observed[runner_up])
+    elif eliminated:
+        last_round = eliminated[-1][1]
+        contenders = [m for m, r in eliminated if r == last_round]
+        runner_up = min(contenders, key=lambda m: observed[m].mean())
+        n = len(observed[runner_up])
+        confidence = paired_confidence(observed[winner][:n], observed[runner_up])
+    return observations, winner, confidence, calls
+
+
+def run_adaptive(df, oracle, methods, groups=None, budget_fraction=None, batch_size=BATCH_SIZE,
+                 z=CONFIDENCE_Z, failure_penalty=FAILURE_PENALTY_M, seed=42):
+    """Adaptive πείραμα σε όλες τις ομάδες -> dict με observations, groups, stats, calls"""
+    methods = list(methods)
+    if groups is None:
+        groups = pattern_groups(df['original_address'])
+    rng = np.random.default_rng(seed)
+    total_budget = None if budget_fraction is None else int(budget_fraction * len(df) * len(methods))
+
+    all_obs, group_rows = [], []
+    calls = 0
+    for name, members in groups.groupby(groups, sort=True):
+        budget = None if total_budget is None else max(len(methods), int(total_budget * len(members) / len(df)))
+        obs, winner, confidence, used = run_group(members.index, oracle, methods, budget, batch_size, z,
+                                                  failure_penalty, rng)
+        calls += used
+        for o in obs:
+            o['group'] = name
+        all_obs.extend(obs)
+        group_rows.append({'Group': name, 'Stations': len(members),
+                           'Sampled': len({o['station'] for o in obs}), 'Calls': used,
+                           'Best_Method': winner, 'Confidence': confidence})
+
+    observations = pd.DataFrame(all_obs, columns=['group', 'station', 'method', 'round', 'distance', 'accuracy'])
+    groups_df = pd.DataFrame(group_rows)
+    return {
+        'observations': observations,
+        'groups': groups_df,
+        'stats': adaptive_statistics(observations, groups_df, methods, z),
+        'calls': calls,
+        'exhaustive_calls': len(df) * len(methods),
+    }
+
+
+def adaptive_statistics(observations, groups_df, methods, z=CONFIDENCE_Z):
+    """Ο πίνακας του method_statistics από τις δειγματοληπτικές παρατηρήσεις, με Samples και CI"""
+    stats = []
+    wins = groups_df.groupby('Best_Method')['Stations'].sum()
+    for method in methods:
+        obs = observations.loc[observations['method'] == method, 'distance'].astype(float)
+        distances = obs.dropna()
+        if not len(distances):
+            continue
+        se = distances.std(ddof=1) / math.sqrt(len(distances)) if len(distances) > 1 else float('nan')
+        stats.append({
+            'Method': method,
+            'Mean_Distance_m': distances.mean(),
+            'Median_Distance_m': distances.median(),
+            'Success_Rate_%': len(distances) / len(obs) * 100,
+            'Within_100m_%': (distances <= 100).mean() * 100,
+            'Within_500m_%': (distances <= 500).mean() * 100,
+            'Times_Best': int(wins.get(method, 0)),     # stathmoi se omades pou kerdise
+            'Samples': len(obs),
+            'CI_Low_m': distances.mean() - z * se,
+            'CI_High_m': distances.mean() + z * se,
+        })
+    return pd.DataFrame(stats).sort_values('Mean_Distance_m')
+
+
+def exhaustive_winners(results_df, methods, groups, failure_penalty=FAILURE_PENALTY_M):
+    """Ο πραγματικός νικητής κάθε ομάδας από όλα τα αποτελέσματα (για σύγκριση offline)"""
+    raw = results_df[[f'{m}_distance' for m in methods]].to_numpy(dtype=float)
+    scores = pd.DataFrame(_costs(raw, failure_penalty), index=results_df.index, columns=methods)
+    scores = scores.groupby(groups).mean()
+    # To idio kostos me tin katataxi, se metra: expm1(mesos log1p) = geometrikos mesos tou (1 + d) - 1,
+    # opote o True_Best exei to elaxisto kostos kai to regret den ginetai arnitiko
+    meters = np.expm1(scores)
+    best = scores.idxmin(axis=1)
+    truth = pd.DataFrame({'True_Best': best,
+                          'True_Best_Cost_m': [meters.loc[g, m] for g, m in best.items()]})
+    return truth, meters
+
+
+def compare_with_exhaustive(result, results_df, methods, groups=None, failure_penalty=FAILURE_PENALTY_M):
+    """Συμφωνία νικητών και regret (m, γεωμετρικός μέσος όπως στην κατάταξη) του adaptive έναντι του exhaustive"""
+    if groups is None:
+        groups = pattern_groups(results_df['original_address'])
+    truth, meters = exhaustive_winners(results_df, methods, groups, failure_penalty)
+    out = result['groups'].set_index('Group').join(truth)
+    out['Chosen_Cost_m'] = [meters.loc[g, m] for g, m in zip(out.index, out['Best_Method'])]
+    out['Regret_m'] = out['Chosen_Cost_m'] - out['True_Best_Cost_m']
+    out['Agree'] = out['Best_Method'] == out['True_Best']
+    return out.reset_index()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Adaptive (successive halving) geocoding experiments - offline replay")
+    parser.add_argument('--recorded', required=True, help="wide results xlsx (px. geocoding_19methods_full.xlsx)")
+    parser.add_argument('--methods', nargs='+', default=None)
+    parser.add_argument('--budget', type=float, default=None, help="klasma ton N x M klisewn (px. 0.25)")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', default=None, help="xlsx me stats / groups / observations")
+    args = parser.parse_args(argv)
+
+    from geocoding_experiments import find_method_columns
+
+    df = pd.read_excel(args.recorded)
+    methods = args.methods or find_method_columns(df)
+    oracle = ReplayOracle(df)
+    result = run_adaptive(df, oracle, methods, budget_fraction=args.budget,
+                          batch_size=args.batch_size, seed=args.seed)
+    comparison = compare_with_exhaustive(result, df, methods)
+
+    print(f"Klisis: {result['calls']:,} apo {result['exhaustive_calls']:,} "
+          f"({result['calls'] / result['exhaustive_calls'] * 100:.1f}%)")
+    print(comparison[['Group', 'Stations', 'Calls', 'Best_Method', 'Confidence', 'True_Best',
+                      'Regret_m']].to_string(index=False))
+    print()
+    print(result['stats'].head(10).to_string(index=False))
+    if args.out:
+        with pd.ExcelWriter(args.out) as writer:
+            result['stats'].to_excel(writer, sheet_name='stats', index=False)
+            comparison.to_excel(writer, sheet_name='groups', index=False)
+            result['observations'].to_excel(writer, sheet_name='observations', index=False)
+        print(f"\nApothikeytike: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
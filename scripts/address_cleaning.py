@@ -0,0 +1,468 @@
+# -*- coding: utf-8 -*-
+# address_cleaning
+# Oles oi methodoi katharismou diefthinseon (v1-v30) se ena importable module,
+# oste notebooks, scripts kai benchmarks na xrisimopoioun ton idio kodika.
+
+import re
+from math import radians, cos, sin, asin, sqrt
+
+import numpy as np
+import pandas as pd
+
+
+def haversine_distance(lat1, lon1, lat2, lon2):
+    """Υπολογισμός απόστασης σε μέτρα"""
+    if pd.isna(lat1) or pd.isna(lon1) or pd.isna(lat2) or pd.isna(lon2):
+        return None
+    
+    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
+    c = 2 * asin(sqrt(a))
+    return c * 6371000
+
+
+def haversine_array(lat1, lon1, lat2, lon2):
+    """Το haversine_distance για πίνακες (NaN όπου λείπει συντεταγμένη)"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype=float)) for x in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * np.arcsin(np.sqrt(a)) * 6371000
+
+
+def extract_address_features(address):
+    # Exagogi charakteristikon apo diefthinsi
+    
+    features = {}
+    
+    # Basic presence checks
+    features['has_question_mark'] = 1 if '?' in address else 0
+    features['has_peo'] = 1 if re.search(r'Π\.?Ε\.?Ο\.?|ΠΕΟ', address, re.IGNORECASE) else 0
+    features['has_eo'] = 1 if re.search(r'Ε\.?Ο\.?|ΕΟ', address, re.IGNORECASE) else 0
+    features['has_neo'] = 1 if re.search(r'Ν\.?Ε\.?Ο\.?|ΝΕΟ', address, re.IGNORECASE) else 0
+    features['has_dash'] = 1 if '-' in address else 0
+    features['has_comma'] = 1 if ',' in address else 0
+    
+    # KM notation
+    if re.search(r'ΧΛΜ|χλμ', address):
+        features['km_notation'] = 0
+    elif re.search(r'Km|km|ΚΜ', address):
+        features['km_notation'] = 1
+    else:
+        features['km_notation'] = 2
+    
+    # Arithmos poleon
+    cities = re.findall(r'[Α-ΩA-Z][α-ωa-z]+', address)
+    keywords = {'ΧΛΜ', 'Km', 'ΠΕΟ', 'ΕΟ', 'ΝΕΟ', 'ΟΔΟΣ', 'ΕΘΝΙΚΗΣ'}
+    cities = [c for c in cities if c.upper() not in keywords]
+    features['num_cities'] = len(cities)
+    
+    # Thesi KM
+    km_match = re.search(r'(\d+)[οηόήOH]?\s*(?:ΧΛΜ|χλμ|Km|km|ΚΜ)', address, re.IGNORECASE)
+    if km_match:
+        km_position = address.find(km_match.group(0))
+        if km_position < len(address) * 0.3:
+            features['km_position'] = 0  # start
+        elif km_position > len(address) * 0.7:
+            features['km_position'] = 2  # end
+        else:
+            features['km_position'] = 1  # middle
+    else:
+        features['km_position'] = 3  # no km
+    
+    # Ordinal numbers
+    features['has_ordinal'] = 1 if re.search(r'\d+[οηόήOH]', address) else 0
+    
+    # Mikos
+    features['address_length'] = len(address)
+    features['num_words'] = len(address.split())
+    features['num_dots'] = address.count('.')
+    
+    # Archi me arithmo
+    features['starts_with_digit'] = 1 if address.strip()[0].isdigit() else 0
+    
+    return features
+
+
+# ============= CLEANING METHODS (v1-v19) =============
+
+def clean_v1_original(address):
+    # v1: Kamia allagi
+    return address
+
+def clean_v2_remove_prefix(address):
+    # v2: Afairesi Π.Ε.Ο., Ε.Ο., Ν.Ε.Ο.
+    address = re.sub(r'Π\.?\s?Ε\.?\s?Ο\.?', '', address, flags=re.IGNORECASE)
+    address = re.sub(r'Ε\.?\s?Ο\.?', '', address, flags=re.IGNORECASE)
+    address = re.sub(r'Ν\.?\s?Ε\.?\s?Ο\.?', '', address, flags=re.IGNORECASE)
+    address = re.sub(r'ΠΕΟ|ΕΟ|ΝΕΟ', '', address, flags=re.IGNORECASE)
+    return ' '.join(address.split())
+
+def clean_v3_normalize_km(address):
+    # v3: Kanonikopisi ΧΛΜ se Km
+    address = re.sub(r'ΧΛΜ|χλμ|χιλ\.?|ΚΜ', 'Km', address, flags=re.IGNORECASE)
+    address = re.sub(r'(\d+)[οηόήΟΗ]?\s+(Km|km)', r'\1 Km', address)
+    return address
+
+def clean_v4_remove_punct_v1(address):
+    # v4: Afairesi - kai ,
+    address = address.replace('-', ' ')
+    address = address.replace(',', ' ')
+    address = re.sub(r'\s+', ' ', address)
+    return address.strip()
+
+def clean_v5_remove_punct_v2(address):
+    # v5: Afairesi -, ?, ,
+    address = address.replace('-', ' ')
+    address = address.replace('?', ' ')
+    address = address.replace(',', ' ')
+    address = re.sub(r'\s+', ' ', address)
+    return address.strip()
+
+def clean_v6_remove_dots(address):
+    # v6: Afairesi teleton
+    address = address.replace('Π.Ε.Ο.', 'ΠΕΟ')
+    address = address.replace('Ε.Ο.', 'ΕΟ')
+    address = address.replace('Ν.Ε.Ο.', 'ΝΕΟ')
+    address = address.replace('.', '')
+    return ' '.join(address.split())
+
+def clean_v7_remove_all_punct(address):
+    # v7: Afairesi olis tis stiksis
+    address = re.sub(r'[.,;:\-\?!/()\[\]{}]', ' ', address)
+    address = re.sub(r'\s+', ' ', address)
+    return address.strip()
+
+def clean_v8_combined_basic(address):
+    # v8: Syndiasmos vasikon methodon
+    address = clean_v2_remove_prefix(address)
+    address = clean_v3_normalize_km(address)
+    address = clean_v5_remove_punct_v2(address)
+    return address
+
+def clean_v9_combined_aggressive(address):
+    # v9: Epithetikos katharismos
+    address = clean_v2_remove_prefix(address)
+    address = clean_v3_normalize_km(address)
+    address = clean_v5_remove_punct_v2(address)
+    address = clean_v6_remove_dots(address)
+    return address
+
+def clean_v10_add_eo_prefix(address):
+    # v10: Prosthiki 'Ethniki Odos' sto prefix
+    km_match = re.search(r'(\d+)[οηOH]?\s*(?:ΧΛΜ|χλμ|Km|km|ΚΜ)', address, flags=re.IGNORECASE)
+    cities = re.findall(r'[Α-ΩA-Z][α-ωa-z]+', address)
+    
+    if km_match and len(cities) >= 2:
+        km_num = km_match.group(1)
+        return f"Εθνική Οδός {cities[0]} {cities[1]} {km_num} χλμ"
+    return address
+
+def clean_v11_km_first(address):
+    # v11: Km proto sti seira
+    km_match = re.search(r'(\d+)[οηOH]?\s*(?:ΧΛΜ|χλμ|Km|km|ΚΜ)', address, flags=re.IGNORECASE)
+    cities = re.findall(r'[Α-ΩA-Z][α-ωa-z]+', address)
+    
+    if km_match and len(cities) >= 2:
+        km_num = km_match.group(1)
+        return f"{km_num} Km {cities[0]} {cities[1]}"
+    
+    return clean_v8_combined_basic(address)
+
+def clean_v12_simplify_cities_only(address):
+    # v12: Mono poleis
+    cities = re.findall(r'[Α-ΩA-Z][α-ωa-z]+', address)
+    keywords = {'ΧΛΜ', 'Km', 'ΠΕΟ', 'ΕΟ', 'ΝΕΟ', 'ΟΔΟΣ', 'ΕΘΝΙΚΗΣ'}
+    cities = [c for c in cities if c.upper() not in keywords]
+    
+    if len(cities) >= 2:
+        return f"{cities[0]} {cities[1]}"
+    elif len(cities) == 1:
+        return cities[0]
+    return address
+
+def clean_v13_simplify_km_cities(address):
+    # v13: Km kai poleis
+    km_match = re.search(r'(\d+)[οηOH]?\s*(?:ΧΛΜ|χλμ|Km|km|ΚΜ)', address, flags=re.IGNORECASE)
+    cities = re.findall(r'[Α-ΩA-Z][α-ωa-z]+', address)
+    keywords = {'ΧΛΜ', 'Km', 'ΠΕΟ', 'ΕΟ', 'ΝΕΟ', 'ΟΔΟΣ', 'ΕΘΝΙΚΗΣ'}
+    cities = [c for c in cities if c.upper() not in keywords]
+    
+    if km_match and len(cities) >= 2:
+        km_num = km_match.group(1)
+        return f"{km_num} Km {cities[0]} {cities[1]}"
+    return clean_v8_combined_basic(address)
+
+def clean_v14_add_greece_suffix(address):
+    # v14: Prosthiki Greece
+    cleaned = clean_v8_combined_basic(address)
+    return f"{cleaned}, Greece"
+
+def clean_v15_add_highway_context(address):
+    # v15: Prosthiki highway
+    cleaned = clean_v8_combined_basic(address)
+    return f"highway {cleaned}"
+
+def clean_v16_english_translation(address):
+    # v16: Meriki metafrasi sta agglika
+    address = re.sub(r'ΧΛΜ|χλμ|χιλ', 'km', address, flags=re.IGNORECASE)
+    address = re.sub(r'Π\.?Ε\.?Ο\.?|ΠΕΟ', 'highway', address, flags=re.IGNORECASE)
+    address = re.sub(r'Ε\.?Ο\.?|ΕΟ', 'national road', address, flags=re.IGNORECASE)
+    address = clean_v5_remove_punct_v2(address)
+    return address
+
+def clean_v17_reverse_cities(address):
+    # v17: Antistrofi seira poleon
+    cities = re.findall(r'[Α-ΩA-Z][α-ωa-z]+', address)
+    keywords = {'ΧΛΜ', 'Km', 'ΠΕΟ', 'ΕΟ', 'ΝΕΟ', 'ΟΔΟΣ', 'ΕΘΝΙΚΗΣ'}
+    cities = [c for c in cities if c.upper() not in keywords]
+    
+    if len(cities) >= 2:
+        km_match = re.search(r'(\d+)[οηOH]?\s*(?:ΧΛΜ|χλμ|Km|km|ΚΜ)', address, flags=re.IGNORECASE)
+        if km_match:
+            km_num = km_match.group(1)
+            return f"{km_num} Km {cities[1]} {cities[0]}"
+    return address
+
+def clean_v18_lowercase_normalized(address):
+    # v18: Mikra grammata
+    address = clean_v8_combined_basic(address)
+    return address.lower()
+
+def clean_v19_uppercase_normalized(address):
+    # v19: Kefalaia grammata
+    address = clean_v8_combined_basic(address)
+    return address.upper()
+
+
+# Dictionary gia oles tis methods
+CLEANING_METHODS = {
+    'v1_original': clean_v1_original,
+    'v2_remove_prefix': clean_v2_remove_prefix,
+    'v3_normalize_km': clean_v3_normalize_km,
+    'v4_remove_punct_v1': clean_v4_remove_punct_v1,
+    'v5_remove_punct_v2': clean_v5_remove_punct_v2,
+    'v6_remove_dots': clean_v6_remove_dots,
+    'v7_remove_all_punct': clean_v7_remove_all_punct,
+    'v8_combined_basic': clean_v8_combined_basic,
+    'v9_combined_aggressive': clean_v9_combined_aggressive,
+    'v10_add_eo_prefix': clean_v10_add_eo_prefix,
+    'v11_km_first': clean_v11_km_first,
+    'v12_simplify_cities_only': clean_v12_simplify_cities_only,
+    'v13_simplify_km_cities': clean_v13_simplify_km_cities,
+    'v14_add_greece_suffix': clean_v14_add_greece_suffix,
+    'v15_add_highway_context': clean_v15_add_highway_context,
+    'v16_english_translation': clean_v16_english_translation,
+    'v17_reverse_cities': clean_v17_reverse_cities,
+    'v18_lowercase_normalized': clean_v18_lowercase_normalized,
+    'v19_uppercase_normalized': clean_v19_uppercase_normalized,
+}
+
+
+# ============= NEW CLEANING METHODS (v20-v30) =============
+
+def clean_v20_km_city1_city2(address):
+    """v20: Format: [Αριθμός] Km [Πόλη1] [Πόλη2]"""
+    km_match = re.search(r'(\d+)[οηόήOH]?\s*(?:ΧΛΜ|χλμ|Km|km|ΚΜ)', address, re.IGNORECASE)
+    cities = re.findall(r'[Α-ΩA-Z][α-ωa-z]+', address)
+    keywords = {'ΧΛΜ', 'Km', 'ΠΕΟ', 'ΕΟ', 'ΝΕΟ', 'ΟΔΟΣ', 'ΕΘΝΙΚΗΣ'}
+    cities = [c for c in cities if c.upper() not in keywords]
+    
+    if km_match and len(cities) >= 2:
+        km_num = km_match.group(1)
+        return f"{km_num} Km {cities[0]} {cities[1]}"
+    return address
+
+def clean_v21_km_city1_city2_genitive(address):
+    """v21: Format: [Αριθμός] Km [Πόλη1]ών [Πόλη2]ς"""
+    km_match = re.search(r'(\d+)[οηόήOH]?\s*(?:ΧΛΜ|χλμ|Km|km|ΚΜ)', address, re.IGNORECASE)
+    cities = re.findall(r'[Α-ΩA-Z][α-ωa-z]+', address)
+    keywords = {'ΧΛΜ', 'Km', 'ΠΕΟ', 'ΕΟ', 'ΝΕΟ', 'ΟΔΟΣ', 'ΕΘΝΙΚΗΣ'}
+    cities = [c for c in cities if c.upper() not in keywords]
+    
+    if km_match and len(cities) >= 2:
+        km_num = km_match.group(1)
+        # Προσθήκη γενικής πτώσης (simplified)
+        city1_gen = cities[0] + "ών" if not cities[0].endswith('α') else cities[0][:-1] + "ών"
+        city2_gen = cities[1] + "ς" if cities[1].endswith('α') else cities[1] + "ας"
+        return f"{km_num} Km {city1_gen} {city2_gen}"
+    return address
+
+def clean_v22_km_eo_city1_city2(address):
+    """v22: Format: [Αριθμός] Km Εθνικής Οδού [Πόλη1]ών [Πόλη2]ς"""
+    km_match = re.search(r'(\d+)[οηόήOH]?\s*(?:ΧΛΜ|χλμ|Km|km|ΚΜ)', address, re.IGNORECASE)
+    cities = re.findall(r'[Α-ΩA-Z][α-ωa-z]+', address)
+    keywords = {'ΧΛΜ', 'Km', 'ΠΕΟ', 'ΕΟ', 'ΝΕΟ', 'ΟΔΟΣ', 'ΕΘΝΙΚΗΣ'}
+    cities = [c for c in cities if c.upper() not in keywords]
+    
+    if km_match and len(cities) >= 2:
+        km_num = km_match.group(1)
+        city1_gen = cities[0] + "ών" if not cities[0].endswith('α') else cities[0][:-1] + "ών"
+        city2_gen = cities[1] + "ς" if cities[1].endswith('α') else cities[1] + "ας"
+        return f"{km_num} Km Εθνικής Οδού {city1_gen} {city2_gen}"
+    return address
+
+def clean_v23_city1_pros_city2(address):
+    """v23: Format: [Πόλη1] προς [Πόλη2]"""
+    cities = re.findall(r'[Α-ΩA-Z][α-ωa-z]+', address)
+    keywords = {'ΧΛΜ', 'Km', 'ΠΕΟ', 'ΕΟ', 'ΝΕΟ', 'ΟΔΟΣ', 'ΕΘΝΙΚΗΣ'}
+    cities = [c for c in cities if c.upper() not in keywords]
+    
+    if len(cities) >= 2:
+        km_match = re.search(r'(\d+)[οηόήOH]?\s*(?:ΧΛΜ|χλμ|Km|km|ΚΜ)', address, re.IGNORECASE)
+        if km_match:
+            km_num = km_match.group(1)
+            return f"{cities[0]} προς {cities[1]}, {km_num}ο χλμ"
+        return f"{cities[0]} προς {cities[1]}"
+    return address
+
+def clean_v24_remove_all_prefixes(address):
+    """v24: Αφαίρεση ΟΛΩΝ των prefixes (ΠΕΟ, ΕΟ, ΝΕΟ, ΟΔΟΣ, ΕΘΝΙΚΗΣ)"""
+    # Πιο aggressive αφαίρεση
+    patterns = [
+        r'Π\.?\s?Ε\.?\s?Ο\.?',
+        r'Ε\.?\s?Ο\.?',
+        r'Ν\.?\s?Ε\.?\s?Ο\.?',
+        r'ΠΕΟ|ΕΟ|ΝΕΟ',
+        r'ΕΘΝΙΚΗΣ?\s+ΟΔΟΥ?',
+        r'ΕΠΑΡΧΙΑΚΗ?\s+ΟΔΟΥ?',
+        r'ΠΑΛΙΑ\s+ΕΘΝΙΚΗ?\s+ΟΔΟΥ?',
+    ]
+    
+    for pattern in patterns:
+        address = re.sub(pattern, '', address, flags=re.IGNORECASE)
+    
+    # Κανονικοποίηση χλμ
+    address = re.sub(r'ΧΛΜ|χλμ|χιλ\.?|ΚΜ', 'χλμ', address, flags=re.IGNORECASE)
+    address = re.sub(r'(\d+)[οηόήΟΗ]?\s+(χλμ)', r'\1ο χλμ', address)
+    
+    return ' '.join(address.split())
+
+def clean_v25_big_cities_pattern(address):
+    """v25: Pattern για μεγάλες πόλεις (Αθήνα, Θεσσαλονίκη, Πάτρα)"""
+    big_cities = ['Αθήνα', 'Αθηνών', 'Θεσσαλονίκη', 'Θεσσαλονίκης', 'Πάτρα', 'Πατρών', 
+                  'Λάρισα', 'Λαρίσης', 'Ηράκλειο', 'Ηρακλείου', 'Βόλος', 'Βόλου',
+                  'Ιωάννινα', 'Ιωαννίνων', 'Χανιά', 'Χανίων', 'Λαμία', 'Λαμίας']
+    
+    km_match = re.search(r'(\d+)[οηόήOH]?\s*(?:ΧΛΜ|χλμ|Km|km|ΚΜ)', address, re.IGNORECASE)
+    
+    # Βρες αν υπάρχει μεγάλη πόλη
+    found_big_city = None
+    for city in big_cities:
+        if city in address:
+            found_big_city = city
+            break
+    
+    if found_big_city and km_match:
+        km_num = km_match.group(1)
+        # Βρες τη δεύτερη πόλη
+        cities = re.findall(r'[Α-ΩA-Z][α-ωa-z]+', address)
+        other_city = None
+        for c in cities:
+            if c != found_big_city and c not in ['ΧΛΜ', 'Km', 'ΠΕΟ', 'ΕΟ', 'ΝΕΟ']:
+                other_city = c
+                break
+        
+        if other_city:
+            return f"Εθνική Οδός {found_big_city} {other_city}, {km_num}ο χιλιόμετρο"
+    
+    return clean_v24_remove_all_prefixes(address)
+
+def clean_v26_small_cities_pattern(address):
+    """v26: Pattern για μικρές πόλεις"""
+    km_match = re.search(r'(\d+)[οηόήOH]?\s*(?:ΧΛΜ|χλμ|Km|km|ΚΜ)', address, re.IGNORECASE)
+    cities = re.findall(r'[Α-ΩA-Z][α-ωa-z]+', address)
+    keywords = {'ΧΛΜ', 'Km', 'ΠΕΟ', 'ΕΟ', 'ΝΕΟ', 'ΟΔΟΣ', 'ΕΘΝΙΚΗΣ'}
+    cities = [c for c in cities if c.upper() not in keywords]
+    
+    # Για μικρές πόλεις, χρησιμοποίησε πιο περιγραφικό format
+    if km_match and len(cities) >= 2:
+        km_num = km_match.group(1)
+        return f"Επαρχιακή Οδός {cities[0]} - {cities[1]}, στο {km_num}ο χιλιόμετρο"
+    
+    return clean_v24_remove_all_prefixes(address)
+
+def clean_v27_english_km_pattern(address):
+    """v27: English pattern: Highway [City1]-[City2] km [number]"""
+    km_match = re.search(r'(\d+)[οηόήOH]?\s*(?:ΧΛΜ|χλμ|Km|km|ΚΜ)', address, re.IGNORECASE)
+    cities = re.findall(r'[Α-ΩA-Z][α-ωa-z]+', address)
+    keywords = {'ΧΛΜ', 'Km', 'ΠΕΟ', 'ΕΟ', 'ΝΕΟ', 'ΟΔΟΣ', 'ΕΘΝΙΚΗΣ'}
+    cities = [c for c in cities if c.upper() not in keywords]
+    
+    if km_match and len(cities) >= 2:
+        km_num = km_match.group(1)
+        return f"Highway {cities[0]}-{cities[1]} km {km_num}"
+    
+    return address
+
+def clean_v28_nomoi_pattern(address):
+    """v28: Προσθήκη νομού context"""
+    cleaned = clean_v24_remove_all_prefixes(address)
+    # Θα χρειαστεί το countyName από το DataFrame
+    return cleaned  # Will be enhanced in the loop with county
+
+def clean_v29_only_km_number(address):
+    """v29: Μόνο χλμ και αριθμός για testing"""
+    km_match = re.search(r'(\d+)[οηόήOH]?\s*(?:ΧΛΜ|χλμ|Km|km|ΚΜ)', address, re.IGNORECASE)
+    cities = re.findall(r'[Α-ΩA-Z][α-ωa-z]+', address)
+    keywords = {'ΧΛΜ', 'Km', 'ΠΕΟ', 'ΕΟ', 'ΝΕΟ', 'ΟΔΟΣ', 'ΕΘΝΙΚΗΣ'}
+    cities = [c for c in cities if c.upper() not in keywords]
+    
+    if km_match and len(cities) >= 1:
+        km_num = km_match.group(1)
+        return f"{km_num}ο χλμ {cities[0]}"
+    
+    return address
+
+def clean_v30_inferred_highway(address):
+    """v30: Προσπάθεια να συμπεράνει την εθνική οδό"""
+    cities = re.findall(r'[Α-ΩA-Z][α-ωa-z]+', address)
+    keywords = {'ΧΛΜ', 'Km', 'ΠΕΟ', 'ΕΟ', 'ΝΕΟ', 'ΟΔΟΣ', 'ΕΘΝΙΚΗΣ'}
+    cities = [c for c in cities if c.upper() not in keywords]
+    
+    # Known highway patterns
+    highway_map = {
+        ('Αθήνα', 'Λαμία'): 'Α1',
+        ('Αθήνα', 'Θεσσαλονίκη'): 'Α1', 
+        ('Αθήνα', 'Κόρινθος'): 'Α8',
+        ('Αθήνα', 'Πάτρα'): 'Α8',
+        ('Λάρισα', 'Βόλος'): 'ΕΟ3',
+        ('Θεσσαλονίκη', 'Καβάλα'): 'Α2',
+    }
+    
+    if len(cities) >= 2:
+        for (c1, c2), highway in highway_map.items():
+            if (c1 in cities and c2 in cities) or (c2 in cities and c1 in cities):
+                km_match = re.search(r'(\d+)', address)
+                if km_match:
+                    return f"{highway} {km_match.group(1)} km"
+                return f"{highway} {cities[0]} {cities[1]}"
+    
+    return clean_v24_remove_all_prefixes(address)
+
+# Dictionary με τις νέες μεθόδους
+NEW_CLEANING_METHODS = {
+    'v20_km_city1_city2': clean_v20_km_city1_city2,
+    'v21_km_city1_city2_genitive': clean_v21_km_city1_city2_genitive,
+    'v22_km_eo_city1_city2': clean_v22_km_eo_city1_city2,
+    'v23_city1_pros_city2': clean_v23_city1_pros_city2,
+    'v24_remove_all_prefixes': clean_v24_remove_all_prefixes,
+    'v25_big_cities_pattern': clean_v25_big_cities_pattern,
+    'v26_small_cities_pattern': clean_v26_small_cities_pattern,
+    'v27_english_km_pattern': clean_v27_english_km_pattern,
+    'v28_nomoi_pattern': clean_v28_nomoi_pattern,
+    'v29_only_km_number': clean_v29_only_km_number,
+    'v30_inferred_highway': clean_v30_inferred_highway,
+}
+
+ALL_CLEANING_METHODS = {**CLEANING_METHODS, **NEW_CLEANING_METHODS}
+
+
+def build_query(method_name, address, county):
+    """Καθαρισμός + geocoding query όπως στο 1_additional_experiments (v28 με νομό)"""
+    if method_name == 'v28_nomoi_pattern':
+        cleaned_address = clean_v24_remove_all_prefixes(address)
+        cleaned_address = f"{cleaned_address}, Νομός {county}"
+    else:
+        cleaned_address = ALL_CLEANING_METHODS[method_name](address)
+    return cleaned_address, f"{cleaned_address}, {county}, Greece"
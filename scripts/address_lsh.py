@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+# address_lsh
+# Omadopoiisi sxedon idion diefthinseon ("6ο ΧΙΛ. Ε.Ο. ΑΓΡΙΝΙΟΥ-ΙΩΑΝΝΙΝΩΝ" /
+# "6o χιλ. ΕΟ Αγρινιου Ιωαννινων") me MinHash + LSH pano se character
+# n-grams, mesa ston idio nomo. Oi ypopsifies ypo-omades vgainoun apo ta LSH
+# buckets (oxi N^2 sygkriseis) kai epivevaionontai me tin pragmatiki Jaccard.
+# Oi arithmoi (xiliometra) prepei na einai idioi - to 6ο kai to 7ο χλμ tis
+# idias odou einai diaforetika pratiria. To geocoding ginetai mia fora ana
+# omada (antiprosopos) kai to apotelesma moirazetai sta ypoloipa meli.
+#
+#   from address_lsh import address_groups, calls_saved
+#   groups = address_groups(df['original_address'], df['countyName'])
+#   print(calls_saved(groups, n_methods=11))
+
+import re
+import unicodedata
+import zlib
+
+import numpy as np
+import pandas as pd
+
+# Parametroi
+SHINGLE_SIZE = 3
+NUM_PERM = 64
+BANDS = 16                   # 16 x 4 rows -> katofli LSH ~ (1/16)^(1/4) = 0.5
+JACCARD_THRESHOLD = 0.6      # elaxisti Jaccard (shingles) gia na enothoun dyo diefthinseis
+MAX_HASH = (1 << 32) - 1
+HASH_BLOCK = 1 << 16          # shingles ana block (mnimi: block x num_perm x 4 bytes)
+
+# Latinika grammata pou moiazoun me ellinika (6o / 6ο, EO / ΕΟ, Km / Κm)
+LOOKALIKES = str.maketrans('ABEHIKMNOPTXYZ', 'ΑΒΕΗΙΚΜΝΟΡΤΧΥΖ')
+
+
+def normalize_address(address):
+    """Κεφαλαία, χωρίς τόνους/στίξη, με ελληνικά τα λατινικά lookalikes"""
+    text = unicodedata.normalize('NFD', str(address).upper())
+    text = ''.join(ch for ch in text if unicodedata.category(ch) != 'Mn')
+    text = text.translate(LOOKALIKES)
+    text = re.sub(r'[^\w]+', ' ', text)
+    return ' '.join(text.split())
+
+
+def shingles(text, k=SHINGLE_SIZE):
+    """Σύνολο από hashes των character k-grams"""
+    text = f' {text} '
+    if len(text) <= k:
+        return {zlib.crc32(text.encode('utf-8'))}
+    return {zlib.crc32(text[i:i + k].encode('utf-8')) for i in range(len(text) - k + 1)}
+
+
+def _permutations(num_perm, seed):
+    # Multiply-shift hashing: h(x) = ((a*x + b) mod 2^64) >> 32, a peritto
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def minhash_signatures(shingle_sets, num_perm=NUM_PERM, seed=1):
+    """(N, num_perm) uint32 MinHash υπογραφές - ένα πέρασμα NumPy σε όλα τα shingles"""
+    a, b = _permutations(num_perm, seed)
+    lengths = np.fromiter((len(s) for s in shingle_sets), dtype=np.int64, count=len(shingle_sets))
+    flat = np.fromiter((h for s in shingle_sets for h in s), dtype=np.uint64, count=int(lengths.sum()))
+    hashed = np.empty((len(flat), num_perm), dtype=np.uint32)
+    with np.errstate(over='ignore'):
+        for start in range(0, len(flat), HASH_BLOCK):
+            x = flat[start:start + HASH_BLOCK, None]
+            hashed[start:start + len(x)] = (a * x + b) >> np.uint64(32)
+    signatures = np.full((len(shingle_sets), num_perm), MAX_HASH, dtype=np.uint32)
+    nonempty = lengths > 0
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+    if nonempty.any():
+        signatures[nonempty] = np.minimum.reduceat(hashed, offsets[nonempty], axis=0)
+    return signatures
+
+
+def _numbers(text):
+    # Oi arithmoi tis diefthinsis (xiliometra, odos) - prepei na symfonoun
+    return ' '.join(re.findall(r'\d+', text))
+
+
+class _UnionFind:
+    def __init__(self, n):
+        self.parent = np.arange(n)
+
+    def find(self, i):
+        root = i
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[i] != root:
+            self.parent[i], i = root, self.parent[i]
+        return root
+
+    def union(self, i, j):
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+
+def address_groups(addresses, counties=None, threshold=JACCARD_THRESHOLD, num_perm=NUM_PERM, bands=BANDS,
+                   k=SHINGLE_SIZE, seed=1):
+    """Ομάδα κάθε διεύθυνσης -> DataFrame με group, representative, normalized (ίδιο index)
+
+    Ίδια ομάδα = ίδιος νομός, ίδιοι αριθμοί και Jaccard(shingles) >= threshold
+    μέσω LSH υποψηφίων (transitive: A~B, B~C -> μία ομάδα).
+    """
+    if num_perm % bands:
+        raise ValueError(f"num_perm ({num_perm}) prepei na diaireitai me ta bands ({bands})")
+    addresses = pd.Series(addresses).fillna('').astype(str)
+    counties = (pd.Series(counties, index=addresses.index).fillna('').astype(str) if counties is not None
+                else pd.Series('', index=addresses.index))
+
+    # Oi idies (meta to normalization) diefthinseis enonontai amesos - MinHash mono stis monadikes
+    raw_codes, raw_uniques = pd.factorize(addresses)
+    normalized = pd.Series(raw_uniques).map(normalize_address).to_numpy(dtype=object)[raw_codes]
+    block = counties.str.upper().to_numpy(dtype=object) + '|' + np.array([_numbers(t) for t in normalized],
+                                                                        dtype=object)
+    codes, uniques = pd.factorize(block + '|' + normalized)
+    first = np.full(len(uniques), len(codes))
+    np.minimum.at(first, codes, np.arange(len(codes)))
+    unique_norm = normalized[first]
+    unique_block = pd.factorize(block[first])[0].astype(np.uint32)
+
+    sets = [shingles(text, k) for text in unique_norm]
+    signatures = minhash_signatures(sets, num_perm, seed)
+    rows = num_perm // bands
+
+    # Ypopsifia zeygi: idio block kai idia rows se toulaxiston ena band (anchor = to proto tou bucket)
+    candidates = []
+    for band in range(bands):
+        key = np.column_stack([unique_block, signatures[:, band * rows:(band + 1) * rows]])
+        key = np.ascontiguousarray(key).view(np.dtype((np.void, key.shape[1] * 4))).ravel()
+        _, bucket = np.unique(key, return_inverse=True)
+        order = np.argsort(bucket, kind='stable')
+        sorted_bucket = bucket[order]
+        starts = np.flatnonzero(np.r_[True, sorted_bucket[1:] != sorted_bucket[:-1]])
+        anchors = order[np.repeat(starts, np.diff(np.r_[starts, len(order)]))]
+        others = order
+        keep = anchors != others
+        candidates.append(np.column_stack([anchors[keep], others[keep]]))
+    pairs = np.unique(np.concatenate(candidates), axis=0) if candidates else np.empty((0, 2), dtype=int)
+
+    uf = _UnionFind(len(uniques))
+    for anchor, other in pairs:
+        sa, sb = sets[anchor], sets[other]
+        if len(sa & sb) / len(sa | sb) >= threshold:
+            uf.union(anchor, other)
+
+    roots = np.array([uf.find(i) for i in range(len(uniques))])
+    group_of_unique = pd.factorize(roots)[0]
+    group = group_of_unique[codes]
+    # Antiprosopos: i pio syxni diefthinsi tis omadas (i proti se isopalia)
+    frame = pd.DataFrame({'group': group, 'address': addresses.to_numpy()}, index=addresses.index)
+    counts = frame.groupby(['group', 'address'], sort=False).size().rename('n').reset_index()
+    best = counts.sort_values(['group', 'n'], ascending=[True, False], kind='stable').drop_duplicates('group')
+    rep_address = best.set_index('group')['address']
+    position = pd.Series(np.arange(len(frame)), index=frame.index)
+    is_rep = frame['address'].to_numpy() == rep_address.reindex(group).to_numpy()
+    rep_pos = pd.Series(position.to_numpy()[is_rep], index=group[is_rep]).groupby(level=0).first()
+    return pd.DataFrame({
+        'group': group,
+        'representative': rep_pos.reindex(group).to_numpy(),     # thesi (0..N-1) tou antiprosopou
+        'normalized': normalized,
+    }, index=addresses.index)
+
+
+def calls_saved(groups, n_methods=1):
+    """API calls χωρίς/με ομαδοποίηση (ένα geocode ανά ομάδα και μέθοδο)"""
+    n, n_groups = len(groups), int(groups['group'].nunique())
+    return {
+        'stations': n,
+        'groups': n_groups,
+        'grouped_stations': int((groups.groupby('group')['group'].transform('size') > 1).sum()),
+        'calls_without': n * n_methods,
+        'calls_with': n_groups * n_methods,
+        'calls_saved': (n - n_groups) * n_methods,
+        'saved_%': (n - n_groups) / n * 100 if n else 0.0,
+    }
+
+
+def main(argv=None):
+    import argparse
+
+    from paths import STATIONS_FILE
+
+    parser = argparse.ArgumentParser(description="Fuzzy omadopoiisi diefthinseon (MinHash/LSH) ana nomo")
+    parser.add_argument('--stations', default=str(STATIONS_FILE))
+    parser.add_argument('--address-column', default='gasStationAddress')
+    parser.add_argument('--county-column', default='countyName')
+    parser.add_argument('--threshold', type=float, default=JACCARD_THRESHOLD)
+    parser.add_argument('--methods', type=int, default=11, help="methodoi ana stathmo (gia ta API calls)")
+    parser.add_argument('--out', default=None, help="xlsx me tin omada kathe stathmou")
+    args = parser.parse_args(argv)
+
+    df = pd.read_excel(args.stations)
+    groups = address_groups(df[args.address_column], df[args.county_column], threshold=args.threshold)
+    report = calls_saved(groups, args.methods)
+    print(f"{report['stations']} stathmoi -> {report['groups']} omades "
+          f"({report['grouped_stations']} stathmoi se omades > 1)")
+    print(f"API calls: {report['calls_without']:,} -> {report['calls_with']:,} "
+          f"(-{report['calls_saved']:,}, {report['saved_%']:.1f}%)")
+
+    sizes = groups.groupby('group')['group'].transform('size')
+    examples = df.assign(group=groups['group'], size=sizes)[sizes > 1].sort_values(['size', 'group'],
+                                                                                   ascending=[False, True])
+    print(examples[['group', args.county_column, args.address_column]].head(15).to_string(index=False))
+    if args.out:
+        df.assign(**groups[['group', 'representative']]).to_excel(args.out, index=False)
+        print(f"\nApothikeytike: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+# address_patterns
+# Ta patterns ton diefthinseon (ΠΕΟ/ΕΟ/ΝΕΟ, χλμ, poleis, ...) os vectorized
+# synartiseis pano se mia stili diefthinseon (Series -> bool Series). Ta
+# xrisimopoiei to pattern analysis kai o rule engine.
+
+import pandas as pd
+
+
+def _contains(pattern, case=False):
+    return lambda s: s.str.contains(pattern, case=case, regex=True)
+
+
+def _starts_with_digit(s):
+    first = s.str.strip().str[0]
+    return first.str.isdigit().fillna(False).astype(bool)
+
+
+# Kathe pattern einai vectorized synartisi pano se oli ti stili diefthinseon,
+# opote ena neo pattern kostizei ena perasma tis stilis
+ADDRESS_PATTERNS = {
+    'has_peo': _contains(r'Π\.?Ε\.?Ο\.?|ΠΕΟ'),
+    'has_eo': _contains(r'Ε\.?Ο\.?|ΕΟ'),
+    'has_neo': _contains(r'Ν\.?Ε\.?Ο\.?|ΝΕΟ'),
+    'has_km': _contains(r'\d+.*(?:ΧΛΜ|χλμ|Km|km|ΚΜ)'),
+    'has_two_cities': lambda s: s.str.count(r'[Α-ΩA-Z][α-ωa-z]+') >= 2,
+    'has_dash': lambda s: s.str.contains('-', regex=False),
+    'has_comma': lambda s: s.str.contains(',', regex=False),
+    'has_question': lambda s: s.str.contains('?', regex=False),
+    'long_address': lambda s: s.str.len() > 50,
+    'starts_with_number': _starts_with_digit,
+}
+
+# Oi synthikes tou xeirografou rule-based systimatos (apply_rule_based_method)
+RULE_CONDITIONS = {
+    'km_distance': _contains(r'\d+.*(?:ΧΛΜ|χλμ|Km|km)'),
+    'very_long': lambda s: s.str.len() > 60,
+    'leading_digit': _contains(r'^\d+', case=True),
+    'has_three_cities': lambda s: s.str.count(r'[Α-ΩA-Z][α-ωa-z]+') >= 3,
+}
+
+CONDITIONS = {**ADDRESS_PATTERNS, **RULE_CONDITIONS}
+
+
+def pattern_matrix(addresses, patterns=ADDRESS_PATTERNS):
+    """N×P boolean πίνακας: ποιες διευθύνσεις έχουν κάθε pattern"""
+    addresses = pd.Series(addresses).astype(str)
+    return pd.DataFrame({name: func(addresses).to_numpy(dtype=bool) for name, func in patterns.items()},
+                        index=addresses.index)
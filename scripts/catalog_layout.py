@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+# catalog_layout
+# Xoriki diataxi tou katalogou pratirion: kathe stathmos pairnei geohash kai
+# Hilbert kleidi (vectorized, xoris loops ana stathmo), o katalogos
+# taxinomeitai kata Hilbert (geitonika pratiria diadoxika -> zesta caches /
+# proxy sto download) kai spaei se partitions ana geohash prefix:
+#
+#   <out>/catalog/<prefix>.csv     ta pratiria tou prefix (Hilbert seira)
+#   <out>/tiles/<prefix>/...       hard links ton tiles (i antigrafa)
+#   <out>/labels/<prefix>/...      idia gia ta YOLO labels (ola ta splits)
+#   <out>/manifest.json            prefix -> plithos, bbox, nomoi
+#
+# To CatalogPartitions diavazei mono ta partitions pou temnoun to bbox i
+# periexoun to nomo pou zitithike.
+#
+#   python scripts/cli.py layout --precision 3
+#   parts = CatalogPartitions('data/catalog_layout')
+#   parts.bbox(37.9, 23.6, 38.1, 23.9)      # mono ~1-2 partitions
+#   parts.county('ΑΧΑΪΑΣ')
+
+import argparse
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from paths import DATA_DIR, DATASET_DIR, STATIONS_FILE, TILES_DIR
+
+# Parametroi
+GEOHASH_PRECISION = 3          # ~156 x 156 km - ~20-30 partitions gia tin Ellada
+HILBERT_ORDER = 16             # 2^16 x 2^16 plegma (~300 m sto lat)
+LAYOUT_DIR = DATA_DIR / 'catalog_layout'
+MANIFEST_FILENAME = 'manifest.json'
+GEOHASH_ALPHABET = np.array(list('0123456789bcdefghjkmnpqrstuvwxyz'), dtype=object)
+ID_COLUMN = 'gasStationID'
+LAT_COLUMN = 'gasStationLat'
+LNG_COLUMN = 'gasStationLong'
+COUNTY_COLUMN = 'countyName'
+
+
+# ============= KLEIDIA =============
+
+def _quantize(values, low, high, bits):
+    cells = (1 << bits)
+    q = np.floor((np.asarray(values, dtype=float) - low) / (high - low) * cells)
+    return np.clip(q, 0, cells - 1).astype(np.uint64)
+
+
+def geohash(lat, lon, precision=GEOHASH_PRECISION):
+    """Vectorized geohash (ίδιο με το standard: lon στα ζυγά bits, lat στα μονά)"""
+    bits = 5 * precision
+    lon_bits, lat_bits = (bits + 1) // 2, bits // 2
+    x = _quantize(lon, -180.0, 180.0, lon_bits)
+    y = _quantize(lat, -90.0, 90.0, lat_bits)
+    code = np.zeros(len(x), dtype=np.uint64)
+    for i in range(bits):
+        # bit i (apo to pio simantiko): zyga = lon, mona = lat
+        if i % 2 == 0:
+            bit = (x >> np.uint64(lon_bits - 1 - i // 2)) & np.uint64(1)
+        else:
+            bit = (y >> np.uint64(lat_bits - 1 - i // 2)) & np.uint64(1)
+        code = (code << np.uint64(1)) | bit
+    out = np.full(len(code), '', dtype=object)
+    for j in range(precision):
+        digit = (code >> np.uint64(5 * (precision - 1 - j))) & np.uint64(31)
+        out = out + GEOHASH_ALPHABET[digit.astype(np.int64)]
+    return out
+
+
+def hilbert_key(lat, lon, order=HILBERT_ORDER, bounds=None):
+    """Θέση στην καμπύλη Hilbert (order bits ανά άξονα) - γειτονικά σημεία -> κοντινά κλειδιά
+
+    bounds = (south, west, north, east) του πλέγματος, default το bbox των σημείων.
+    """
+    lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+    if bounds is None:
+        bounds = (np.nanmin(lat), np.nanmin(lon), np.nanmax(lat), np.nanmax(lon)) if len(lat) else (0, 0, 1, 1)
+    south, west, north, east = bounds
+    x = _quantize(lon, west, max(east, west + 1e-9), order).astype(np.int64)
+    y = _quantize(lat, south, max(north, south + 1e-9), order).astype(np.int64)
+    d = np.zeros(len(x), dtype=np.int64)
+    s = 1 << (order - 1)
+    # To klassiko xy2d, gia olous tous pinakes mazi
+    while s > 0:
+        rx = ((x & s) > 0).astype(np.int64)
+        ry = ((y & s) > 0).astype(np.int64)
+        d += s * s * ((3 * rx) ^ ry)
+        # Peristrofi tou tetartimoriou
+        flip = ry == 0
+        swap_x = flip & (rx == 1)
+        x = np.where(swap_x, s - 1 - x, x)
+        y = np.where(swap_x, s - 1 - y, y)
+        x, y = np.where(flip, y, x), np.where(flip, x, y)
+        s >>= 1
+    return d
+
+
+def layout_catalog(df, precision=GEOHASH_PRECISION, order='hilbert'):
+    """Κατάλογος + στήλες geohash/hilbert, ταξινομημένος (hilbert ή geohash)"""
+    lat, lon = df[LAT_COLUMN].to_numpy(dtype=float), df[LNG_COLUMN].to_numpy(dtype=float)
+    valid = ~(np.isnan(lat) | np.isnan(lon))
+    out = df.copy()
+    out['geohash'] = ''
+    out.loc[valid, 'geohash'] = geohash(lat[valid], lon[valid], max(precision, 6))
+    out['hilbert'] = -1
+    out.loc[valid, 'hilbert'] = hilbert_key(lat[valid], lon[valid])
+    out['partition'] = out['geohash'].str[:precision]
+    by = ['hilbert'] if order == 'hilbert' else ['geohash']
+    return out.sort_values(by, kind='stable').reset_index(drop=True)
+
+
+# ============= PARTITIONS =============
+
+def _link(src, dst):
+    # Hard link (idio disko, xoris xoro) i antigrafo
+    if dst.exists():
+        dst.unlink()
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def write_partitions(catalog, out_dir=LAYOUT_DIR, tiles_dir=TILES_DIR, dataset_dir=DATASET_DIR):
+    """Γράφει catalog/tiles/labels ανά geohash prefix και το manifest"""
+    from google_maps_static_downloader import parse_tile_filename
+
+    out_dir = Path(out_dir)
+    # Katharismos ton palion partitions: allo precision / metakinimenoi stathmoi
+    # den prepei na afisoun stale catalog/<prefix>.csv i links se tiles/labels
+    for kind in ('catalog', 'tiles', 'labels'):
+        if (out_dir / kind).is_dir():
+            shutil.rmtree(out_dir / kind)
+    (out_dir / 'catalog').mkdir(parents=True, exist_ok=True)
+    partition_of = dict(zip(catalog[ID_COLUMN].astype(int), catalog['partition']))
+    manifest = {}
+    for prefix, part in catalog.groupby('partition', sort=True):
+        name = prefix or '_'
+        part.to_csv(out_dir / 'catalog' / f'{name}.csv', index=False)
+        manifest[name] = {
+            'count': len(part),
+            'bbox': [float(part[LAT_COLUMN].min()), float(part[LNG_COLUMN].min()),
+                     float(part[LAT_COLUMN].max()), float(part[LNG_COLUMN].max())] if prefix else None,
+            'counties': sorted(part[COUNTY_COLUMN].dropna().astype(str).unique().tolist())
+            if COUNTY_COLUMN in part.columns else [],
+            'tiles': 0,
+            'labels': 0,
+        }
+
+    # Tiles kai labels: idio onoma arxeiou, fakelos = prefix tou stathmou
+    sources = [('tiles', path) for path in sorted(Path(tiles_dir).glob('*'))] if Path(tiles_dir).is_dir() else []
+    for split_labels in sorted(Path(dataset_dir).glob('*/labels')):
+        sources += [('labels', path) for path in sorted(split_labels.glob('*.txt'))]
+    for kind, path in sources:
+        parsed = parse_tile_filename(f"{path.stem}.png")
+        prefix = partition_of.get(parsed[0]) if parsed else None
+        if prefix is None:
+            continue
+        name = prefix or '_'
+        target = out_dir / kind / name
+        if kind == 'labels':
+            target = target / path.parent.parent.name       # train / val / test
+        target.mkdir(parents=True, exist_ok=True)
+        _link(path, target / path.name)
+        manifest[name][kind] += 1
+
+    tmp_path = out_dir / (MANIFEST_FILENAME + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'precision': int(catalog['partition'].str.len().max() or 0), 'partitions': manifest}, f,
+                  ensure_ascii=False, indent=1)
+    os.replace(tmp_path, out_dir / MANIFEST_FILENAME)
+    return manifest
+
+
+class CatalogPartitions:
+    """Regional subsets: διαβάζει μόνο τα partitions που χρειάζονται"""
+
+    def __init__(self, root=LAYOUT_DIR):
+        self.root = Path(root)
+        with open(self.root / MANIFEST_FILENAME, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        self.precision = manifest['precision']
+        self.partitions = manifest['partitions']
+        self.reads = 0
+
+    def _read(self, names):
+        self.reads += len(names)
+        frames = [pd.read_csv(self.root / 'catalog' / f'{name}.csv') for name in names]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def prefixes_for_bbox(self, south, west, north, east):
+        return [name for name, meta in self.partitions.items()
+                if meta['bbox'] is not None and meta['bbox'][0] <= north and meta['bbox'][2] >= south
+                and meta['bbox'][1] <= east and meta['bbox'][3] >= west]
+
+    def bbox(self, south, west, north, east):
+        """Σταθμοί μέσα στο bbox (διαβάζονται μόνο τα partitions που το τέμνουν)"""
+        df = self._read(self.prefixes_for_bbox(south, west, north, east))
+        if df.empty:
+            return df
+        inside = df[LAT_COLUMN].between(south, north) & df[LNG_COLUMN].between(west, east)
+        return df[inside].reset_index(drop=True)
+
+    def county(self, name):
+        df = self._read([p for p, meta in self.partitions.items() if name in meta['counties']])
+        return df[df[COUNTY_COLUMN] == name].reset_index(drop=True) if not df.empty else df
+
+    def tile_paths(self, prefixes):
+        return [path for prefix in prefixes for path in sorted((self.root / 'tiles' / prefix).glob('*'))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Taxinomisi (Hilbert/geohash) kai partitions ana geohash prefix")
+    parser.add_argument('--stations', default=str(STATIONS_FILE))
+    parser.add_argument('--out', default=str(LAYOUT_DIR))
+    parser.add_argument('--precision', type=int, default=GEOHASH_PRECISION, help="xaraktires geohash ana partition")
+    parser.add_argument('--order', choices=['hilbert', 'geohash'], default='hilbert')
+    parser.add_argument('--tiles', default=str(TILES_DIR))
+    parser.add_argument('--dataset', default=str(DATASET_DIR), help="fakelos me ta splits (*/labels)")
+    args = parser.parse_args(argv)
+
+    catalog = layout_catalog(pd.read_excel(args.stations), args.precision, args.order)
+    manifest = write_partitions(catalog, args.out, args.tiles, args.dataset)
+    summary = pd.DataFrame([{'Partition': name, 'Stations': meta['count'], 'Tiles': meta['tiles'],
+                             'Labels': meta['labels'], 'Counties': len(meta['counties'])}
+                            for name, meta in manifest.items()])
+    print(summary.to_string(index=False))
+    print(f"\n{len(catalog)} pratiria se {len(manifest)} partitions -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+# circular_error
+# Circular error analysi (CE{threshold} hit rates kai CEP{q} aktines) gia oles
+# tis methodous mazi, apo enan taxinomimeno pinaka apostaseon (N stathmoi x M
+# methodoi), me bootstrap confidence intervals.
+#
+#   from circular_error import ce_table
+#   ce_df = ce_table(df, n_boot=1000)       # CE50_pct, CE50_pct_lo, CE50_pct_hi, CEP90_m, ...
+
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from results_store import ResultsStore
+
+# Parametroi
+DEFAULT_THRESHOLDS = (50, 100, 200, 500, 1000, 5000)   # metra
+DEFAULT_PERCENTILES = (50, 90, 95)                     # CEP50 / CEP90 / CEP95
+BOOTSTRAP_CHUNK = 50      # resamples ana ergasia - stathero gia idia apotelesmata me opoiodipote workers
+CI_LEVEL = 0.95
+
+
+def distance_matrix(df, methods):
+    """(N, M) float pinakas me tis {method}_distance stiles (NaN = apotyxia)"""
+    if isinstance(df, ResultsStore):
+        return df.distances(methods).astype(float)
+    return np.column_stack([pd.to_numeric(df[f'{m}_distance'], errors='coerce').to_numpy(dtype=float)
+                            for m in methods])
+
+
+def sort_distances(distances):
+    # Ta NaN pane sto telos kathe stilis, opote ta prota valid[m] einai oi egkyres apostaseis
+    return np.sort(distances, axis=0), np.sum(~np.isnan(distances), axis=0)
+
+
+def hit_counts(sorted_d, valid, thresholds):
+    """(M, T) plithos apostaseon <= threshold ana methodo"""
+    thresholds = np.asarray(thresholds, dtype=float)
+    return np.stack([np.searchsorted(sorted_d[:n, m], thresholds, side='right')
+                     for m, n in enumerate(valid)]) if len(valid) else np.zeros((0, len(thresholds)), int)
+
+
+def percentile_radii(sorted_d, valid, percentiles):
+    """(M, Q) aktina pou periexei to q% ton egkyron apotelesmaton (grammiki paremvoli opos np.quantile)"""
+    q = np.asarray(percentiles, dtype=float) / 100
+    pos = q[None, :] * np.maximum(valid - 1, 0)[:, None]       # (M, Q)
+    lo = np.floor(pos).astype(int)
+    hi = np.minimum(lo + 1, np.maximum(valid - 1, 0)[:, None])
+    cols = np.arange(sorted_d.shape[1])[:, None]
+    radii = sorted_d[lo, cols] + (sorted_d[hi, cols] - sorted_d[lo, cols]) * (pos - lo)
+    radii[valid == 0] = np.nan
+    return radii
+
+
+def _bootstrap_chunk(seed, n_resamples, distances, hits, percentiles):
+    # Bootstrap me varoi (poses fores epilegetai kathe stathmos) anti gia antigrafa ton dedomenon
+    n, m = distances.shape
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, n, size=(n_resamples, n))
+    weights = np.bincount((picks + np.arange(n_resamples)[:, None] * n).ravel(),
+                          minlength=n_resamples * n).reshape(n_resamples, n).astype(np.float32)
+
+    valid_mask = ~np.isnan(distances)
+    valid_b = weights @ valid_mask.astype(np.float32)                          # (B, M)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        hit_pct = (weights @ hits.reshape(n, -1)).reshape(n_resamples, m, -1) / valid_b[:, :, None] * 100
+        mean_b = (weights @ np.where(valid_mask, distances, 0).astype(np.float32)) / valid_b
+
+    # Weighted quantiles: athroistika varoi sti seira taxinomisis kathe methodou
+    q = np.asarray(percentiles, dtype=float) / 100
+    radii = np.full((n_resamples, m, len(q)), np.nan)
+    offsets = np.arange(n_resamples)[:, None]
+    for j in range(m):
+        order = np.argsort(distances[:, j])[:valid_mask[:, j].sum()]
+        if not len(order):
+            continue
+        cum = np.cumsum(weights[:, order], axis=1, dtype=np.float64)
+        total = cum[:, -1:]
+        # Ena searchsorted gia ola ta resamples: kathe grammi metatopizetai kata (total + 1)
+        shift = offsets * (cum[:, -1].max() + 1)
+        idx = np.searchsorted((cum + shift).ravel(), (q[None, :] * total + shift).ravel(), side='left')
+        idx = idx.reshape(n_resamples, len(q)) - offsets * len(order)
+        radii[:, j, :] = distances[order, j][np.clip(idx, 0, len(order) - 1)]
+    return hit_pct, radii, mean_b
+
+
+def bootstrap_intervals(distances, thresholds=DEFAULT_THRESHOLDS, percentiles=DEFAULT_PERCENTILES,
+                        n_boot=1000, ci=CI_LEVEL, seed=42, workers=None):
+    """Bootstrap CIs gia CE{t}_pct, CEP{q}_m kai mean -> dict name -> (low (M, ...), high (M, ...))"""
+    distances = np.asarray(distances, dtype=float)
+    hits = (distances[:, :, None] <= np.asarray(thresholds, dtype=float)[None, None, :]).astype(np.float32)
+
+    sizes = [min(BOOTSTRAP_CHUNK, n_boot - start) for start in range(0, n_boot, BOOTSTRAP_CHUNK)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    # To numpy afinei to GIL sta matmul/sort/cumsum, opote ta threads trexoun parallila
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        parts = list(pool.map(lambda args: _bootstrap_chunk(args[0], args[1], distances, hits, percentiles),
+                              zip(seeds, sizes)))
+
+    alpha = (1 - ci) / 2
+    out = {}
+    for name, k in (('hit_pct', 0), ('radius', 1), ('mean', 2)):
+        samples = np.concatenate([p[k] for p in parts])
+        out[name] = tuple(np.nanquantile(samples, [alpha, 1 - alpha], axis=0))
+    return out
+
+
+def ce_table(df, methods=None, thresholds=DEFAULT_THRESHOLDS, percentiles=DEFAULT_PERCENTILES,
+             n_boot=0, ci=CI_LEVEL, seed=42, workers=None):
+    """CE pinakas gia oles tis methodous, taxinomimenos kata mesi apostasi"""
+    if methods is None and isinstance(df, ResultsStore):
+        methods = df.methods
+    elif methods is None:
+        from geocoding_experiments import find_method_columns
+        methods = find_method_columns(df)
+
+    distances = distance_matrix(df, methods)
+    sorted_d, valid = sort_distances(distances)
+    counts = hit_counts(sorted_d, valid, thresholds)
+    radii = percentile_radii(sorted_d, valid, percentiles)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        table = pd.DataFrame({
+            'Method': methods,
+            'Valid_Stations': valid,
+            'Failed_Stations': len(df) - valid,
+            'Success_Rate_%': valid / len(df) * 100 if len(df) else np.nan,
+            'Mean_Distance_m': np.nanmean(distances, axis=0),
+            'Median_Distance_m': np.nanmedian(distances, axis=0),
+            'Std_Distance_m': np.nanstd(distances, axis=0, ddof=1),
+        })
+        for i, t in enumerate(thresholds):
+            table[f'CE{t}_count'] = counts[:, i]
+            table[f'CE{t}_pct'] = counts[:, i] / valid * 100
+        for i, q in enumerate(percentiles):
+            table[f'CEP{q}_m'] = radii[:, i]
+
+    if n_boot:
+        intervals = bootstrap_intervals(distances, thresholds, percentiles, n_boot, ci, seed, workers)
+        low, high = intervals['mean']
+        table['Mean_Distance_m_lo'], table['Mean_Distance_m_hi'] = low, high
+        low, high = intervals['hit_pct']
+        for i, t in enumerate(thresholds):
+            table[f'CE{t}_pct_lo'], table[f'CE{t}_pct_hi'] = low[:, i], high[:, i]
+        low, high = intervals['radius']
+        for i, q in enumerate(percentiles):
+            table[f'CEP{q}_m_lo'], table[f'CEP{q}_m_hi'] = low[:, i], high[:, i]
+
+    return table.sort_values('Mean_Distance_m').reset_index(drop=True)
+
+
+def format_ce_breakdown(table, thresholds=DEFAULT_THRESHOLDS):
+    # "count/valid (pct%)" opos sto geocoding_full_analysis.ipynb, me CI an yparxei
+    rows = []
+    for _, row in table.iterrows():
+        cells = {'Method': row['Method']}
+        for t in thresholds:
+            cell = f"{row[f'CE{t}_count']}/{row['Valid_Stations']} ({row[f'CE{t}_pct']:.1f}%)"
+            if f'CE{t}_pct_lo' in row:
+                cell += f" [{row[f'CE{t}_pct_lo']:.1f}-{row[f'CE{t}_pct_hi']:.1f}]"
+            cells[f'CE{t}'] = cell
+        rows.append(cells)
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Circular error (CE/CEP) analysi me bootstrap CIs")
+    parser.add_argument('--results', required=True, help="xlsx me stiles {method}_distance")
+    parser.add_argument('--sheet', default=0)
+    parser.add_argument('--methods', nargs='+', default=None, help="default: oles oi {method}_distance")
+    parser.add_argument('--thresholds', nargs='+', type=float, default=list(DEFAULT_THRESHOLDS))
+    parser.add_argument('--percentiles', nargs='+', type=float, default=list(DEFAULT_PERCENTILES))
+    parser.add_argument('--bootstrap', type=int, default=1000, help="0 = xoris CIs")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out', default=None, help="xlsx exodou")
+    args = parser.parse_args(argv)
+
+    thresholds = [int(t) if float(t).is_integer() else t for t in args.thresholds]
+    percentiles = [int(q) if float(q).is_integer() else q for q in args.percentiles]
+    if args.results.endswith('.npz'):
+        df = ResultsStore.load(args.results)
+    else:
+        df = pd.read_excel(args.results, sheet_name=args.sheet)
+    table = ce_table(df, args.methods, thresholds, percentiles, n_boot=args.bootstrap, workers=args.workers)
+
+    print(f"CIRCULAR ERROR ANALYSIS - {len(table)} methodoi, {len(df)} stathmoi")
+    print(format_ce_breakdown(table, thresholds).to_string(index=False))
+    print()
+    print(table[['Method', 'Mean_Distance_m', *[f'CEP{q}_m' for q in percentiles]]].to_string(index=False))
+    if args.out:
+        table.to_excel(args.out, index=False)
+        print(f"\nApothikeytike: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
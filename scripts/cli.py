@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# cli
+# Koino entry point gia ola ta vimata tou pipeline. Kathe subcommand fortonei
+# to module tou mono otan trexei, oste to --help, ta dry runs kai to cache-stats
+# na xekinane amesos xoris pandas/sklearn/matplotlib/googlemaps.
+#
+#   python scripts/cli.py download --dry-run
+#   python scripts/cli.py validate --workers 8
+#   python scripts/cli.py experiments --dry-run
+#   python scripts/cli.py cache-stats
+
+import argparse
+import importlib
+import importlib.util
+import sys
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+# Ta numbered scripts einai kodikas - vriskontai dipla sto scripts/ kai oxi
+# sto FUELSTATION_ROOT (pou mporei na deixnei se dedomena allou diskou)
+ML_SCRIPTS_DIR = SCRIPTS_DIR.parent / 'data' / 'geocoding_pattern_analysis_ml' / 'scripts'
+
+# subcommand -> (module i script tou ML fakelou, perigrafi)
+COMMANDS = {
+    'pipeline': ('pipeline', "Olo to pipeline (DAG) - xanatrexei mono ta stale stages"),
+    'dedup': ('station_dedup', "Afairesi diplotypon pratirion"),
+    'download': ('google_maps_static_downloader', "Lipsi eikonon apo to Google Maps Static API"),
+    'map-cache': ('static_map_cache', "Topiko Static Maps cache (LRU se bytes): stats, clear, proxy"),
+    'validate': ('validate_images', "Elegxos ton PNG tiles tou dataset"),
+    'transcode': ('transcode_tiles', "Metatropi ton tiles se lossless WebP / JPEG (parallila)"),
+    'pack': ('tile_archive', "Paketarisma ton tiles se memory-mapped archive"),
+    'infer': ('tile_inference', "Batched anixneusi pratirion se ola ta tiles (disko i archive, CPU)"),
+    'diff': ('station_diff', "Diafora dyo snapshots pratirion -> work lists (download / geocode)"),
+    'index': ('station_index', "Xoriko evretirio pratirion (k-NN, radius, bbox), local API kai benchmark"),
+    'layout': ('catalog_layout', "Hilbert/geohash taxinomisi kai partitions (catalog, tiles, labels) ana geohash"),
+    'markers': ('excel_to_markers', "Excel pratirion -> markers.js"),
+    'experiments': ('1_additional_experiments.py', "Nees methodoi geocoding (v20-v30)"),
+    'analyze': ('2_analyze_results_rules.py', "Pattern analysis & rule-based approach"),
+    'report': ('3_final_summary_report.py', "Final summary report"),
+    'consistency': ('run_consistency', "Synepeia ton 3 geocoding runs, consensus kai requery mono ton diafonion"),
+    'plausibility': ('plausibility_index', "Elegxos geocoding apotelesmaton me hulls nomon/dimon (lathos nomos)"),
+    'shard': ('shard_runner', "Sharded geocoding/download se polla processes/mixanimata (leases me heartbeat)"),
+    'train': ('method_model', "RandomForest epilogis methodou: feature cache, grid/CV parallila, versioned montelo"),
+    'lsh': ('address_lsh', "Fuzzy omadopoiisi diefthinseon (MinHash/LSH) kai API calls pou glitonoun"),
+    'adaptive': ('adaptive_experiments', "Adaptive (successive halving) experiments se katagegrammena results"),
+    'store': ('results_store', "Wide results xlsx -> compact store (.npz) me memory report"),
+    'ce': ('circular_error', "Circular error (CE/CEP) analysi me bootstrap CIs"),
+    'bench': ('run_benchmarks', "Benchmarks me synthetika dedomena"),
+}
+
+
+def load_command(target):
+    # Ta numbered scripts den einai importable me to onoma tous
+    if target.endswith('.py'):
+        path = ML_SCRIPTS_DIR / target
+        spec = importlib.util.spec_from_file_location(path.stem, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    if target == 'run_benchmarks':
+        sys.path.insert(0, str(SCRIPTS_DIR.parent / 'benchmarks'))
+    return importlib.import_module(target)
+
+
+def cache_stats(argv):
+    from geocoding_client import CACHE_FILE, cache_stats as compute_stats, load_cache
+
+    parser = argparse.ArgumentParser(prog='cli.py cache-stats', description="Statistika tou geocoding cache")
+    parser.add_argument('--cache-file', default=str(CACHE_FILE))
+    args = parser.parse_args(argv)
+
+    stats = compute_stats(load_cache(args.cache_file))
+    print(f"Synolo: {stats['total']}, epityximena: {stats['successful']}, apotyximena: {stats['failed']}")
+    for accuracy, count in stats['accuracy'].items():
+        print(f"  {accuracy}: {count}")
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    parser = argparse.ArgumentParser(
+        description="Fuel station detection pipeline",
+        epilog="'<command> --help' gia tis epiloges kathe vimatos")
+    parser.add_argument('command', choices=[*COMMANDS, 'cache-stats'],
+                        help=', '.join(f"{name}: {desc}" for name, (_, desc) in COMMANDS.items()))
+    args = parser.parse_args(argv[:1])
+    rest = argv[1:]
+
+    if args.command == 'cache-stats':
+        return cache_stats(rest)
+    module = load_command(COMMANDS[args.command][0])
+    return module.main(rest) or 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
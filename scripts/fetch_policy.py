@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+# fetch_policy
+# Politiki gia ta HTTP requests tou downloader:
+#   - katigoriopoiisi tis apantisis: 429/5xx/exceptions -> retry, 400/404 ->
+#     monimi apotyxia (kakes parametroi/syntetagmenes), 403 -> quota/key
+#     (ta retries den voithane, to run stamataei)
+#   - exponential backoff me full jitter, pou sevetai to Retry-After
+#   - circuit breaker: otan to pososto sfalmaton sto teleutaio parathyro
+#     xeperasei to katofli, ola ta workers perimenoun cooldown kai meta
+#     perna ena dokimastiko request (half-open)
+#   - dead-letter arxeio (JSON lines) me tous stathmous pou apetyxan, gia
+#     replay me 'download --replay-dead-letter'
+#
+#   policy, breaker = BackoffPolicy(), CircuitBreaker()
+#   result = fetch_with_policy(url, requests.get, policy, breaker)
+#   if result.kind == PERMANENT: dead_letter.add(station_id, lat, lon, result.reason, result.status)
+
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+from pipeline_metrics import METRICS
+
+# Parametroi
+BASE_DELAY = 1.0             # seconds, proto retry
+MAX_DELAY = 60.0             # anotato orio ana retry (kai gia to Retry-After)
+MAX_RETRIES = 4
+BREAKER_WINDOW = 50          # teleutaia requests pou metrane sto error rate
+BREAKER_MIN_CALLS = 10
+BREAKER_THRESHOLD = 0.5      # > 50% sfalmata -> open
+BREAKER_COOLDOWN = 30.0      # seconds se open prin to half-open probe
+DEAD_LETTER_FILENAME = 'download_dead_letter.jsonl'
+
+# Eidi apotelesmatos
+OK = 'ok'
+RETRY = 'retry'              # prosorino (429, 5xx, timeout) - xanadokimazetai
+PERMANENT = 'permanent'      # kako request - dead letter, oxi retry
+QUOTA = 'quota'              # 403: quota/billing/key - stamatima tou run
+
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+QUOTA_STATUSES = {403}
+
+
+def classify_status(status):
+    if status == 200:
+        return OK
+    if status in RETRY_STATUSES:
+        return RETRY
+    if status in QUOTA_STATUSES:
+        return QUOTA
+    return PERMANENT
+
+
+def parse_retry_after(value, now=None):
+    """Retry-After (δευτερόλεπτα ή HTTP date) -> δευτερόλεπτα ή None"""
+    if not value:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = now if now is not None else time.time()
+    return max(0.0, when.timestamp() - now)
+
+
+class BackoffPolicy:
+    """Exponential backoff με full jitter: U(0, min(max_delay, base * 2^attempt)), τουλάχιστον Retry-After"""
+
+    def __init__(self, base_delay=BASE_DELAY, max_delay=MAX_DELAY, max_retries=MAX_RETRIES, seed=None):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retries = max_retries
+        self._rng = random.Random(seed)
+
+    def delay(self, attempt, retry_after=None):
+        delay = self._rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+
+class CircuitBreaker:
+    """Κοινός για όλα τα workers: closed -> open (error spike) -> half-open (ένα probe) -> closed"""
+
+    def __init__(self, window=BREAKER_WINDOW, threshold=BREAKER_THRESHOLD, min_calls=BREAKER_MIN_CALLS,
+                 cooldown=BREAKER_COOLDOWN, clock=time.monotonic):
+        self.threshold = threshold
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self.clock = clock
+        self.results = deque(maxlen=window)
+        self.state = 'closed'
+        self.opened_at = None
+        self.trips = 0
+        self._probing = False
+        self._cond = threading.Condition()
+
+    def error_rate(self):
+        with self._cond:
+            return self.results.count(False) / len(self.results) if self.results else 0.0
+
+    def acquire(self, sleep=time.sleep):
+        """Περιμένει όσο ο breaker είναι open· στο half-open περνάει μόνο ένα probe τη φορά"""
+        while True:
+            with self._cond:
+                if self.state == 'closed':
+                    return
+                remaining = self.opened_at + self.cooldown - self.clock()
+                if remaining <= 0 and not self._probing:
+                    self.state = 'half_open'
+                    self._probing = True
+                    return
+                if remaining > 0:
+                    METRICS.counter('breaker_waits_total').inc()
+                wait = max(remaining, 0.05)
+            sleep(wait)
+
+    def record(self, success):
+        with self._cond:
+            if self.state == 'half_open':
+                self._probing = False
+                if success:
+                    self.state = 'closed'
+                    self.results.clear()
+                    METRICS.counter('breaker_transitions_total', to='closed').inc()
+                else:
+                    self._open()
+                return
+            self.results.append(bool(success))
+            if (self.state == 'closed' and len(self.results) >= self.min_calls
+                    and self.results.count(False) / len(self.results) > self.threshold):
+                self._open()
+
+    def _open(self):
+        self.state = 'open'
+        self.opened_at = self.clock()
+        self.trips += 1
+        METRICS.counter('breaker_transitions_total', to='open').inc()
+        print(f"   Circuit breaker open: pausi {self.cooldown:.0f}s (error rate {self._rate():.0%})")
+
+    def _rate(self):
+        return self.results.count(False) / len(self.results) if self.results else 1.0
+
+
+class FetchResult:
+    def __init__(self, kind, response=None, status=None, reason='', attempts=0):
+        self.kind = kind
+        self.response = response
+        self.status = status
+        self.reason = reason
+        self.attempts = attempts
+
+
+def fetch_with_policy(url, fetch, policy=None, breaker=None, timeout=30, sleep=time.sleep):
+    """GET με backoff/Retry-After και circuit breaker -> FetchResult (ok/retry/permanent/quota)"""
+    policy = policy or BackoffPolicy()
+    result = None
+    for attempt in range(policy.max_retries + 1):
+        if attempt:
+            METRICS.counter('download_retries_total').inc()
+        if breaker is not None:
+            breaker.acquire(sleep)
+        retry_after = None
+        try:
+            with METRICS.timer('download_request_seconds'):
+                response = fetch(url, timeout=timeout)
+        except Exception as e:
+            METRICS.counter('download_exceptions_total', kind=type(e).__name__).inc()
+            result = FetchResult(RETRY, reason=f"{type(e).__name__}: {e}", attempts=attempt + 1)
+        else:
+            status = response.status_code
+            METRICS.counter('download_http_status_total', status=status).inc()
+            kind = classify_status(status)
+            result = FetchResult(kind, response, status, f"HTTP {status}", attempt + 1)
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        if breaker is not None:
+            # Mono ta prosorina sfalmata (outage) metrane - ena 404 den anoigei ton breaker
+            breaker.record(result.kind != RETRY)
+        if result.kind != RETRY:
+            return result
+        if attempt < policy.max_retries:
+            delay = policy.delay(attempt, retry_after)
+            print(f"   {result.reason} - prospatheia {attempt + 1}/{policy.max_retries + 1}, "
+                  f"anamoni {delay:.1f}s")
+            sleep(delay)
+    return result
+
+
+class DeadLetterQueue:
+    """JSON lines με τους σταθμούς που απέτυχαν οριστικά (χωρίς URL, άρα χωρίς API key)"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def add(self, station_id, lat, lon, reason, status=None, attempts=0):
+        record = {'station_id': int(station_id), 'lat': float(lat), 'lon': float(lon), 'reason': reason,
+                  'status': status, 'attempts': attempts, 'timestamp': datetime.now().isoformat()}
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
+        METRICS.counter('download_dead_letter_total', reason=reason.split(':')[0]).inc()
+
+    def load(self):
+        """Τελευταία εγγραφή ανά station_id"""
+        if not self.path.exists():
+            return {}
+        records = {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    records[record['station_id']] = record
+        return records
+
+    def remove(self, station_ids):
+        """Ξαναγράφει το αρχείο χωρίς τους σταθμούς που πέτυχαν στο replay"""
+        station_ids = set(station_ids)
+        with self._lock:
+            records = [r for r in self.load().values() if r['station_id'] not in station_ids]
+            tmp_path = self.path.with_name(self.path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record) + '\n')
+            os.replace(tmp_path, self.path)
+        return len(records)
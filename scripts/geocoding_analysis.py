@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+# geocoding_analysis
+# Pattern analysis, rule-based epilogi methodou kai sygkrisi proseggiseon tou
+# 2_analyze_results_rules.py. To matplotlib/seaborn fortonontai mono sta plots.
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from address_patterns import ADDRESS_PATTERNS, pattern_matrix
+from geocoding_experiments import find_method_columns
+from rule_engine import HAND_RULES, assign_methods, routed_distances
+
+
+# Oi kanones tou apply_rule_based_method se morfi JSON
+RULES_JSON = [
+    {
+        'condition': 'has_peo_and_km',
+        'pattern': r'Π\.?Ε\.?Ο\.?.*\d+.*(?:ΧΛΜ|χλμ|Km)',
+        'method': 'v8_combined_basic'
+    },
+    {
+        'condition': 'has_question_mark',
+        'pattern': r'\?',
+        'method': 'v9_combined_aggressive'
+    },
+    {
+        'condition': 'very_long',
+        'check': 'len > 60',
+        'method': 'v12_simplify_cities_only'
+    },
+    {
+        'condition': 'starts_with_number',
+        'pattern': r'^\d+',
+        'method': 'v11_km_first'
+    }
+]
+
+TEST_ADDRESSES = [
+    "Π.Ε.Ο. ΑΘΗΝΩΝ - ΛΑΜΙΑΣ, 68ο ΧΛΜ",
+    "5ο χλμ Λάρισας Βόλου",
+    "ΦΑΡΣΑΛΑ - ΛΑΜΙΑ ?",
+    "Ε.Ο. ΘΕΣΣΑΛΟΝΙΚΗΣ ΠΟΛΥΓΥΡΟΥ 59 ΧΛΜ ΓΑΛΑΤΑΔΕΣ ΧΑΛΚΙΔΙΚΗΣ",
+]
+
+
+def pattern_method_matrix(df, method_columns=None, patterns=ADDRESS_PATTERNS, masks=None):
+    """P×M πίνακες count/valid/mean/median απόστασης για κάθε pattern και μέθοδο"""
+    if method_columns is None:
+        method_columns = find_method_columns(df)
+    if masks is None:
+        masks = pattern_matrix(df['original_address'], patterns)
+
+    m = masks.to_numpy(dtype=np.float64)                                        # (N, P)
+    distances = df[[f'{method}_distance' for method in method_columns]].to_numpy(dtype=float)
+    valid = ~np.isnan(distances)
+
+    # Αθροίσματα και πλήθη για όλα τα (pattern, method) με δύο matrix products
+    valid_counts = m.T @ valid
+    sums = m.T @ np.where(valid, distances, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(valid_counts > 0, sums / valid_counts, np.nan)
+
+    # Η διάμεσος δεν είναι γραμμική - ένα nanmedian ανά pattern, vectorized σε όλες τις μεθόδους
+    medians = np.full_like(means, np.nan)
+    bool_masks = masks.to_numpy(dtype=bool)
+    for p in range(bool_masks.shape[1]):
+        subset = distances[bool_masks[:, p]]
+        has_valid = valid_counts[p] > 0
+        if has_valid.any():
+            medians[p, has_valid] = np.nanmedian(subset[:, has_valid], axis=0)
+
+    index = pd.Index(masks.columns, name='Pattern')
+    columns = pd.Index(method_columns, name='Method')
+    return {
+        'count': pd.Series(bool_masks.sum(axis=0), index=index),
+        'valid': pd.DataFrame(valid_counts.astype(int), index=index, columns=columns),
+        'mean': pd.DataFrame(means, index=index, columns=columns),
+        'median': pd.DataFrame(medians, index=index, columns=columns),
+    }
+
+
+def analyze_address_patterns(df, method_columns=None, patterns=ADDRESS_PATTERNS, matrix=None):
+    """Αναλύει patterns στις διευθύνσεις και την απόδοση κάθε μεθόδου"""
+    if method_columns is None:
+        method_columns = find_method_columns(df)
+
+    masks = None
+    if matrix is None:
+        masks = pattern_matrix(df['original_address'], patterns)
+        matrix = pattern_method_matrix(df, method_columns, masks=masks)
+    means = matrix['mean']
+
+    if 'v1_original' in means.columns:
+        v1_means = means['v1_original'].to_numpy()
+    else:
+        v1 = df['v1_original_distance'].to_numpy(dtype=float)
+        v1_valid = ~np.isnan(v1)
+        if masks is None:
+            masks = pattern_matrix(df['original_address'], patterns)
+        m = masks.to_numpy(dtype=np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            v1_means = (m.T @ np.where(v1_valid, v1, 0.0)) / (m.T @ v1_valid)
+
+    results = []
+    for p, pattern_name in enumerate(means.index):
+        count = int(matrix['count'].iloc[p])
+        row = means.iloc[p]
+        # Βρες ποια μέθοδος είναι καλύτερη για αυτό το pattern (η πρώτη σε ισοπαλία)
+        if count == 0 or row.isna().all():
+            continue
+        best_method = row.idxmin()
+        best_distance = row[best_method]
+
+        results.append({
+            'Pattern': pattern_name,
+            'Count': count,
+            'Percentage': f"{count/len(df)*100:.1f}%",
+            'Best_Method': best_method,
+            'Best_Mean_Distance': f"{best_distance:.1f}m",
+            'Improvement_vs_v1': f"{v1_means[p] - best_distance:.1f}m"
+        })
+
+    return pd.DataFrame(results)
+
+
+def create_rule_based_system(df, pattern_analysis):
+    """
+    Δημιουργεί rule-based σύστημα βασισμένο στα patterns
+    """
+
+    print("🔨 Δημιουργία Rule-Based System...")
+
+    # Εξαγωγή κανόνων από το pattern analysis
+    rules = []
+    for _, row in pattern_analysis.iterrows():
+        rules.append({
+            'pattern': row['Pattern'],
+            'method': row['Best_Method'],
+            'confidence': float(row['Count']) / len(df)
+        })
+
+    # Sort by confidence
+    rules.sort(key=lambda x: x['confidence'], reverse=True)
+
+    print(f"\n📋 Δημιουργήθηκαν {len(rules)} κανόνες:")
+    for i, rule in enumerate(rules[:5], 1):
+        print(f"   {i}. If {rule['pattern']} → use {rule['method']} (conf: {rule['confidence']:.2f})")
+
+    return rules
+
+
+def apply_rule_based_method(address, rules_list=None):
+    """
+    Εφαρμόζει το rule-based σύστημα σε μία διεύθυνση
+    """
+    # Για ολόκληρη στήλη: rule_engine.assign_methods(addresses, HAND_RULES)
+    return assign_methods([address], HAND_RULES)[0]
+
+
+def _approach_row(results, name, distances, success_rate):
+    results['Approach'].append(name)
+    results['Mean_Distance'].append(distances.mean())
+    results['Median_Distance'].append(distances.median())
+    results['Success_Rate'].append(success_rate)
+    results['Within_100m'].append((distances <= 100).mean() * 100)
+    results['Within_500m'].append((distances <= 500).mean() * 100)
+
+
+def evaluate_approaches(df, rules=None, learned_rules=None):
+    """Συγκρίνει διάφορες προσεγγίσεις"""
+
+    results = {
+        'Approach': [],
+        'Mean_Distance': [],
+        'Median_Distance': [],
+        'Success_Rate': [],
+        'Within_100m': [],
+        'Within_500m': []
+    }
+
+    # 1. Original (v1)
+    v1_distances = df['v1_original_distance'].dropna()
+    _approach_row(results, 'Original (v1)', v1_distances, 100.0)  # Always has a result
+
+    # 2. Simple Rule (always use v8_combined_basic)
+    if 'v8_combined_basic_distance' in df.columns:
+        v8_distances = df['v8_combined_basic_distance'].dropna()
+        _approach_row(results, 'Simple Rule (v8)', v8_distances, len(v8_distances) / len(df) * 100)
+
+    # 3. Rule-Based System (όλη η στήλη μαζί)
+    rule_based_distances = routed_distances(df, assign_methods(df['original_address'], HAND_RULES)).dropna()
+    if len(rule_based_distances):
+        _approach_row(results, 'Rule-Based', rule_based_distances,
+                      len(rule_based_distances) / len(df) * 100)
+
+    # 3b. Learned decision list
+    if learned_rules is not None:
+        learned_distances = routed_distances(df, assign_methods(df['original_address'], learned_rules)).dropna()
+        if len(learned_distances):
+            _approach_row(results, 'Learned Rules', learned_distances,
+                          len(learned_distances) / len(df) * 100)
+
+    # 4. Oracle (best possible per station)
+    if 'best_distance' in df.columns or 'best_distance_enhanced' in df.columns:
+        best_col = 'best_distance_enhanced' if 'best_distance_enhanced' in df.columns else 'best_distance'
+        best_distances = df[best_col].dropna()
+        _approach_row(results, 'Oracle (Best Possible)', best_distances,
+                      len(best_distances) / len(df) * 100)
+
+    return pd.DataFrame(results)
+
+
+def plot_analysis(df, comparison_df, pattern_analysis, fig_path, show=False):
+    """Τα 4 plots της ανάλυσης σε ένα png"""
+    import matplotlib
+    if not show:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    # Set style
+    sns.set_style("whitegrid")
+    fig, axes = plt.subplots(2, 2, figsize=(15, 12))
+
+    # 1. Bar plot: Mean distance by approach
+    ax1 = axes[0, 0]
+    comparison_df.plot(x='Approach', y='Mean_Distance', kind='bar', ax=ax1, color='steelblue')
+    ax1.set_title('Mean Distance by Approach', fontsize=14, fontweight='bold')
+    ax1.set_ylabel('Distance (meters)')
+    ax1.set_xlabel('')
+    ax1.tick_params(axis='x', rotation=45)
+
+    # 2. Success metrics comparison
+    ax2 = axes[0, 1]
+    metrics = comparison_df.set_index('Approach')[['Within_100m', 'Within_500m']]
+    metrics.plot(kind='bar', ax=ax2)
+    ax2.set_title('Success Metrics Comparison', fontsize=14, fontweight='bold')
+    ax2.set_ylabel('Percentage (%)')
+    ax2.set_xlabel('')
+    ax2.legend(['Within 100m', 'Within 500m'])
+    ax2.tick_params(axis='x', rotation=45)
+
+    # 3. Distribution of best methods
+    ax3 = axes[1, 0]
+    if 'best_method' in df.columns or 'best_method_enhanced' in df.columns:
+        best_col = 'best_method_enhanced' if 'best_method_enhanced' in df.columns else 'best_method'
+        method_counts = df[best_col].value_counts().head(10)
+        method_counts.plot(kind='barh', ax=ax3, color='coral')
+        ax3.set_title('Top 10 Best Methods (Frequency)', fontsize=14, fontweight='bold')
+        ax3.set_xlabel('Number of times selected as best')
+        ax3.set_ylabel('')
+
+    # 4. Pattern prevalence
+    ax4 = axes[1, 1]
+    pattern_counts = pattern_analysis.set_index('Pattern')['Count']
+    pattern_counts.plot(kind='barh', ax=ax4, color='lightgreen')
+    ax4.set_title('Address Pattern Prevalence', fontsize=14, fontweight='bold')
+    ax4.set_xlabel('Number of addresses')
+    ax4.set_ylabel('')
+
+    plt.suptitle('Geocoding Analysis Results', fontsize=16, fontweight='bold', y=1.02)
+    plt.tight_layout()
+
+    plt.savefig(fig_path, dpi=300, bbox_inches='tight')
+    print(f"\n💾 Plots saved to: {fig_path}")
+    if show:
+        plt.show()
+    plt.close(fig)
+
+
+def save_rules_json(path, rules_json=RULES_JSON):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(rules_json, f, ensure_ascii=False, indent=2)
+
+
+def save_pattern_method_matrix(path, matrix):
+    # Ena sheet ana statistiko (Pattern x Method)
+    with pd.ExcelWriter(path) as writer:
+        for name in ('mean', 'median', 'valid'):
+            matrix[name].to_excel(writer, sheet_name=name)
+        matrix['count'].rename('Count').to_excel(writer, sheet_name='count')
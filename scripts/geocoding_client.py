@@ -0,0 +1,95 @@
+# geocoding_client
+# Geocoding me persistent JSON cache (data/geocoding_cache.json), opos sto
+# geocoding_comparison_analysis.ipynb, me metrics gia cache hits, latency kai sfalmata.
+
+import json
+import os
+
+from paths import CACHE_FILE
+from pipeline_metrics import METRICS
+
+
+def load_cache(cache_file=CACHE_FILE):
+    """Load cache from JSON file - fortosi cache apo JSON arxeio"""
+    try:
+        if os.path.exists(cache_file):
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            print(f"Cache fortothike: {len(cache)} cached addresses")
+            return cache
+        else:
+            print("Den vrethike cache arxeio - tha dimiourgithei neo")
+            return {}
+    except Exception as e:
+        print(f"Sfalma kata ti fortosi cache: {e}")
+        return {}
+
+
+def save_cache(cache, cache_file=CACHE_FILE):
+    """Save cache to JSON file - apothikefsi cache se JSON arxeio"""
+    try:
+        os.makedirs(os.path.dirname(cache_file) or '.', exist_ok=True)
+        with open(cache_file, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+        print(f"Cache apothikeythike: {len(cache)} addresses sto {cache_file}")
+    except Exception as e:
+        print(f"Sfalma kata tin apothikefsi cache: {e}")
+
+
+def parse_geocode_result(result):
+    if not result:
+        return None
+    location = result[0]['geometry']['location']
+    return {
+        'lat': location['lat'],
+        'lng': location['lng'],
+        'accuracy': result[0]['geometry']['location_type'],
+    }
+
+
+def geocode_address(gmaps, address, cache=None, verbose=False):
+    """Geocode mia dieuthinsi me persistent caching (kai ton arnitikon apotelesmaton)"""
+    if cache is not None and address in cache:
+        METRICS.counter('geocode_cache_total', result='hit').inc()
+        if verbose:
+            print(f"    [CACHE HIT] Using cached result for: {address[:50]}...")
+        return cache[address]
+    METRICS.counter('geocode_cache_total', result='miss').inc()
+
+    try:
+        with METRICS.timer('geocode_request_seconds'):
+            result = gmaps.geocode(address, region='gr')
+    except Exception as e:
+        METRICS.counter('geocode_errors_total', kind=type(e).__name__).inc()
+        print(f"Sfalma: {e}")
+        geocoded_result = None
+    else:
+        geocoded_result = parse_geocode_result(result)
+        accuracy = geocoded_result['accuracy'] if geocoded_result else 'FAILED'
+        METRICS.counter('geocode_results_total', accuracy=accuracy).inc()
+        if verbose:
+            print(f"    [API CALL] New geocoding for: {address[:50]}...")
+
+    if cache is not None:
+        cache[address] = geocoded_result
+    return geocoded_result
+
+
+def cache_hit_ratio():
+    hits = METRICS.total('geocode_cache_total', result='hit')
+    misses = METRICS.total('geocode_cache_total', result='miss')
+    return hits / (hits + misses) if hits + misses else 0.0
+
+
+def cache_stats(cache):
+    """Statistika tou cache: synolo, epityximena/arnitika kai katanomi accuracy"""
+    accuracy = {}
+    for result in cache.values():
+        key = result['accuracy'] if result else 'FAILED'
+        accuracy[key] = accuracy.get(key, 0) + 1
+    return {
+        'total': len(cache),
+        'successful': sum(1 for r in cache.values() if r),
+        'failed': sum(1 for r in cache.values() if not r),
+        'accuracy': dict(sorted(accuracy.items(), key=lambda kv: -kv[1])),
+    }
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+# geocoding_experiments
+# To geocoding loop, i epilogi kalyteris methodou kai ta statistika ana methodo
+# tou 1_additional_experiments.py, os synartiseis pou mporoun na ksanaxrisimopoiithoun.
+
+import time
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from address_cleaning import build_query, haversine_array, haversine_distance
+from pipeline_metrics import METRICS
+from result_buffer import FLUSH_EVERY, ResultBuffer
+
+
+def geocode_methods(df_existing, gmaps, methods, rate_limit=0.1, show_progress=True,
+                    checkpoint=None, flush_every=FLUSH_EVERY, representatives=None):
+    """Geocoding κάθε σταθμού με κάθε μέθοδο -> νέο df με τις στήλες {method}_*
+
+    Τα αποτελέσματα μαζεύονται σε buffers ανά (μέθοδο, πεδίο) και μπαίνουν στο
+    df με ένα concat στο τέλος. Με checkpoint, κάθε flush_every σταθμούς τα
+    ολοκληρωμένα γράφονται στο δίσκο και ένα νέο run συνεχίζει από εκεί.
+    Με representatives (θέση αντιπροσώπου ανά σταθμό, π.χ. από το
+    address_lsh.address_groups) γίνεται geocoding μόνο στους αντιπροσώπους και
+    το αποτέλεσμα μοιράζεται στα μέλη, με την απόσταση από το δικό τους ground truth.
+    """
+    methods = list(methods)
+    results = ResultBuffer(len(df_existing), methods, checkpoint=checkpoint, flush_every=flush_every,
+                           ids=df_existing['gasStationID'])
+    resumed = results.resume()
+    if resumed:
+        print(f"   Checkpoint: {resumed} stathmoi exoun idi oloklirothei ({checkpoint})")
+
+    rows = enumerate(df_existing.itertuples(index=False))
+    if show_progress:
+        rows = tqdm(rows, total=len(df_existing), desc="New Geocoding")
+
+    representatives = (np.arange(len(df_existing)) if representatives is None
+                       else np.asarray(representatives, dtype=np.int64))
+    columns = {name: i for i, name in enumerate(df_existing.columns)}
+    with METRICS.stage('geocode_methods'):
+        for pos, values in rows:
+            if results.completed[pos] or representatives[pos] != pos:
+                continue
+            row = {name: values[i] for name, i in columns.items()}
+            with METRICS.timer('geocode_station_seconds'):
+                geocode_station(results, pos, row, gmaps, methods, rate_limit)
+            results.done(pos)
+
+    members = np.flatnonzero(representatives != np.arange(len(df_existing)))
+    if len(members):
+        fan_out(results, df_existing, members, representatives[members], methods)
+        METRICS.counter('geocode_calls_saved_total').inc(len(members) * len(methods))
+
+    results.flush()
+    df_final = results.merge_into(df_existing)
+    results.remove_checkpoint()
+    return df_final
+
+
+def fan_out(results, df_existing, members, sources, methods):
+    """Τα αποτελέσματα των αντιπροσώπων στα μέλη των ομάδων (απόσταση από το ground truth του μέλους)"""
+    results.copy_rows(members, sources)
+    gt_lat = df_existing['ground_truth_lat'].to_numpy(dtype=float)[members]
+    gt_lng = df_existing['ground_truth_lng'].to_numpy(dtype=float)[members]
+    for method in methods:
+        lat, lng = results.buffers[method, 'lat'][members], results.buffers[method, 'lng'][members]
+        results.buffers[method, 'distance'][members] = haversine_array(gt_lat, gt_lng, lat, lng)
+
+
+def geocode_station(results, pos, row, gmaps, methods, rate_limit=0.1):
+    """Όλες οι μέθοδοι για έναν σταθμό (γράφει στο ResultBuffer, θέση pos)"""
+    for method_name in methods:
+        cleaned_address = None
+        try:
+            cleaned_address, query = build_query(method_name, row['original_address'], row['countyName'])
+
+            # API call
+            with METRICS.timer('geocode_request_seconds', method=method_name):
+                result = gmaps.geocode(query, region='gr')
+
+            if result:
+                loc = result[0]['geometry']['location']
+                distance = haversine_distance(
+                    row['ground_truth_lat'], row['ground_truth_lng'],
+                    loc['lat'], loc['lng']
+                )
+                accuracy = result[0]['geometry']['location_type']
+                METRICS.counter('geocode_results_total', method=method_name, accuracy=accuracy).inc()
+
+                # Αποθήκευση αποτελεσμάτων
+                results.set(pos, method_name, address=cleaned_address, lat=loc['lat'], lng=loc['lng'],
+                            distance=distance, accuracy=accuracy)
+            else:
+                # Αποτυχία geocoding
+                METRICS.counter('geocode_results_total', method=method_name, accuracy='FAILED').inc()
+                results.set(pos, method_name, address=cleaned_address, accuracy='FAILED')
+
+        except Exception as e:
+            METRICS.counter('geocode_errors_total', method=method_name, kind=type(e).__name__).inc()
+            print(f"\n❌ Error για station {row['gasStationID']}, method {method_name}: {e}")
+            results.set(pos, method_name, address=cleaned_address, accuracy='ERROR')
+
+        # Rate limiting
+        if rate_limit:
+            time.sleep(rate_limit)
+
+
+def find_method_columns(df):
+    """Όλες οι μέθοδοι από τις στήλες {method}_distance"""
+    return [col.replace('_distance', '') for col in df.columns
+            if col.endswith('_distance') and not col.startswith('best_')
+            and not col.startswith('original_')]
+
+
+def find_best_method_enhanced(row, all_methods):
+    """Βρίσκει την καλύτερη μέθοδο για κάθε σταθμό"""
+    best_method = None
+    best_distance = float('inf')
+
+    for method in all_methods:
+        dist_col = f'{method}_distance'
+        if dist_col in row and pd.notna(row[dist_col]) and row[dist_col] < best_distance:
+            best_distance = row[dist_col]
+            best_method = method
+
+    return pd.Series({
+        'best_method_enhanced': best_method,
+        'best_distance_enhanced': best_distance,
+        'improvement_over_v1': row['v1_original_distance'] - best_distance if best_method else 0
+    })
+
+
+def method_statistics(df_final, all_methods):
+    """Στατιστικά ανά μέθοδο, ταξινομημένα κατά μέση απόσταση"""
+    stats_data = []
+    for method in all_methods:
+        dist_col = f'{method}_distance'
+        if dist_col in df_final.columns:
+            distances = df_final[dist_col].dropna()
+
+            if len(distances) > 0:
+                stats_data.append({
+                    'Method': method,
+                    'Mean_Distance_m': distances.mean(),
+                    'Median_Distance_m': distances.median(),
+                    'Success_Rate_%': (len(distances) / len(df_final)) * 100,
+                    'Within_100m_%': (distances <= 100).mean() * 100,
+                    'Within_500m_%': (distances <= 500).mean() * 100,
+                    'Times_Best': (df_final['best_method_enhanced'] == method).sum()
+                })
+
+    return pd.DataFrame(stats_data).sort_values('Mean_Distance_m')
@@ -1,23 +1,70 @@
-import pandas as pd
-import requests
+import argparse
 import os
+import re
 from pathlib import Path
 import time
 from datetime import datetime
-from dotenv import load_dotenv
 
-load_dotenv()
-GOOGLE_API_KEY = os.getenv('GOOGLE_MAPS_API_KEY')
+from paths import STATIONS_FILE, TILES_DIR
+from pipeline_metrics import METRICS, SIZE_BUCKETS, rate
+
+# pandas, requests kai dotenv fortonontai mesa stis synartiseis, oste to
+# import tou module (px. apo to validate_images i to --help) na einai amesso
 
 # Parametroi
 IMAGE_WIDTH = 640
 IMAGE_HEIGHT = 640
 ZOOM_LEVEL = 19
-OUTPUT_FOLDER = "/Users/geo/Desktop/fuelstation-detection-thesis/dataset/all"
+OUTPUT_FOLDER = str(TILES_DIR)
 MAP_TYPE = 'satellite'
 SHOW_MARKER = False
+STATIC_MAPS_URL = "https://maps.googleapis.com/maps/api/staticmap"
+MIN_FILE_SIZE = 1000
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+JPEG_SIGNATURE = b'\xff\xd8\xff'
+# format= tou Static Maps API -> (katalixi arxeiou, signature). None = default tou API (PNG)
+IMAGE_FORMAT = None
+IMAGE_FORMATS = {
+    'png': ('png', PNG_SIGNATURE),
+    'png8': ('png', PNG_SIGNATURE),
+    'png32': ('png', PNG_SIGNATURE),
+    'jpg': ('jpg', JPEG_SIGNATURE),
+    'jpg-baseline': ('jpg', JPEG_SIGNATURE),
+}
+
+# px. 00011_zoom_19_640x640.png (i .jpg / .webp meta apo transcode)
+TILE_EXTENSIONS = ('png', 'jpg', 'webp')
+TILE_FILENAME_RE = re.compile(r'^(\d+)_zoom_(\d+)_(\d+)x(\d+)\.(?:' + '|'.join(TILE_EXTENSIONS) + r')$')
+
+def tile_filename(station_id, zoom, width, height, ext='png'):
+    padded_id = str(station_id).zfill(5)
+    return f"{padded_id}_zoom_{zoom}_{width}x{height}.{ext}"
+
+def format_extension(image_format):
+    return IMAGE_FORMATS[image_format][0] if image_format else 'png'
+
+def parse_tile_filename(filename):
+    # Epistrefei (station_id, zoom, width, height) i None
+    match = TILE_FILENAME_RE.match(filename)
+    if not match:
+        return None
+    station_id, zoom, width, height = match.groups()
+    return int(station_id), int(zoom), int(width), int(height)
+
+def list_tile_files(folder):
+    # Ola ta arxeia eikonon tou fakelou me katalixi tile (png/jpg/webp), taxinomimena
+    return sorted(p for p in Path(folder).iterdir()
+                  if p.is_file() and p.suffix[1:].lower() in TILE_EXTENSIONS)
+
+def get_api_key():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return os.getenv('GOOGLE_MAPS_API_KEY')
 
 def load_all_stations(file_path):
+    import pandas as pd
+
     print(f"Fortosi dedomenon apo: {file_path}")
     df = pd.read_excel(file_path)
     print(f"Synolo pratirion: {len(df)}")
@@ -29,8 +76,8 @@ def load_all_stations(file_path):
     
     return df
 
-def get_static_map_url(lat, lon, zoom, width, height, api_key, map_type='satellite', show_marker=False):
-    base_url = "https://maps.googleapis.com/maps/api/staticmap"
+def get_static_map_url(lat, lon, zoom, width, height, api_key, map_type='satellite', show_marker=False,
+                       base_url=STATIC_MAPS_URL, image_format=None):
     url = (
         f"{base_url}?"
         f"center={lat},{lon}&"
@@ -39,47 +86,80 @@ def get_static_map_url(lat, lon, zoom, width, height, api_key, map_type='satelli
         f"scale=1&"
         f"maptype={map_type}&"
     )
+    if image_format:
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Agnosto format: {image_format} (epitrepta: {', '.join(IMAGE_FORMATS)})")
+        url += f"format={image_format}&"
     if show_marker:
         url += f"markers=color:red|{lat},{lon}&"
     url += f"key={api_key}"
     return url
 
-def download_map_image(url, output_path, max_retries=3):
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, timeout=30)
-            if response.status_code == 200:
-                with open(output_path, 'wb') as f:
-                    f.write(response.content)
-                file_size = os.path.getsize(output_path)
-                if file_size < 1000:
-                    print(f"   Mikro megethos arxeiou ({file_size} bytes)")
-                    return False
-                return True
-            else:
-                print(f"   Sfalma: HTTP {response.status_code}")
-                return False
-        except Exception as e:
-            print(f"   Prospatheia {attempt+1}/{max_retries} apetyche: {e}")
-            if attempt < max_retries - 1:
-                time.sleep(2)
-    return False
-
-def create_all_images(data_file, api_key, output_folder):
+def download_tile(url, output_path, cache=None, policy=None, breaker=None, signature=PNG_SIGNATURE):
+    # -> FetchResult (fetch_policy): ok / permanent (kai aporrifthen periexomeno) / quota / retry (exantlithikan)
+    import requests
+
+    from fetch_policy import OK, PERMANENT, fetch_with_policy
+
+    # Me cache (static_map_cache): idio tile -> anagnosi apo to disko anti gia API call
+    fetch = cache.get if cache is not None else requests.get
+    result = fetch_with_policy(url, fetch, policy, breaker)
+    if result.kind != OK:
+        print(f"   Sfalma: {result.reason}")
+        return result
+
+    # Elegxos prin tin eggrafi, oste na min menoun error PNGs sto dataset
+    response = result.response
+    content = response.content
+    METRICS.counter('download_bytes_total').inc(len(content))
+    METRICS.histogram('download_response_bytes', buckets=SIZE_BUCKETS).observe(len(content))
+    reason = None
+    if len(content) < MIN_FILE_SIZE:
+        reason = 'small'
+        print(f"   Mikro megethos arxeiou ({len(content)} bytes)")
+    elif not content.startswith(signature):
+        reason = 'not_png' if signature == PNG_SIGNATURE else 'bad_signature'
+        print(f"   Lathos typos eikonas ({response.headers.get('Content-Type')})")
+    if reason:
+        METRICS.counter('download_rejected_total', reason=reason).inc()
+        if cache is not None:
+            cache.discard(url)
+        result.kind, result.reason = PERMANENT, f"rejected: {reason}"
+        return result
+
+    with METRICS.timer('download_write_seconds'):
+        with open(output_path, 'wb') as f:
+            f.write(content)
+    return result
+
+def download_map_image(url, output_path, max_retries=3, cache=None, policy=None, breaker=None):
+    from fetch_policy import OK, BackoffPolicy
+
+    policy = policy or BackoffPolicy(max_retries=max_retries - 1)
+    return download_tile(url, output_path, cache, policy, breaker).kind == OK
+
+def create_all_images(data_file, api_key, output_folder, dry_run=False, cache=None, replay_dead_letter=False,
+                      base_url=STATIC_MAPS_URL, policy=None, breaker=None, image_format=IMAGE_FORMAT,
+                      station_ids=None, order=None):
     #  leitourgia katevamatos eikonon
+    import numpy as np
+    import pandas as pd
+
     print("="*70)
     print(" Google Maps Static API - Lipsi Eikonon")
     print("="*70)
     print()
     
-    if not api_key:
+    if not api_key and not dry_run:
         print("Sfalma: Den vrethike API key")
         return
     
-    print(f"API Key: {api_key[:20]}...")
+    if api_key:
+        print(f"API Key: {api_key[:20]}...")
     
     output_path = Path(output_folder)
-    output_path.mkdir(parents=True, exist_ok=True)
+    if not dry_run:
+        output_path.mkdir(parents=True, exist_ok=True)
     print(f"Fakelos exodou: {output_path.absolute()}")
     print()
     
@@ -88,6 +168,25 @@ def create_all_images(data_file, api_key, output_folder):
     except Exception as e:
         print(f"Sfalma fortosis: {e}")
         return
+
+    from fetch_policy import DEAD_LETTER_FILENAME, OK, QUOTA, BackoffPolicy, CircuitBreaker, DeadLetterQueue
+
+    if station_ids is not None:
+        # Work list (px. apo to station_diff): mono ta pratiria pou allaxan
+        stations_df = stations_df[stations_df['gasStationID'].isin(station_ids)].reset_index(drop=True)
+        print(f"Work list: {len(stations_df)} pratiria")
+
+    if order == 'hilbert':
+        # Geitonika pratiria diadoxika -> zesto cache/proxy kai diadoxika tiles sto disko
+        from catalog_layout import hilbert_key
+        keys = hilbert_key(stations_df['gasStationLat'], stations_df['gasStationLong'])
+        stations_df = stations_df.iloc[np.argsort(keys, kind='stable')].reset_index(drop=True)
+
+    dead_letter = DeadLetterQueue(output_path / DEAD_LETTER_FILENAME)
+    pending = dead_letter.load()     # kai xoris replay: oti petyxei apo edo vgainei apo to dead letter
+    if replay_dead_letter:
+        stations_df = stations_df[stations_df['gasStationID'].isin(pending)].reset_index(drop=True)
+        print(f"Replay dead letter: {len(stations_df)} pratiria apo {dead_letter.path}")
     
     print()
     print(f"Katevasma eikonon:")
@@ -95,9 +194,22 @@ def create_all_images(data_file, api_key, output_folder):
     print(f"   Typos charti: {MAP_TYPE}")
     print(f"   Marker: {'Nai' if SHOW_MARKER else 'Ochi'}")
     print(f"   Zoom level: {ZOOM_LEVEL}")
+    print(f"   Format: {image_format or 'default (png)'}")
+    ext = format_extension(image_format)
+    signature = IMAGE_FORMATS[image_format][1] if image_format else PNG_SIGNATURE
     print(f"   Synolo eikonon: {len(stations_df)}")
     print()
     
+    if dry_run:
+        existing = sum((output_path / tile_filename(sid, ZOOM_LEVEL, IMAGE_WIDTH, IMAGE_HEIGHT, ext)).exists()
+                       for sid in stations_df['gasStationID'])
+        print(f"Dry run: {existing} eikones yparxoun idi, {len(stations_df) - existing} tha katevoun")
+        for _, row in stations_df.head(3).iterrows():
+            print("  " + get_static_map_url(row['gasStationLat'], row['gasStationLong'], ZOOM_LEVEL,
+                                            IMAGE_WIDTH, IMAGE_HEIGHT, 'API_KEY', MAP_TYPE, SHOW_MARKER,
+                                            base_url, image_format))
+        return
+    
     stats = {
         'total': 0,
         'success': 0,
@@ -105,88 +217,183 @@ def create_all_images(data_file, api_key, output_folder):
     }
     
     log_data = []
+    recovered = []
+    # Koina gia ola ta requests: backoff me Retry-After kai breaker pou pagonei to run se outage
+    policy = policy or BackoffPolicy()
+    breaker = breaker or CircuitBreaker()
     
-    for idx, row in stations_df.iterrows():
-        station_id = row['gasStationID']
-        lat = row['gasStationLat']
-        lon = row['gasStationLong']
+    METRICS.reset()
+    with METRICS.stage('download'):
+        for pos, (idx, row) in enumerate(stations_df.iterrows()):
+            station_id = row['gasStationID']
+            lat = row['gasStationLat']
+            lon = row['gasStationLong']
         
-        print(f"Pratirio {idx+1}/{len(stations_df)}: ID={station_id}")
-        print(f"  Thesi: {lat:.6f}, {lon:.6f}")
+            print(f"Pratirio {idx+1}/{len(stations_df)}: ID={station_id}")
+            print(f"  Thesi: {lat:.6f}, {lon:.6f}")
         
-        stats['total'] += 1
+            stats['total'] += 1
         
-        padded_id = str(station_id).zfill(5)
-        filename = f"{padded_id}_zoom_{ZOOM_LEVEL}_{IMAGE_WIDTH}x{IMAGE_HEIGHT}.png"
-        filepath = output_path / filename
+            filename = tile_filename(station_id, ZOOM_LEVEL, IMAGE_WIDTH, IMAGE_HEIGHT, ext)
+            filepath = output_path / filename
         
-        url = get_static_map_url(lat, lon, ZOOM_LEVEL, IMAGE_WIDTH, IMAGE_HEIGHT, 
-                                api_key, MAP_TYPE, SHOW_MARKER)
+            url = get_static_map_url(lat, lon, ZOOM_LEVEL, IMAGE_WIDTH, IMAGE_HEIGHT, 
+                                    api_key, MAP_TYPE, SHOW_MARKER, base_url, image_format)
         
-        print(f"  Lipsi zoom {ZOOM_LEVEL} ({IMAGE_WIDTH}x{IMAGE_HEIGHT})...", end=" ")
-        success = download_map_image(url, filepath)
+            print(f"  Lipsi zoom {ZOOM_LEVEL} ({IMAGE_WIDTH}x{IMAGE_HEIGHT})...", end=" ")
+            cached = cache is not None and cache.is_fresh(url)
+            result = download_tile(url, filepath, cache, policy, breaker, signature)
+            success = result.kind == OK
         
-        if success:
-            print("OK")
-            stats['success'] += 1
-            status = 'success'
-        else:
-            print("Apotychia")
-            stats['failed'] += 1
-            status = 'failed'
+            METRICS.counter('download_stations_total', status='success' if success else 'failed').inc()
+            if success:
+                print("OK")
+                stats['success'] += 1
+                status = 'success'
+                if int(station_id) in pending:
+                    recovered.append(station_id)
+            else:
+                print("Apotychia")
+                stats['failed'] += 1
+                status = 'failed'
+                dead_letter.add(station_id, lat, lon, result.reason, result.status, result.attempts)
         
-        log_data.append({
-            'station_id': station_id,
-            'lat': lat,
-            'lon': lon,
-            'zoom': ZOOM_LEVEL,
-            'resolution': f"{IMAGE_WIDTH}x{IMAGE_HEIGHT}",
-            'filename': filename,
-            'status': status,
-            'timestamp': datetime.now().isoformat()
-        })
+            log_data.append({
+                'station_id': station_id,
+                'lat': lat,
+                'lon': lon,
+                'zoom': ZOOM_LEVEL,
+                'resolution': f"{IMAGE_WIDTH}x{IMAGE_HEIGHT}",
+                'filename': filename,
+                'status': status,
+                'reason': '' if success else result.reason,
+                'timestamp': datetime.now().isoformat()
+            })
+
+            if result.kind == QUOTA:
+                # Quota/key: ta ypoloipa requests tha apotyxoun episis - sto dead letter gia replay argotera
+                rest = stations_df.iloc[pos + 1:]
+                for _, other in rest.iterrows():
+                    dead_letter.add(other['gasStationID'], other['gasStationLat'], other['gasStationLong'],
+                                    'quota: not attempted')
+                print(f"\nQuota/API key ({result.reason}): diakopi, {len(rest)} pratiria sto {dead_letter.path}")
+                break
         
-        time.sleep(0.5)
+            if not cached:     # ta cache hits den xreiazontai rate limit
+                time.sleep(0.5)
         
-        if (idx + 1) % 10 == 0:
-            print()
+            if (idx + 1) % 10 == 0:
+                print()
     
+    if recovered:
+        left = dead_letter.remove(recovered)
+        print(f"Dead letter: {len(recovered)} pratiria anaktithikan, {left} menoun sto {dead_letter.path}")
+
     log_df = pd.DataFrame(log_data)
-    log_file = output_path / 'download_log.csv'
+    log_file = output_path / ('download_log_replay.csv' if replay_dead_letter else 'download_log.csv')
+    if station_ids is not None and log_file.exists():
+        # Work list: merge sto yparxon log ana station_id - ta ypoloipa pratiria kratoun tis grammes tous
+        previous = pd.read_csv(log_file)
+        if 'station_id' in previous.columns:
+            done = set(log_df['station_id']) if len(log_df) else set()
+            log_df = pd.concat([previous[~previous['station_id'].isin(done)], log_df], ignore_index=True)
     log_df.to_csv(log_file, index=False)
     print(f"\nLog: {log_file}")
     print()
     
+    # Metrics: JSON lines + Prometheus text file dipla sto log
+    METRICS.export_jsonl(output_path / 'download_metrics.jsonl')
+    METRICS.export_prometheus(output_path / 'download_metrics.prom')
+    wall = METRICS.histogram('stage_seconds', stage='download').sum
+    request_time = METRICS.histogram('download_request_seconds').sum
+    print("Metrics:")
+    print(METRICS.summary())
+    print(f"  bytes/s (wall): {rate(METRICS.total('download_bytes_total'), wall):,.0f}")
+    print(f"  xronos se HTTP: {request_time:.1f}s apo {wall:.1f}s")
+    print()
+    
     print("="*70)
     print(" Perilipsi")
     print("="*70)
     print(f"Synolo eikonon: {stats['total']}")
-    print(f"Epitychis lipsi: {stats['success']} ({stats['success']/stats['total']*100:.1f}%)")
+    print(f"Epitychis lipsi: {stats['success']} ({stats['success']/max(stats['total'], 1)*100:.1f}%)")
     print(f"Apotychies: {stats['failed']}")
+    if breaker.trips:
+        print(f"Circuit breaker: {breaker.trips} fores open")
+    if stats['failed']:
+        print(f"Dead letter: {dead_letter.path} (replay: download --replay-dead-letter)")
     print()
     print(f"Arxeia: {output_path.absolute()}")
     print()
 
-if __name__ == "__main__":
-    DATA_FILE = "/Users/geo/Desktop/fuelstation-detection-thesis/data/ALL χιλιομετικές διευθύνσεις.xlsx"
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Lipsi doryforikon eikonon apo to Google Maps Static API")
+    parser.add_argument('--data-file', default=str(STATIONS_FILE))
+    parser.add_argument('--output-folder', default=OUTPUT_FOLDER)
+    parser.add_argument('--dry-run', action='store_true',
+                        help="mono fortosi pratirion kai ta URLs, xoris katevasma")
+    parser.add_argument('--cache-dir', default=None,
+                        help="fakelos tou Static Maps cache (default: data/.static_map_cache)")
+    parser.add_argument('--cache-max-mb', type=float, default=None, help="orio megethous tou cache (LRU)")
+    parser.add_argument('--no-cache', action='store_true', help="kathe tile apo to API, xoris topiko cache")
+    parser.add_argument('--format', dest='image_format', choices=list(IMAGE_FORMATS), default=IMAGE_FORMAT,
+                        help="format= tou Static Maps API (jpg: ~3-5x mikrotera tiles, me apoleies)")
+    parser.add_argument('--only-ids', default=None,
+                        help="arxeio me ena gasStationID ana grammi (px. data/station_diff/download_ids.txt)")
+    parser.add_argument('--order', choices=['workbook', 'hilbert'], default='workbook',
+                        help="seira katevasmatos (hilbert: geitonika pratiria diadoxika)")
+    parser.add_argument('--replay-dead-letter', action='store_true',
+                        help="mono ta pratiria tou download_dead_letter.jsonl (oxi olo to arxeio)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    api_key = get_api_key()
     
-    if not GOOGLE_API_KEY:
+    if not api_key and not args.dry_run:
         print("="*70)
         print(" Sfalma: Den vrethike API Key")
         print("="*70)
         print()
         print("Orise to GOOGLE_MAPS_API_KEY sto .env file")
         print("="*70)
-        exit(1)
+        return 1
     
-    create_all_images(
-        data_file=DATA_FILE,
-        api_key=GOOGLE_API_KEY,
-        output_folder=OUTPUT_FOLDER
-    )
+    cache = None
+    if not args.no_cache and not args.dry_run:
+        from static_map_cache import MAX_BYTES, STATIC_MAP_CACHE_DIR, StaticMapCache
+        max_bytes = int(args.cache_max_mb * 1024 ** 2) if args.cache_max_mb else MAX_BYTES
+        cache = StaticMapCache(args.cache_dir or STATIC_MAP_CACHE_DIR, max_bytes=max_bytes)
+
+    station_ids = None
+    if args.only_ids:
+        from station_diff import load_id_list
+        station_ids = load_id_list(args.only_ids)
+
+    try:
+        create_all_images(
+            data_file=args.data_file,
+            api_key=api_key,
+            output_folder=args.output_folder,
+            dry_run=args.dry_run,
+            cache=cache,
+            replay_dead_letter=args.replay_dead_letter,
+            image_format=args.image_format,
+            station_ids=station_ids,
+            order=args.order
+        )
+    finally:
+        if cache is not None:
+            from static_map_cache import format_cache_stats
+            cache.flush()
+            print(format_cache_stats(cache.stats()))
     
     print()
     print("="*70)
     print(" Oloklirothike")
     print("="*70)
-    print()
\ No newline at end of file
+    print()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
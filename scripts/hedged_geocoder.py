@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+# hedged_geocoder
+# Geocoder me pollapla backends (Google, to JSON cache, topiki antikatastasi)
+# kai hedged requests: an to primary den apantisei mesa sto p95 tis latency
+# pou exei paratirithei, stelnetai ena backup request kai kerdizei i proti
+# apantisi pou pernaei tous kanones empistosynis. Ta hedges periorizontai se
+# ena pososto ton requests, opote to kostos den diplasiazetai.
+#
+# Exei to idio .geocode(query, region) me to googlemaps.Client, ara bainei
+# opou pernaei ena gmaps (geocode_methods, LiveOracle, geocode_address).
+#
+#   geocoder = HedgedGeocoder(GoogleBackend(client), cache=CacheBackend(load_cache()))
+#   result = geocoder.geocode(query, region='gr')
+#   print(format_latency_stats(geocoder.stats()))
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+
+from pipeline_metrics import METRICS
+
+# Parametroi
+HEDGE_QUANTILE = 95          # to backup fevgei meta to p95 tou primary
+MIN_SAMPLES = 20             # mexri tote xrisimopoieitai to DEFAULT_HEDGE_DELAY
+DEFAULT_HEDGE_DELAY = 1.0    # seconds
+MAX_HEDGE_FRACTION = 0.10    # to poly 10% ton requests me backup
+LATENCY_WINDOW = 500         # teleutaies latencies ana backend
+ACCURACY_RANK = {'ROOFTOP': 0, 'RANGE_INTERPOLATED': 1, 'GEOMETRIC_CENTER': 2, 'APPROXIMATE': 3}
+MAX_ACCEPT_ACCURACY = 'GEOMETRIC_CENTER'   # APPROXIMATE -> dokimazetai to epomeno backend
+
+
+class LatencyTracker:
+    """Kyliomeno parathyro latencies ana backend (p50/p95/p99) + histogram sta METRICS"""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, backend, seconds):
+        with self._lock:
+            self._samples.setdefault(backend, deque(maxlen=self.window)).append(seconds)
+        METRICS.histogram('geocode_backend_seconds', backend=backend).observe(seconds)
+
+    def quantile(self, backend, q, default=None):
+        with self._lock:
+            samples = list(self._samples.get(backend, ()))
+        if len(samples) < MIN_SAMPLES:
+            return default
+        return float(np.percentile(samples, q))
+
+    def summary(self):
+        with self._lock:
+            items = {name: list(s) for name, s in self._samples.items()}
+        return {name: {'count': len(s), 'p50': float(np.percentile(s, 50)), 'p95': float(np.percentile(s, 95)),
+                       'p99': float(np.percentile(s, 99)), 'max': max(s)}
+                for name, s in items.items() if s}
+
+
+# ============= BACKENDS =============
+
+class GoogleBackend:
+    """googlemaps.Client (i opoiodipote antikeimeno me .geocode)"""
+
+    def __init__(self, client, name='google'):
+        self.client = client
+        self.name = name
+
+    def geocode(self, query, region='gr'):
+        return self.client.geocode(query, region=region)
+
+
+class CacheBackend:
+    """To geocoding_cache.json (address -> {lat, lng, accuracy} i None) os backend
+
+    Epistrefei None otan den yparxei to query (miss), [] gia cached apotyxia.
+    """
+
+    def __init__(self, cache, name='cache'):
+        self.cache = cache
+        self.name = name
+        self._lock = threading.Lock()
+
+    def geocode(self, query, region='gr'):
+        with self._lock:
+            if query not in self.cache:
+                return None
+            entry = self.cache[query]
+        if not entry:
+            return []
+        return [{'geometry': {'location': {'lat': entry['lat'], 'lng': entry['lng']},
+                              'location_type': entry['accuracy']}}]
+
+    def store(self, query, result):
+        from geocoding_client import parse_geocode_result
+        with self._lock:
+            self.cache[query] = parse_geocode_result(result)
+
+
+def accept_result(result, max_rank=ACCURACY_RANK[MAX_ACCEPT_ACCURACY]):
+    """Κανόνας εμπιστοσύνης: μη κενό αποτέλεσμα με location_type έως max_rank (default GEOMETRIC_CENTER)"""
+    if not result:
+        return False
+    rank = ACCURACY_RANK.get(result[0]['geometry'].get('location_type'), len(ACCURACY_RANK))
+    return rank <= max_rank
+
+
+class HedgedGeocoder:
+    """Primary + backups με hedging στο p95, πρώτα το cache (χωρίς κόστος)"""
+
+    def __init__(self, primary, backups=None, cache=None, accept=accept_result, hedge_quantile=HEDGE_QUANTILE,
+                 max_hedge_fraction=MAX_HEDGE_FRACTION, default_delay=DEFAULT_HEDGE_DELAY, workers=8):
+        self.primary = primary
+        self.backups = list(backups) if backups is not None else [primary]   # default: idio backend xana
+        self.cache = cache
+        self.accept = accept
+        self.hedge_quantile = hedge_quantile
+        self.max_hedge_fraction = max_hedge_fraction
+        self.default_delay = default_delay
+        self.latency = LatencyTracker()
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='geocode')
+
+    def _call(self, backend, query, region):
+        started = time.perf_counter()
+        try:
+            return backend.geocode(query, region=region)
+        finally:
+            self.latency.record(backend.name, time.perf_counter() - started)
+
+    def hedge_delay(self):
+        return self.latency.quantile(self.primary.name, self.hedge_quantile, self.default_delay)
+
+    def _may_hedge(self):
+        # Proypologismos: hedges <= max_hedge_fraction * requests (+1 gia tin arxi)
+        with self._lock:
+            if self.hedges + 1 > self.max_hedge_fraction * self.requests + 1:
+                return False
+            self.hedges += 1
+        METRICS.counter('geocode_hedges_total').inc()
+        return True
+
+    def _hedge(self, futures, backups, query, region, skip=()):
+        backend = next((b for b in backups if b not in skip), None)
+        if backend is not None and self._may_hedge():
+            futures[self._pool.submit(self._call, backend, query, region)] = backend
+
+    def geocode(self, query, region='gr'):
+        if self.cache is not None:
+            cached = self.cache.geocode(query, region)
+            if cached is not None:
+                METRICS.counter('geocode_cache_total', result='hit').inc()
+                return cached
+            METRICS.counter('geocode_cache_total', result='miss').inc()
+
+        with self._lock:
+            self.requests += 1
+        first = self._pool.submit(self._call, self.primary, query, region)
+        futures = {first: self.primary}
+        backups = iter(self.backups)
+        fallback, error = None, None
+        answered = set()
+        timeout = self.hedge_delay()
+
+        while futures:
+            done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # Argo primary: backup request (an to epitrepei o proypologismos)
+                self._hedge(futures, backups, query, region)
+                timeout = None
+                continue
+            for future in done:
+                backend = futures.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+                    METRICS.counter('geocode_errors_total', backend=backend.name, kind=type(e).__name__).inc()
+                    result = None
+                else:
+                    answered.add(backend)
+                if result is not None and self.accept(result):
+                    if future is not first:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    self._store(query, result)
+                    return result
+                if result is not None and fallback is None:
+                    fallback = result
+            if not futures:
+                # Kamia apodekti apantisi - epomeno (allo) backend amesos, xoris anamoni p95
+                self._hedge(futures, backups, query, region, skip=answered)
+                timeout = None
+
+        if fallback is None and error is not None:
+            raise error
+        result = fallback if fallback is not None else []
+        self._store(query, result)
+        return result
+
+    def _store(self, query, result):
+        if self.cache is not None and hasattr(self.cache, 'store'):
+            self.cache.store(query, result)
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'hedges': self.hedges,
+            'hedge_fraction': self.hedges / self.requests if self.requests else 0.0,
+            'hedge_wins': self.hedge_wins,
+            'hedge_delay': self.hedge_delay(),
+            'backends': self.latency.summary(),
+        }
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def format_latency_stats(stats):
+    lines = [f"Requests: {stats['requests']}, hedges: {stats['hedges']} ({stats['hedge_fraction'] * 100:.1f}%), "
+             f"hedge wins: {stats['hedge_wins']}, hedge delay: {stats['hedge_delay']:.3f}s"]
+    for name, s in stats['backends'].items():
+        lines.append(f"  {name:<10} n={s['count']:<6} p50={s['p50'] * 1000:7.1f}ms  p95={s['p95'] * 1000:7.1f}ms  "
+                     f"p99={s['p99'] * 1000:7.1f}ms  max={s['max'] * 1000:7.1f}ms")
+    return '\n'.join(lines)
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+# method_model
+# To RandomForest tou geocoding_pattern_analysis_ml.ipynb (provlepsi tis
+# kalyteris methodou katharismou apo ta features tis diefthinsis) os module:
+#   - feature matrix cache: ta extract_address_features ypologizontai mia fora
+#     ana synolo diefthinseon + FEATURE_VERSION (.npz sto .feature_cache)
+#   - hyperparameter grid kai CV folds parallila se olous tous pyrines
+#     (joblib/loky: o X einai float32 contiguous kai perna san read-only memmap,
+#     oxi antigrafo ana worker)
+#   - versioned model artifact (models/method_model_vN.joblib + .json) kai ta
+#     confusion_matrix.csv / feature_importance.csv / classification_report.csv
+#     sti morfi tou notebook
+#
+#   python scripts/cli.py train --results data/geocoding_pattern_analysis_ml/geocoding_19methods_full.xlsx
+#   model = load_model(); predict_methods(model, ['45ο ΧΛΜ Ε.Ο. ΑΘΗΝΩΝ-ΛΑΜΙΑΣ'])
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from paths import ML_DIR, RESULTS_19_METHODS
+
+# Parametroi
+# Allagi sto extract_address_features -> FEATURE_VERSION += 1 (akyrwnei to cache)
+FEATURE_VERSION = 1
+FEATURE_COLUMNS = ['has_question_mark', 'has_peo', 'has_eo', 'has_neo', 'has_dash', 'has_comma', 'km_notation',
+                   'num_cities', 'km_position', 'has_ordinal', 'address_length', 'num_words', 'num_dots',
+                   'starts_with_digit']
+FEATURE_CACHE_DIR = ML_DIR / '.feature_cache'
+MODELS_DIR = ML_DIR / 'models'
+MIN_CLASS_SAMPLES = 5          # opos sto notebook: classes me < 5 stathmous ektos
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+CV_FOLDS = 5
+# Arrays megalytera apo afto pernane stous loky workers san memmap (0 = panta): o X
+# (~7.6k x 14 float32 = 430 KB) einai kato apo to default 1M tou joblib kai tha ginotan pickle
+MEMMAP_MAX_NBYTES = 0
+# To notebook: n_estimators=300, max_depth=10, min_samples_leaf=3 (mesa sto grid)
+PARAM_GRID = {
+    'n_estimators': [100, 300],
+    'max_depth': [6, 10, None],
+    'min_samples_leaf': [1, 3, 5],
+}
+
+
+# ============= FEATURES =============
+
+def address_set_key(addresses, version=FEATURE_VERSION):
+    """sha256 του συνόλου διευθύνσεων (ταξινομημένες, μοναδικές) + feature version"""
+    h = hashlib.sha256(f"features-v{version}:{','.join(FEATURE_COLUMNS)}\n".encode('utf-8'))
+    for address in sorted(set(addresses)):
+        h.update(address.encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()[:16]
+
+
+def compute_features(addresses):
+    """(U, F) float32 για μοναδικές διευθύνσεις (extract_address_features)"""
+    from address_cleaning import extract_address_features
+
+    rows = []
+    for address in addresses:
+        try:
+            features = extract_address_features(address)
+        except IndexError:
+            # Keni diefthinsi (address.strip()[0])
+            features = {}
+        rows.append([features.get(name, 0) for name in FEATURE_COLUMNS])
+    return np.asarray(rows, dtype=np.float32).reshape(len(rows), len(FEATURE_COLUMNS))
+
+
+def feature_matrix(addresses, cache_dir=FEATURE_CACHE_DIR, version=FEATURE_VERSION):
+    """(N, F) features στη σειρά των addresses, το κλειδί του συνόλου και αν ήρθαν από το cache"""
+    addresses = pd.Series(addresses, dtype=object).fillna('').astype(str)
+    codes, unique = pd.factorize(addresses)
+    unique = list(unique)
+    key = address_set_key(unique, version)
+    path = Path(cache_dir) / f'features_{key}.npz' if cache_dir else None
+
+    if path is not None and path.exists():
+        with np.load(path, allow_pickle=False) as data:
+            cached = dict(zip(data['addresses'].tolist(), data['X']))
+        X_unique = np.stack([cached[a] for a in unique]) if unique else np.empty((0, len(FEATURE_COLUMNS)))
+        return np.ascontiguousarray(X_unique[codes], dtype=np.float32), key, True
+
+    X_unique = compute_features(unique)
+    if path is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.stem + '.tmp.npz')
+        np.savez(tmp_path, X=X_unique, addresses=np.array(unique, dtype=str), columns=np.array(FEATURE_COLUMNS))
+        os.replace(tmp_path, path)
+    return np.ascontiguousarray(X_unique[codes], dtype=np.float32), key, False
+
+
+def best_method_labels(df, method_columns=None):
+    """best_method ανά σταθμό (η στήλη αν υπάρχει, αλλιώς argmin των {method}_distance)"""
+    if 'best_method' in df.columns:
+        return df['best_method'].astype(object).where(df['best_method'].notna(), None)
+    if method_columns is None:
+        from geocoding_experiments import find_method_columns
+        method_columns = find_method_columns(df)
+    distances = df[[f'{m}_distance' for m in method_columns]].to_numpy(dtype=float)
+    ok = ~np.isnan(distances)
+    best = np.argmin(np.where(ok, distances, np.inf), axis=1)
+    return pd.Series(np.where(ok.any(axis=1), np.array(method_columns, dtype=object)[best], None),
+                     index=df.index, dtype=object)
+
+
+# ============= TRAINING =============
+
+def train_model(X, y, param_grid=PARAM_GRID, cv=CV_FOLDS, n_jobs=-1, min_class_samples=MIN_CLASS_SAMPLES,
+                test_size=TEST_SIZE, random_state=RANDOM_STATE):
+    """Grid search (CV) με όλους τους πυρήνες, fit του καλύτερου, αξιολόγηση στο test split"""
+    from joblib import parallel_config
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import classification_report, confusion_matrix
+    from sklearn.model_selection import GridSearchCV, StratifiedKFold, train_test_split
+
+    y = pd.Series(y, dtype=object).reset_index(drop=True)
+    counts = y.value_counts()
+    valid = y.isin(counts[counts >= min_class_samples].index).to_numpy() & y.notna().to_numpy()
+    X, y = X[valid], y[valid].astype(str).to_numpy()
+    stratify = y if len(np.unique(y)) > 1 else None
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state,
+                                                        stratify=stratify)
+
+    n_splits = max(2, min(cv, pd.Series(y_train).value_counts().min()))
+    # Ena dentro ana worker (n_jobs=1 mesa sto forest): to parallilismo einai ston syndyasmo
+    # params x folds, oxi mesa sto kathe fit
+    search = GridSearchCV(
+        RandomForestClassifier(class_weight='balanced', random_state=random_state, n_jobs=1),
+        param_grid, cv=StratifiedKFold(n_splits, shuffle=True, random_state=random_state),
+        n_jobs=n_jobs, refit=True, pre_dispatch='2*n_jobs')
+    started = time.perf_counter()
+    with parallel_config(backend='loky', max_nbytes=MEMMAP_MAX_NBYTES, mmap_mode='r'):
+        search.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - started
+
+    model = search.best_estimator_
+    y_pred = model.predict(X_test)
+    labels = list(model.classes_)
+    grid = pd.DataFrame(search.cv_results_)
+    grid = grid[['params', 'mean_test_score', 'std_test_score', 'mean_fit_time', 'rank_test_score']] \
+        .sort_values('rank_test_score', kind='stable').reset_index(drop=True)
+    grid['params'] = grid['params'].map(lambda p: json.dumps(p, sort_keys=True))
+    best = grid.iloc[0]
+    return {
+        'model': model,
+        'best_params': search.best_params_,
+        'cv_mean': float(best['mean_test_score']),
+        'cv_std': float(best['std_test_score']),
+        'cv_folds': n_splits,
+        'train_accuracy': float(model.score(X_train, y_train)),
+        'test_accuracy': float(model.score(X_test, y_test)),
+        'samples': int(len(y)),
+        'dropped': int((~valid).sum()),
+        'fit_seconds': fit_seconds,
+        'grid': grid,
+        'confusion_matrix': pd.DataFrame(confusion_matrix(y_test, y_pred, labels=labels), index=labels,
+                                         columns=labels),
+        'classification_report': pd.DataFrame(
+            classification_report(y_test, y_pred, output_dict=True, zero_division=0)).transpose(),
+        'feature_importance': pd.DataFrame({'feature': FEATURE_COLUMNS, 'importance': model.feature_importances_})
+        .sort_values('importance', ascending=False),
+        'classification_text': classification_report(y_test, y_pred, zero_division=0),
+    }
+
+
+# ============= ARTIFACTS =============
+
+def next_version(models_dir=MODELS_DIR):
+    versions = [int(p.stem.rsplit('_v', 1)[1]) for p in Path(models_dir).glob('method_model_v*.joblib')
+                if p.stem.rsplit('_v', 1)[1].isdigit()]
+    return max(versions, default=0) + 1
+
+
+def save_artifacts(result, out_dir=ML_DIR, models_dir=MODELS_DIR, feature_key=None):
+    """models/method_model_vN.joblib + .json και τα CSV του notebook στο out_dir"""
+    import joblib
+    import sklearn
+
+    out_dir, models_dir = Path(out_dir), Path(models_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    models_dir.mkdir(parents=True, exist_ok=True)
+    version = next_version(models_dir)
+    model_path = models_dir / f'method_model_v{version}.joblib'
+    meta = {
+        'version': version,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'feature_version': FEATURE_VERSION,
+        'feature_columns': FEATURE_COLUMNS,
+        'feature_key': feature_key,
+        'classes': [str(c) for c in result['model'].classes_],
+        'best_params': result['best_params'],
+        **{name: result[name] for name in ('cv_mean', 'cv_std', 'cv_folds', 'train_accuracy', 'test_accuracy',
+                                           'samples', 'fit_seconds')},
+        'sklearn': sklearn.__version__,
+    }
+    tmp_path = model_path.with_name(model_path.name + '.tmp')
+    joblib.dump({'model': result['model'], 'meta': meta}, tmp_path)
+    os.replace(tmp_path, model_path)
+    with open(model_path.with_suffix('.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    result['confusion_matrix'].to_csv(out_dir / 'confusion_matrix.csv')
+    result['feature_importance'].to_csv(out_dir / 'feature_importance.csv', index=False)
+    result['classification_report'].to_csv(out_dir / 'classification_report.csv')
+    result['grid'].to_csv(out_dir / 'method_model_grid.csv', index=False)
+    return model_path
+
+
+def load_model(path=None, models_dir=MODELS_DIR):
+    """Το artifact ({'model', 'meta'}), default η τελευταία έκδοση"""
+    import joblib
+
+    if path is None:
+        version = next_version(models_dir) - 1
+        if version < 1:
+            raise FileNotFoundError(f"Den yparxei montelo sto {models_dir}")
+        path = Path(models_dir) / f'method_model_v{version}.joblib'
+    artifact = joblib.load(path)
+    if artifact['meta']['feature_version'] != FEATURE_VERSION:
+        raise ValueError(f"To {path} exei features v{artifact['meta']['feature_version']}, "
+                         f"o kodikas v{FEATURE_VERSION} - xreiazetai xanaekpaideysi")
+    return artifact
+
+
+def predict_methods(artifact, addresses, cache_dir=None):
+    X = feature_matrix(addresses, cache_dir=cache_dir)[0]
+    return artifact['model'].predict(X)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ekpaideysi tou RandomForest epilogis methodou (cache + grid)")
+    parser.add_argument('--results', default=str(RESULTS_19_METHODS), help="xlsx me original_address kai "
+                                                                           "{method}_distance")
+    parser.add_argument('--address-column', default='original_address')
+    parser.add_argument('--out-dir', default=str(ML_DIR))
+    parser.add_argument('--models-dir', default=str(MODELS_DIR))
+    parser.add_argument('--cache-dir', default=str(FEATURE_CACHE_DIR))
+    parser.add_argument('--no-cache', action='store_true', help="features apo tin arxi, xoris .npz")
+    parser.add_argument('--cv', type=int, default=CV_FOLDS)
+    parser.add_argument('--jobs', type=int, default=-1, help="workers gia grid x folds (-1 = oloi oi pyrines)")
+    parser.add_argument('--quick', action='store_true', help="mono ta params tou notebook (xoris grid)")
+    args = parser.parse_args(argv)
+
+    df = pd.read_excel(args.results)
+    started = time.perf_counter()
+    X, feature_key, cached = feature_matrix(df[args.address_column],
+                                           cache_dir=None if args.no_cache else args.cache_dir)
+    print(f"Features: {X.shape[0]} x {X.shape[1]} se {time.perf_counter() - started:.2f}s "
+          f"({'cache' if cached else 'ypologismos'}, key {feature_key})")
+
+    param_grid = {'n_estimators': [300], 'max_depth': [10], 'min_samples_leaf': [3]} if args.quick else PARAM_GRID
+    result = train_model(X, best_method_labels(df), param_grid, cv=args.cv, n_jobs=args.jobs)
+    print(f"Samples: {result['samples']} (ektos {result['dropped']} me class < {MIN_CLASS_SAMPLES} i xoris best)")
+    print(f"Grid: {len(result['grid'])} syndyasmoi x {result['cv_folds']} folds se {result['fit_seconds']:.1f}s")
+    print(f"Kalytera params: {result['best_params']}")
+    print(f"CV accuracy: {result['cv_mean']:.3f} (+/- {result['cv_std'] * 2:.3f})")
+    print(f"Train accuracy: {result['train_accuracy']:.3f}, test accuracy: {result['test_accuracy']:.3f}")
+    print("\nCLASSIFICATION REPORT\n")
+    print(result['classification_text'])
+
+    model_path = save_artifacts(result, args.out_dir, args.models_dir, feature_key)
+    print(f"Montelo: {model_path}")
+    print(f"CSV: confusion_matrix.csv, feature_importance.csv, classification_report.csv -> {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
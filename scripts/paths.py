@@ -0,0 +1,22 @@
+# paths
+# Koina paths tou project, sxetika me to root tou repo (oxi apolyta paths).
+# To root mporei na allaxei me to FUELSTATION_ROOT (px. gia dedomena se allo disko).
+
+import os
+from pathlib import Path
+
+REPO_ROOT = Path(os.getenv('FUELSTATION_ROOT', Path(__file__).resolve().parents[1]))
+
+DATA_DIR = REPO_ROOT / 'data'
+DATASET_DIR = REPO_ROOT / 'dataset'
+TILES_DIR = DATASET_DIR / 'all'
+ML_DIR = DATA_DIR / 'geocoding_pattern_analysis_ml'
+
+STATIONS_FILE = DATA_DIR / 'ALL χιλιομετικές διευθύνσεις.xlsx'
+CLEANED_FILE = DATA_DIR / 'ALL_cleaned.xlsx'
+COMPARISON_FULL_FILE = DATA_DIR / 'geocoding_comparison_FULL.xlsx'
+CACHE_FILE = DATA_DIR / 'geocoding_cache.json'
+MARKERS_JS = DATA_DIR / 'markers.js'
+
+RESULTS_19_METHODS = ML_DIR / 'geocoding_19methods_full.xlsx'
+RESULTS_ENHANCED = ML_DIR / 'geocoding_enhanced_results.xlsx'
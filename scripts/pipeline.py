@@ -0,0 +1,392 @@
+# -*- coding: utf-8 -*-
+# pipeline
+# Mikro DAG gia olo to pipeline (dedup -> geocoding -> experiments -> analysis
+# -> report, kai markers / download apo to Excel pratirion). Kathe stage dilonei
+# inputs, outputs, parametrous kai ton kodika pou to epireazei. To kleidi tou
+# stage einai sha256 apo ta periexomena ton inputs + parametrous + kodika, opote
+# xanatrexei mono an allaxe kati apo afta (i leipoun / allaxan ta outputs).
+# Anexartita stages (px. markers kai download) trexoun parallila.
+#
+#   python scripts/cli.py pipeline --status
+#   python scripts/cli.py pipeline --skip download
+#   python scripts/cli.py pipeline --force analyze
+#
+# O kodikas dilonetai os 'module', 'module:synartisi' i 'module:DICT' (px.
+# 'address_cleaning:NEW_CLEANING_METHODS'), opote i allagi enos cleaner v1-v19
+# den kanei stale oute to dedup oute ta experiments v20-v30.
+
+import argparse
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+
+from paths import (CLEANED_FILE, COMPARISON_FULL_FILE, DATA_DIR, ML_DIR, MARKERS_JS, REPO_ROOT,
+                   RESULTS_19_METHODS, RESULTS_ENHANCED, STATIONS_FILE, TILES_DIR)
+
+# Parametroi
+STATE_FILE = DATA_DIR / '.pipeline' / 'state.json'
+LOG_DIR = DATA_DIR / '.pipeline' / 'logs'
+HASH_CHUNK = 1 << 20
+CLI = Path(__file__).resolve().parent / 'cli.py'
+
+
+class Stage:
+    """Ena vima tou pipeline: cli subcommand (subprocess), python callable i notebook pou trexei me to xeri"""
+
+    def __init__(self, name, command=None, func=None, notebook=None, inputs=(), outputs=(),
+                 params=None, code=(), after=()):
+        self.name = name
+        self.command = list(command or [])
+        self.func = func
+        self.notebook = notebook
+        self.inputs = [Path(p) for p in inputs]
+        self.outputs = [Path(p) for p in outputs]
+        self.params = dict(params or {})
+        self.code = list(code)
+        self.after = list(after)
+
+    @property
+    def manual(self):
+        return self.notebook is not None
+
+    def argv(self):
+        # {'max-depth': 3, 'no-plots': True} -> ['--max-depth', '3', '--no-plots']
+        args = list(self.command)
+        for key, value in self.params.items():
+            if value is True:
+                args.append(f'--{key}')
+            elif value not in (None, False):
+                args += [f'--{key}', str(value)]
+        return args
+
+
+def default_stages():
+    """To pipeline tou repo, me ta paths tou paths.py"""
+    return [
+        Stage('dedup', ['dedup', '--input', STATIONS_FILE, '--output', CLEANED_FILE],
+              inputs=[STATIONS_FILE], outputs=[CLEANED_FILE],
+              params={'threshold': 20}, code=['station_dedup:remove_nearby_duplicates']),
+        Stage('comparison', notebook='scripts/geocoding_full_analysis.ipynb',
+              inputs=[CLEANED_FILE], outputs=[COMPARISON_FULL_FILE],
+              code=['geocoding_client']),
+        Stage('methods19', notebook='scripts/geocoding_pattern_analysis_ml.ipynb',
+              inputs=[COMPARISON_FULL_FILE], outputs=[RESULTS_19_METHODS],
+              code=['address_cleaning:CLEANING_METHODS', 'address_cleaning:build_query']),
+        Stage('experiments', ['experiments', '--existing', RESULTS_19_METHODS, '--output', RESULTS_ENHANCED,
+                              '--out-dir', ML_DIR],
+              inputs=[RESULTS_19_METHODS],
+              outputs=[RESULTS_ENHANCED, ML_DIR / 'geocoding_methods_statistics.xlsx'],
+              params={'rate-limit': 0.1},
+              code=['address_cleaning:NEW_CLEANING_METHODS', 'address_cleaning:build_query',
+                    'geocoding_experiments']),
+        Stage('analyze', ['analyze', '--results', RESULTS_19_METHODS, '--out-dir', ML_DIR],
+              inputs=[RESULTS_19_METHODS],
+              outputs=[ML_DIR / name for name in ('pattern_analysis.xlsx', 'pattern_method_matrix.xlsx',
+                                                  'approach_comparison.xlsx', 'geocoding_rules.json',
+                                                  'learned_rules.json')],
+              params={'max-depth': 3},
+              code=['geocoding_analysis', 'rule_engine', 'address_patterns']),
+        Stage('report', ['report', '--results', RESULTS_19_METHODS, '--out-dir', ML_DIR],
+              inputs=[RESULTS_19_METHODS, ML_DIR / 'learned_rules.json'],
+              outputs=[ML_DIR / 'FINAL_REPORT_FOR_PROFESSOR.txt', ML_DIR / 'FINAL_SUMMARY_FOR_PROFESSOR.xlsx'],
+              code=['rule_engine:format_rules']),
+        Stage('markers', ['markers', '--excel', STATIONS_FILE, '--out', MARKERS_JS],
+              inputs=[STATIONS_FILE], outputs=[MARKERS_JS]),
+        Stage('download', ['download', '--data-file', STATIONS_FILE, '--output-folder', TILES_DIR],
+              inputs=[STATIONS_FILE], outputs=[TILES_DIR]),
+    ]
+
+
+# ============= HASHING =============
+
+class Hasher:
+    """sha256 periexomenon me cache (size, mtime_ns) ana arxeio, oste ta megala xlsx na diavazontai mia fora"""
+
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else {}
+        self._lock = threading.Lock()
+
+    def file(self, path):
+        path = Path(path)
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        if path.is_dir():
+            return self.directory(path)
+        key = str(path)
+        stamp = [st.st_size, st.st_mtime_ns]
+        with self._lock:
+            cached = self.cache.get(key)
+        if cached and cached[:2] == stamp:
+            return cached[2]
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+                h.update(chunk)
+        digest = h.hexdigest()
+        with self._lock:
+            self.cache[key] = stamp + [digest]
+        return digest
+
+    def snapshot(self):
+        # Antigrafo tou cache gia to save_state (ta threads sinexizoun na prosthetoun hashes)
+        with self._lock:
+            return dict(self.cache)
+
+    @staticmethod
+    def directory(path):
+        # Fakeloi me xiliades tiles: apotypoma apo (onoma, megethos, mtime), oxi periexomeno.
+        # Mono ta tiles (png/jpg/webp): to validate grafei index/report ston idio fakelo
+        from google_maps_static_downloader import list_tile_files
+
+        h = hashlib.sha256()
+        for tile in list_tile_files(path):
+            st = tile.stat()
+            h.update(f'{tile.name}\0{st.st_size}\0{st.st_mtime_ns}\n'.encode())
+        return 'dir:' + h.hexdigest()
+
+
+def code_hash(spec):
+    """sha256 tou kodika: 'module' (oloklero to arxeio), 'module:obj' (source), 'module:DICT' (ta values)"""
+    module_name, _, attr = spec.partition(':')
+    module = importlib.import_module(module_name)
+    if not attr:
+        return hashlib.sha256(Path(module.__file__).read_bytes()).hexdigest()
+    obj = getattr(module, attr)
+    parts = obj.values() if isinstance(obj, dict) else [obj]
+    source = '\n'.join(inspect.getsource(part) for part in parts)
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def command_file(stage):
+    # To script tou cli subcommand ginetai meros tou kleidiou
+    if not stage.command:
+        return None
+    from cli import COMMANDS, ML_SCRIPTS_DIR, SCRIPTS_DIR
+    target = COMMANDS.get(stage.command[0], (None,))[0]
+    if target is None:
+        return None
+    return ML_SCRIPTS_DIR / target if target.endswith('.py') else SCRIPTS_DIR / f'{target}.py'
+
+
+def _rel(path):
+    # Sxetika paths sto kleidi, oste to repo na metakineitai xoris na ginoun ola stale
+    try:
+        return Path(path).resolve().relative_to(REPO_ROOT.resolve()).as_posix()
+    except ValueError:
+        return str(path)
+
+
+def stage_key(stage, hasher):
+    entry = command_file(stage)
+    payload = {
+        'name': stage.name,
+        'argv': [_rel(a) if isinstance(a, Path) else str(a) for a in stage.argv()],
+        'func': code_hash(f'{stage.func.__module__}:{stage.func.__qualname__}') if stage.func else None,
+        'inputs': {_rel(p): hasher.file(p) for p in stage.inputs},
+        'code': {spec: code_hash(spec) for spec in stage.code},
+        'entry': hasher.file(entry) if entry else None,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+# ============= STATE =============
+
+def load_state(path=STATE_FILE):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {'stages': {}, 'hashes': {}}
+
+
+def save_state(state, path=STATE_FILE):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+# ============= DAG =============
+
+def dependencies(stages):
+    """stage -> set apo stages pou paragoun kapoio input tou (+ ta rita 'after')"""
+    producers = {}
+    for stage in stages:
+        for out in stage.outputs:
+            producers[out] = stage.name
+    deps = {}
+    for stage in stages:
+        deps[stage.name] = {producers[p] for p in stage.inputs if p in producers} | set(stage.after)
+        deps[stage.name].discard(stage.name)
+    # Elegxos kyklon (Kahn)
+    pending = {name: set(d) for name, d in deps.items()}
+    while pending:
+        ready = [name for name, d in pending.items() if not d & pending.keys()]
+        if not ready:
+            raise ValueError(f"Kyklos sto pipeline: {sorted(pending)}")
+        for name in ready:
+            del pending[name]
+    return deps
+
+
+def staleness(stage, state, hasher):
+    """(kleidi, logos) - logos None an to stage einai up to date"""
+    key = stage_key(stage, hasher)
+    record = state['stages'].get(stage.name)
+    if record is None:
+        return key, 'never run'
+    if record['key'] != key:
+        return key, 'inputs/params/code changed'
+    for out in stage.outputs:
+        digest = hasher.file(out)
+        if digest is None:
+            return key, f'missing output {out.name}'
+        if record['outputs'].get(_rel(out)) != digest:
+            return key, f'output {out.name} modified'
+    return key, None
+
+
+def _run_stage(stage, log_dir):
+    if stage.func is not None:
+        stage.func(**stage.params)
+        return
+    log_dir.mkdir(parents=True, exist_ok=True)
+    with open(log_dir / f'{stage.name}.log', 'w', encoding='utf-8') as log:
+        proc = subprocess.run([sys.executable, str(CLI), *map(str, stage.argv())], cwd=REPO_ROOT,
+                              stdout=log, stderr=subprocess.STDOUT)
+    if proc.returncode:
+        raise RuntimeError(f"exit code {proc.returncode} (log: {log_dir / f'{stage.name}.log'})")
+
+
+def run_pipeline(stages, state_file=STATE_FILE, log_dir=LOG_DIR, force=(), skip=(), only=None,
+                 workers=4, dry_run=False, mark_done=()):
+    """Τρέχει τα stale stages με σειρά DAG, τα ανεξάρτητα παράλληλα -> dict stage -> status"""
+    stages = [s for s in stages if s.name not in skip]
+    by_name = {s.name: s for s in stages}
+    deps = dependencies(stages)
+    if only:
+        # Ta zitoumena kai osa proigountai
+        wanted, todo = set(), list(only)
+        while todo:
+            name = todo.pop()
+            if name not in wanted:
+                wanted.add(name)
+                todo.extend(deps[name])
+        deps = {name: d & wanted for name, d in deps.items() if name in wanted}
+
+    state = load_state(state_file)
+    hasher = Hasher(state.setdefault('hashes', {}))
+    lock = threading.Lock()
+    status = {}
+
+    def persist():
+        # Kaleitai me to lock: to state['hashes'] allazei apo ta threads (Hasher._lock), ara snapshot
+        save_state({**state, 'hashes': hasher.snapshot()}, state_file)
+
+    def execute(name):
+        stage = by_name[name]
+        key, reason = staleness(stage, state, hasher)
+        if name in force:
+            reason = reason or 'forced'
+        if reason is None:
+            return 'up to date', None
+        if dry_run:
+            return f'stale ({reason})', None
+        if name in mark_done:
+            # To notebook etrexe me to xeri - katagrafi tis trexousas katastasis
+            missing = [p.name for p in stage.outputs if not p.exists()]
+            if missing:
+                raise RuntimeError(f"den yparxoun ta outputs {missing}")
+            record = {'key': key, 'outputs': {_rel(p): hasher.file(p) for p in stage.outputs},
+                      'finished': datetime.now().isoformat(timespec='seconds'), 'seconds': None}
+            return f'marked done ({reason})', record
+        if stage.manual:
+            missing = [p for p in stage.outputs if not p.exists()]
+            if missing:
+                raise RuntimeError(f"trexte to {stage.notebook} ({reason})")
+            return f'manual - trexte to {stage.notebook} ({reason})', None
+        started = time.perf_counter()
+        _run_stage(stage, log_dir)
+        seconds = time.perf_counter() - started
+        key = stage_key(stage, hasher)     # ta inputs den allazoun, alla o kodikas mporei na fortothike
+        record = {'key': key, 'outputs': {_rel(p): hasher.file(p) for p in stage.outputs},
+                  'finished': datetime.now().isoformat(timespec='seconds'), 'seconds': round(seconds, 2)}
+        return f'ran ({reason}, {seconds:.1f}s)', record
+
+    pending = dict(deps)
+    running = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            for name in [n for n, d in pending.items() if not d - status.keys()]:
+                del pending[name]
+                failed = [d for d in deps[name] if status[d].startswith('failed') or status[d].startswith('skipped')]
+                if failed:
+                    status[name] = f'skipped (failed: {", ".join(sorted(failed))})'
+                    print(f"[{name}] {status[name]}")
+                    continue
+                # stale upstream sto dry run: kai to downstream tha xanatrexei
+                if dry_run and any(status[d].startswith('stale') for d in deps[name]):
+                    status[name] = 'stale (upstream)'
+                    print(f"[{name}] {status[name]}")
+                    continue
+                running[pool.submit(execute, name)] = name
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    status[name], record = future.result()
+                except Exception as e:
+                    status[name], record = f'failed: {e}', None
+                if record is not None:
+                    with lock:
+                        state['stages'][name] = record
+                        persist()
+                print(f"[{name}] {status[name]}")
+
+    if not dry_run:
+        with lock:
+            persist()
+    return status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memoized pipeline (DAG) - xanatrexei mono ta stale stages")
+    parser.add_argument('--status', action='store_true', help="mono poia stages einai stale")
+    parser.add_argument('--only', nargs='+', help="ta stages afta (kai osa proigountai)")
+    parser.add_argument('--skip', nargs='+', default=[], help="px. download")
+    parser.add_argument('--force', nargs='+', default=[])
+    parser.add_argument('--mark-done', nargs='+', default=[],
+                        help="katagrafi manual stages (notebooks) os up to date meta apo xeirokiniti ektelesi")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--state-file', default=str(STATE_FILE))
+    args = parser.parse_args(argv)
+
+    stages = default_stages()
+    names = {s.name for s in stages}
+    unknown = [n for n in [*(args.only or []), *args.skip, *args.force, *args.mark_done] if n not in names]
+    if unknown:
+        parser.error(f"agnosta stages: {unknown} (yparxoun: {', '.join(sorted(names))})")
+
+    status = run_pipeline(stages, state_file=args.state_file, force=set(args.force), skip=set(args.skip),
+                          only=args.only, workers=args.workers, dry_run=args.status,
+                          mark_done=set(args.mark_done))
+    return 1 if any(s.startswith('failed') for s in status.values()) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
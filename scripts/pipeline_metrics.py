@@ -0,0 +1,247 @@
+# pipeline_metrics
+# Counters, timers kai histograms gia to download kai to geocoding, me export se
+# JSON lines i Prometheus text file kai proairetiko cProfile ana stage.
+#
+#   from pipeline_metrics import METRICS
+#   with METRICS.stage('download'):
+#       with METRICS.timer('download_request_seconds'):
+#           ...
+#   METRICS.counter('download_http_status_total', status=200).inc()
+#   METRICS.export_prometheus('download_metrics.prom')
+
+import cProfile
+import json
+import math
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+# Parametroi
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2e6, 5e6)
+PROFILE_DIR_ENV = 'FUELSTATION_PROFILE_DIR'
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self):
+        return {'value': self.value}
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, labels, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # to teleutaio = +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            i = 0
+            while i < len(self.buckets) and value > self.buckets[i]:
+                i += 1
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+            self.min = min(self.min, value)
+            self.max = max(self.max, value)
+
+    def quantile(self, q):
+        # Ektimisi apo ta buckets (grammiki paremvoli mesa sto bucket)
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = self.min
+        for i, n in enumerate(self.counts):
+            upper = self.buckets[i] if i < len(self.buckets) else self.max
+            if n and seen + n >= rank:
+                lo, hi = max(lower, self.min), min(upper, self.max)
+                return lo + (hi - lo) * (rank - seen) / n
+            seen += n
+            lower = upper
+        return self.max
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else None,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+            'p50': self.quantile(0.50),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'buckets': dict(zip([*map(str, self.buckets), '+Inf'], self.counts)),
+        }
+
+
+class MetricsRegistry:
+    def __init__(self, profile_dir=None):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self.profile_dir = profile_dir or os.getenv(PROFILE_DIR_ENV)
+        self._profiling = False
+
+    def _get(self, cls, name, labels, **kwargs):
+        key = (name, _label_key(labels))
+        with self._lock:
+            metric = self._metrics.get(key)
+            if metric is None:
+                metric = self._metrics[key] = cls(name, labels, **kwargs)
+            return metric
+
+    def counter(self, name, **labels):
+        return self._get(Counter, name, labels)
+
+    def histogram(self, name, buckets=LATENCY_BUCKETS, **labels):
+        return self._get(Histogram, name, labels, buckets=buckets)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        hist = self.histogram(name, **labels)
+        start = time.perf_counter()
+        try:
+            yield hist
+        finally:
+            hist.observe(time.perf_counter() - start)
+
+    @contextmanager
+    def stage(self, name, profile=None):
+        # Wall time tou stage + cProfile an exei oristei profile_dir
+        profile = self.profile_dir is not None if profile is None else profile
+        profiler = None
+        if profile and not self._profiling:
+            profiler = cProfile.Profile()
+            self._profiling = True
+            profiler.enable()
+        try:
+            with self.timer('stage_seconds', stage=name):
+                yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self._profiling = False
+                out_dir = Path(self.profile_dir or '.')
+                out_dir.mkdir(parents=True, exist_ok=True)
+                profiler.dump_stats(str(out_dir / f"{name}.prof"))
+
+    def enable_profiling(self, profile_dir):
+        self.profile_dir = str(profile_dir)
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+
+    def metrics(self):
+        with self._lock:
+            return list(self._metrics.values())
+
+    def total(self, name, **match):
+        # Athroisma enos counter gia ola ta labels pou tairiazoun
+        want = {k: str(v) for k, v in match.items()}
+        return sum(m.value for m in self.metrics()
+                   if m.name == name and m.kind == 'counter'
+                   and all(dict(_label_key(m.labels)).get(k) == v for k, v in want.items()))
+
+    def records(self):
+        timestamp = datetime.now().isoformat()
+        return [{'timestamp': timestamp, 'name': m.name, 'type': m.kind,
+                 'labels': {k: str(v) for k, v in m.labels.items()}, **m.snapshot()}
+                for m in self.metrics()]
+
+    def export_jsonl(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            for record in self.records():
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return path
+
+    def export_prometheus(self, path):
+        lines = []
+        seen_types = set()
+        for m in sorted(self.metrics(), key=lambda m: (m.name, _label_key(m.labels))):
+            name = _prom_name(m.name)
+            if name not in seen_types:
+                lines.append(f"# TYPE {name} {m.kind}")
+                seen_types.add(name)
+            if m.kind == 'counter':
+                lines.append(f"{name}{_prom_labels(m.labels)} {m.value}")
+                continue
+            cumulative = 0
+            for bound, n in zip([*map(str, m.buckets), '+Inf'], m.counts):
+                cumulative += n
+                lines.append(f"{name}_bucket{_prom_labels({**m.labels, 'le': bound})} {cumulative}")
+            lines.append(f"{name}_sum{_prom_labels(m.labels)} {m.sum}")
+            lines.append(f"{name}_count{_prom_labels(m.labels)} {m.count}")
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = Path(f"{path}.tmp")
+        tmp_path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+        os.replace(tmp_path, path)  # atomiko gia to node_exporter textfile collector
+        return path
+
+    def summary(self):
+        # Syntomi anafora gia to terminal
+        lines = []
+        for m in sorted(self.metrics(), key=lambda m: (m.name, _label_key(m.labels))):
+            labels = ','.join(f"{k}={v}" for k, v in _label_key(m.labels))
+            label_str = f"{{{labels}}}" if labels else ''
+            if m.kind == 'counter':
+                lines.append(f"  {m.name}{label_str}: {m.value:,}")
+            elif m.count:
+                snap = m.snapshot()
+                lines.append(f"  {m.name}{label_str}: n={m.count:,} mean={snap['mean']:.4f} "
+                             f"p50={snap['p50']:.4f} p95={snap['p95']:.4f} max={snap['max']:.4f}")
+        return '\n'.join(lines)
+
+
+def _prom_name(name):
+    return re.sub(r'[^a-zA-Z0-9_:]', '_', name)
+
+
+def _prom_escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _prom_labels(labels):
+    if not labels:
+        return ''
+    body = ','.join(f'{_prom_name(k)}="{_prom_escape(v)}"' for k, v in sorted(labels.items()))
+    return f"{{{body}}}"
+
+
+def rate(total, seconds):
+    return total / seconds if seconds else 0.0
+
+
+# Koino registry gia ola ta scripts
+METRICS = MetricsRegistry()
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+# plausibility_index
+# Elegxos an ena geocoding apotelesma einai logiko XORIS ground truth (p.x.
+# gia nea pratiria): apo tis gnostes syntetagmenes tou katalogou xtizontai
+# kyrta perivlimata (convex hull + buffer) ana nomo (countyName) kai ana dimo
+# (municipalityName), kai kathe apotelesma elegxetai me vectorized
+# point-in-polygon (ola ta simeia x ola ta hulls me ena matrix product pano
+# sta facet equations). Etsi ta lathi tou typou Αγρίνιο/Ιωάννινα (swsto
+# onoma dromou, lathos nomos) vgainoun se ena perasma, xoris API calls.
+#
+#   index = PlausibilityIndex.fit(pd.read_excel(STATIONS_FILE))
+#   index.check(lat, lng, county, municipality)    # in_county, outside_km, predicted_county, ...
+#   python scripts/cli.py plausibility --results data/geocoding_pattern_analysis_ml/geocoding_19methods_full.xlsx
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from paths import CACHE_FILE, DATA_DIR, STATIONS_FILE
+
+# Parametroi
+COUNTY_BUFFER_KM = 5.0         # perithorio gyro apo to hull tou nomou
+MUNICIPALITY_BUFFER_KM = 2.0
+BUFFER_POINTS = 16             # simeia ana kyklo tou buffer
+KM_PER_DEG_LAT = 110.574
+KM_PER_DEG_LON = 111.320       # x cos(lat)
+LAT_COLUMN = 'gasStationLat'
+LNG_COLUMN = 'gasStationLong'
+COUNTY_COLUMN = 'countyName'
+MUNICIPALITY_COLUMN = 'municipalityName'
+PLAUSIBILITY_FILE = DATA_DIR / 'geocoding_plausibility.xlsx'
+
+# Apotelesma ana simeio
+OK = 'ok'
+WRONG_COUNTY = 'wrong_county'      # ektos tou nomou tou, mesa se allon
+OUTSIDE = 'outside'                # ektos olon (thalassa / ektos Elladas)
+UNKNOWN = 'unknown'                # xoris syntetagmenes i agnostos nomos
+
+
+class Hulls:
+    """Κυρτά περιβλήματα ομάδων σημείων σε km (τοπική ισαπεξική προβολή) ως facet equations"""
+
+    def __init__(self, names, equations, owner, lat0):
+        self.names = np.asarray(names, dtype=object)
+        self.equations = equations          # (E, 3): n_x, n_y, offset (n . p + offset <= 0 mesa)
+        self.owner = owner                  # (E,) se poio hull anikei kathe facet
+        self.starts = np.flatnonzero(np.r_[True, owner[1:] != owner[:-1]]) if len(owner) else np.empty(0, int)
+        self.lat0 = lat0
+        self._position = {name: i for i, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def build(cls, lat, lng, groups, buffer_km, lat0=None):
+        from scipy.spatial import ConvexHull
+
+        lat, lng = np.asarray(lat, dtype=float), np.asarray(lng, dtype=float)
+        groups = pd.Series(groups, dtype=object).to_numpy()
+        valid = ~(np.isnan(lat) | np.isnan(lng)) & pd.notna(groups)
+        lat0 = float(np.mean(lat[valid])) if lat0 is None else lat0
+        xy = project(lat[valid], lng[valid], lat0)
+        # Buffer = Minkowski athroisma me kyklo: kathe simeio -> BUFFER_POINTS simeia gyro tou
+        angles = np.linspace(0, 2 * np.pi, BUFFER_POINTS, endpoint=False)
+        circle = np.column_stack([np.cos(angles), np.sin(angles)]) * buffer_km
+        codes, names = pd.factorize(groups[valid], sort=True)
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(names) + 1))
+        equations, owner = [], []
+        for k in range(len(names)):
+            points = np.unique(np.round(xy[order[bounds[k]:bounds[k + 1]]], 3), axis=0)
+            # Mono ta akraia simeia xreiazontai buffer (ta esoterika den allazoun to hull)
+            if len(points) >= 3:
+                try:
+                    points = points[ConvexHull(points).vertices]
+                except Exception:
+                    pass                        # syggrammika simeia - ola mazi
+            buffered = (points[:, None, :] + circle[None, :, :]).reshape(-1, 2)
+            hull = ConvexHull(buffered)
+            equations.append(hull.equations)
+            owner.append(np.full(len(hull.equations), k))
+        equations = np.concatenate(equations) if equations else np.empty((0, 3))
+        owner = np.concatenate(owner) if owner else np.empty(0, dtype=int)
+        return cls(list(names), equations, owner, lat0)
+
+    def outside_km(self, lat, lng):
+        """(N, K): πόσο έξω από κάθε hull (<= 0 = μέσα) - το max των αποστάσεων από τα facets"""
+        xy = project(lat, lng, self.lat0)
+        signed = xy @ self.equations[:, :2].T + self.equations[:, 2]          # (N, E)
+        if not len(self.starts):
+            return np.empty((len(xy), 0))
+        return np.maximum.reduceat(signed, self.starts, axis=1)
+
+    def positions(self, names):
+        """όνομα -> θέση του hull (-1 αν δεν υπάρχει)"""
+        return np.array([self._position.get(name, -1) for name in pd.Series(names, dtype=object)], dtype=int)
+
+
+def project(lat, lng, lat0):
+    """Γεωγραφικές -> (N, 2) km (ισαπεξική γύρω από το lat0, αρκετή για την Ελλάδα)"""
+    lat, lng = np.asarray(lat, dtype=float), np.asarray(lng, dtype=float)
+    return np.column_stack([lng * KM_PER_DEG_LON * np.cos(np.radians(lat0)), lat * KM_PER_DEG_LAT])
+
+
+class PlausibilityIndex:
+    """Hulls νομών και δήμων από τον κατάλογο -> έλεγχος αποτελεσμάτων geocoding"""
+
+    def __init__(self, counties, municipalities):
+        self.counties = counties
+        self.municipalities = municipalities
+
+    @classmethod
+    def fit(cls, df, county_buffer_km=COUNTY_BUFFER_KM, municipality_buffer_km=MUNICIPALITY_BUFFER_KM,
+            lat_column=LAT_COLUMN, lng_column=LNG_COLUMN):
+        lat = pd.to_numeric(df[lat_column], errors='coerce').to_numpy()
+        lng = pd.to_numeric(df[lng_column], errors='coerce').to_numpy()
+        counties = Hulls.build(lat, lng, df[COUNTY_COLUMN], county_buffer_km)
+        if not len(counties):
+            raise ValueError(f"Kanena pratirio me syntetagmenes kai {COUNTY_COLUMN}")
+        municipalities = None
+        if MUNICIPALITY_COLUMN in df.columns:
+            # O idios dimos mporei na yparxei se dyo nomous -> kleidi nomos/dimos
+            municipalities = Hulls.build(lat, lng, municipality_key(df[COUNTY_COLUMN], df[MUNICIPALITY_COLUMN]),
+                                         municipality_buffer_km, lat0=counties.lat0)
+        return cls(counties, municipalities)
+
+    def check(self, lat, lng, county, municipality=None):
+        """Ένα DataFrame ανά σημείο: status, in_county, county_outside_km, predicted_county, in_municipality"""
+        lat, lng = np.asarray(lat, dtype=float), np.asarray(lng, dtype=float)
+        n = len(lat)
+        has_point = ~(np.isnan(lat) | np.isnan(lng))
+        outside = np.full((n, len(self.counties)), np.nan)
+        if has_point.any():
+            outside[has_point] = self.counties.outside_km(lat[has_point], lng[has_point])
+
+        own = self.counties.positions(county)
+        rows = np.arange(n)
+        known = has_point & (own >= 0)
+        own_outside = np.where(known, outside[rows, np.maximum(own, 0)], np.nan)
+        in_county = known & (own_outside <= 0)
+        # O nomos pou "periexei" kalytera to simeio (to mikrotero outside_km)
+        best = np.argmin(np.where(np.isnan(outside), np.inf, outside), axis=1)
+        best_outside = outside[rows, best]
+        predicted = np.where(has_point & (best_outside <= 0), self.counties.names[best], None)
+
+        status = np.select([~known, in_county, has_point & (best_outside <= 0)], [UNKNOWN, OK, WRONG_COUNTY],
+                           default=OUTSIDE)
+        out = pd.DataFrame({
+            'status': status,
+            'in_county': in_county,
+            'county_outside_km': np.round(np.clip(own_outside, 0, None), 3),
+            'predicted_county': predicted,
+        })
+        if self.municipalities is not None and municipality is not None:
+            own_m = self.municipalities.positions(municipality_key(county, municipality))
+            in_m = np.zeros(n, dtype=bool)
+            m_outside = np.full(n, np.nan)
+            idx = np.flatnonzero(has_point & (own_m >= 0))
+            if len(idx):
+                # Mono to hull tou dimou tou kathe simeiou (oxi N x olous tous dimous)
+                m_outside[idx] = self._own_outside(self.municipalities, lat[idx], lng[idx], own_m[idx])
+                in_m[idx] = m_outside[idx] <= 0
+            out['in_municipality'] = in_m
+            out['municipality_outside_km'] = np.round(np.clip(m_outside, 0, None), 3)
+        return out
+
+    @staticmethod
+    def _own_outside(hulls, lat, lng, own):
+        # Ta facets tou hull kathe simeiou: max ana (simeio, facet tou hull tou)
+        xy = project(lat, lng, hulls.lat0)
+        ends = np.r_[hulls.starts[1:], len(hulls.owner)]
+        counts = ends[own] - hulls.starts[own]
+        point = np.repeat(np.arange(len(own)), counts)
+        facet = np.concatenate([np.arange(hulls.starts[k], ends[k]) for k in own])
+        signed = np.einsum('ij,ij->i', xy[point], hulls.equations[facet, :2]) + hulls.equations[facet, 2]
+        return np.maximum.reduceat(signed, np.r_[0, np.cumsum(counts)[:-1]])
+
+
+def municipality_key(county, municipality):
+    county = pd.Series(county, dtype=object).reset_index(drop=True)
+    municipality = pd.Series(municipality, dtype=object).reset_index(drop=True)
+    key = county.astype(str) + '/' + municipality.astype(str)
+    return key.where(county.notna() & municipality.notna(), None)
+
+
+# ============= APOTELESMATA GEOCODING =============
+
+def check_results(df, index, methods, lat_suffix='_lat', lng_suffix='_lng'):
+    """Για κάθε μέθοδο (στήλες {method}_lat/_lng): {method}_plausibility και {method}_predicted_county"""
+    out = pd.DataFrame(index=df.index)
+    municipality = df[MUNICIPALITY_COLUMN] if MUNICIPALITY_COLUMN in df.columns else None
+    for method in methods:
+        checked = index.check(pd.to_numeric(df[f'{method}{lat_suffix}'], errors='coerce'),
+                              pd.to_numeric(df[f'{method}{lng_suffix}'], errors='coerce'),
+                              df[COUNTY_COLUMN], municipality)
+        out[f'{method}_plausibility'] = checked['status'].to_numpy()
+        out[f'{method}_predicted_county'] = checked['predicted_county'].to_numpy()
+        out[f'{method}_county_outside_km'] = checked['county_outside_km'].to_numpy()
+        if 'in_municipality' in checked.columns:
+            out[f'{method}_in_municipality'] = checked['in_municipality'].to_numpy()
+    return out
+
+
+def summarize(flags, methods):
+    rows = []
+    for method in methods:
+        status = flags[f'{method}_plausibility']
+        checked = (status != UNKNOWN).sum()
+        row = {'Method': method, 'Checked': int(checked)}
+        for name in (OK, WRONG_COUNTY, OUTSIDE):
+            row[f'PCT_{name}'] = (status == name).sum() / checked * 100 if checked else np.nan
+        if f'{method}_in_municipality' in flags.columns:
+            row['PCT_in_municipality'] = flags[f'{method}_in_municipality'].sum() / checked * 100 if checked else np.nan
+        rows.append(row)
+    return pd.DataFrame(rows).sort_values('PCT_ok', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plausibility ton geocoding apotelesmaton (hulls nomon/dimon)")
+    parser.add_argument('--stations', default=str(STATIONS_FILE), help="katalogos me gnostes syntetagmenes")
+    parser.add_argument('--results', default=None,
+                        help="xlsx me {method}_lat/_lng kai countyName (default: ta run1-3 apo to cache)")
+    parser.add_argument('--methods', nargs='+', default=None)
+    parser.add_argument('--cache-file', default=str(CACHE_FILE))
+    parser.add_argument('--county-buffer', type=float, default=COUNTY_BUFFER_KM, help="km")
+    parser.add_argument('--municipality-buffer', type=float, default=MUNICIPALITY_BUFFER_KM, help="km")
+    parser.add_argument('--out', default=str(PLAUSIBILITY_FILE))
+    args = parser.parse_args(argv)
+
+    stations = pd.read_excel(args.stations)
+    started = time.perf_counter()
+    index = PlausibilityIndex.fit(stations, args.county_buffer, args.municipality_buffer)
+    print(f"Hulls: {len(index.counties)} nomoi, "
+          f"{len(index.municipalities) if index.municipalities is not None else 0} dimoi "
+          f"se {time.perf_counter() - started:.2f}s")
+
+    if args.results:
+        from geocoding_experiments import find_method_columns
+        df = pd.read_excel(args.results)
+        methods = args.methods or [m for m in find_method_columns(df)
+                                   if f'{m}_lat' in df.columns and f'{m}_lng' in df.columns]
+    else:
+        from geocoding_client import load_cache
+        from run_consistency import RUNS, reconstruct_runs
+        df = reconstruct_runs(stations, load_cache(args.cache_file))
+        methods = args.methods or list(RUNS)
+
+    started = time.perf_counter()
+    flags = check_results(df, index, methods)
+    seconds = time.perf_counter() - started
+    points = len(df) * len(methods)
+    print(f"Elegxos: {points} apotelesmata se {seconds:.3f}s ({points / max(seconds, 1e-9):,.0f}/s)")
+    summary = summarize(flags, methods)
+    print(summary.to_string(index=False, float_format=lambda v: f'{v:.1f}'))
+
+    keep = [c for c in ('gasStationID', 'original_address', 'gasStationAddress', COUNTY_COLUMN, MUNICIPALITY_COLUMN)
+            if c in df.columns]
+    result = pd.concat([df[keep], flags], axis=1)
+    wrong = result[(flags[[f'{m}_plausibility' for m in methods]] == WRONG_COUNTY).any(axis=1)]
+    with pd.ExcelWriter(args.out) as writer:
+        summary.to_excel(writer, sheet_name='summary', index=False)
+        wrong.to_excel(writer, sheet_name='wrong county', index=False)
+        result.to_excel(writer, sheet_name='flags', index=False)
+    print(f"\n{len(wrong)} stathmoi me toulaxiston ena apotelesma se lathos nomo -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# result_buffer
+# Syllogi ton apotelesmaton tou geocoding loop se proapothikeumenous NumPy
+# buffers ana (methodo, pedio) anti gia df.at[idx, col] = ... Oi nees stiles
+# dimiourgountai mia fora sto telos (ena concat), kai ana flush_every stathmous
+# ta oloklirwmena apotelesmata grafontai atomika se checkpoint, oste ena run
+# pou kopike na synexizei apo ekei pou eixe meinei.
+#
+#   results = ResultBuffer(len(df), methods, checkpoint='geocoding_partial.pkl')
+#   results.set(pos, 'v20_km_city1_city2', distance=123.4, accuracy='ROOFTOP')
+#   results.done(pos)
+#   df = results.merge_into(df)
+
+import hashlib
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Parametroi
+# pedio -> dtype (float = NaN otan leipei, object = None)
+FIELDS = {
+    'address': object,
+    'lat': np.float64,
+    'lng': np.float64,
+    'distance': np.float64,
+    'accuracy': object,
+}
+FLUSH_EVERY = 200   # stathmoi metaxy checkpoints
+
+
+class ResultBuffer:
+    """Buffers (methodos, pedio) -> np.array megethous N, me checkpoint sto disko"""
+
+    def __init__(self, n, methods, fields=FIELDS, checkpoint=None, flush_every=FLUSH_EVERY, ids=None):
+        self.n = n
+        # Hash ton gasStationID me ti seira tous: to checkpoint kratai theseis, oxi IDs
+        self.ids_hash = None if ids is None else hashlib.blake2b(
+            '\n'.join(map(str, ids)).encode('utf-8'), digest_size=16).hexdigest()
+        self.methods = list(methods)
+        self.fields = dict(fields)
+        self.checkpoint = Path(checkpoint) if checkpoint else None
+        self.flush_every = flush_every
+        self.buffers = {(m, f): self._empty(dtype) for m in self.methods for f, dtype in self.fields.items()}
+        self.completed = np.zeros(n, dtype=bool)
+        self._since_flush = 0
+
+    def _empty(self, dtype):
+        if dtype is object:
+            return np.full(self.n, None, dtype=object)
+        return np.full(self.n, np.nan, dtype=dtype)
+
+    def columns(self):
+        # Idia seira stilon me to palio loop: {method}_address/_lat/_lng/_distance/_accuracy
+        return [f'{m}_{f}' for m in self.methods for f in self.fields]
+
+    def set(self, pos, method, **values):
+        for field, value in values.items():
+            self.buffers[method, field][pos] = np.nan if value is None and self.fields[field] is not object else value
+
+    def done(self, pos):
+        """Ο σταθμός ολοκληρώθηκε για όλες τις μεθόδους (flush ανά flush_every)"""
+        self.completed[pos] = True
+        self._since_flush += 1
+        if self.checkpoint is not None and self._since_flush >= self.flush_every:
+            self.flush()
+
+    def copy_rows(self, targets, sources):
+        """Αντιγραφή όλων των πεδίων από τις θέσεις sources στις targets (fan-out ομάδων)"""
+        for arr in self.buffers.values():
+            arr[targets] = arr[sources]
+        self.completed[targets] = self.completed[sources]
+
+    def frame(self, index=None):
+        """Όλες οι νέες στήλες ως ένα DataFrame"""
+        data = {f'{m}_{f}': self.buffers[m, f] for m in self.methods for f in self.fields}
+        return pd.DataFrame(data, index=index, copy=False)
+
+    def merge_into(self, df):
+        """df + νέες στήλες με ένα concat (οι υπάρχουσες στήλες με ίδιο όνομα αντικαθίστανται)"""
+        new = self.frame(df.index)
+        return pd.concat([df.drop(columns=[c for c in new.columns if c in df.columns]), new], axis=1)
+
+    # ============= CHECKPOINT =============
+
+    def flush(self):
+        if self.checkpoint is None:
+            return
+        self.checkpoint.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.checkpoint.with_name(self.checkpoint.name + '.tmp')
+        state = {
+            'methods': self.methods,
+            'fields': list(self.fields),
+            'ids': self.ids_hash,
+            'completed': np.flatnonzero(self.completed),
+            'buffers': {f'{m}_{f}': arr[self.completed] for (m, f), arr in self.buffers.items()},
+        }
+        pd.to_pickle(state, tmp_path)
+        os.replace(tmp_path, self.checkpoint)
+        self._since_flush = 0
+
+    def resume(self):
+        """Φορτώνει το checkpoint (αν υπάρχει) -> πόσοι σταθμοί είχαν ολοκληρωθεί"""
+        if self.checkpoint is None or not self.checkpoint.exists():
+            return 0
+        state = pd.read_pickle(self.checkpoint)
+        if state['methods'] != self.methods or state['fields'] != list(self.fields):
+            raise ValueError(f"To checkpoint {self.checkpoint} einai gia alles methodous/pedia")
+        if self.ids_hash is not None and state.get('ids') != self.ids_hash:
+            raise ValueError(f"To checkpoint {self.checkpoint} einai gia alla gasStationID "
+                             "(allos katalogos / work list) - svise to gia neo run")
+        positions = state['completed']
+        if len(positions) and positions.max() >= self.n:
+            raise ValueError(f"To checkpoint {self.checkpoint} einai gia allo dataset")
+        for (m, f), arr in self.buffers.items():
+            arr[positions] = state['buffers'][f'{m}_{f}']
+        self.completed[positions] = True
+        return len(positions)
+
+    def remove_checkpoint(self):
+        if self.checkpoint is not None and self.checkpoint.exists():
+            self.checkpoint.unlink()
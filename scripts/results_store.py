@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+# results_store
+# Compact morfi tou wide results frame (geocoding_19methods_full /
+# geocoding_enhanced_results): anti gia 5 object/float64 stiles ana methodo,
+#   - lat/lng/distance se ena float32 pinaka (N, M, 3)
+#   - accuracy os uint8 kodikous (0 = keno) pano se ena mikro lexiko
+#   - cleaned addresses os int32 kodikous se koino lexiko (interning), -1 = keno
+# kai oi ypoloipes (mi-method) stiles opos itan. Me accessors ana methodo,
+# to_frame() pros ta piso kai memory_report() gia ti sygkrisi.
+#
+#   store = ResultsStore.from_frame(pd.read_excel(RESULTS_ENHANCED))
+#   store.distances()                  # (N, M) float32
+#   store.method('v8_combined_basic')  # DataFrame me tis 5 stiles
+#   print(store.memory_report())
+#   store.save('results.npz'); ResultsStore.load('results.npz')
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Parametroi (float32: ~1e-6 moires sto lat/lng, < 1 m)
+NUMERIC_FIELDS = ('lat', 'lng', 'distance')
+ACCURACY_LEVELS = ('', 'ROOFTOP', 'RANGE_INTERPOLATED', 'GEOMETRIC_CENTER', 'APPROXIMATE', 'FAILED', 'ERROR')
+
+
+def _method_columns(df):
+    from geocoding_experiments import find_method_columns
+    return find_method_columns(df)
+
+
+def _intern(values, vocabulary, lookup):
+    # Kodikopoiisi me koino lexiko, oste idies diefthinseis se alles methodous na min epanalamvanontai
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+    mapping = np.empty(len(uniques), dtype=np.int32)
+    for i, value in enumerate(uniques):
+        value = str(value)
+        if value not in lookup:
+            lookup[value] = len(vocabulary)
+            vocabulary.append(value)
+        mapping[i] = lookup[value]
+    out = np.full(len(codes), -1, dtype=np.int32)
+    found = codes >= 0
+    out[found] = mapping[codes[found]]
+    return out
+
+
+class ResultsStore:
+    """Ta apotelesmata N stathmon x M methodon se compact pinakes"""
+
+    def __init__(self, base, methods, values, accuracy, accuracy_levels, addresses, vocabulary):
+        self.base = base                                  # mi-method stiles (DataFrame, N grammes)
+        self.methods = list(methods)
+        self.values = values                              # (N, M, 3) float32: lat, lng, distance
+        self.accuracy = accuracy                          # (N, M) uint8
+        self.accuracy_levels = list(accuracy_levels)
+        self.addresses = addresses                        # (N, M) int32, -1 = keno
+        self.vocabulary = np.asarray(vocabulary, dtype=object)
+        self._position = {m: i for i, m in enumerate(self.methods)}
+
+    @classmethod
+    def from_frame(cls, df, methods=None):
+        """Wide DataFrame ({method}_address/_lat/_lng/_distance/_accuracy) -> ResultsStore"""
+        methods = list(methods) if methods is not None else _method_columns(df)
+        n, m = len(df), len(methods)
+
+        values = np.full((n, m, len(NUMERIC_FIELDS)), np.nan, dtype=np.float32)
+        accuracy = np.zeros((n, m), dtype=np.uint8)
+        addresses = np.full((n, m), -1, dtype=np.int32)
+        levels = list(ACCURACY_LEVELS)
+        vocabulary, lookup = [], {}
+
+        method_cols = set()
+        for j, method in enumerate(methods):
+            for k, field in enumerate(NUMERIC_FIELDS):
+                col = f'{method}_{field}'
+                if col in df.columns:
+                    values[:, j, k] = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float32)
+                    method_cols.add(col)
+            col = f'{method}_accuracy'
+            if col in df.columns:
+                codes, uniques = pd.factorize(df[col].astype(object), use_na_sentinel=True)
+                for value in uniques:
+                    if str(value) not in levels:
+                        levels.append(str(value))
+                mapping = np.array([levels.index(str(u)) for u in uniques], dtype=np.uint8)
+                found = codes >= 0
+                accuracy[found, j] = mapping[codes[found]]
+                method_cols.add(col)
+            col = f'{method}_address'
+            if col in df.columns:
+                addresses[:, j] = _intern(df[col].to_numpy(dtype=object), vocabulary, lookup)
+                method_cols.add(col)
+        if len(levels) > 255:
+            raise ValueError(f"Poly polles times accuracy ({len(levels)}) gia uint8")
+
+        base = df[[c for c in df.columns if c not in method_cols]].copy()
+        return cls(base, methods, values, accuracy, levels, addresses, vocabulary)
+
+    def __len__(self):
+        return len(self.base)
+
+    def _col(self, method):
+        try:
+            return self._position[method]
+        except KeyError:
+            raise KeyError(f"Agnosti methodos: {method}") from None
+
+    def _cols(self, methods):
+        return slice(None) if methods is None else [self._col(m) for m in methods]
+
+    # ============= ACCESSORS =============
+
+    def distances(self, methods=None):
+        """(N, M) float32 αποστάσεις (NaN = αποτυχία)"""
+        return self.values[:, self._cols(methods), 2]
+
+    def coords(self, methods=None):
+        """(N, M, 2) float32 lat/lng"""
+        return self.values[:, self._cols(methods), :2]
+
+    def accuracy_codes(self, methods=None):
+        return self.accuracy[:, self._cols(methods)]
+
+    def distance(self, method):
+        return pd.Series(self.values[:, self._col(method), 2], index=self.base.index, name=f'{method}_distance')
+
+    def accuracy_of(self, method):
+        """Categorical Series με τα accuracy της μεθόδου"""
+        codes = self.accuracy[:, self._col(method)].astype(np.int16) - 1     # 0 (keno) -> NaN
+        categories = self.accuracy_levels[1:]
+        return pd.Series(pd.Categorical.from_codes(codes, categories=categories),
+                         index=self.base.index, name=f'{method}_accuracy')
+
+    def address_of(self, method):
+        codes = self.addresses[:, self._col(method)]
+        out = np.where(codes >= 0, self.vocabulary[np.maximum(codes, 0)], None)
+        return pd.Series(out, index=self.base.index, name=f'{method}_address')
+
+    def method(self, method):
+        """Οι 5 στήλες μιας μεθόδου ως DataFrame"""
+        j = self._col(method)
+        return pd.DataFrame({
+            f'{method}_address': self.address_of(method),
+            f'{method}_lat': self.values[:, j, 0],
+            f'{method}_lng': self.values[:, j, 1],
+            f'{method}_distance': self.values[:, j, 2],
+            f'{method}_accuracy': self.accuracy_of(method),
+        }, index=self.base.index)
+
+    def to_frame(self):
+        """Πίσω στο wide frame (float64 / object στήλες, όπως το Excel)"""
+        parts = [self.base]
+        for method in self.methods:
+            part = self.method(method)
+            for field in NUMERIC_FIELDS:
+                part[f'{method}_{field}'] = part[f'{method}_{field}'].astype(np.float64)
+            part[f'{method}_accuracy'] = part[f'{method}_accuracy'].astype(object).where(
+                part[f'{method}_accuracy'].notna(), None)
+            parts.append(part)
+        return pd.concat(parts, axis=1)
+
+    # ============= MEMORY =============
+
+    def nbytes(self):
+        vocab = sum(len(s.encode('utf-8')) + 49 for s in self.vocabulary)    # ~ megethos str
+        return {
+            'base': int(self.base.memory_usage(deep=True).sum()),
+            'values_float32': self.values.nbytes,
+            'accuracy_uint8': self.accuracy.nbytes,
+            'address_codes_int32': self.addresses.nbytes,
+            'address_vocabulary': vocab,
+        }
+
+    def memory_report(self, df=None):
+        """Μνήμη ανά κομμάτι του store και σύγκριση με το wide frame (αν δοθεί)"""
+        parts = self.nbytes()
+        rows = [{'Part': name, 'MB': size / 1e6} for name, size in parts.items()]
+        total = sum(parts.values())
+        rows.append({'Part': 'store_total', 'MB': total / 1e6})
+        if df is not None:
+            wide = int(df.memory_usage(deep=True).sum())
+            rows.append({'Part': 'wide_frame', 'MB': wide / 1e6})
+            rows.append({'Part': 'ratio_wide/store', 'MB': wide / total})
+        report = pd.DataFrame(rows)
+        report['MB'] = report['MB'].round(3)
+        return report
+
+    # ============= SAVE / LOAD =============
+
+    def save(self, path):
+        """.npz χωρίς pickle (τα base columns ως ξεχωριστοί πίνακες)"""
+        arrays = {
+            'methods': np.asarray(self.methods, dtype=str),
+            'values': self.values,
+            'accuracy': self.accuracy,
+            'accuracy_levels': np.asarray(self.accuracy_levels, dtype=str),
+            'addresses': self.addresses,
+            'vocabulary': np.asarray(self.vocabulary.tolist(), dtype=str),
+            'base_columns': np.asarray([str(c) for c in self.base.columns], dtype=str),
+        }
+        for i, col in enumerate(self.base.columns):
+            series = self.base[col]
+            if series.dtype.kind in 'biuf':
+                arrays[f'base_{i}'] = series.to_numpy()
+            else:
+                arrays[f'base_{i}_mask'] = series.isna().to_numpy()
+                arrays[f'base_{i}'] = series.fillna('').astype(str).to_numpy(dtype=str)
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            base = {}
+            for i, col in enumerate(data['base_columns'].tolist()):
+                values = data[f'base_{i}']
+                if f'base_{i}_mask' in data:
+                    values = np.where(data[f'base_{i}_mask'], None, values.astype(object))
+                base[col] = values
+            return cls(pd.DataFrame(base), data['methods'].tolist(), data['values'], data['accuracy'],
+                       data['accuracy_levels'].tolist(), data['addresses'], data['vocabulary'].tolist())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Wide results xlsx -> compact store (.npz) me memory report")
+    parser.add_argument('--results', required=True, help="px. geocoding_enhanced_results.xlsx")
+    parser.add_argument('--out', default=None, help=".npz (to diavazei kai to 'ce --results')")
+    args = parser.parse_args(argv)
+
+    df = pd.read_excel(args.results)
+    store = ResultsStore.from_frame(df)
+    print(f"{len(store)} stathmoi x {len(store.methods)} methodoi, "
+          f"{len(store.vocabulary)} monadikes diefthinseis, {len(store.accuracy_levels) - 1} accuracy times")
+    print(store.memory_report(df).to_string(index=False))
+    if args.out:
+        store.save(args.out)
+        print(f"\nApothikeytike: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
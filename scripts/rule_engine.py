@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+# rule_engine
+# Rule-based epilogi methodou katharismou os diatetagmeni decision list: kathe
+# kanonas einai AND apo synthikes (address_patterns.CONDITIONS, '!' = arnisi)
+# kai o protos pou tairiazei dialegei ti methodo. Oi synthikes ypologizontai
+# vectorized mia fora ana monadiki diefthinsi, opote mia stili diefthinseon
+# pairnei methodo se ena perasma. I lista mporei na mathei apo ta apotelesmata
+# (rixo dentro pano sto pattern x method) kai na apothikeutei se JSON.
+#
+#   from rule_engine import HAND_RULES, assign_methods, learn_rules
+#   methods = assign_methods(df['original_address'], HAND_RULES)
+#   learned = learn_rules(df, max_depth=3)
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from address_patterns import ADDRESS_PATTERNS, CONDITIONS, pattern_matrix
+
+# Parametroi
+RULES_VERSION = 1
+FAILURE_PENALTY_M = 10000   # kostos (metra) otan mia methodos den vriskei apotelesma
+MIN_SUPPORT = 20            # elaxistoi stathmoi ana fyllo tou dentrou
+
+# To apply_rule_based_method tou 2_analyze_results_rules.py os decision list
+HAND_RULES = {
+    'version': RULES_VERSION,
+    'rules': [
+        {'when': ['has_peo', 'km_distance'], 'method': 'v8_combined_basic'},   # ΠΕΟ + χλμ
+        {'when': ['has_question'], 'method': 'v9_combined_aggressive'},        # problematic
+        {'when': ['very_long'], 'method': 'v12_simplify_cities_only'},         # > 60 xaraktires
+        {'when': ['leading_digit'], 'method': 'v11_km_first'},                 # xekinaei me arithmo
+        {'when': ['has_three_cities'], 'method': 'v13_simplify_km_cities'},    # polles poleis
+    ],
+    'default': 'v3_normalize_km',
+}
+
+
+def _condition_names(rule_set):
+    return sorted({c.lstrip('!') for rule in rule_set['rules'] for c in rule['when']})
+
+
+def compile_rules(rule_set, conditions=CONDITIONS):
+    """Decision list -> synartisi addresses -> np.array me ti methodo kathe diefthinsis"""
+    names = _condition_names(rule_set)
+    unknown = [n for n in names if n not in conditions]
+    if unknown:
+        raise ValueError(f"Agnostes synthikes: {unknown}")
+    compiled = [([(c.lstrip('!'), c.startswith('!')) for c in rule['when']], rule['method'])
+                for rule in rule_set['rules']]
+    default = rule_set['default']
+
+    def assign(addresses):
+        addresses = pd.Series(addresses).fillna('').astype(str)
+        # Oi idies diefthinseis epanalamvanontai - oi synthikes ypologizontai mono stis monadikes
+        codes, uniques = pd.factorize(addresses)
+        uniques = pd.Series(uniques)
+        masks = {name: conditions[name](uniques).to_numpy(dtype=bool) for name in names}
+
+        out = np.full(len(uniques), default, dtype=object)
+        assigned = np.zeros(len(uniques), dtype=bool)
+        for terms, method in compiled:
+            hit = ~assigned
+            for name, negate in terms:
+                hit &= ~masks[name] if negate else masks[name]
+            out[hit] = method
+            assigned |= hit
+        return out[codes]
+
+    return assign
+
+
+def assign_methods(addresses, rule_set=HAND_RULES, conditions=CONDITIONS):
+    return compile_rules(rule_set, conditions)(addresses)
+
+
+def routed_distances(df, methods):
+    """Η απόσταση της μεθόδου που επέλεξαν οι κανόνες για κάθε σταθμό (NaN αν λείπει η στήλη)"""
+    methods = np.asarray(methods, dtype=object)
+    codes, uniques = pd.factorize(methods)
+    columns = [f'{m}_distance' for m in uniques]
+    present = [c for c in columns if c in df.columns]
+    table = df[present].to_numpy(dtype=float) if present else np.empty((len(df), 0))
+    position = np.array([present.index(c) if c in present else -1 for c in columns], dtype=int)[codes]
+    out = np.full(len(df), np.nan)
+    found = position >= 0
+    out[found] = table[np.flatnonzero(found), position[found]]
+    return pd.Series(out, index=df.index)
+
+
+def learn_rules(df, method_columns=None, conditions=ADDRESS_PATTERNS, max_depth=3,
+                min_support=MIN_SUPPORT, failure_penalty=FAILURE_PENALTY_M):
+    """Μαθαίνει decision list από ένα ρηχό δέντρο που ελαχιστοποιεί τη συνολική απόσταση"""
+    if method_columns is None:
+        from geocoding_experiments import find_method_columns
+        method_columns = find_method_columns(df)
+
+    X = pattern_matrix(df['original_address'], conditions)
+    names = list(X.columns)
+    X = X.to_numpy(dtype=np.float64)                                          # (N, P)
+    raw = df[[f'{m}_distance' for m in method_columns]].to_numpy(dtype=float)  # (N, M)
+    cost = np.where(np.isnan(raw), failure_penalty, raw)
+
+    leaves = []
+
+    def grow(rows, path, depth):
+        node_sums = cost[rows].sum(axis=0)
+        best = int(np.argmin(node_sums))
+        n = len(rows)
+        split = None
+        if depth < max_depth and n >= 2 * min_support:
+            # Ολα τα splits μαζί: (P, M) αθροίσματα αριστερά = X^T · cost, δεξιά = node - αριστερά
+            left_sums = X[rows].T @ cost[rows]
+            left_n = X[rows].sum(axis=0)
+            split_cost = left_sums.min(axis=1) + (node_sums - left_sums).min(axis=1)
+            allowed = (left_n >= min_support) & (n - left_n >= min_support)
+            split_cost[~allowed] = np.inf
+            p = int(np.argmin(split_cost))
+            if split_cost[p] < node_sums[best] - 1e-9:
+                split = p
+        if split is None:
+            chosen = raw[rows, best]
+            leaves.append({
+                'when': path,
+                'method': method_columns[best],
+                'support': int(n),
+                'mean_distance': float(np.nanmean(chosen)) if (~np.isnan(chosen)).any() else None,
+            })
+            return
+        has = X[rows, split] > 0
+        grow(rows[has], path + [names[split]], depth + 1)
+        grow(rows[~has], path + [f'!{names[split]}'], depth + 1)
+
+    grow(np.arange(len(df)), [], 0)
+
+    # Ta fylla xorizoun oles tis diefthinseis - to megalytero ginetai default
+    leaves.sort(key=lambda leaf: -leaf['support'])
+    default = leaves[0]
+    rules = [leaf for leaf in leaves[1:] if leaf['method'] != default['method']]
+    return {
+        'version': RULES_VERSION,
+        'rules': rules,
+        'default': default['method'],
+        'learned': {'max_depth': max_depth, 'min_support': min_support,
+                    'failure_penalty': failure_penalty, 'stations': int(len(df)),
+                    'methods': len(method_columns)},
+    }
+
+
+def format_rules(rule_set):
+    # Anagnosimi morfi (if-chain) gia to report
+    lines = []
+    for i, rule in enumerate(rule_set['rules'], 1):
+        terms = ' and '.join(f"not {c[1:]}" if c.startswith('!') else c for c in rule['when']) or 'always'
+        extra = f"  (n={rule['support']})" if 'support' in rule else ''
+        lines.append(f"Rule {i}: if {terms} -> {rule['method']}{extra}")
+    lines.append(f"Default -> {rule_set['default']}")
+    return '\n'.join(lines)
+
+
+def save_rules(path, rule_set):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(rule_set, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def load_rules(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        rule_set = json.load(f)
+    if rule_set.get('version') != RULES_VERSION:
+        raise ValueError(f"Agnosti ekdosi kanonon: {rule_set.get('version')}")
+    return rule_set
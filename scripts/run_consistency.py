@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+# run_consistency
+# Synepeia ton 3 runs tou geocoding (run1 = diefthinsi, run2 = + nomos,
+# run3 = + dimos + nomos) ana stathmo, olo se pinakes (N, 3) anti gia to
+# reconstruct_all_runs grammi-grammi tou geocoding_full_analysis.ipynb:
+#   - spread_m: megisti apostasi metaxy ton runs pou petyxan
+#   - accuracy_flip: to idio pratirio ROOFTOP se ena run kai APPROXIMATE se allo
+#   - consensus: to medoid ton runs (to simeio me ti mikroteri synoliki
+#     apostasi apo ta alla, isopalia -> kalytero accuracy) kai posa runs symfonoun
+# Me --requery ananeonontai (xoris cache) MONO ta cache entries ton stathmon pou
+# diafonoun (spread > katofli i flip) - oxi tris plires diadromes - kai to
+# consensus apothikeyetai gia ta epomena vimata. Ta 3 queries (diefthinsi,
+# + nomos, + dimos) ananeonontai (palia / stale entries), kai gia na lythei i
+# diafonia stelnetai kai ena diaforetiko 4o query (run4, tie-break): i
+# diefthinsi me components administrative_area = nomos. To run4 mpainei sto
+# medoid kai sto consensus_support (oxi sto spread / flip, pou krinoun to requery).
+# Se sfalma tou API to palio entry menei opos itan.
+#
+#   python scripts/cli.py consistency                       # mono apo to cache
+#   python scripts/cli.py consistency --requery --threshold 200
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from paths import CACHE_FILE, CLEANED_FILE, DATA_DIR
+
+# Parametroi
+RUNS = ('run1', 'run2', 'run3')
+TIEBREAK_RUN = 'run4'          # components-restricted query, mono gia tous stathmous tou requery
+CONSENSUS_RUNS = RUNS + (TIEBREAK_RUN,)
+ACCURACY_SCORES = {
+    'ROOFTOP': 4,
+    'RANGE_INTERPOLATED': 3,
+    'GEOMETRIC_CENTER': 2,
+    'APPROXIMATE': 1,
+}
+SPREAD_THRESHOLD_M = 100.0     # runs pio makria apo afto = diafonia
+RATE_LIMIT = 0.1               # seconds metaxy API calls sto --requery
+CONSENSUS_FILE = DATA_DIR / 'geocoding_consensus.xlsx'
+ADDRESS_COLUMN = 'gasStationAddress'
+COUNTY_COLUMN = 'countyName'
+MUNICIPALITY_COLUMN = 'municipalityName'
+LAT_COLUMN = 'gasStationLat'
+LNG_COLUMN = 'gasStationLong'
+
+
+# ============= RUNS APO TO CACHE =============
+
+def build_queries(df):
+    """run -> Series με τα query strings (ίδια με τα f-strings του notebook)"""
+    address = df[ADDRESS_COLUMN].astype(str)
+    county = df[COUNTY_COLUMN].astype(str)
+    municipality = df[MUNICIPALITY_COLUMN].astype(str)
+    return {
+        'run1': address,
+        'run2': address + ', ' + county,
+        'run3': address + ', ' + municipality + ', ' + county,
+    }
+
+
+def tiebreak_key(address, county):
+    """Κλειδί cache του run4 (η διεύθυνση + components, όχι ίδιο με κανένα από τα 3 queries)"""
+    return address + ' [administrative_area:' + county + ']'
+
+
+def build_tiebreak_queries(df):
+    """(κλειδί cache, διεύθυνση, components) του run4 για τους σταθμούς με νομό"""
+    rows = df[df[COUNTY_COLUMN].notna()]
+    address = rows[ADDRESS_COLUMN].astype(str)
+    county = rows[COUNTY_COLUMN].astype(str)
+    return list(dict.fromkeys(
+        (key, a, (('administrative_area', c), ('country', 'GR')))
+        for key, a, c in zip(tiebreak_key(address, county), address, county)))
+
+
+def lookup_cache(queries, cache):
+    """queries -> (lat, lng, accuracy) πίνακες· το cache ρωτιέται μία φορά ανά μοναδικό query"""
+    codes, unique = pd.factorize(pd.Series(queries, dtype=object))
+    entries = [cache.get(q) for q in unique]
+    lat = np.array([e['lat'] if e and e.get('lat') is not None else np.nan for e in entries] + [np.nan])
+    lng = np.array([e['lng'] if e and e.get('lat') is not None else np.nan for e in entries] + [np.nan])
+    acc = np.array([e.get('accuracy') if e and e.get('lat') is not None else 'FAILED' for e in entries]
+                   + ['FAILED'], dtype=object)
+    # codes == -1 (NaN query) -> teleutaia thesi = FAILED
+    return lat[codes], lng[codes], acc[codes]
+
+
+def reconstruct_runs(df, cache):
+    """Οι στήλες run{1,2,3}_* και best_* του geocoding_comparison_FULL.xlsx (+ run4 αν υπάρχει στο cache)"""
+    from address_cleaning import haversine_array
+
+    out = df.reset_index(drop=True).copy()
+    queries = build_queries(out)
+    queries[TIEBREAK_RUN] = tiebreak_key(out[ADDRESS_COLUMN].astype(str), out[COUNTY_COLUMN].astype(str)) \
+        .where(out[COUNTY_COLUMN].notna(), None)
+    for run in CONSENSUS_RUNS:
+        lat, lng, acc = lookup_cache(queries[run], cache)
+        out[f'{run}_lat'] = lat
+        out[f'{run}_lng'] = lng
+        out[f'{run}_accuracy'] = acc
+        out[f'{run}_score'] = pd.Series(acc).map(ACCURACY_SCORES).fillna(0).astype(int).to_numpy()
+        out[f'{run}_distance'] = haversine_array(out[LAT_COLUMN], out[LNG_COLUMN], lat, lng)
+    return add_best(out)
+
+
+def add_best(df):
+    """best_* = το run με τη μικρότερη απόσταση από το ground truth (πρώτο σε ισοπαλία)"""
+    distances = np.column_stack([df[f'{run}_distance'].to_numpy(dtype=float) for run in RUNS])
+    ok = ~np.isnan(distances)
+    best = np.argmin(np.where(ok, distances, np.inf), axis=1)
+    any_ok = ok.any(axis=1)
+    rows = np.arange(len(df))
+    df['best_method'] = np.where(any_ok, np.array(RUNS, dtype=object)[best], 'ALL_FAILED')
+    for field, missing in (('lat', np.nan), ('lng', np.nan), ('accuracy', 'FAILED'), ('score', 0),
+                           ('distance', np.nan)):
+        values = np.column_stack([df[f'{run}_{field}'].to_numpy(dtype=object) for run in RUNS])[rows, best]
+        df[f'best_{field}'] = pd.Series(np.where(any_ok, values, missing)).infer_objects().to_numpy()
+    return df
+
+
+# ============= SYNEPEIA =============
+
+def run_arrays(df, runs=RUNS):
+    """(N, K) lat, lng, accuracy score και ok από τις στήλες run*_"""
+    lat = np.column_stack([pd.to_numeric(df[f'{run}_lat'], errors='coerce').to_numpy(dtype=float) for run in runs])
+    lng = np.column_stack([pd.to_numeric(df[f'{run}_lng'], errors='coerce').to_numpy(dtype=float) for run in runs])
+    score = np.column_stack([df[f'{run}_accuracy'].map(ACCURACY_SCORES).fillna(0).to_numpy(dtype=int)
+                             for run in runs])
+    return lat, lng, score, ~(np.isnan(lat) | np.isnan(lng))
+
+
+def pairwise_distances(lat, lng):
+    """(N, K) -> (N, K, K) haversine (NaN όπου λείπει κάποιο run)"""
+    from address_cleaning import haversine_array
+
+    return haversine_array(lat[:, :, None], lng[:, :, None], lat[:, None, :], lng[:, None, :])
+
+
+def run_spread(df, threshold=SPREAD_THRESHOLD_M):
+    """spread_m, n_ok, accuracy_flip και needs_requery ανά σταθμό"""
+    lat, lng, score, ok = run_arrays(df)
+    dist = pairwise_distances(lat, lng)
+    n_ok = ok.sum(axis=1)
+    # Megisti apostasi metaxy zevgon pou petyxan (NaN me < 2 runs)
+    spread = np.where(n_ok >= 2, np.where(np.isnan(dist), -np.inf, dist).max(axis=(1, 2), initial=-np.inf), np.nan)
+    flip = ((score == ACCURACY_SCORES['ROOFTOP']) & ok).any(axis=1) & \
+           ((score == ACCURACY_SCORES['APPROXIMATE']) & ok).any(axis=1)
+    disagree = np.nan_to_num(spread, nan=0.0) > threshold
+    return pd.DataFrame({'n_ok': n_ok, 'spread_m': spread, 'accuracy_flip': flip,
+                         'needs_requery': disagree | flip}, index=df.index)
+
+
+def consensus(df, threshold=SPREAD_THRESHOLD_M):
+    """Medoid των runs ανά σταθμό, μαζί με το run4 αν υπάρχει (+ support = runs σε απόσταση <= threshold)"""
+    from address_cleaning import haversine_array
+
+    runs = [run for run in CONSENSUS_RUNS if f'{run}_lat' in df.columns]
+    lat, lng, score, ok = run_arrays(df, runs)
+    dist = pairwise_distances(lat, lng)
+    n = len(df)
+    # Synoliki apostasi apo ta alla runs, isopalia -> kalytero accuracy, meta prota to run1
+    total = np.where(ok, np.nansum(dist, axis=2), np.inf)
+    cost = total - score * 1e-6
+    pick = np.argmin(cost, axis=1)
+    rows = np.arange(n)
+    any_ok = ok.any(axis=1)
+    support = ((dist[rows, pick] <= threshold) & ok).sum(axis=1)
+    c_lat = np.where(any_ok, lat[rows, pick], np.nan)
+    c_lng = np.where(any_ok, lng[rows, pick], np.nan)
+    c_acc = np.where(any_ok, np.column_stack([df[f'{run}_accuracy'].to_numpy(dtype=object) for run in runs])
+                     [rows, pick], 'FAILED')
+    out = pd.DataFrame({
+        'consensus_method': np.where(any_ok, np.array(runs, dtype=object)[pick], 'ALL_FAILED'),
+        'consensus_lat': c_lat,
+        'consensus_lng': c_lng,
+        'consensus_accuracy': c_acc,
+        'consensus_support': np.where(any_ok, support, 0),
+    }, index=df.index)
+    if LAT_COLUMN in df.columns:
+        out['consensus_distance'] = haversine_array(df[LAT_COLUMN], df[LNG_COLUMN], c_lat, c_lng)
+    return out
+
+
+def analyze(df, threshold=SPREAD_THRESHOLD_M):
+    """Runs + spread/flip + consensus σε ένα DataFrame"""
+    out = df.copy()
+    for frame in (run_spread(df, threshold), consensus(df, threshold)):
+        for column in frame.columns:
+            out[column] = frame[column]
+    return out
+
+
+# ============= RE-QUERY =============
+
+def requery(df, mask, gmaps, cache, rate_limit=RATE_LIMIT, sleep=time.sleep):
+    """Ανανέωση (χωρίς cache) των entries των σταθμών του mask -> (calls, αλλαγμένα, σφάλματα)
+
+    Τα 3 queries ξαναστέλνονται ίδια (stale entries) και για tie-break το run4
+    (διεύθυνση + components νομού)· σε σφάλμα του API το entry δεν αγγίζεται.
+    """
+    from geocoding_client import parse_geocode_result
+
+    flagged = df[np.asarray(mask, dtype=bool)]
+    queries = build_queries(flagged)
+    unique = [(query, query, None)
+              for query in pd.unique(pd.concat([queries[run] for run in RUNS], ignore_index=True))]
+    unique += build_tiebreak_queries(flagged)
+    changed = errors = 0
+    for i, (query, address, components) in enumerate(unique):
+        try:
+            if components:
+                response = gmaps.geocode(address, components=dict(components), region='gr')
+            else:
+                response = gmaps.geocode(address, region='gr')
+        except Exception as e:
+            # Timeout / quota: to palio apotelesma menei (oxi None sto cache)
+            print(f"Sfalma gia '{query[:50]}': {e}")
+            errors += 1
+        else:
+            result = parse_geocode_result(response)
+            changed += cache.get(query) != result
+            cache[query] = result
+        if rate_limit and i < len(unique) - 1:
+            sleep(rate_limit)
+    return len(unique), changed, errors
+
+
+def summarize(result, threshold, calls=0):
+    n = len(result)
+    flagged = int(result['needs_requery'].sum())
+    lines = [
+        f"Stathmoi: {n}, me >= 2 runs: {int((result['n_ok'] >= 2).sum())}",
+        f"Diafonia > {threshold:g}m: {int((result['spread_m'] > threshold).sum())}, "
+        f"ROOFTOP/APPROXIMATE flip: {int(result['accuracy_flip'].sum())}, gia requery: {flagged}",
+        f"Median spread: {np.nanmedian(result['spread_m']) if result['spread_m'].notna().any() else float('nan'):.1f}m, "
+        f"support >= 3: {int((result['consensus_support'] >= 3).sum())}",
+    ]
+    if 'consensus_distance' in result.columns:
+        for name in ('run1_distance', 'best_distance', 'consensus_distance'):
+            if name in result.columns:
+                lines.append(f"  {name:<20} mean {result[name].mean():8.1f}m  median {result[name].median():8.1f}m")
+    if calls:
+        lines.append(f"API calls: {calls} (anti gia {len(RUNS) * n} gia tris plires diadromes)")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Synepeia ton 3 geocoding runs, consensus kai epilektiko requery")
+    parser.add_argument('--stations', default=str(CLEANED_FILE), help="xlsx pratirion (ta runs apo to cache)")
+    parser.add_argument('--results', default=None,
+                        help="etoimo xlsx me stiles run*_lat/lng/accuracy (px. geocoding_comparison_FULL.xlsx)")
+    parser.add_argument('--sheet', default=0)
+    parser.add_argument('--cache-file', default=str(CACHE_FILE))
+    parser.add_argument('--threshold', type=float, default=SPREAD_THRESHOLD_M, help="spread (m) = diafonia")
+    parser.add_argument('--requery', action='store_true', help="ananeosi ton cache entries + tie-break run4 gia tous stathmous pou diafonoun")
+    parser.add_argument('--rate-limit', type=float, default=RATE_LIMIT)
+    parser.add_argument('--out', default=str(CONSENSUS_FILE))
+    args = parser.parse_args(argv)
+
+    from geocoding_client import load_cache, save_cache
+
+    if args.results:
+        df = pd.read_excel(args.results, sheet_name=args.sheet)
+        cache = None
+    else:
+        cache = load_cache(args.cache_file)
+        started = time.perf_counter()
+        stations = pd.read_excel(args.stations)
+        stations_columns = list(stations.columns)
+        df = reconstruct_runs(stations, cache)
+        print(f"Runs apo to cache: {len(df)} stathmoi se {time.perf_counter() - started:.2f}s")
+
+    result = analyze(df, args.threshold)
+    calls = 0
+    if args.requery and result['needs_requery'].any():
+        if cache is None:
+            parser.error("--requery xreiazetai ta runs apo to cache (oxi --results)")
+        import googlemaps
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        gmaps = googlemaps.Client(key=os.getenv('GOOGLE_MAPS_API_KEY'))
+        mask = result['needs_requery'].to_numpy()
+        calls, changed, errors = requery(df, mask, gmaps, cache, args.rate_limit)
+        print(f"Requery: {changed} entries allaxan, {errors} sfalmata (ta entries tous emeinan idia)")
+        save_cache(cache, args.cache_file)
+        # To cache exei pleon ta nea apotelesmata - oi ypoloipoi stathmoi menoun idioi
+        result = analyze(reconstruct_runs(df[stations_columns], cache), args.threshold)
+
+    print(summarize(result, args.threshold, calls))
+    tmp_path = f"{args.out}.tmp.xlsx"
+    with pd.ExcelWriter(tmp_path) as writer:
+        result.to_excel(writer, sheet_name='raw results', index=False)
+        result[result['needs_requery']].to_excel(writer, sheet_name='disagreements', index=False)
+    os.replace(tmp_path, args.out)
+    print(f"Consensus: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,687 @@
+# -*- coding: utf-8 -*-
+# shard_runner
+# Sharded ektelesi ton megalon loops (geocoding / download) apo osa processes
+# theloume, kai se polla mixanimata me koino filesystem (NFS/SMB). Xoris
+# server kai xoris SQLite (to locking tis SQLite se diktyaka filesystems den
+# einai axiopisto): ola einai arxeia ston fakelo tou run:
+#
+#   <run>/plan.json              job, parametroi, shards
+#   <run>/shards/<id>.ids        ta gasStationID tou shard (ena ana grammi)
+#   <run>/leases/<id>.lease      poios douleuei to shard (O_EXCL create), to
+#                                mtime einai to heartbeat
+#   <run>/done/<id>.json         oloklirosi (stats)
+#   <run>/failed/<id>.json       apotyxies (xanadokimazetai os MAX_ATTEMPTS, meta to
+#                                not_before - backoff pou diplasiazetai)
+#   <run>/results/<id>.csv       apotelesmata tou shard
+#   <run>/manifest.csv           ola ta apotelesmata (merge me lock)
+#
+# Lease pou den ananeothike gia LEASE_TIMEOUT (o worker pethane / to
+# mixanima epese) ginetai reclaim apo allon worker (atomiko rename, opote
+# mono enas to pairnei). Oi xronoi sygkrinontai me to roloi tou filesystem,
+# oxi tou kathe mixanimatos. Oi workers tou geocode grafoun ta nea
+# apotelesmata sto koino geocoding_cache.json (merge me lock) kai moirazontai
+# to --qps (quota) metaxy tous.
+#
+#   python scripts/cli.py shard plan --job geocode --shard-size 200
+#   python scripts/cli.py shard work --processes 4        # se kathe mixanima
+#   python scripts/cli.py shard status
+
+import argparse
+import importlib
+import json
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import pandas as pd
+
+from paths import CACHE_FILE, DATA_DIR, STATIONS_FILE, TILES_DIR
+
+# Parametroi
+SHARD_SIZE = 200
+LEASE_TIMEOUT = 120.0          # seconds xoris heartbeat -> to shard xanadinetai
+HEARTBEAT_INTERVAL = 15.0
+LOCK_TIMEOUT = 30.0            # lock (manifest / cache) pio palio apo afto = egkataleimmeno (to merge kratei deyterolepta)
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF = 60.0           # seconds prin xanadokimastei shard pou apetyxe (x2 ana prospatheia)
+RUN_DIR = DATA_DIR / 'shard_run'
+MANIFEST_FILENAME = 'manifest.csv'
+RUN_SUBDIRS = ('shards', 'leases', 'done', 'failed', 'results')
+ID_COLUMN = 'gasStationID'
+
+
+# ============= ARXEIA =============
+
+def write_atomic(path, text):
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    tmp_path.write_text(text, encoding='utf-8')
+    os.replace(tmp_path, path)
+
+
+def fs_now(directory):
+    """Η ώρα του filesystem (mtime ενός αρχείου που μόλις αγγίξαμε) - κοινό ρολόι για όλα τα μηχανήματα"""
+    probe = Path(directory) / f".clock-{socket.gethostname()}"
+    probe.touch()
+    return probe.stat().st_mtime
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class FileLock:
+    """Αποκλειστικό lock με O_EXCL αρχείο (δουλεύει και σε κοινό filesystem), με σπάσιμο παλιών locks"""
+
+    def __init__(self, path, timeout=LOCK_TIMEOUT, poll=0.05, clock_dir=None):
+        self.path = Path(path)
+        self.clock_dir = Path(clock_dir) if clock_dir is not None else self.path.parent
+        self.timeout = timeout
+        self.poll = poll
+        self.token = None
+        self._stop = threading.Event()
+        self._refresher = None
+
+    def _break_stale(self, now):
+        # O katoxos pethane: rename (atomiko, mono enas ta katafernei). An to arxeio pou
+        # pirame einai fresko, allos waiter to espase kai to xanapire prin apo emas -> epistrofi
+        stale = self.path.with_name(f"{self.path.name}.stale-{uuid.uuid4().hex[:8]}")
+        try:
+            os.rename(self.path, stale)
+        except FileNotFoundError:
+            return
+        if now - stale.stat().st_mtime <= self.timeout:
+            try:
+                os.link(stale, self.path)
+            except FileExistsError:
+                pass
+        stale.unlink()
+
+    def _refresh(self):
+        # Megalo merge: to mtime ananeonetai oste na min fainetai egkataleimmeno stous allous
+        while not self._stop.wait(self.timeout / 4):
+            try:
+                os.utime(self.path)
+            except FileNotFoundError:
+                return
+
+    def __enter__(self):
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                now = fs_now(self.clock_dir)
+                try:
+                    age = now - self.path.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+                if age > self.timeout:
+                    self._break_stale(now)
+                    continue
+                time.sleep(self.poll)
+                continue
+            self.token = f"{worker_name()}:{uuid.uuid4().hex}"
+            with os.fdopen(fd, 'w') as f:
+                f.write(self.token)
+            self._stop.clear()
+            self._refresher = threading.Thread(target=self._refresh, daemon=True)
+            self._refresher.start()
+            return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._refresher.join()
+        try:
+            # Mono to diko mas lock (oxi kapoiou allou pou to pire meta apo reclaim)
+            if self.path.read_text() == self.token:
+                self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+# ============= QUEUE =============
+
+class ShardQueue:
+    """Τα shards ενός run και τα leases τους (όλα αρχεία στο run_dir)"""
+
+    def __init__(self, run_dir=RUN_DIR, lease_timeout=LEASE_TIMEOUT, max_attempts=MAX_ATTEMPTS,
+                 retry_backoff=RETRY_BACKOFF):
+        self.run_dir = Path(run_dir)
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        for name in RUN_SUBDIRS:
+            (self.run_dir / name).mkdir(parents=True, exist_ok=True)
+
+    # --- plan ---
+
+    @classmethod
+    def plan(cls, run_dir, station_ids, job, params=None, shard_size=SHARD_SIZE, force=False):
+        run_dir = Path(run_dir)
+        if (run_dir / 'plan.json').exists():
+            if not force:
+                raise FileExistsError(f"Yparxei idi plan sto {run_dir} (--force gia neo)")
+            # Neo plan: ta shard ids xanaxekinoun apo 00000, ara done/failed/leases/results/manifest
+            # tou proigoumenou den prepei na metrisoun
+            for name in RUN_SUBDIRS:
+                shutil.rmtree(run_dir / name, ignore_errors=True)
+            for path in (run_dir / MANIFEST_FILENAME, run_dir / f'{MANIFEST_FILENAME}.lock'):
+                if path.exists():
+                    path.unlink()
+        queue = cls(run_dir)
+        station_ids = [int(i) for i in station_ids]
+        shards = []
+        for number, start in enumerate(range(0, len(station_ids), shard_size)):
+            shard = f"{number:05d}"
+            write_atomic(queue.run_dir / 'shards' / f'{shard}.ids',
+                         ''.join(f'{i}\n' for i in station_ids[start:start + shard_size]))
+            shards.append(shard)
+        write_atomic(run_dir / 'plan.json', json.dumps({
+            'job': job, 'params': params or {}, 'shards': shards, 'stations': len(station_ids),
+            'shard_size': shard_size, 'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }, ensure_ascii=False, indent=1))
+        return queue
+
+    def load_plan(self):
+        with open(self.run_dir / 'plan.json', 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def shard_ids(self, shard):
+        from station_diff import load_id_list
+        return sorted(load_id_list(self.run_dir / 'shards' / f'{shard}.ids'))
+
+    # --- leases ---
+
+    def _lease(self, shard):
+        return self.run_dir / 'leases' / f'{shard}.lease'
+
+    def failure(self, shard):
+        """Η εγγραφή failed/<id>.json (attempts, error, not_before) ή None"""
+        path = self.run_dir / 'failed' / f'{shard}.json'
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def attempts(self, shard):
+        record = self.failure(shard)
+        return record['attempts'] if record else 0
+
+    def _waiting(self, failure, now):
+        # Shard pou apetyxe kai den exei ftasei to not_before tou (backoff)
+        return failure is not None and now < failure.get('not_before', 0)
+
+    def is_done(self, shard):
+        return (self.run_dir / 'done' / f'{shard}.json').exists()
+
+    def lease_age(self, shard, now=None):
+        """Δευτερόλεπτα από το τελευταίο heartbeat (None αν δεν υπάρχει lease)"""
+        try:
+            mtime = self._lease(shard).stat().st_mtime
+        except FileNotFoundError:
+            return None
+        return (now if now is not None else fs_now(self.run_dir)) - mtime
+
+    def claim(self, worker):
+        """Το πρώτο ελεύθερο (ή εγκαταλελειμμένο) shard -> shard id, ή None αν δεν έμεινε τίποτα"""
+        now = fs_now(self.run_dir)
+        for shard in self.load_plan()['shards']:
+            if self.is_done(shard):
+                continue
+            failure = self.failure(shard)
+            if failure and failure['attempts'] >= self.max_attempts or self._waiting(failure, now):
+                continue
+            lease = self._lease(shard)
+            age = self.lease_age(shard, now)
+            if age is not None:
+                if age <= self.lease_timeout:
+                    continue
+                # Reclaim: to rename petyxainei mono gia enan worker
+                reclaimed = lease.with_name(f"{lease.name}.reclaimed-{uuid.uuid4().hex[:8]}")
+                try:
+                    os.rename(lease, reclaimed)
+                except FileNotFoundError:
+                    continue
+                if now - reclaimed.stat().st_mtime <= self.lease_timeout:
+                    # Allos worker to ekane reclaim kai to xanapire prin apo emas: epistrofi tou lease tou
+                    try:
+                        os.link(reclaimed, lease)
+                    except FileExistsError:
+                        pass
+                    reclaimed.unlink()
+                    continue
+                reclaimed.unlink()
+                print(f"   Reclaim tou shard {shard} (heartbeat prin {age:.0f}s)")
+            try:
+                fd = os.open(lease, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                continue
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'worker': worker, 'acquired': now}, f)
+            if self.is_done(shard):
+                # Teleiose molis prin to claim (apo ton proigoumeno katoxo)
+                self.release(shard, worker)
+                continue
+            return shard
+        return None
+
+    def owner(self, shard):
+        try:
+            with open(self._lease(shard), 'r', encoding='utf-8') as f:
+                return json.load(f).get('worker')
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def heartbeat(self, shard, worker):
+        """Ανανέωση του lease· False αν το χάσαμε (reclaim από άλλον)"""
+        if self.owner(shard) != worker:
+            return False
+        try:
+            os.utime(self._lease(shard))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def release(self, shard, worker):
+        if self.owner(shard) == worker:
+            try:
+                self._lease(shard).unlink()
+            except FileNotFoundError:
+                pass
+
+    def complete(self, shard, worker, stats):
+        write_atomic(self.run_dir / 'done' / f'{shard}.json',
+                     json.dumps({'worker': worker, 'finished': time.strftime('%Y-%m-%dT%H:%M:%S'), **stats}))
+        self.release(shard, worker)
+
+    def fail(self, shard, worker, error):
+        """Καταγραφή αποτυχίας· το shard ξαναδίνεται μετά από retry_backoff * 2^(attempts-1)"""
+        attempts = self.attempts(shard) + 1
+        not_before = fs_now(self.run_dir) + self.retry_backoff * 2 ** (attempts - 1)
+        write_atomic(self.run_dir / 'failed' / f'{shard}.json',
+                     json.dumps({'worker': worker, 'attempts': attempts, 'error': error, 'not_before': not_before},
+                                ensure_ascii=False))
+        self.release(shard, worker)
+        return attempts
+
+    def next_retry(self):
+        """Δευτερόλεπτα μέχρι το επόμενο shard σε backoff (None αν δεν περιμένει κανένα)"""
+        now = fs_now(self.run_dir)
+        waits = []
+        for shard in self.load_plan()['shards']:
+            failure = self.failure(shard)
+            if (not self.is_done(shard) and failure and failure['attempts'] < self.max_attempts
+                    and self._waiting(failure, now)):
+                waits.append(failure['not_before'] - now)
+        return min(waits) if waits else None
+
+    def live_workers(self):
+        """Πόσα leases είναι ζωντανά (για το μοίρασμα του quota)"""
+        now = fs_now(self.run_dir)
+        ages = [self.lease_age(p.stem, now) for p in (self.run_dir / 'leases').glob('*.lease')]
+        return max(1, sum(age is not None and age <= self.lease_timeout for age in ages))
+
+    def status(self):
+        plan = self.load_plan()
+        now = fs_now(self.run_dir)
+        rows = []
+        for shard in plan['shards']:
+            age = self.lease_age(shard, now)
+            failure = self.failure(shard)
+            attempts = failure['attempts'] if failure else 0
+            if self.is_done(shard):
+                state = 'done'
+            elif attempts >= self.max_attempts:
+                state = 'failed'
+            elif age is None:
+                state = 'retry' if self._waiting(failure, now) else 'pending'
+            else:
+                state = 'running' if age <= self.lease_timeout else 'stale'
+            rows.append({'shard': shard, 'state': state, 'worker': self.owner(shard) if age is not None else None,
+                         'heartbeat_age_s': age, 'attempts': attempts})
+        return pd.DataFrame(rows, columns=['shard', 'state', 'worker', 'heartbeat_age_s', 'attempts'])
+
+    # --- merge ---
+
+    def merge_results(self, shard, records):
+        """results/<shard>.csv και merge στο κοινό manifest.csv (με lock, τελευταία εγγραφή ανά σταθμό)"""
+        records = pd.DataFrame(records)
+        records.to_csv(self.run_dir / 'results' / f'{shard}.csv', index=False)
+        manifest = self.run_dir / MANIFEST_FILENAME
+        with FileLock(f"{manifest}.lock"):
+            previous = pd.read_csv(manifest) if manifest.exists() else pd.DataFrame()
+            merged = pd.concat([previous, records], ignore_index=True)
+            if ID_COLUMN in merged.columns:
+                merged = merged.drop_duplicates(ID_COLUMN, keep='last').sort_values(ID_COLUMN, kind='stable')
+            tmp_path = manifest.with_name(f"{manifest.name}.{uuid.uuid4().hex[:8]}.tmp")
+            merged.to_csv(tmp_path, index=False)
+            os.replace(tmp_path, manifest)
+        return len(records)
+
+
+class Heartbeat:
+    """Thread που ανανεώνει το lease όσο τρέχει το shard (lost = το πήρε άλλος)"""
+
+    def __init__(self, queue, shard, worker, interval=HEARTBEAT_INTERVAL):
+        self.queue, self.shard, self.worker = queue, shard, worker
+        self.interval = interval
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if not self.queue.heartbeat(self.shard, self.worker):
+                self.lost = True
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+class Throttle:
+    """Κοινό quota: κάθε worker κάνει qps / (ζωντανοί workers) requests/s"""
+
+    def __init__(self, queue, qps=None):
+        self.queue = queue
+        self.qps = qps
+        self.interval = 0.0
+        self._last = 0.0
+
+    def refresh(self):
+        if self.qps:
+            self.interval = self.queue.live_workers() / self.qps
+
+    def wait(self):
+        if self.interval:
+            delay = self._last + self.interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._last = time.monotonic()
+
+
+# ============= JOBS =============
+
+def _load_stations(params, station_ids):
+    df = pd.read_excel(params.get('stations', str(STATIONS_FILE)))
+    return df[df[ID_COLUMN].isin(station_ids)].reset_index(drop=True)
+
+
+def _make_client(spec):
+    if spec in (None, 'google'):
+        import googlemaps
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        return googlemaps.Client(key=os.getenv('GOOGLE_MAPS_API_KEY'))
+    module_name, _, attr = spec.partition(':')
+    return getattr(importlib.import_module(module_name), attr)()
+
+
+def geocode_job(station_ids, ctx):
+    """Τα 3 runs (run_consistency) για τους σταθμούς του shard· νέα αποτελέσματα -> κοινό cache
+
+    Σε σφάλμα του API (timeout / quota) τα ολοκληρωμένα μπαίνουν στο cache και το
+    σφάλμα περνάει στο work() -> retry του shard (όχι None στο κοινό cache).
+    """
+    from geocoding_client import load_cache, parse_geocode_result
+    from run_consistency import RUNS, build_queries
+
+    params = ctx['params']
+    df = _load_stations(params, station_ids)
+    if 'client' not in ctx:
+        ctx['client'] = _make_client(params.get('client'))
+    cache_file = params.get('cache_file', str(CACHE_FILE))
+    known = load_cache(cache_file)
+    fresh = {}
+    queries = build_queries(df)
+    records = []
+    try:
+        for i, station_id in enumerate(df[ID_COLUMN]):
+            record = {ID_COLUMN: int(station_id)}
+            for run in RUNS:
+                query = queries[run].iloc[i]
+                if query in known:
+                    result = known[query]
+                else:
+                    if query not in fresh:
+                        ctx['throttle'].wait()
+                        fresh[query] = parse_geocode_result(ctx['client'].geocode(query, region='gr'))
+                    result = fresh[query]
+                record[f'{run}_lat'] = result['lat'] if result else None
+                record[f'{run}_lng'] = result['lng'] if result else None
+                record[f'{run}_accuracy'] = result['accuracy'] if result else 'FAILED'
+            records.append(record)
+            if ctx['heartbeat'].lost:
+                raise RuntimeError("to lease xathike (reclaim apo allon worker)")
+    finally:
+        # Kai se sfalma: ta apotelesmata pou irthan den xanazitiountai sto retry
+        if fresh:
+            merge_cache(cache_file, fresh, ctx['run_dir'])
+    return records, {'api_calls': len(fresh)}
+
+
+def merge_cache(cache_file, fresh, clock_dir=None):
+    """Τα νέα αποτελέσματα στο κοινό geocoding_cache.json (read-modify-write υπό lock)"""
+    from geocoding_client import load_cache
+
+    cache_file = Path(cache_file)
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    with FileLock(f"{cache_file}.lock", clock_dir=clock_dir):
+        cache = load_cache(cache_file)
+        cache.update(fresh)
+        write_atomic(cache_file, json.dumps(cache, ensure_ascii=False, indent=2))
+    return len(cache)
+
+
+def download_job(station_ids, ctx):
+    """Tiles των σταθμών του shard (τα υπάρχοντα έγκυρα tiles παραλείπονται - idempotent)"""
+    from fetch_policy import OK, QUOTA, BackoffPolicy, CircuitBreaker
+    from google_maps_static_downloader import (IMAGE_HEIGHT, IMAGE_WIDTH, MAP_TYPE, PNG_SIGNATURE, SHOW_MARKER,
+                                               STATIC_MAPS_URL, ZOOM_LEVEL, download_tile, get_api_key,
+                                               get_static_map_url, tile_filename)
+
+    params = ctx['params']
+    df = _load_stations(params, station_ids)
+    output = Path(params.get('output_folder', str(TILES_DIR)))
+    output.mkdir(parents=True, exist_ok=True)
+    api_key = params.get('api_key') or get_api_key()
+    policy, breaker = ctx.setdefault('policy', BackoffPolicy()), ctx.setdefault('breaker', CircuitBreaker())
+    records, calls = [], 0
+    for station_id, lat, lon in zip(df[ID_COLUMN], df['gasStationLat'], df['gasStationLong']):
+        path = output / tile_filename(station_id, ZOOM_LEVEL, IMAGE_WIDTH, IMAGE_HEIGHT)
+        if path.exists():
+            with open(path, 'rb') as f:
+                if f.read(len(PNG_SIGNATURE)) == PNG_SIGNATURE:
+                    records.append({ID_COLUMN: int(station_id), 'filename': path.name, 'status': 'exists',
+                                    'reason': ''})
+                    continue
+        ctx['throttle'].wait()
+        url = get_static_map_url(lat, lon, ZOOM_LEVEL, IMAGE_WIDTH, IMAGE_HEIGHT, api_key, MAP_TYPE, SHOW_MARKER,
+                                 params.get('base_url', STATIC_MAPS_URL))
+        result = download_tile(url, path, None, policy, breaker)
+        calls += 1
+        records.append({ID_COLUMN: int(station_id), 'filename': path.name,
+                        'status': 'success' if result.kind == OK else 'failed',
+                        'reason': '' if result.kind == OK else result.reason})
+        if result.kind == QUOTA:
+            # Quota/key: ola ta epomena tha apotyxoun - to shard xanadokimazetai argotera
+            raise RuntimeError(f"quota: {result.reason}")
+        if ctx['heartbeat'].lost:
+            raise RuntimeError("to lease xathike (reclaim apo allon worker)")
+    return records, {'api_calls': calls}
+
+
+JOBS = {
+    'geocode': geocode_job,
+    'download': download_job,
+}
+
+
+def resolve_job(name):
+    """'geocode' | 'download' | 'module:callable' (callable(station_ids, ctx) -> (records, stats))"""
+    if name in JOBS:
+        return JOBS[name]
+    module_name, _, attr = name.partition(':')
+    if not attr:
+        raise ValueError(f"Agnosto job '{name}' ({', '.join(JOBS)} i module:callable)")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+# ============= WORKER =============
+
+def work(run_dir=RUN_DIR, worker=None, qps=None, max_shards=None, lease_timeout=LEASE_TIMEOUT,
+         heartbeat_interval=HEARTBEAT_INTERVAL, retry_backoff=RETRY_BACKOFF):
+    """Παίρνει shards μέχρι να τελειώσουν· επιστρέφει (shards, σταθμοί) που έκανε αυτός ο worker"""
+    queue = ShardQueue(run_dir, lease_timeout=lease_timeout, retry_backoff=retry_backoff)
+    plan = queue.load_plan()
+    job = resolve_job(plan['job'])
+    worker = worker or worker_name()
+    throttle = Throttle(queue, qps or plan['params'].get('qps'))
+    ctx = {'params': plan['params'], 'throttle': throttle, 'worker': worker, 'run_dir': queue.run_dir}
+    shards = stations = 0
+    while max_shards is None or shards < max_shards:
+        shard = queue.claim(worker)
+        if shard is None:
+            # Menoun mono shards se backoff (px. quota): anamoni os to not_before tou protou
+            wait = queue.next_retry()
+            if wait is None:
+                break
+            print(f"[{worker}] anamoni {wait:.0f}s gia xanadokimi shard (backoff)")
+            time.sleep(wait + 0.1)
+            continue
+        throttle.refresh()
+        ids = queue.shard_ids(shard)
+        started = time.perf_counter()
+        with Heartbeat(queue, shard, worker, heartbeat_interval) as heartbeat:
+            ctx['heartbeat'] = heartbeat
+            try:
+                records, stats = job(ids, ctx)
+                if heartbeat.lost or queue.owner(shard) != worker:
+                    raise RuntimeError("to lease xathike (reclaim apo allon worker)")
+                queue.merge_results(shard, records)
+            except Exception as e:
+                if heartbeat.lost or queue.owner(shard) != worker:
+                    # To shard to exei pleon allos worker: oute merge / complete oute fail (attempts)
+                    print(f"[{worker}] shard {shard}: to lease xathike, to afinoume ston neo worker")
+                    continue
+                attempts = queue.fail(shard, worker, f"{type(e).__name__}: {e}")
+                print(f"[{worker}] shard {shard}: sfalma ({e}), prospatheia {attempts}/{queue.max_attempts}")
+                continue
+        seconds = time.perf_counter() - started
+        queue.complete(shard, worker, {'stations': len(ids), 'seconds': round(seconds, 3), **stats})
+        shards += 1
+        stations += len(ids)
+        print(f"[{worker}] shard {shard}: {len(ids)} stathmoi se {seconds:.1f}s")
+    return shards, stations
+
+
+def _work_process(run_dir, qps, lease_timeout, heartbeat_interval, retry_backoff):
+    work(run_dir, qps=qps, lease_timeout=lease_timeout, heartbeat_interval=heartbeat_interval,
+         retry_backoff=retry_backoff)
+
+
+def run_local(run_dir=RUN_DIR, processes=2, qps=None, lease_timeout=LEASE_TIMEOUT,
+              heartbeat_interval=HEARTBEAT_INTERVAL, retry_backoff=RETRY_BACKOFF):
+    """N worker processes σε αυτό το μηχάνημα (τα ίδια leases με τους απομακρυσμένους)"""
+    import multiprocessing
+
+    procs = [multiprocessing.Process(target=_work_process, args=(str(run_dir), qps, lease_timeout,
+                                                                 heartbeat_interval, retry_backoff))
+             for _ in range(processes)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+    return [proc.exitcode for proc in procs]
+
+
+def format_status(queue):
+    status = queue.status()
+    plan = queue.load_plan()
+    counts = status['state'].value_counts()
+    lines = [f"Job: {plan['job']}, {plan['stations']} stathmoi se {len(status)} shards",
+             '  ' + ', '.join(f"{state}: {int(counts.get(state, 0))}"
+                              for state in ('done', 'running', 'stale', 'pending', 'retry', 'failed'))]
+    done = [json.loads(p.read_text(encoding='utf-8')) for p in (queue.run_dir / 'done').glob('*.json')]
+    if done:
+        by_worker = pd.DataFrame(done).groupby('worker').agg(shards=('stations', 'size'),
+                                                               stations=('stations', 'sum'),
+                                                               seconds=('seconds', 'sum'))
+        by_worker['stations_per_s'] = by_worker['stations'] / by_worker['seconds'].clip(lower=1e-9)
+        lines.append(by_worker.to_string(float_format=lambda v: f'{v:.1f}'))
+    running = status[status['state'].isin(['running', 'stale'])]
+    if len(running):
+        lines.append(running.to_string(index=False, float_format=lambda v: f'{v:.0f}'))
+    manifest = queue.run_dir / MANIFEST_FILENAME
+    if manifest.exists():
+        lines.append(f"Manifest: {manifest}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sharded geocoding/download me leases (polla processes/mixanimata)")
+    parser.add_argument('action', choices=['plan', 'work', 'status'])
+    parser.add_argument('--run-dir', default=str(RUN_DIR), help="koinos fakelos tou run (idios se ola ta mixanimata)")
+    # plan
+    parser.add_argument('--job', default='geocode', help="geocode | download | module:callable")
+    parser.add_argument('--stations', default=str(STATIONS_FILE))
+    parser.add_argument('--only-ids', default=None, help="work list (ena gasStationID ana grammi)")
+    parser.add_argument('--shard-size', type=int, default=SHARD_SIZE)
+    parser.add_argument('--cache-file', default=str(CACHE_FILE), help="(geocode) koino cache")
+    parser.add_argument('--client', default='google', help="(geocode) google | module:factory")
+    parser.add_argument('--output-folder', default=str(TILES_DIR), help="(download) fakelos tiles")
+    parser.add_argument('--base-url', default=None, help="(download) allo Static Maps endpoint (px. proxy)")
+    parser.add_argument('--force', action='store_true', help="neo plan pano se yparxon run")
+    # work
+    parser.add_argument('--processes', type=int, default=1, help="workers se afto to mixanima")
+    parser.add_argument('--qps', type=float, default=None, help="synoliko quota (requests/s) gia olous tous workers")
+    parser.add_argument('--lease-timeout', type=float, default=LEASE_TIMEOUT)
+    parser.add_argument('--heartbeat', type=float, default=HEARTBEAT_INTERVAL)
+    parser.add_argument('--retry-backoff', type=float, default=RETRY_BACKOFF,
+                        help="seconds prin xanadokimastei shard pou apetyxe (x2 ana prospatheia)")
+    args = parser.parse_args(argv)
+
+    if args.action == 'plan':
+        stations = pd.read_excel(args.stations, usecols=[ID_COLUMN])[ID_COLUMN].dropna().astype(int)
+        if args.only_ids:
+            from station_diff import load_id_list
+            stations = stations[stations.isin(load_id_list(args.only_ids))]
+        params = {'stations': str(Path(args.stations).resolve()), 'qps': args.qps}
+        if args.job == 'geocode':
+            params.update(cache_file=str(Path(args.cache_file).resolve()), client=args.client)
+        elif args.job == 'download':
+            params.update(output_folder=str(Path(args.output_folder).resolve()))
+            if args.base_url:
+                params['base_url'] = args.base_url
+        resolve_job(args.job)
+        queue = ShardQueue.plan(args.run_dir, stations.tolist(), args.job, params, args.shard_size, args.force)
+        print(format_status(queue))
+    elif args.action == 'work':
+        started = time.perf_counter()
+        if args.processes > 1:
+            exitcodes = run_local(args.run_dir, args.processes, args.qps, args.lease_timeout, args.heartbeat,
+                                  args.retry_backoff)
+            print(f"Workers: {len(exitcodes)}, exit codes: {exitcodes}")
+        else:
+            shards, stations = work(args.run_dir, qps=args.qps, lease_timeout=args.lease_timeout,
+                                    heartbeat_interval=args.heartbeat, retry_backoff=args.retry_backoff)
+            print(f"{shards} shards, {stations} stathmoi")
+        print(f"Xronos: {time.perf_counter() - started:.1f}s")
+        print(format_status(ShardQueue(args.run_dir, lease_timeout=args.lease_timeout)))
+    else:
+        print(format_status(ShardQueue(args.run_dir, lease_timeout=args.lease_timeout)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+# static_map_cache
+# Topiko cache gia ta Static Maps requests. To kleidi einai oi normalizemenes
+# parametroi tou get_static_map_url (center, zoom, size, scale, maptype,
+# markers) XORIS to API key, ara to idio tile me allo key i allo base_url einai
+# hit. Oi eikones (PNG i JPEG me format=jpg) grafontai ena arxeio ana kleidi,
+# me ena JSON index (LRU seira, ETag/Last-Modified, Content-Type). Otan to synolo ton bytes xeperasei to max_bytes,
+# fevgoun ta ligotero prosfata xrisimopoiimena. Entries palaiotera apo max_age
+# ksanaelegxontai me conditional request (If-None-Match / If-Modified-Since):
+# 304 -> menei to idio arxeio xoris na xanakatevei.
+#
+#   cache = StaticMapCache(STATIC_MAP_CACHE_DIR, max_bytes=2 * 1024**3)
+#   response = cache.get(url)          # opos to requests.get (status_code, content, headers)
+#   print(cache.stats())
+#
+# I san diafanis proxy gia notebooks / ad-hoc elegxous (base_url=... sto get_static_map_url):
+#   python scripts/cli.py map-cache --serve 8765
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+from paths import DATA_DIR
+from pipeline_metrics import METRICS
+
+# Parametroi
+STATIC_MAP_CACHE_DIR = DATA_DIR / '.static_map_cache'
+INDEX_FILENAME = 'index.json'
+MAX_BYTES = 2 * 1024 ** 3          # 2 GB
+MAX_AGE = 30 * 24 * 3600           # meta apo 30 meres -> conditional revalidation
+FLUSH_EVERY = 50                   # nees eggrafes metaxy apothikeuseon tou index
+COORD_DECIMALS = 6                 # ~0.1 m - idio kentro me diaforetiki grafi = idio kleidi
+EXCLUDED_PARAMS = {'key', 'signature'}
+DEFAULT_CONTENT_TYPE = 'image/png'   # entries xoris content_type (palaia index) itan PNG
+CONTENT_TYPE_EXTENSIONS = {'image/png': 'png', 'image/jpeg': 'jpg', 'image/webp': 'webp'}
+
+
+def _normalize_location(value):
+    # "38.1234567,21.5" -> "38.123457,21.500000" (diefthinseis menoun opos einai)
+    try:
+        lat, lng = (float(v) for v in value.split(','))
+    except ValueError:
+        return value.strip()
+    return f"{lat:.{COORD_DECIMALS}f},{lng:.{COORD_DECIMALS}f}"
+
+
+def _normalize_markers(value):
+    parts = value.split('|')
+    return '|'.join(p if ':' in p else _normalize_location(p) for p in parts)
+
+
+def normalize_params(url):
+    """Οι παράμετροι του Static Maps URL χωρίς key/signature, κανονικοποιημένες και ταξινομημένες"""
+    params = []
+    for name, value in parse_qsl(urlsplit(url).query, keep_blank_values=True):
+        name = name.lower()
+        if name in EXCLUDED_PARAMS:
+            continue
+        if name == 'center':
+            value = _normalize_location(value)
+        elif name == 'markers':
+            value = _normalize_markers(value)
+        elif name in ('maptype', 'format'):
+            value = value.lower()
+        params.append((name, value))
+    return sorted(_with_defaults(params))
+
+
+def _with_defaults(params):
+    # scale=1 kai maptype=roadmap einai oi default times tou API - idio tile me i xoris
+    names = {name for name, _ in params}
+    if 'scale' not in names:
+        params.append(('scale', '1'))
+    if 'maptype' not in names:
+        params.append(('maptype', 'roadmap'))
+    return params
+
+
+def cache_key(url):
+    canonical = '&'.join(f'{name}={value}' for name, value in normalize_params(url))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class CachedResponse:
+    """Ελάχιστο response (status_code, content, headers) όπως το requests.Response"""
+
+    def __init__(self, status_code, content, headers, from_cache):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+        self.from_cache = from_cache
+
+
+class StaticMapCache:
+    """On-disk LRU cache ανά κανονικοποιημένο Static Maps URL, με όριο σε bytes"""
+
+    def __init__(self, cache_dir=STATIC_MAP_CACHE_DIR, max_bytes=MAX_BYTES, max_age=MAX_AGE,
+                 flush_every=FLUSH_EVERY):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.flush_every = flush_every
+        self.index_path = self.cache_dir / INDEX_FILENAME
+        self.entries = OrderedDict()        # key -> record, apo ton palaiotero pros ton pio prosfato
+        self.total_bytes = 0
+        self.counts = {'hits': 0, 'misses': 0, 'revalidated': 0, 'not_modified': 0, 'stored': 0,
+                       'evicted': 0, 'evicted_bytes': 0}
+        self._dirty = 0
+        self._lock = threading.RLock()
+        self._load()
+
+    def _path(self, key, record=None):
+        record = record if record is not None else self.entries.get(key, {})
+        content_type = record.get('content_type') or DEFAULT_CONTENT_TYPE
+        return self.cache_dir / key[:2] / f"{key}.{CONTENT_TYPE_EXTENSIONS.get(content_type, 'bin')}"
+
+    def _load(self):
+        if not self.index_path.exists():
+            return
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        # I LRU seira xtizetai apo to last_access - ta arxeia pou leipoun agnoountai
+        for key, record in sorted(records.items(), key=lambda item: item[1]['last_access']):
+            if self._path(key, record).exists():
+                self.entries[key] = record
+                self.total_bytes += record['bytes']
+
+    def flush(self):
+        with self._lock:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_name(INDEX_FILENAME + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.index_path)
+            self._dirty = 0
+
+    close = flush
+
+    # ============= LOOKUP / STORE =============
+
+    def lookup(self, url):
+        """(key, record, content) ή (key, None, None) - το hit μετακινείται στο τέλος της LRU"""
+        key = cache_key(url)
+        with self._lock:
+            record = self.entries.get(key)
+            if record is None:
+                return key, None, None
+            try:
+                content = self._path(key, record).read_bytes()
+            except OSError:
+                self._drop(key)
+                return key, None, None
+            record['last_access'] = time.time()
+            self.entries.move_to_end(key)
+            return key, record, content
+
+    def is_fresh(self, url):
+        """Υπάρχει στο cache και είναι νεότερο από max_age (δηλαδή get() χωρίς δίκτυο)"""
+        with self._lock:
+            record = self.entries.get(cache_key(url))
+            return record is not None and time.time() - record['fetched'] < self.max_age
+
+    def store(self, url, content, headers=None):
+        key = cache_key(url)
+        headers = headers or {}
+        content_type = (headers.get('Content-Type') or DEFAULT_CONTENT_TYPE).split(';')[0].strip().lower()
+        now = time.time()
+        record = {
+            'bytes': len(content),
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'content_type': content_type,
+            'fetched': now,
+            'last_access': now,
+        }
+        path = self._path(key, record)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        with self._lock:
+            if key in self.entries:
+                old = self.entries.pop(key)
+                self.total_bytes -= old['bytes']
+                old_path = self._path(key, old)
+                if old_path != path:
+                    # Allo format apo prin (px. png -> jpg): to palio arxeio den xreiazetai
+                    try:
+                        old_path.unlink()
+                    except FileNotFoundError:
+                        pass
+            self.entries[key] = record
+            self.total_bytes += len(content)
+            self.counts['stored'] += 1
+            self._evict()
+            self._mark_dirty()
+        return key
+
+    def discard(self, url):
+        """Αφαίρεση ενός URL (π.χ. όταν ο downloader απορρίψει το περιεχόμενο)"""
+        with self._lock:
+            if self._drop(cache_key(url)):
+                self._mark_dirty()
+
+    def _drop(self, key):
+        record = self.entries.pop(key, None)
+        if record is None:
+            return False
+        self.total_bytes -= record['bytes']
+        try:
+            self._path(key, record).unlink()
+        except FileNotFoundError:
+            pass
+        return True
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self.entries:
+            key, record = next(iter(self.entries.items()))
+            self._drop(key)
+            self.counts['evicted'] += 1
+            self.counts['evicted_bytes'] += record['bytes']
+            METRICS.counter('static_map_cache_evictions_total').inc()
+
+    def _mark_dirty(self):
+        self._dirty += 1
+        if self._dirty >= self.flush_every:
+            self.flush()
+
+    def _count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+        METRICS.counter('static_map_cache_total', result=name).inc()
+
+    # ============= HTTP =============
+
+    def get(self, url, timeout=30, session=None):
+        """Σαν το requests.get: από το cache αν υπάρχει (με revalidation μετά το max_age), αλλιώς δίκτυο"""
+        key, record, content = self.lookup(url)
+        if record is not None and time.time() - record['fetched'] < self.max_age:
+            self._count('hits')
+            return CachedResponse(200, content, {'Content-Type': record.get('content_type') or DEFAULT_CONTENT_TYPE,
+                                                 'X-Cache': 'HIT'}, True)
+
+        import requests
+        http = session or requests
+        headers = {}
+        if record is not None:
+            if record.get('etag'):
+                headers['If-None-Match'] = record['etag']
+            if record.get('last_modified'):
+                headers['If-Modified-Since'] = record['last_modified']
+            self._count('revalidated')
+        else:
+            self._count('misses')
+
+        response = http.get(url, timeout=timeout, headers=headers)
+        if record is not None and response.status_code == 304:
+            self._count('not_modified')
+            with self._lock:
+                if key in self.entries:
+                    self.entries[key]['fetched'] = time.time()
+                    self._mark_dirty()
+            return CachedResponse(200, content, {'Content-Type': record.get('content_type') or DEFAULT_CONTENT_TYPE,
+                                                 'X-Cache': 'REVALIDATED'}, True)
+        if response.status_code == 200:
+            self.store(url, response.content, response.headers)
+        return response
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self.counts)
+            lookups = counts['hits'] + counts['misses'] + counts['revalidated']
+            return {
+                **counts,
+                'entries': len(self.entries),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'hit_ratio': (counts['hits'] + counts['not_modified']) / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            for key in list(self.entries):
+                self._drop(key)
+            self.flush()
+
+
+def format_cache_stats(stats):
+    return (f"Static Maps cache: {stats['entries']} tiles, {stats['bytes'] / 1e6:.1f}/"
+            f"{stats['max_bytes'] / 1e6:.0f} MB | hits {stats['hits']}, misses {stats['misses']}, "
+            f"revalidated {stats['revalidated']} (304: {stats['not_modified']}), evicted {stats['evicted']} "
+            f"| hit ratio {stats['hit_ratio'] * 100:.1f}%")
+
+
+# ============= PROXY =============
+
+def serve(cache, port, upstream, host='127.0.0.1'):
+    """Τοπικός proxy: GET /maps/api/staticmap?... -> cache ή upstream (ίδιο query string)"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = urlsplit(self.path).query
+            try:
+                response = cache.get(f"{upstream}?{query}")
+            except Exception as e:
+                self.send_error(502, str(e))
+                return
+            self.send_response(response.status_code)
+            self.send_header('Content-Type', response.headers.get('Content-Type', 'application/octet-stream'))
+            self.send_header('Content-Length', str(len(response.content)))
+            self.send_header('X-Cache', 'HIT' if getattr(response, 'from_cache', False) else 'MISS')
+            self.end_headers()
+            self.wfile.write(response.content)
+
+        def log_message(self, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def main(argv=None):
+    from google_maps_static_downloader import STATIC_MAPS_URL
+
+    parser = argparse.ArgumentParser(description="Topiko cache (LRU se bytes) gia ta Static Maps tiles")
+    parser.add_argument('--cache-dir', default=str(STATIC_MAP_CACHE_DIR))
+    parser.add_argument('--max-mb', type=float, default=MAX_BYTES / 1024 ** 2)
+    parser.add_argument('--clear', action='store_true', help="diagrafi olon ton entries")
+    parser.add_argument('--serve', type=int, default=None, metavar='PORT',
+                        help="proxy sto 127.0.0.1:PORT (base_url=http://127.0.0.1:PORT/maps/api/staticmap)")
+    parser.add_argument('--upstream', default=STATIC_MAPS_URL)
+    args = parser.parse_args(argv)
+
+    cache = StaticMapCache(args.cache_dir, max_bytes=int(args.max_mb * 1024 ** 2))
+    if args.clear:
+        cache.clear()
+        print(f"Adeiase to cache: {args.cache_dir}")
+    if args.serve is not None:
+        server = serve(cache, args.serve, args.upstream)
+        print(f"Proxy: http://127.0.0.1:{args.serve}/maps/api/staticmap -> {args.upstream} (Ctrl+C gia telos)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            cache.flush()
+    print(format_cache_stats(cache.stats()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
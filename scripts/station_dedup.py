@@ -0,0 +1,124 @@
+# station_dedup
+# I afairesi diplotypon pratirion (DBSCAN me apostasi se metra) apo to
+# fuel_station_duplication.ipynb, os importable synartisi.
+
+import argparse
+
+import numpy as np
+
+from paths import CLEANED_FILE, STATIONS_FILE
+
+# Parametroi
+DISTANCE_THRESHOLD = 20   # metra
+ID_COLUMN = 'gasStationID'
+
+
+def remove_nearby_duplicates(df, distance_threshold=10, id_column='gasStationID'):
+    # scipy/sklearn mono otan trexei pragmatika to dedup
+    from scipy.spatial.distance import cdist
+    from sklearn.cluster import DBSCAN
+
+    print("\n \n \n")
+    print(f"REMOVING DUPLICATE FUEL STATIONS")
+    print("\n \n \n")
+    print(f"Initial stations: {len(df)}")
+    print(f"Distance threshold: {distance_threshold}m")
+
+    df_work = df.copy()
+
+    # Metatropi lat/lon se metra (Euclidean approximation)
+    mean_lat = df_work['gasStationLat'].mean()
+    lat_m = df_work['gasStationLat'].values * 111320  # 1 degree lat = 111.32 km
+    lon_m = df_work['gasStationLong'].values * 111320 * np.cos(np.radians(mean_lat))
+    
+    coords = np.column_stack([lat_m, lon_m])
+
+    # Ypologismos apostaseon (Euclidean)
+    print("\nCalculating distances...")
+    distance_matrix = cdist(coords, coords, metric='euclidean')
+
+    # DBSCAN clustering
+    print("Finding clusters...")
+    clustering = DBSCAN(eps=distance_threshold, min_samples=1, metric='precomputed')
+    df_work['cluster'] = clustering.fit_predict(distance_matrix)
+
+    # Statistika
+    n_clusters = df_work['cluster'].nunique()
+    clusters_with_duplicates = df_work['cluster'].value_counts()
+    clusters_with_duplicates = clusters_with_duplicates[clusters_with_duplicates > 1]
+
+    print(f"\nTotal clusters: {n_clusters}")
+    print(f"Clusters with duplicates: {len(clusters_with_duplicates)}")
+
+    # Epilogi pratiriwn
+    keep_indices = []
+    remove_indices = []
+
+    for cluster_id in df_work['cluster'].unique():
+        cluster_members = df_work[df_work['cluster'] == cluster_id]
+
+        if len(cluster_members) == 1:
+            keep_indices.append(cluster_members.index[0])
+        else:
+            max_id_idx = cluster_members[id_column].idxmax()
+            keep_indices.append(max_id_idx)
+
+            for idx in cluster_members.index:
+                if idx != max_id_idx:
+                    remove_indices.append(idx)
+
+    # Dimiourgia cleaned kai removed DataFrames
+    cleaned_df = df.loc[keep_indices].copy().reset_index(drop=True)
+    removed_df = df.loc[remove_indices].copy().reset_index(drop=True)
+
+    # Prosthiki replaced_by_id sto removed_df
+    if len(removed_df) > 0:
+        removed_df['replaced_by_id'] = None
+        for idx in remove_indices:
+            cluster_id = df_work.loc[idx, 'cluster']
+            cluster_members = df_work[df_work['cluster'] == cluster_id]
+            kept_id = cluster_members[id_column].max()
+            removed_df.loc[removed_df.index[remove_indices.index(idx)], 'replaced_by_id'] = kept_id
+
+    # Prosthiki cluster info sta cleaned data
+    cleaned_df['cluster'] = df_work.loc[keep_indices, 'cluster'].values
+
+    # Statistics
+    stats = {
+        'original_count': len(df),
+        'kept_count': len(cleaned_df),
+        'removed_count': len(removed_df),
+        'clusters_total': n_clusters,
+        'clusters_with_duplicates': len(clusters_with_duplicates),
+        'distance_threshold': distance_threshold,
+        'retention_rate': len(cleaned_df) / len(df) * 100
+    }
+
+    print("\n")
+    print(f"RESULTS")
+    print("\n")
+    print(f"Initial stations:  {stats['original_count']}")
+    print(f"Kept stations:     {stats['kept_count']}")
+    print(f"Removed stations:  {stats['removed_count']}")
+    print("\n")
+
+    return cleaned_df, removed_df, stats, df_work
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Afairesi diplotypon pratirion (DBSCAN)")
+    parser.add_argument('--input', default=str(STATIONS_FILE))
+    parser.add_argument('--output', default=str(CLEANED_FILE))
+    parser.add_argument('--threshold', type=float, default=DISTANCE_THRESHOLD, help="metra")
+    args = parser.parse_args(argv)
+
+    import pandas as pd
+
+    df = pd.read_excel(args.input)
+    cleaned_df, removed_df, stats, _ = remove_nearby_duplicates(df, args.threshold, ID_COLUMN)
+    cleaned_df.to_excel(args.output, index=False)
+    print(f"Apothikeytike: {args.output} (retention {stats['retention_rate']:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
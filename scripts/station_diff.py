@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+# station_diff
+# Sygkrisi dyo exagogon tou katalogou pratirion ana gasStationID (ena outer
+# merge, xoris loops): kathe stathmos einai added, removed, moved (metakinisi
+# pano apo to katofli) i address_changed (allagi meta to normalization tis
+# diefthinsis). Apo ti diafora vgainoun work lists (ena ID ana grammi) pou
+# dexontai o downloader kai ta geocoding experiments me --only-ids, oste mia
+# evdomadiaia ananeosi na agizei mono tous stathmous pou allaxan.
+#
+#   python scripts/cli.py diff --old data/stations_2024-05.xlsx --new "data/ALL χιλιομετικές διευθύνσεις.xlsx"
+#   python scripts/cli.py download --only-ids data/station_diff/download_ids.txt
+#   python scripts/cli.py experiments --only-ids data/station_diff/geocode_ids.txt
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from paths import DATA_DIR, STATIONS_FILE
+
+# Parametroi
+MOVE_THRESHOLD_M = 10.0       # idio katofli me to dedup (< 10m = idio simeio)
+ID_COLUMN = 'gasStationID'
+LAT_COLUMN = 'gasStationLat'
+LNG_COLUMN = 'gasStationLong'
+ADDRESS_COLUMN = 'gasStationAddress'
+DIFF_DIR = DATA_DIR / 'station_diff'
+CHANGES = ('added', 'removed', 'moved', 'address_changed', 'unchanged')
+
+# work list -> allages pou tin trofodotoun
+WORK_LISTS = {
+    'download': ('added', 'moved'),                          # nea tiles
+    'geocode': ('added', 'address_changed', 'moved'),        # nea geocoding / apostasi apo to ground truth
+    'removed': ('removed',),
+}
+
+
+def diff_snapshots(old, new, move_threshold=MOVE_THRESHOLD_M, id_column=ID_COLUMN, lat_column=LAT_COLUMN,
+                   lng_column=LNG_COLUMN, address_column=ADDRESS_COLUMN):
+    """Μία γραμμή ανά gasStationID με change, moved_m και τις παλιές/νέες τιμές"""
+    from address_cleaning import haversine_array
+    from address_lsh import normalize_address
+
+    columns = [id_column, lat_column, lng_column, address_column]
+    for name, frame in (('old', old), ('new', new)):
+        missing = [c for c in columns if c not in frame.columns]
+        if missing:
+            raise ValueError(f"Leipoun stiles apo to {name} snapshot: {missing}")
+        if frame[id_column].duplicated().any():
+            raise ValueError(f"Diplotypa {id_column} sto {name} snapshot")
+
+    merged = old[columns].merge(new[columns], on=id_column, how='outer', suffixes=('_old', '_new'),
+                                indicator=True)
+    both = (merged['_merge'] == 'both').to_numpy()
+
+    # NaN gia added/removed (leipei i mia plevra)
+    moved_m = haversine_array(merged[f'{lat_column}_old'], merged[f'{lng_column}_old'],
+                              merged[f'{lat_column}_new'], merged[f'{lng_column}_new'])
+    moved = both & (moved_m > move_threshold)
+
+    # Allagi diefthinsis = allagi meta to normalization (oxi tonoi/kena/lookalikes)
+    old_addr = merged[f'{address_column}_old'].fillna('').astype(str)
+    new_addr = merged[f'{address_column}_new'].fillna('').astype(str)
+    changed_raw = (old_addr != new_addr).to_numpy() & both
+    address_changed = np.zeros(len(merged), dtype=bool)
+    if changed_raw.any():
+        address_changed[changed_raw] = (old_addr[changed_raw].map(normalize_address).to_numpy()
+                                        != new_addr[changed_raw].map(normalize_address).to_numpy())
+
+    change = np.select(
+        [merged['_merge'].eq('right_only').to_numpy(), merged['_merge'].eq('left_only').to_numpy(),
+         moved, address_changed],
+        ['added', 'removed', 'moved', 'address_changed'], default='unchanged')
+
+    diff = merged.drop(columns='_merge')
+    diff.insert(1, 'change', change)
+    diff.insert(2, 'moved', moved)
+    diff.insert(3, 'address_changed', address_changed)
+    diff.insert(4, 'moved_m', moved_m)
+    return diff.sort_values(id_column, kind='stable').reset_index(drop=True)
+
+
+def work_lists(diff, id_column=ID_COLUMN):
+    """work list -> ταξινομημένα IDs (moved + address_changed μαζί μετράει και στα δύο)"""
+    lists = {}
+    for name, changes in WORK_LISTS.items():
+        mask = diff['change'].isin(changes)
+        if 'moved' in changes:
+            mask |= diff['moved']
+        if 'address_changed' in changes:
+            mask |= diff['address_changed']
+        lists[name] = diff.loc[mask, id_column].astype(int).sort_values().tolist()
+    return lists
+
+
+def write_work_lists(lists, out_dir=DIFF_DIR):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = {}
+    for name, ids in lists.items():
+        paths[name] = out_dir / f'{name}_ids.txt'
+        paths[name].write_text(''.join(f'{i}\n' for i in ids), encoding='utf-8')
+    return paths
+
+
+def load_id_list(path):
+    """Αρχείο με ένα gasStationID ανά γραμμή (κενές γραμμές και # σχόλια αγνοούνται) -> set"""
+    ids = set()
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                ids.add(int(line))
+    return ids
+
+
+def update_rows(previous, updated, order, key=ID_COLUMN):
+    """Τα previous με τις γραμμές του updated (ίδιο key) αντικατεστημένες, στη σειρά του order
+
+    Για τα incremental runs: μόνο οι σταθμοί της work list ξαναϋπολογίζονται,
+    οι υπόλοιποι κρατάνε τις τιμές του προηγούμενου αποτελέσματος.
+    """
+    columns = [c for c in updated.columns if c != key]
+    kept = previous.drop_duplicates(key, keep='last').set_index(key).reindex(columns=columns)
+    fresh = updated.set_index(key)[columns]
+    combined = pd.concat([kept.drop(index=fresh.index, errors='ignore'), fresh])
+    return combined.reindex(pd.Index(order, name=key)).reset_index()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diafora dyo snapshots tou katalogou pratirion -> work lists")
+    parser.add_argument('--old', required=True, help="proigoumeno xlsx pratirion")
+    parser.add_argument('--new', default=str(STATIONS_FILE))
+    parser.add_argument('--threshold', type=float, default=MOVE_THRESHOLD_M, help="metakinisi (m) pou metraei")
+    parser.add_argument('--out-dir', default=str(DIFF_DIR))
+    args = parser.parse_args(argv)
+
+    old, new = pd.read_excel(args.old), pd.read_excel(args.new)
+    diff = diff_snapshots(old, new, move_threshold=args.threshold)
+    counts = diff['change'].value_counts().reindex(CHANGES, fill_value=0)
+    print(f"Palio: {len(old)} pratiria, neo: {len(new)} pratiria")
+    for change, count in counts.items():
+        print(f"  {change:<16} {count}")
+    both = int((diff['moved'] & diff['address_changed']).sum())
+    if both:
+        print(f"  (moved kai address_changed: {both})")
+
+    lists = work_lists(diff)
+    paths = write_work_lists(lists, args.out_dir)
+    out_dir = Path(args.out_dir)
+    diff[diff['change'] != 'unchanged'].to_csv(out_dir / 'station_diff.csv', index=False)
+    for name, path in paths.items():
+        print(f"{name:<9} {len(lists[name]):>6} IDs -> {path}")
+    print(f"Leptomeries: {out_dir / 'station_diff.csv'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+# station_index
+# Xoriko evretirio pratirion sti mnimi: KD-tree (scipy cKDTree) pano se
+# 3D kartesianes syntetagmenes (ECEF, sfaira R=6371 km), opote i eukleidia
+# apostasi (chord) einai monotoni me tin haversine kai den yparxei paramorfosi
+# sto platos. Gia bbox ena taxinomimeno kata lat array (searchsorted + maska lon).
+#   - nearest(lat, lon, k)       k plisiestera
+#   - radius(lat, lon, meters)   ola mesa se aktina
+#   - bbox(south, west, north, east)
+# Fortonei apo ton katalogo mia fora kai apanta se microseconds. Me to --serve
+# anoigei ena mikro JSON HTTP API gia to Leaflet map (data/maps, ?api=...).
+#
+#   index = StationIndex.from_frame(pd.read_excel(STATIONS_FILE))
+#   index.nearest(38.25, 21.73, k=5)
+#   python scripts/cli.py index --serve 8766
+#   -> data/maps/fuel_stations_map.html?api=http://127.0.0.1:8766
+
+import argparse
+import json
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from paths import STATIONS_FILE
+
+# Parametroi
+EARTH_RADIUS_M = 6371000
+ID_COLUMN = 'gasStationID'
+LAT_COLUMN = 'gasStationLat'
+LNG_COLUMN = 'gasStationLong'
+# Stiles pou epistrefontai se kathe apotelesma (opos sto markers.js)
+RECORD_COLUMNS = {'gasStationID': 'id', 'locationType': 'loc_type', 'gasStationAddress': 'address',
+                  'municipalityName': 'municipality', 'countyName': 'county'}
+MAX_RESULTS = 5000            # orio apotelesmaton ana HTTP request (viewport oli i Ellada)
+LEAFSIZE = 16
+
+
+def to_xyz(lat, lon):
+    """Γεωγραφικές -> (N, 3) καρτεσιανές σε μέτρα (σφαίρα)"""
+    lat, lon = np.radians(np.asarray(lat, dtype=float)), np.radians(np.asarray(lon, dtype=float))
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)]) * EARTH_RADIUS_M
+
+
+def chord_to_arc(chord):
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.clip(chord / (2 * EARTH_RADIUS_M), 0, 1))
+
+
+def arc_to_chord(meters):
+    return 2 * EARTH_RADIUS_M * np.sin(np.minimum(meters, np.pi * EARTH_RADIUS_M) / (2 * EARTH_RADIUS_M))
+
+
+class StationIndex:
+    """KD-tree (k-NN, radius) + ταξινομημένο lat (bbox) πάνω στους σταθμούς του καταλόγου"""
+
+    def __init__(self, lat, lon, records=None):
+        from scipy.spatial import cKDTree
+
+        self.lat = np.asarray(lat, dtype=float)
+        self.lon = np.asarray(lon, dtype=float)
+        self.records = records                    # DataFrame (idia seira) i None
+        self.tree = cKDTree(to_xyz(self.lat, self.lon), leafsize=LEAFSIZE)
+        self._by_lat = np.argsort(self.lat, kind='stable')
+        self._sorted_lat = self.lat[self._by_lat]
+        # Oi stiles ton apotelesmaton etoimes (JSON-friendly) mia fora, oxi ana query
+        self._fields = {}
+        if records is not None:
+            for column, name in RECORD_COLUMNS.items():
+                if column in records.columns:
+                    self._fields[name] = np.array(
+                        [None if pd.isna(v) else (int(v) if column == ID_COLUMN else str(v))
+                         for v in records[column].to_numpy(dtype=object)], dtype=object)
+
+    @classmethod
+    def from_frame(cls, df, lat_column=LAT_COLUMN, lon_column=LNG_COLUMN):
+        """Από τον κατάλογο (γραμμές χωρίς συντεταγμένες αγνοούνται)"""
+        lat = pd.to_numeric(df[lat_column], errors='coerce')
+        lon = pd.to_numeric(df[lon_column], errors='coerce')
+        valid = (lat.notna() & lon.notna()).to_numpy()
+        records = df.loc[valid].reset_index(drop=True)
+        return cls(lat[valid].to_numpy(), lon[valid].to_numpy(), records)
+
+    def __len__(self):
+        return len(self.lat)
+
+    # ============= QUERIES (theseis sto index) =============
+
+    def nearest(self, lat, lon, k=1):
+        """(θέσεις, αποστάσεις σε m) των k πλησιέστερων, από το κοντινότερο"""
+        k = min(int(k), len(self))
+        chord, pos = self.tree.query(to_xyz(lat, lon)[0], k=k)
+        return np.atleast_1d(pos), chord_to_arc(np.atleast_1d(chord))
+
+    def nearest_many(self, lat, lon, k=1):
+        """Batch: (N, k) θέσεις και αποστάσεις για N σημεία μαζί"""
+        k = min(int(k), len(self))
+        chord, pos = self.tree.query(to_xyz(lat, lon), k=k)
+        return pos.reshape(len(chord), -1), chord_to_arc(chord).reshape(len(chord), -1)
+
+    def radius(self, lat, lon, meters, sort=True):
+        """(θέσεις, αποστάσεις) όλων σε απόσταση <= meters"""
+        point = to_xyz(lat, lon)[0]
+        pos = np.asarray(self.tree.query_ball_point(point, arc_to_chord(meters)), dtype=np.int64)
+        dist = chord_to_arc(np.linalg.norm(self.tree.data[pos] - point, axis=1)) if len(pos) else np.empty(0)
+        if sort and len(pos):
+            order = np.argsort(dist, kind='stable')
+            pos, dist = pos[order], dist[order]
+        return pos, dist
+
+    def bbox(self, south, west, north, east):
+        """Θέσεις μέσα στο ορθογώνιο (west > east = πέρασμα του αντιμεσημβρινού)"""
+        lo = np.searchsorted(self._sorted_lat, south, side='left')
+        hi = np.searchsorted(self._sorted_lat, north, side='right')
+        pos = self._by_lat[lo:hi]
+        lon = self.lon[pos]
+        inside = (lon >= west) & (lon <= east) if west <= east else (lon >= west) | (lon <= east)
+        return np.sort(pos[inside])
+
+    # ============= RECORDS =============
+
+    def to_records(self, pos, distances=None):
+        """Θέσεις -> λίστα dicts (id, lat, lon, loc_type, address, ... [, distance_m])"""
+        pos = np.asarray(pos, dtype=np.int64)
+        out = {'lat': self.lat[pos], 'lon': self.lon[pos]}
+        for name, values in self._fields.items():
+            out[name] = values[pos]
+        if distances is not None:
+            out['distance_m'] = np.round(np.asarray(distances, dtype=float), 1)
+        names = list(out)
+        return [dict(zip(names, row)) for row in zip(*(out[name].tolist() for name in names))]
+
+
+# ============= HTTP =============
+
+def _param(query, name, cast=float, default=None):
+    values = query.get(name)
+    if not values:
+        if default is None:
+            raise ValueError(f"leipei i parametros '{name}'")
+        return default
+    return cast(values[0])
+
+
+def handle_query(index, path, max_results=MAX_RESULTS):
+    """'/nearest?lat=..&lon=..&k=..' | '/radius?lat=..&lon=..&m=..' | '/bbox?south=..&west=..&north=..&east=..'"""
+    parts = urlsplit(path)
+    query = parse_qs(parts.query)
+    endpoint = parts.path.rstrip('/') or '/'
+    started = time.perf_counter()
+    distances = None
+    if endpoint == '/nearest':
+        pos, distances = index.nearest(_param(query, 'lat'), _param(query, 'lon'),
+                                       min(_param(query, 'k', int, 1), max_results))
+    elif endpoint == '/radius':
+        pos, distances = index.radius(_param(query, 'lat'), _param(query, 'lon'), _param(query, 'm'))
+    elif endpoint == '/bbox':
+        pos = index.bbox(_param(query, 'south'), _param(query, 'west'), _param(query, 'north'), _param(query, 'east'))
+    else:
+        raise KeyError(endpoint)
+    total = len(pos)
+    pos = pos[:max_results]
+    distances = distances[:max_results] if distances is not None else None
+    return {
+        'count': total,
+        'truncated': total > len(pos),
+        'query_us': round((time.perf_counter() - started) * 1e6, 1),
+        'stations': index.to_records(pos, distances),
+    }
+
+
+def serve(index, port, host='127.0.0.1', max_results=MAX_RESULTS):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            try:
+                status, body = 200, handle_query(index, self.path, max_results)
+            except KeyError as e:
+                status, body = 404, {'error': f"agnosto endpoint {e} (nearest, radius, bbox)"}
+            except ValueError as e:
+                status, body = 400, {'error': str(e)}
+            payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            # To map anoigei apo file:// - xreiazetai CORS
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+# ============= BENCHMARK =============
+
+def benchmark(index, queries=20000, k=5, meters=2000, box_deg=0.2, seed=0):
+    """Queries/s ανά τύπο query (τυχαία σημεία γύρω από τους σταθμούς)"""
+    rng = np.random.default_rng(seed)
+    pick = rng.integers(len(index), size=queries)
+    lat = index.lat[pick] + rng.normal(scale=0.05, size=queries)
+    lon = index.lon[pick] + rng.normal(scale=0.05, size=queries)
+    rows = []
+    # kathe query -> plithos apotelesmaton
+    cases = {
+        f'nearest k={k}': lambda i: len(index.nearest(lat[i], lon[i], k)[0]),
+        f'radius {meters:g}m': lambda i: len(index.radius(lat[i], lon[i], meters)[0]),
+        f'bbox {box_deg:g}deg': lambda i: len(index.bbox(lat[i] - box_deg / 2, lon[i] - box_deg / 2,
+                                                       lat[i] + box_deg / 2, lon[i] + box_deg / 2)),
+    }
+    for name, query in cases.items():
+        found = 0
+        started = time.perf_counter()
+        for i in range(queries):
+            found += query(i)
+        seconds = time.perf_counter() - started
+        rows.append({'Query': name, 'QPS': queries / seconds, 'Mean_us': seconds / queries * 1e6,
+                     'Mean_results': found / queries})
+    started = time.perf_counter()
+    index.nearest_many(lat, lon, k)
+    seconds = time.perf_counter() - started
+    rows.append({'Query': f'nearest_many k={k} (batch)', 'QPS': queries / seconds,
+                 'Mean_us': seconds / queries * 1e6, 'Mean_results': k})
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Xoriko evretirio pratirion (k-NN, radius, bbox) kai local API")
+    parser.add_argument('--stations', default=str(STATIONS_FILE))
+    parser.add_argument('--serve', type=int, default=None, metavar='PORT',
+                        help="JSON API sto 127.0.0.1:PORT (/nearest, /radius, /bbox)")
+    parser.add_argument('--bench', action='store_true', help="queries/s ana typo query")
+    parser.add_argument('--queries', type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    index = StationIndex.from_frame(pd.read_excel(args.stations))
+    print(f"Index: {len(index)} pratiria se {time.perf_counter() - started:.2f}s (mazi me to xlsx)")
+
+    if args.bench:
+        report = benchmark(index, queries=args.queries)
+        print(report.to_string(index=False, float_format=lambda v: f'{v:,.1f}'))
+    if args.serve is not None:
+        server = serve(index, args.serve)
+        print(f"API: http://127.0.0.1:{args.serve}/bbox?south=..&west=..&north=..&east=.. (Ctrl+C gia telos)")
+        print(f"Map: data/maps/fuel_stations_map.html?api=http://127.0.0.1:{args.serve}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+# tile_archive
+# Paketarei ta PNG tiles (dataset/all i ena split) se ena memory-mapped archive
+# me raw uint8 HWC pinakes i zlib-compressed blocks, kai index ana station_id/zoom.
+
+import argparse
+import json
+import os
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from google_maps_static_downloader import OUTPUT_FOLDER, TILE_EXTENSIONS, list_tile_files, parse_tile_filename
+from validate_images import BAD_STATUSES, INDEX_FILENAME, load_index
+
+# Parametroi
+ARCHIVE_VERSION = 1
+ALIGNMENT = 4096       # kathe raw tile xekinaei se oria selidas
+DEFAULT_BLOCK_SIZE = 32
+DECODE_CHUNK = 64
+CODECS = ('raw', 'zlib')
+
+
+def index_path_for(archive_path):
+    return Path(f"{archive_path}.json")
+
+
+def tile_key(station_id, zoom):
+    return f"{int(station_id)}/{int(zoom)}"
+
+
+def split_station_ids(split_dir):
+    # Ta station IDs enos split (px. dataset/train) apo ta onomata ton labels
+    split_dir = Path(split_dir)
+    labels_dir = split_dir / 'labels' if (split_dir / 'labels').is_dir() else split_dir
+    ids = set()
+    for label in labels_dir.glob('*.txt'):
+        parsed = parse_tile_filename(f"{label.stem}.png")
+        if parsed:
+            ids.add(parsed[0])
+    return ids
+
+
+def collect_tiles(folder, station_ids=None, skip_invalid=True):
+    # Ola ta tiles (png / jpg me --format jpg / webp meta apo transcode). An to idio tile
+    # yparxei se dyo formats, kratame ena ana (station, zoom) me ti seira tou TILE_EXTENSIONS
+    folder = Path(folder)
+    bad = set()
+    if skip_invalid:
+        bad = {name for name, rec in load_index(folder / INDEX_FILENAME).items()
+               if rec['status'] in BAD_STATUSES}
+
+    chosen = {}
+    for path in list_tile_files(folder):
+        parsed = parse_tile_filename(path.name)
+        if parsed is None or path.name in bad:
+            continue
+        if station_ids is not None and parsed[0] not in station_ids:
+            continue
+        key = (parsed[0], parsed[1])
+        rank = TILE_EXTENSIONS.index(path.suffix[1:].lower())
+        if key not in chosen or rank < chosen[key][0]:
+            chosen[key] = (rank, path)
+    return [(station_id, zoom, path) for (station_id, zoom), (_, path) in sorted(chosen.items())]
+
+
+def decode_tile(path):
+    with Image.open(path) as img:
+        return np.ascontiguousarray(np.asarray(img.convert('RGB'), dtype=np.uint8))
+
+
+def try_decode_tile(path):
+    # (array, None) i (None, sfalma) - ena xalasmeno tile den stamataei olo to paketarisma
+    try:
+        return decode_tile(path), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def pack_tiles(folder=OUTPUT_FOLDER, archive_path=None, codec='raw', block_size=DEFAULT_BLOCK_SIZE,
+               station_ids=None, skip_invalid=True, workers=None, compress_level=6):
+    if codec not in CODECS:
+        raise ValueError(f"Agnosto codec: {codec} (epitrepta: {CODECS})")
+
+    folder = Path(folder)
+    archive_path = Path(archive_path) if archive_path else folder.parent / f"{folder.name}.tiles"
+    tiles = collect_tiles(folder, station_ids, skip_invalid)
+    print(f"Paketarisma {len(tiles)} tiles -> {archive_path} (codec={codec})")
+
+    entries = []
+    blocks = []
+    skipped = []  # (source, sfalma) ton tiles pou den egine decode
+    pending = []  # (entry, array) tou trexontos block
+    tmp_path = Path(f"{archive_path}.tmp")
+
+    def flush_block(f):
+        raw = b''.join(arr.tobytes() for _, arr in pending)
+        data = zlib.compress(raw, compress_level)
+        blocks.append({'offset': f.tell(), 'nbytes': len(data), 'raw_nbytes': len(raw)})
+        f.write(data)
+        pending.clear()
+
+    def decoded(pool):
+        # Decode ana chunks oste na min kratame oles tis eikones sti mnimi
+        for start in range(0, len(tiles), DECODE_CHUNK):
+            chunk = tiles[start:start + DECODE_CHUNK]
+            yield from zip(chunk, pool.map(try_decode_tile, [t[2] for t in chunk]))
+
+    try:
+        # To PIL apeleftheronei to GIL sto decode, ara ta threads arkoun
+        with ThreadPoolExecutor(max_workers=workers) as pool, open(tmp_path, 'wb') as f:
+            for (station_id, zoom, path), (arr, error) in decoded(pool):
+                if arr is None:
+                    skipped.append((path.name, error))
+                    continue
+                entry = {
+                    'key': tile_key(station_id, zoom),
+                    'station_id': station_id,
+                    'zoom': zoom,
+                    'shape': list(arr.shape),
+                    'nbytes': arr.nbytes,
+                    'source': path.name,
+                }
+                if codec == 'raw':
+                    offset = -f.tell() % ALIGNMENT
+                    f.write(b'\0' * offset)
+                    entry['offset'] = f.tell()
+                    f.write(arr.tobytes())
+                else:
+                    entry['block'] = len(blocks)
+                    entry['offset'] = sum(e['nbytes'] for e, _ in pending)
+                    pending.append((entry, arr))
+                    if len(pending) >= block_size:
+                        flush_block(f)
+                entries.append(entry)
+            if pending:
+                flush_block(f)
+
+        os.replace(tmp_path, archive_path)
+    finally:
+        # Apotyxia sto paketarisma: na min meinei miso <archive>.tmp
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+    index = {
+        'version': ARCHIVE_VERSION,
+        'codec': codec,
+        'dtype': 'uint8',
+        'block_size': block_size if codec == 'zlib' else None,
+        'blocks': blocks,
+        'entries': entries,
+        'skipped': [source for source, _ in skipped],
+    }
+    with open(index_path_for(archive_path), 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+
+    size_mb = archive_path.stat().st_size / 1e6
+    print(f"Oloklirothike: {len(entries)} tiles, {size_mb:.1f} MB")
+    if skipped:
+        print(f"Paraleifthikan {len(skipped)} tiles pou den egine decode:")
+        for source, error in skipped:
+            print(f"   {source}: {error}")
+    return archive_path
+
+
+class TileArchive:
+    """Reader gia archives tou pack_tiles - epistrefei NumPy views xoris antigrafi."""
+
+    def __init__(self, archive_path, block_cache=4):
+        self.path = Path(archive_path)
+        with open(index_path_for(self.path), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get('version') != ARCHIVE_VERSION:
+            raise ValueError(f"Mi symvato archive version: {index.get('version')}")
+
+        self.codec = index['codec']
+        self.entries = index['entries']
+        self.blocks = index['blocks']
+        self._by_key = {e['key']: i for i, e in enumerate(self.entries)}
+        self._block_cache = OrderedDict()
+        self._block_cache_size = block_cache
+        self._mm = np.memmap(self.path, dtype=np.uint8, mode='r') if self.entries else None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self._by_key
+
+    def __getitem__(self, position):
+        return self._view(self.entries[position])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        # To mmap kleinei otan den yparxoun pleon views pano tou
+        self._mm = None
+        self._block_cache.clear()
+
+    def keys(self):
+        return [e['key'] for e in self.entries]
+
+    def station_ids(self):
+        return np.array([e['station_id'] for e in self.entries], dtype=np.int64)
+
+    def get(self, station_id, zoom=None):
+        if zoom is None:
+            matches = [e for e in self.entries if e['station_id'] == int(station_id)]
+            if len(matches) != 1:
+                raise KeyError(f"Xreiazetai zoom gia to station {station_id} ({len(matches)} tiles)")
+            return self._view(matches[0])
+        return self._view(self.entries[self._by_key[tile_key(station_id, zoom)]])
+
+    def iter_batches(self, batch_size=16):
+        # Yield (entries, array NxHxWxC); gia raw archives ta diadoxika tiles
+        # einai sto idio mmap, alla to stack kanei mia antigrafi ana batch
+        for start in range(0, len(self.entries), batch_size):
+            batch = self.entries[start:start + batch_size]
+            yield batch, np.stack([self._view(e) for e in batch])
+
+    def _view(self, entry):
+        if self.codec == 'raw':
+            start = entry['offset']
+            return self._mm[start:start + entry['nbytes']].reshape(entry['shape'])
+        block = self._load_block(entry['block'])
+        start = entry['offset']
+        return block[start:start + entry['nbytes']].reshape(entry['shape'])
+
+    def _load_block(self, block_id):
+        if block_id in self._block_cache:
+            self._block_cache.move_to_end(block_id)
+            return self._block_cache[block_id]
+        meta = self.blocks[block_id]
+        data = self._mm[meta['offset']:meta['offset'] + meta['nbytes']]
+        block = np.frombuffer(zlib.decompress(data), dtype=np.uint8)
+        self._block_cache[block_id] = block
+        if len(self._block_cache) > self._block_cache_size:
+            self._block_cache.popitem(last=False)
+        return block
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Paketarisma ton tiles se memory-mapped archive")
+    parser.add_argument('--folder', default=OUTPUT_FOLDER)
+    parser.add_argument('--archive', default=None, help="default: <folder>.tiles")
+    parser.add_argument('--codec', choices=CODECS, default='raw')
+    parser.add_argument('--block-size', type=int, default=DEFAULT_BLOCK_SIZE)
+    parser.add_argument('--split', default=None, help="fakelos labels enos split (px. dataset/train/labels)")
+    parser.add_argument('--include-invalid', action='store_true')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    station_ids = split_station_ids(args.split) if args.split else None
+    pack_tiles(args.folder, args.archive, codec=args.codec, block_size=args.block_size,
+               station_ids=station_ids, skip_invalid=not args.include_invalid, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,449 @@
+# -*- coding: utf-8 -*-
+# tile_inference
+# Anixneusi pratirion se OLA ta tiles se CPU: ta tiles erxontai se batches
+# apo to disko (decode se ThreadPool - to PIL afinei to GIL) i apo ena
+# archive tou tile_archive (ta workers diavazoun apeftheias apo to mmap,
+# xoris pickling pixels), kai o detector trexei se ProcessPool. Oi
+# anixneuseis grafontai incrementally (JSON lines, ena tile ana grammi me to
+# station_id) - ena run pou diakoptetai synexizei apo ekei pou emeine.
+#
+# Detectors (--detector):
+#   canopy                  NumPy baseline: foteina, axroma stegastra (ndimage.label)
+#   onnx:models/best.onnx   YOLOv8-style ONNX (onnxruntime, CPUExecutionProvider)
+#   mymodule:make_detector  opoiodipote callable (i class) batch -> detections
+# Kathe detector: (N, H, W, 3) uint8 -> lista N pinakon (K, 6) me
+# [class, x_center, y_center, width, height, score] kanonikopoiimena opos ta YOLO labels.
+#
+#   python scripts/cli.py infer --folder dataset/all --batch 16
+#   python scripts/cli.py infer --archive dataset/all.tiles --detector onnx:runs/best.onnx
+
+import argparse
+import importlib
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from google_maps_static_downloader import OUTPUT_FOLDER
+from pipeline_metrics import METRICS, MetricsRegistry
+from tile_archive import collect_tiles, decode_tile, tile_key
+
+# Parametroi
+BATCH_SIZE = 16
+DETECTIONS_FILENAME = 'detections.jsonl'
+SUMMARY_FILENAME = 'station_detections.csv'
+INFERENCE_DIR = Path(OUTPUT_FOLDER).parent / 'inference'
+STAGES = ('decode', 'queue', 'infer', 'write', 'batch')
+# canopy baseline
+CANOPY_POOL = 8                 # 640px -> 80x80 kelia
+CANOPY_MIN_BRIGHTNESS = 200
+CANOPY_MAX_CHROMA = 30
+CANOPY_MIN_CELLS = 6            # ~ 6 x 64 px^2 se zoom 19
+CANOPY_MAX_CELLS = 400
+# onnx
+ONNX_CONFIDENCE = 0.25
+ONNX_IOU = 0.45
+
+
+# ============= DETECTORS =============
+
+class CanopyDetector:
+    """Baseline χωρίς μοντέλο: μεγάλες φωτεινές, άχρωμες επιφάνειες (στέγαστρα αντλιών)"""
+
+    def __init__(self, pool=CANOPY_POOL, min_brightness=CANOPY_MIN_BRIGHTNESS, max_chroma=CANOPY_MAX_CHROMA,
+                 min_cells=CANOPY_MIN_CELLS, max_cells=CANOPY_MAX_CELLS):
+        self.pool = pool
+        self.min_brightness = min_brightness
+        self.max_chroma = max_chroma
+        self.min_cells = min_cells
+        self.max_cells = max_cells
+
+    def __call__(self, batch):
+        from scipy import ndimage
+
+        n, h, w, _ = batch.shape
+        p = self.pool
+        # Mesos oros ana keli p x p gia olo to batch mazi
+        cells = batch[:, :h - h % p, :w - w % p].reshape(n, h // p, p, w // p, p, 3) \
+            .sum(axis=(2, 4), dtype=np.uint32) / (p * p)
+        brightness = cells.mean(axis=3)
+        chroma = cells.max(axis=3) - cells.min(axis=3)
+        mask = (brightness >= self.min_brightness) & (chroma <= self.max_chroma)
+        # Syndesimotita mono mesa stin idia eikona (oxi ston axona tou batch)
+        structure = np.zeros((3, 3, 3), dtype=bool)
+        structure[1] = ndimage.generate_binary_structure(2, 1)
+        labels, count = ndimage.label(mask, structure=structure)
+        out = [[] for _ in range(n)]
+        if count:
+            sizes = np.bincount(labels.ravel(), minlength=count + 1)
+            for label, box in enumerate(ndimage.find_objects(labels), start=1):
+                if box is None or not self.min_cells <= sizes[label] <= self.max_cells:
+                    continue
+                image, rows, cols = box
+                bh, bw = rows.stop - rows.start, cols.stop - cols.start
+                score = sizes[label] / (bh * bw)          # posa kelia tou box einai stegastro
+                out[image.start].append([0, (cols.start + bw / 2) / (w // p), (rows.start + bh / 2) / (h // p),
+                                         bw / (w // p), bh / (h // p), score])
+        return [np.asarray(d, dtype=np.float32).reshape(-1, 6) for d in out]
+
+
+def nms(boxes, scores, iou=ONNX_IOU):
+    """Greedy NMS σε xywh (κανονικοποιημένα) -> θέσεις που κρατιούνται"""
+    x1, y1 = boxes[:, 0] - boxes[:, 2] / 2, boxes[:, 1] - boxes[:, 3] / 2
+    x2, y2 = boxes[:, 0] + boxes[:, 2] / 2, boxes[:, 1] + boxes[:, 3] / 2
+    area = boxes[:, 2] * boxes[:, 3]
+    order = np.argsort(-scores, kind='stable')
+    keep = []
+    while len(order):
+        i, rest = order[0], order[1:]
+        keep.append(i)
+        inter = (np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+                 * np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None))
+        order = rest[inter / (area[i] + area[rest] - inter + 1e-12) <= iou]
+    return np.asarray(keep, dtype=np.int64)
+
+
+class OnnxDetector:
+    """YOLOv8-style ONNX (έξοδος (N, 4 + classes, boxes), xywh σε pixels εισόδου) στον CPU"""
+
+    def __init__(self, path, confidence=ONNX_CONFIDENCE, iou=ONNX_IOU, threads=1):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        # Ena thread ana process: to parallilismo einai sto ProcessPool
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(str(path), options, providers=['CPUExecutionProvider'])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.size = tuple(d if isinstance(d, int) else 640 for d in model_input.shape[2:4])
+        self.confidence = confidence
+        self.iou = iou
+
+    def __call__(self, batch):
+        from PIL import Image
+
+        h, w = self.size
+        if batch.shape[1:3] != (h, w):
+            batch = np.stack([np.asarray(Image.fromarray(img).resize((w, h), Image.BILINEAR)) for img in batch])
+        x = np.ascontiguousarray(batch.transpose(0, 3, 1, 2), dtype=np.float32) / 255.0
+        pred = self.session.run(None, {self.input_name: x})[0]              # (N, 4 + C, B)
+        out = []
+        for p in pred:
+            p = p.T
+            scores = p[:, 4:]
+            cls = scores.argmax(axis=1)
+            conf = scores[np.arange(len(p)), cls]
+            keep = conf >= self.confidence
+            boxes = p[keep, :4] / np.array([w, h, w, h], dtype=np.float32)
+            cls, conf = cls[keep], conf[keep]
+            picked = np.concatenate([np.flatnonzero(cls == c)[nms(boxes[cls == c], conf[cls == c], self.iou)]
+                                     for c in np.unique(cls)]) if len(cls) else np.empty(0, dtype=np.int64)
+            out.append(np.column_stack([cls[picked], boxes[picked], conf[picked]]).astype(np.float32))
+        return out
+
+
+def load_detector(spec):
+    """'canopy' | 'onnx:<path>' | 'module:attr' -> callable(batch) -> λίστα (K, 6)"""
+    if spec == 'canopy':
+        return CanopyDetector()
+    if spec.startswith('onnx:'):
+        return OnnxDetector(spec[len('onnx:'):])
+    module_name, _, attr = spec.partition(':')
+    if not attr:
+        raise ValueError(f"Agnostos detector '{spec}' (canopy, onnx:<path>, module:callable)")
+    target = getattr(importlib.import_module(module_name), attr)
+    return target() if isinstance(target, type) else target
+
+
+# ============= WORKERS =============
+
+_WORKER = {}
+
+
+def _init_worker(spec, archive_path=None):
+    from tile_archive import TileArchive
+
+    _WORKER['detector'] = load_detector(spec)
+    _WORKER['archive'] = TileArchive(archive_path) if archive_path else None
+
+
+def _run_batch(payload, submitted):
+    """Ένα batch στο worker: (detections, δευτερόλεπτα ανάγνωσης archive, infer, αναμονής στην ουρά)"""
+    started = time.time()
+    kind, data = payload
+    read = 0.0
+    if kind == 'archive':
+        archive = _WORKER['archive']
+        batch = np.stack([archive[i] for i in data])
+        read = time.time() - started
+    else:
+        batch = data
+    infer_started = time.time()
+    detections = _WORKER['detector'](batch)
+    return detections, read, time.time() - infer_started, started - submitted
+
+
+class _InlinePool:
+    # workers=0: idio process (debugging / profiling tou detector)
+    def __init__(self, spec, archive_path):
+        _init_worker(spec, archive_path)
+
+    def submit(self, fn, *args):
+        from concurrent.futures import Future
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+# ============= SOURCES =============
+
+def _timed_decode(path):
+    started = time.perf_counter()
+    try:
+        return decode_tile(path), time.perf_counter() - started, ''
+    except Exception as e:
+        return None, time.perf_counter() - started, f"{type(e).__name__}: {e}"
+
+
+def disk_batches(tiles, batch_size, decode_pool, prefetch, metrics=METRICS):
+    """(meta, payload, decode_seconds) ανά batch - τα επόμενα batches γίνονται decode όσο τρέχει το infer"""
+    pending = deque()
+    starts = iter(range(0, len(tiles), batch_size))
+
+    def submit_next():
+        start = next(starts, None)
+        if start is not None:
+            chunk = tiles[start:start + batch_size]
+            pending.append((chunk, [decode_pool.submit(_timed_decode, t[2]) for t in chunk]))
+
+    for _ in range(prefetch):
+        submit_next()
+    while pending:
+        chunk, futures = pending.popleft()
+        submit_next()
+        results = [f.result() for f in futures]
+        meta, arrays, failed = [], [], []
+        for (station_id, zoom, path), (arr, seconds, error) in zip(chunk, results):
+            metrics.histogram('inference_stage_seconds', stage='decode').observe(seconds)
+            record = {'station_id': station_id, 'zoom': zoom, 'key': tile_key(station_id, zoom), 'source': path.name}
+            if arr is None:
+                failed.append({**record, 'error': error})
+            else:
+                meta.append(record)
+                arrays.append(arr)
+        # Diaforetika megethi den xoroun se ena (N, H, W, 3) - ta spame ana shape
+        by_shape = {}
+        for record, arr in zip(meta, arrays):
+            by_shape.setdefault(arr.shape, []).append((record, arr))
+        for group in by_shape.values():
+            yield [r for r, _ in group], ('array', np.stack([a for _, a in group])), []
+        if failed:
+            yield failed, None, failed
+
+
+def archive_batches(archive, positions, batch_size):
+    for start in range(0, len(positions), batch_size):
+        chunk = positions[start:start + batch_size]
+        meta = [{'station_id': archive.entries[i]['station_id'], 'zoom': archive.entries[i]['zoom'],
+                 'key': archive.entries[i]['key'], 'source': archive.entries[i].get('source', '')} for i in chunk]
+        yield meta, ('archive', chunk), []
+
+
+# ============= RUNNER =============
+
+def load_done(path):
+    """Τα tile keys που έχουν ήδη γραφτεί (για συνέχιση)"""
+    done = set()
+    if Path(path).exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)['key'])
+                except (ValueError, KeyError):
+                    continue                      # miso grammeni teleutaia grammi
+    return done
+
+
+def run_inference(folder=None, archive_path=None, detector='canopy', out_dir=INFERENCE_DIR, batch_size=BATCH_SIZE,
+                  workers=None, decode_threads=None, station_ids=None, resume=True, limit=None):
+    """Όλα τα tiles -> detections.jsonl (incremental) + station_detections.csv, επιστρέφει report"""
+    from tile_archive import TileArchive
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_path = out_dir / DETECTIONS_FILENAME
+    done = load_done(out_path) if resume else set()
+    if not resume and out_path.exists():
+        out_path.unlink()
+
+    archive = None
+    if archive_path:
+        archive = TileArchive(archive_path)
+        todo = [i for i, e in enumerate(archive.entries) if e['key'] not in done
+                and (station_ids is None or e['station_id'] in station_ids)]
+    else:
+        todo = [t for t in collect_tiles(folder or OUTPUT_FOLDER, station_ids)
+                if tile_key(t[0], t[1]) not in done]
+    todo = todo[:limit] if limit else todo
+    total = len(todo)
+    print(f"Tiles: {total} gia anixneusi ({len(done)} idi etoima) - detector {detector}")
+
+    workers = os.cpu_count() if workers is None else workers
+    pool = (ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                initargs=(detector, str(archive_path) if archive_path else None))
+            if workers > 0 else _InlinePool(detector, str(archive_path) if archive_path else None))
+    decode_pool = ThreadPoolExecutor(max_workers=decode_threads) if archive is None else None
+    max_inflight = max(2, 2 * workers)
+    # Xexoristo registry ana run: to report den anakatevei latencies proigoumenon runs
+    metrics = MetricsRegistry()
+    processed = errors = found = 0
+    next_progress = batch_size * 50
+    pending = deque()
+    started = time.perf_counter()
+
+    def write(f, meta, future, batch_started):
+        nonlocal processed, found
+        detections, read, infer, queued = future.result()
+        write_started = time.perf_counter()
+        for record, dets in zip(meta, detections):
+            dets = np.asarray(dets, dtype=np.float32).reshape(-1, 6)
+            found += len(dets)
+            f.write(json.dumps({**record, 'count': len(dets),
+                                'detections': np.round(dets, 5).tolist()}, ensure_ascii=False) + '\n')
+        f.flush()
+        processed += len(meta)
+        metrics.counter('inference_tiles_total', status='ok').inc(len(meta))
+        if read:
+            metrics.histogram('inference_stage_seconds', stage='decode').observe(read)
+        metrics.histogram('inference_stage_seconds', stage='queue').observe(queued)
+        metrics.histogram('inference_stage_seconds', stage='infer').observe(infer)
+        metrics.histogram('inference_stage_seconds', stage='write').observe(time.perf_counter() - write_started)
+        metrics.histogram('inference_stage_seconds', stage='batch').observe(time.perf_counter() - batch_started)
+
+    try:
+        batches = (archive_batches(archive, todo, batch_size) if archive is not None
+                   else disk_batches(todo, batch_size, decode_pool, max_inflight, metrics))
+        with open(out_path, 'a', encoding='utf-8') as f:
+            for meta, payload, failed in batches:
+                batch_started = time.perf_counter()
+                if failed:
+                    # Spasmena tiles: grammi me error, oste to resume na min ta xanadokimazei
+                    for record in failed:
+                        f.write(json.dumps({**record, 'count': 0, 'detections': []}, ensure_ascii=False) + '\n')
+                    errors += len(failed)
+                    metrics.counter('inference_tiles_total', status='error').inc(len(failed))
+                    continue
+                pending.append((meta, pool.submit(_run_batch, payload, time.time()), batch_started))
+                # Ta apotelesmata grafontai me ti seira ypovolis
+                while len(pending) >= max_inflight or (pending and pending[0][1].done()):
+                    write(f, *pending.popleft())
+                if processed >= next_progress:
+                    next_progress += batch_size * 50
+                    print(f"   {processed}/{total} tiles ({processed / (time.perf_counter() - started):.1f} img/s)")
+            while pending:
+                write(f, *pending.popleft())
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        if decode_pool is not None:
+            decode_pool.shutdown(wait=True)
+        if archive is not None:
+            archive.close()
+
+    wall = time.perf_counter() - started
+    summary = station_summary(out_path)
+    summary.to_csv(out_dir / SUMMARY_FILENAME, index=False)
+    report = {
+        'tiles': processed,
+        'errors': errors,
+        'detections': found,
+        'seconds': wall,
+        'images_per_second': processed / wall if wall > 0 else 0.0,
+        'workers': workers,
+        'batch_size': batch_size,
+        'stages': stage_latency(metrics),
+        'stations_with_detections': int((summary['detections'] > 0).sum()) if len(summary) else 0,
+    }
+    metrics.export_jsonl(out_dir / 'inference_metrics.jsonl')
+    return report
+
+
+def station_summary(path):
+    """Ανά station_id: tiles, detections, max score (από όλο το detections.jsonl)"""
+    rows = []
+    if Path(path).exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                scores = [d[5] for d in record['detections']]
+                rows.append({'station_id': record['station_id'], 'key': record['key'], 'count': record['count'],
+                             'max_score': max(scores) if scores else np.nan, 'error': bool(record.get('error'))})
+    df = pd.DataFrame(rows, columns=['station_id', 'key', 'count', 'max_score', 'error'])
+    df = df.drop_duplicates('key', keep='last')
+    return (df.groupby('station_id', sort=True)
+            .agg(tiles=('key', 'size'), detections=('count', 'sum'), max_score=('max_score', 'max'),
+                 errors=('error', 'sum'))
+            .reset_index())
+
+
+def stage_latency(metrics=METRICS):
+    rows = {}
+    for stage in STAGES:
+        hist = metrics.histogram('inference_stage_seconds', stage=stage)
+        if hist.count:
+            snap = hist.snapshot()
+            rows[stage] = {'count': snap['count'], 'mean_ms': snap['mean'] * 1e3, 'p50_ms': snap['p50'] * 1e3,
+                           'p95_ms': snap['p95'] * 1e3}
+    return rows
+
+
+def format_report(report):
+    lines = [f"{report['tiles']} tiles se {report['seconds']:.1f}s -> {report['images_per_second']:.1f} img/s "
+             f"(workers {report['workers']}, batch {report['batch_size']}, sfalmata {report['errors']})",
+             f"Anixneuseis: {report['detections']} se afto to run, pratiria me anixneusi (synolika): "
+             f"{report['stations_with_detections']}",
+             f"{'Stage':<8} {'count':>7} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}"]
+    for stage, s in report['stages'].items():
+        lines.append(f"{stage:<8} {s['count']:>7} {s['mean_ms']:>9.2f} {s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f}")
+    lines.append("(decode ana tile, ta ypoloipa ana batch)")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batched anixneusi pratirion se ola ta tiles (CPU)")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--folder', default=None, help=f"fakelos tiles (default: {OUTPUT_FOLDER})")
+    source.add_argument('--archive', default=None, help="archive tou 'pack' (workers diavazoun apo to mmap)")
+    parser.add_argument('--detector', default='canopy', help="canopy | onnx:<path> | module:callable")
+    parser.add_argument('--out', default=str(INFERENCE_DIR))
+    parser.add_argument('--batch', type=int, default=BATCH_SIZE)
+    parser.add_argument('--workers', type=int, default=None, help="processes gia ton detector (0 = idio process)")
+    parser.add_argument('--decode-threads', type=int, default=None)
+    parser.add_argument('--only-ids', default=None, help="arxeio me gasStationID (ena ana grammi)")
+    parser.add_argument('--limit', type=int, default=None)
+    parser.add_argument('--restart', action='store_true', help="sviinei to detections.jsonl kai xekinaei apo tin arxi")
+    args = parser.parse_args(argv)
+
+    station_ids = None
+    if args.only_ids:
+        from station_diff import load_id_list
+        station_ids = load_id_list(args.only_ids)
+    report = run_inference(args.folder, args.archive, args.detector, args.out, args.batch, args.workers,
+                           args.decode_threads, station_ids, resume=not args.restart, limit=args.limit)
+    print(format_report(report))
+    print(f"Detections: {Path(args.out) / DETECTIONS_FILENAME}, ana pratirio: {Path(args.out) / SUMMARY_FILENAME}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# transcode_tiles
+# Metatropi ton katevasmenon tiles (dataset/all, png/jpg/webp) se lossless WebP
+# i JPEG me rythmizomeni poiotita, parallila se ProcessPool. Ta originals
+# menoun opos einai - ta nea arxeia grafontai
+# se allo fakelo me to idio onoma kai alli katalixi, kai to transcode_report.csv
+# kratai bytes prin/meta ana tile.
+#
+#   python scripts/cli.py transcode --to webp --out dataset/all_webp
+#   python scripts/cli.py transcode --to jpg --quality 85 --out dataset/all_jpg
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+import pandas as pd
+
+from google_maps_static_downloader import OUTPUT_FOLDER, list_tile_files, parse_tile_filename
+
+# Parametroi
+TARGETS = {'webp': 'webp', 'jpg': 'jpg'}
+JPEG_QUALITY = 90
+WEBP_METHOD = 2                 # 0 (grigoro) - 6 (mikrotero arxeio), meta to 2 ~idio megethos
+REPORT_FILENAME = 'transcode_report.csv'
+
+
+def transcode_tile(path, out_dir, target='webp', quality=JPEG_QUALITY, method=WEBP_METHOD):
+    """Ένα tile -> target (lossless WebP ή JPEG quality) -> εγγραφή με bytes πριν/μετά"""
+    from PIL import Image
+
+    path = Path(path)
+    out_path = Path(out_dir) / f"{path.stem}.{TARGETS[target]}"
+    record = {'filename': path.name, 'output': out_path.name, 'src_bytes': path.stat().st_size,
+              'dst_bytes': None, 'seconds': None, 'status': 'ok', 'reason': ''}
+    started = time.perf_counter()
+    try:
+        with Image.open(path) as img:
+            img = img.convert('RGB')
+            tmp_path = out_path.with_name(out_path.name + '.tmp')
+            if target == 'webp':
+                img.save(tmp_path, format='WEBP', lossless=True, method=method)
+            else:
+                img.save(tmp_path, format='JPEG', quality=quality, optimize=True)
+        os.replace(tmp_path, out_path)
+        record['dst_bytes'] = out_path.stat().st_size
+    except Exception as e:
+        record.update(status='error', reason=f"{type(e).__name__}: {e}")
+    record['seconds'] = time.perf_counter() - started
+    return record
+
+
+def transcode_dataset(folder=OUTPUT_FOLDER, out_dir=None, target='webp', quality=JPEG_QUALITY, workers=None,
+                      force=False):
+    folder = Path(folder)
+    out_dir = Path(out_dir) if out_dir else folder.parent / f"{folder.name}_{target}"
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    to_convert, skipped = [], 0
+    for path in list_tile_files(folder):
+        # Tiles pou einai idi sto target format (px. --format jpg -> --to jpg) den xanasympiezontai
+        if parse_tile_filename(path.name) is None or path.suffix[1:].lower() == TARGETS[target]:
+            continue
+        out_path = out_dir / f"{path.stem}.{TARGETS[target]}"
+        # Idi metatrepmeno kai neotero apo to original -> den xanaginetai
+        if not force and out_path.exists() and out_path.stat().st_mtime_ns >= path.stat().st_mtime_ns:
+            skipped += 1
+            continue
+        to_convert.append(str(path))
+    print(f"Tiles: {len(to_convert) + skipped} (gia metatropi: {len(to_convert)}, idi etoima: {skipped})")
+
+    records = []
+    started = time.perf_counter()
+    if to_convert:
+        job = partial(transcode_tile, out_dir=out_dir, target=target, quality=quality)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            records = list(pool.map(job, to_convert, chunksize=16))
+    wall = time.perf_counter() - started
+
+    report = pd.DataFrame(records, columns=['filename', 'output', 'src_bytes', 'dst_bytes', 'seconds',
+                                            'status', 'reason'])
+    if len(report):
+        report_path = out_dir / REPORT_FILENAME
+        report.to_csv(report_path, index=False)
+        ok = report[report['status'] == 'ok']
+        src, dst = ok['src_bytes'].sum(), ok['dst_bytes'].sum()
+        print(f"{target}{'' if target == 'webp' else f' q={quality}'}: {src / 1e6:.1f} MB -> {dst / 1e6:.1f} MB "
+              f"(x{src / max(dst, 1):.2f}, -{(1 - dst / max(src, 1)) * 100:.1f}%)")
+        print(f"Xronos: {wall:.1f}s ({len(report) / max(wall, 1e-9):.1f} tiles/s), sfalmata: {len(report) - len(ok)}")
+        print(f"Report: {report_path}")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallili metatropi ton tiles (PNG/JPEG/WebP) se lossless WebP i JPEG")
+    parser.add_argument('--folder', default=OUTPUT_FOLDER)
+    parser.add_argument('--out', default=None, help="fakelos exodou (default: <folder>_<to>)")
+    parser.add_argument('--to', dest='target', choices=list(TARGETS), default='webp')
+    parser.add_argument('--quality', type=int, default=JPEG_QUALITY, help="mono gia --to jpg")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--force', action='store_true', help="xanametatropi kai ton etoimon")
+    args = parser.parse_args(argv)
+    transcode_dataset(args.folder, args.out, args.target, args.quality, args.workers, args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+# validate_images
+# Parallilos elegxos ton eikonon tou dataset/all: header (PNG/JPEG/WebP), perceptual hash
+# kai anixneusi omoiomorfon / placeholder tiles ("Sorry, we have no imagery here").
+
+import argparse
+import json
+import os
+import shutil
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+from google_maps_static_downloader import (JPEG_SIGNATURE, OUTPUT_FOLDER, PNG_SIGNATURE, list_tile_files,
+                                           parse_tile_filename)
+
+# Parametroi
+INDEX_FILENAME = '.validation_index.json'
+REPORT_FILENAME = 'validation_report.csv'
+INDEX_VERSION = 1
+THUMB_SIZE = 64
+UNIFORM_STD = 4.0          # max typiki apoklisi (ana kanali) gia omoiomorfi eikona
+PLACEHOLDER_FRACTION = 0.85  # pososto pixel me to idio (kvantismeno) xroma
+DUPLICATE_HASH_MIN = 5     # idio dhash se toso polla pratiria = placeholder
+PNG_IEND = b'\x00\x00\x00\x00IEND\xaeB`\x82'
+JPEG_EOI = b'\xff\xd9'
+
+RECORD_COLUMNS = ['filename', 'size', 'mtime_ns', 'width', 'height', 'bit_depth',
+                  'color_type', 'dhash', 'color_std', 'dominant_fraction', 'status', 'reason']
+BAD_STATUSES = {'bad_header', 'truncated', 'wrong_size', 'decode_error',
+                'uniform', 'placeholder', 'duplicate_hash'}
+
+
+def read_png_header(path):
+    # Diavazei mono to IHDR kai to telos tou arxeiou (xoris decode)
+    with open(path, 'rb') as f:
+        head = f.read(33)
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(size - len(PNG_IEND), 0))
+        tail = f.read()
+
+    if len(head) < 33 or not head.startswith(PNG_SIGNATURE) or head[12:16] != b'IHDR':
+        return None
+    width, height, bit_depth, color_type = struct.unpack('>IIBB', head[16:26])
+    return {
+        'width': width,
+        'height': height,
+        'bit_depth': bit_depth,
+        'color_type': color_type,
+        'truncated': tail != PNG_IEND,
+    }
+
+
+def read_image_header(path):
+    # PNG: IHDR xoris decode. JPEG / WebP (--format jpg, transcode): signature, telos arxeiou
+    # kai diastaseis apo to PIL (diavazei mono to header)
+    with open(path, 'rb') as f:
+        head = f.read(12)
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(size - len(JPEG_EOI), 0))
+        tail = f.read()
+
+    if head.startswith(PNG_SIGNATURE):
+        return read_png_header(path)
+    if head.startswith(JPEG_SIGNATURE):
+        truncated = tail != JPEG_EOI
+    elif head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        truncated = struct.unpack('<I', head[4:8])[0] + 8 > size
+    else:
+        return None
+    try:
+        with Image.open(path) as img:
+            width, height = img.size
+    except Exception:
+        return None
+    return {'width': width, 'height': height, 'bit_depth': 8, 'color_type': None, 'truncated': truncated}
+
+
+def dhash(gray_image):
+    # 64-bit difference hash se hex
+    pixels = np.asarray(gray_image.resize((9, 8), Image.BILINEAR), dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    return f"{int(np.packbits(bits).view('>u8')[0]):016x}"
+
+
+def scan_tile(path):
+    # Ektelite se worker process - epistrefei ena record gia to index
+    path = Path(path)
+    stat = path.stat()
+    record = dict.fromkeys(RECORD_COLUMNS)
+    record.update(filename=path.name, size=stat.st_size, mtime_ns=stat.st_mtime_ns,
+                  status='ok', reason='')
+
+    header = read_image_header(path)
+    if header is None:
+        record.update(status='bad_header', reason='den einai egkyri eikona (PNG/JPEG/WebP)')
+        return record
+    record.update({k: header[k] for k in ('width', 'height', 'bit_depth', 'color_type')})
+    if header['truncated']:
+        record.update(status='truncated', reason='leipei to telos tis eikonas (IEND / EOI / RIFF)')
+        return record
+
+    parsed = parse_tile_filename(path.name)
+    if parsed and (header['width'], header['height']) != (parsed[2], parsed[3]):
+        record.update(status='wrong_size',
+                      reason=f"{header['width']}x{header['height']} anti gia {parsed[2]}x{parsed[3]}")
+        return record
+
+    try:
+        with Image.open(path) as img:
+            thumb = img.convert('RGB').resize((THUMB_SIZE, THUMB_SIZE), Image.BOX)
+    except Exception as e:
+        record.update(status='decode_error', reason=str(e))
+        return record
+
+    arr = np.asarray(thumb)
+    color_std = float(arr.reshape(-1, 3).std(axis=0).max())
+    quantized = (arr >> 3).astype(np.uint32)
+    packed = (quantized[..., 0] << 10) | (quantized[..., 1] << 5) | quantized[..., 2]
+    dominant_fraction = float(np.bincount(packed.ravel()).max() / packed.size)
+
+    record.update(dhash=dhash(thumb.convert('L')),
+                  color_std=round(color_std, 3),
+                  dominant_fraction=round(dominant_fraction, 4))
+    if color_std < UNIFORM_STD:
+        record.update(status='uniform', reason=f'std={color_std:.2f}')
+    elif dominant_fraction >= PLACEHOLDER_FRACTION:
+        record.update(status='placeholder', reason=f'dominant={dominant_fraction:.2f}')
+    return record
+
+
+def load_index(index_path):
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get('version') == INDEX_VERSION:
+            return index['files']
+    except (OSError, ValueError, KeyError):
+        pass
+    return {}
+
+
+def save_index(index_path, files):
+    tmp_path = Path(f"{index_path}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': INDEX_VERSION, 'files': files}, f, ensure_ascii=False)
+    os.replace(tmp_path, index_path)
+
+
+def mark_duplicate_hashes(records, min_count=DUPLICATE_HASH_MIN):
+    # Idio dhash se polla diaforetika pratiria -> Google placeholder
+    counts = {}
+    for rec in records:
+        if rec['status'] == 'ok' and rec['dhash']:
+            counts[rec['dhash']] = counts.get(rec['dhash'], 0) + 1
+    for rec in records:
+        if rec['status'] == 'ok' and counts.get(rec['dhash'], 0) >= min_count:
+            rec['status'] = 'duplicate_hash'
+            rec['reason'] = f"dhash se {counts[rec['dhash']]} eikones"
+    return records
+
+
+def validate_dataset(folder=OUTPUT_FOLDER, workers=None, index_path=None, quarantine_folder=None):
+    folder = Path(folder)
+    index_path = Path(index_path) if index_path else folder / INDEX_FILENAME
+    cached = load_index(index_path)
+
+    files = {}
+    to_scan = []
+    for path in list_tile_files(folder):
+        stat = path.stat()
+        entry = cached.get(path.name)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            files[path.name] = entry
+        else:
+            to_scan.append(str(path))
+
+    print(f"Eikones: {len(files) + len(to_scan)} (apo index: {len(files)}, gia elegxo: {len(to_scan)})")
+
+    if to_scan:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for rec in pool.map(scan_tile, to_scan, chunksize=16):
+                files[rec['filename']] = rec
+        save_index(index_path, files)
+
+    # To duplicate_hash exartatai apo oles tis eikones, opote den apothikeuetai sto index
+    records = mark_duplicate_hashes([dict(rec) for rec in files.values()])
+    report = pd.DataFrame(records, columns=RECORD_COLUMNS)
+
+    bad = report[report['status'].isin(BAD_STATUSES)]
+    if quarantine_folder is not None and len(bad):
+        quarantine = Path(quarantine_folder)
+        quarantine.mkdir(parents=True, exist_ok=True)
+        for name in bad['filename']:
+            shutil.move(str(folder / name), str(quarantine / name))
+        print(f"Metakinithikan {len(bad)} eikones sto {quarantine}")
+
+    report_path = folder / REPORT_FILENAME
+    report.assign(checked_at=datetime.now().isoformat()).to_csv(report_path, index=False)
+
+    print(f"Egkyres: {len(report) - len(bad)}, provlimatikes: {len(bad)}")
+    if len(bad):
+        print(bad['status'].value_counts().to_string())
+    print(f"Report: {report_path}")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallilos elegxos ton tiles tou dataset (PNG/JPEG/WebP)")
+    parser.add_argument('--folder', default=OUTPUT_FOLDER)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--quarantine', default=None, help="fakelos gia tis provlimatikes eikones")
+    args = parser.parse_args(argv)
+    validate_dataset(args.folder, workers=args.workers, quarantine_folder=args.quarantine)
+
+
+if __name__ == "__main__":
+    main()